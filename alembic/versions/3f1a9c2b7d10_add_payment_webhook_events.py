@@ -0,0 +1,46 @@
+"""add payment_webhook_events queue
+
+Revision ID: 3f1a9c2b7d10
+Revises: 
+Create Date: 2026-10-19 09:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1a9c2b7d10'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'payment_webhook_events',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('payload', sa.Text(), nullable=False),
+        sa.Column('received_at', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+        sa.Column('processed_at', sa.TIMESTAMP(), nullable=True),
+        sa.Column('outcome', sa.String(length=20), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        schema='voice_bot'
+    )
+    op.create_index(
+        'ix_payment_webhook_events_pending',
+        'payment_webhook_events',
+        ['id'],
+        unique=False,
+        schema='voice_bot',
+        postgresql_where=sa.text('processed_at IS NULL')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_payment_webhook_events_pending', table_name='payment_webhook_events', schema='voice_bot')
+    op.drop_table('payment_webhook_events', schema='voice_bot')
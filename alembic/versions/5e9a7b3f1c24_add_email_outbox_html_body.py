@@ -0,0 +1,28 @@
+"""add email_outbox.html_body
+
+Revision ID: 5e9a7b3f1c24
+Revises: c71d0f93e2b8
+Create Date: 2026-10-19 12:51:08.774310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e9a7b3f1c24'
+down_revision: Union[str, None] = 'c71d0f93e2b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('email_outbox', sa.Column('html_body', sa.Text(), nullable=True), schema='voice_bot')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('email_outbox', 'html_body', schema='voice_bot')
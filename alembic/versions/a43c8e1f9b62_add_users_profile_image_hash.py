@@ -0,0 +1,28 @@
+"""add users.profile_image_hash
+
+Revision ID: a43c8e1f9b62
+Revises: 5e9a7b3f1c24
+Create Date: 2026-10-19 13:02:41.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a43c8e1f9b62'
+down_revision: Union[str, None] = '5e9a7b3f1c24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('profile_image_hash', sa.String(length=64), nullable=True), schema='voice_bot')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'profile_image_hash', schema='voice_bot')
@@ -0,0 +1,70 @@
+"""add archive_chunks.owner, chunk archived qna per user
+
+Chunks of an archive with an owner column (QnA's user_id) hold one owner's rows
+and carry the owner, so reading one user's archived history only decodes that
+user's chunks. QnA chunks written before are split per user here; downgrade keeps
+them split, which older code reads the same way.
+
+Revision ID: a9e4c2d8b513
+Revises: f3b8d2a61c47
+Create Date: 2026-10-19 17:20:11.518402
+
+"""
+import json
+import zlib
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9e4c2d8b513'
+down_revision: Union[str, None] = 'f3b8d2a61c47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+QNA_SOURCE = 'voice_bot.qna'
+COMPRESSION_LEVEL = 6
+
+
+def split_qna_chunks(connection) -> None:
+    """Rewrite every QnA chunk without an owner as one chunk per user_id."""
+    chunks = connection.execute(sa.text(
+        "SELECT id, payload, archived_at FROM voice_bot_archive.archive_chunks "
+        "WHERE source = :source AND owner IS NULL ORDER BY id"
+    ), {"source": QNA_SOURCE}).all()
+    for chunk in chunks:
+        data = json.loads(zlib.decompress(chunk.payload))
+        groups = {}
+        for index, user_id in enumerate(data.get('user_id', [])):
+            groups.setdefault(user_id, []).append(index)
+        for user_id, indexes in groups.items():
+            part = {name: [values[index] for index in indexes] for name, values in data.items()}
+            keys = [datetime.fromisoformat(value) for value in part['created_at']]
+            connection.execute(sa.text(
+                "INSERT INTO voice_bot_archive.archive_chunks "
+                "(source, min_key, max_key, row_count, owner, payload, archived_at) "
+                "VALUES (:source, :min_key, :max_key, :row_count, :owner, :payload, :archived_at)"
+            ), {"source": QNA_SOURCE, "min_key": min(keys), "max_key": max(keys), "row_count": len(indexes),
+                "owner": user_id, "archived_at": chunk.archived_at,
+                "payload": zlib.compress(json.dumps(part, separators=(",", ":")).encode("utf-8"),
+                                         COMPRESSION_LEVEL)})
+        connection.execute(sa.text("DELETE FROM voice_bot_archive.archive_chunks WHERE id = :id"),
+                           {"id": chunk.id})
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('archive_chunks', sa.Column('owner', sa.BigInteger(), nullable=True),
+                  schema='voice_bot_archive')
+    op.create_index('ix_archive_chunks_source_owner', 'archive_chunks', ['source', 'owner', 'min_key'],
+                    unique=False, schema='voice_bot_archive')
+    split_qna_chunks(op.get_bind())
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_archive_chunks_source_owner', table_name='archive_chunks', schema='voice_bot_archive')
+    op.drop_column('archive_chunks', 'owner', schema='voice_bot_archive')
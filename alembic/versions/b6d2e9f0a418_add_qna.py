@@ -0,0 +1,43 @@
+"""add qna
+
+Revision ID: b6d2e9f0a418
+Revises: f3a7d09c5e41
+Create Date: 2026-10-19 17:02:48.116095
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6d2e9f0a418'
+down_revision: Union[str, None] = 'f3a7d09c5e41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'qna',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('session_id', sa.BigInteger(), nullable=True),
+        sa.Column('question_asked', sa.Text(), nullable=False),
+        sa.Column('answer_given', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+        sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        schema='voice_bot'
+    )
+    op.create_index('ix_qna_user_id_id', 'qna', ['user_id', 'id'], unique=False, schema='voice_bot')
+    op.create_index('ix_qna_session_id_id', 'qna', ['session_id', 'id'], unique=False, schema='voice_bot')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_qna_session_id_id', table_name='qna', schema='voice_bot')
+    op.drop_index('ix_qna_user_id_id', table_name='qna', schema='voice_bot')
+    op.drop_table('qna', schema='voice_bot')
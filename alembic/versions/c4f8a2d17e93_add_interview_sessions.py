@@ -0,0 +1,43 @@
+"""add interview_sessions
+
+Revision ID: c4f8a2d17e93
+Revises: b6d2e9f0a418
+Create Date: 2026-10-19 17:48:12.630471
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4f8a2d17e93'
+down_revision: Union[str, None] = 'b6d2e9f0a418'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'interview_sessions',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('job_title', sa.String(length=255), nullable=True),
+        sa.Column('job_description', sa.Text(), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('question_count', sa.Integer(), nullable=False),
+        sa.Column('started_at', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+        sa.Column('ended_at', sa.TIMESTAMP(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        schema='voice_bot'
+    )
+    op.create_index('ix_interview_sessions_user_id_id', 'interview_sessions', ['user_id', 'id'], unique=False,
+                    schema='voice_bot')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_interview_sessions_user_id_id', table_name='interview_sessions', schema='voice_bot')
+    op.drop_table('interview_sessions', schema='voice_bot')
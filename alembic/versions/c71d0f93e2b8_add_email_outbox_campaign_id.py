@@ -0,0 +1,30 @@
+"""add email_outbox.campaign_id
+
+Revision ID: c71d0f93e2b8
+Revises: 8b4e21d6c3a5
+Create Date: 2026-10-19 11:26:50.104733
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c71d0f93e2b8'
+down_revision: Union[str, None] = '8b4e21d6c3a5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('email_outbox', sa.Column('campaign_id', sa.String(length=36), nullable=True), schema='voice_bot')
+    op.create_index(op.f('ix_voice_bot_email_outbox_campaign_id'), 'email_outbox', ['campaign_id'], unique=False, schema='voice_bot')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_voice_bot_email_outbox_campaign_id'), table_name='email_outbox', schema='voice_bot')
+    op.drop_column('email_outbox', 'campaign_id', schema='voice_bot')
@@ -0,0 +1,46 @@
+"""add payment and feedback indexes
+
+Revision ID: d52b7e8a4f16
+Revises: a43c8e1f9b62
+Create Date: 2026-10-19 14:21:07.530119
+
+The indexes are built with CREATE INDEX CONCURRENTLY so the migration can run
+against a live database without blocking writes to payments or feedback.
+CONCURRENTLY cannot run inside a transaction, hence the autocommit block.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd52b7e8a4f16'
+down_revision: Union[str, None] = 'a43c8e1f9b62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (index name, table, columns, schema)
+INDEXES = [
+    ('ix_payments_user_id_created_at', 'payments', ['user_id', 'created_at'], 'voice_bot'),
+    ('ix_payments_subscription_end', 'payments', ['subscription_end'], 'voice_bot'),
+    ('ix_payments_link_status_id', 'payments', ['link_status', 'id'], 'voice_bot'),
+    ('ix_feedback_user_id', 'feedback', ['user_id'], None),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, columns, schema in INDEXES:
+            # A failed concurrent build leaves an INVALID index behind; start a rerun from scratch
+            op.drop_index(name, table_name=table, schema=schema, postgresql_concurrently=True, if_exists=True)
+            op.create_index(name, table, columns, unique=False, schema=schema, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _, schema in reversed(INDEXES):
+            op.drop_index(name, table_name=table, schema=schema, postgresql_concurrently=True, if_exists=True)
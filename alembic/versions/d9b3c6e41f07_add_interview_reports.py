@@ -0,0 +1,63 @@
+"""add interview_reports and interview_report_aggregates
+
+Revision ID: d9b3c6e41f07
+Revises: c4f8a2d17e93
+Create Date: 2026-10-19 18:31:55.207813
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9b3c6e41f07'
+down_revision: Union[str, None] = 'c4f8a2d17e93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'interview_reports',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('user_email', sa.String(length=255), nullable=False),
+        sa.Column('session_id', sa.BigInteger(), nullable=True),
+        sa.Column('job_title', sa.String(length=255), nullable=True),
+        sa.Column('job_description', sa.Text(), nullable=True),
+        sa.Column('total_questions', sa.Integer(), nullable=False),
+        sa.Column('total_score', sa.Float(), nullable=False),
+        sa.Column('max_possible_score', sa.Float(), nullable=False),
+        sa.Column('areas_for_improvement', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        schema='voice_bot'
+    )
+    op.create_index('ix_interview_reports_user_email_id', 'interview_reports', ['user_email', 'id'], unique=False,
+                    schema='voice_bot')
+    op.create_table(
+        'interview_report_aggregates',
+        sa.Column('user_email', sa.String(length=255), nullable=False),
+        sa.Column('total_reports', sa.Integer(), nullable=False),
+        sa.Column('total_questions', sa.Integer(), nullable=False),
+        sa.Column('total_score', sa.Float(), nullable=False),
+        sa.Column('max_possible_score', sa.Float(), nullable=False),
+        sa.Column('score_buckets', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('improvement_areas', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('last_report_id', sa.BigInteger(), nullable=True),
+        sa.Column('last_job_title', sa.String(length=255), nullable=True),
+        sa.Column('last_job_description', sa.Text(), nullable=True),
+        sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+        sa.PrimaryKeyConstraint('user_email'),
+        schema='voice_bot'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('interview_report_aggregates', schema='voice_bot')
+    op.drop_index('ix_interview_reports_user_email_id', table_name='interview_reports', schema='voice_bot')
+    op.drop_table('interview_reports', schema='voice_bot')
@@ -0,0 +1,40 @@
+"""add interview_questions
+
+Revision ID: e5a1c7b93d20
+Revises: d9b3c6e41f07
+Create Date: 2026-10-19 13:44:14.534111
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a1c7b93d20'
+down_revision: Union[str, None] = 'd9b3c6e41f07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'interview_questions',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('question', sa.Text(), nullable=False),
+        sa.Column('role', sa.String(length=255), nullable=True),
+        sa.Column('skills', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('difficulty', sa.String(length=20), nullable=True),
+        sa.Column('embedding', sa.LargeBinary(), nullable=False),
+        sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        schema='voice_bot'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('interview_questions', schema='voice_bot')
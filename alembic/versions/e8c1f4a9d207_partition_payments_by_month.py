@@ -0,0 +1,182 @@
+"""partition payments by month on created_at
+
+Revision ID: e8c1f4a9d207
+Revises: d52b7e8a4f16
+Create Date: 2026-10-19 15:04:52.412730
+
+Rebuilds voice_bot.payments as a table range-partitioned on created_at with one
+partition per month, from the oldest payment through PREMAKE_MONTHS ahead; the
+app's maintenance worker creates later months (src/database/partitions.py). A
+DEFAULT partition takes any row no monthly partition covers, so inserts never fail
+when maintenance falls behind.
+
+Partitioned tables need the partition key in every unique constraint, so the
+primary key becomes (id, created_at) and the cf_link_id/transaction_id unique
+constraints become (cf_link_id, created_at)/(transaction_id, created_at). Ids keep
+coming from the existing payments_id_seq.
+
+Those constraints alone no longer make cf_link_id or transaction_id unique, so
+global uniqueness is kept with an unpartitioned key table, voice_bot.payment_keys,
+written by a trigger on payments in the same transaction as the insert or update:
+a second payment with a taken cf_link_id or transaction_id fails on the key
+table's primary key. Keys are not released when a payment is deleted, so ids of
+archived payments stay taken too.
+
+Rows are copied while the old table is locked against writes; payments is small
+enough today for that to take seconds. Downgrade copies the rows of the attached
+partitions back into a plain table (archived partitions are left where they are).
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8c1f4a9d207'
+down_revision: Union[str, None] = 'd52b7e8a4f16'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PREMAKE_MONTHS = 3
+
+COLUMNS = ('id, user_id, cf_link_id, transaction_id, link_id, link_url, amount, currency, status, '
+           'link_status, created_at, updated_at, plan_type, subscription_end')
+
+
+def _columns():
+    return [
+        sa.Column('id', sa.Integer(), server_default=sa.text("nextval('voice_bot.payments_id_seq'::regclass)"),
+                  nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('cf_link_id', sa.String(length=50), nullable=True),
+        sa.Column('transaction_id', sa.String(length=100), nullable=True),
+        sa.Column('link_id', sa.String(length=50), nullable=True),
+        sa.Column('link_url', sa.Text(), nullable=True),
+        sa.Column('amount', sa.Numeric(precision=10, scale=2), nullable=False),
+        sa.Column('currency', sa.String(length=10), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=True),
+        sa.Column('link_status', sa.String(length=20), nullable=True),
+        sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+        sa.Column('updated_at', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+        sa.Column('plan_type', sa.String(), nullable=True),
+        sa.Column('subscription_end', sa.DateTime(timezone=True), nullable=True),
+    ]
+
+
+def _add_month(month: date, months: int = 1) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _create_indexes():
+    op.create_index('ix_payments_user_id_created_at', 'payments', ['user_id', 'created_at'], schema='voice_bot')
+    op.create_index('ix_payments_subscription_end', 'payments', ['subscription_end'], schema='voice_bot')
+    op.create_index('ix_payments_link_status_id', 'payments', ['link_status', 'id'], schema='voice_bot')
+
+
+CLAIM_KEYS_FUNCTION = """
+CREATE FUNCTION voice_bot.payments_claim_keys() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' THEN
+        DELETE FROM voice_bot.payment_keys
+        WHERE (kind = 'cf_link_id' AND value = OLD.cf_link_id AND OLD.cf_link_id IS DISTINCT FROM NEW.cf_link_id)
+           OR (kind = 'transaction_id' AND value = OLD.transaction_id
+               AND OLD.transaction_id IS DISTINCT FROM NEW.transaction_id);
+    END IF;
+    IF NEW.cf_link_id IS NOT NULL AND (TG_OP = 'INSERT' OR NEW.cf_link_id IS DISTINCT FROM OLD.cf_link_id) THEN
+        INSERT INTO voice_bot.payment_keys (kind, value, payment_id) VALUES ('cf_link_id', NEW.cf_link_id, NEW.id);
+    END IF;
+    IF NEW.transaction_id IS NOT NULL
+       AND (TG_OP = 'INSERT' OR NEW.transaction_id IS DISTINCT FROM OLD.transaction_id) THEN
+        INSERT INTO voice_bot.payment_keys (kind, value, payment_id)
+        VALUES ('transaction_id', NEW.transaction_id, NEW.id);
+    END IF;
+    RETURN NULL;
+END
+$$
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    op.execute('LOCK TABLE voice_bot.payments IN EXCLUSIVE MODE')
+    # The partition key cannot be NULL
+    op.execute('UPDATE voice_bot.payments SET created_at = COALESCE(updated_at, CURRENT_TIMESTAMP) '
+               'WHERE created_at IS NULL')
+
+    op.create_table('payments_partitioned', *_columns(), schema='voice_bot',
+                    postgresql_partition_by='RANGE (created_at)')
+
+    oldest = bind.execute(sa.text('SELECT min(created_at) FROM voice_bot.payments')).scalar()
+    current = date.today().replace(day=1)
+    month = min(oldest.date().replace(day=1), current) if oldest else current
+    last = _add_month(current, PREMAKE_MONTHS)
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE voice_bot.payments_p{month.year:04d}_{month.month:02d} "
+            f"PARTITION OF voice_bot.payments_partitioned "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_month(month).isoformat()}')"
+        )
+        month = _add_month(month)
+    op.execute('CREATE TABLE voice_bot.payments_default PARTITION OF voice_bot.payments_partitioned DEFAULT')
+
+    op.execute(f'INSERT INTO voice_bot.payments_partitioned ({COLUMNS}) SELECT {COLUMNS} FROM voice_bot.payments')
+
+    # Keep the sequence when the old table (its owner) is dropped
+    op.execute('ALTER SEQUENCE voice_bot.payments_id_seq OWNED BY NONE')
+    op.drop_table('payments', schema='voice_bot')
+    op.rename_table('payments_partitioned', 'payments', schema='voice_bot')
+    op.execute('ALTER SEQUENCE voice_bot.payments_id_seq OWNED BY voice_bot.payments.id')
+
+    op.create_primary_key('payments_pkey', 'payments', ['id', 'created_at'], schema='voice_bot')
+    op.create_unique_constraint('uq_payments_cf_link_id_created_at', 'payments', ['cf_link_id', 'created_at'],
+                                schema='voice_bot')
+    op.create_unique_constraint('uq_payments_transaction_id_created_at', 'payments',
+                                ['transaction_id', 'created_at'], schema='voice_bot')
+    _create_indexes()
+
+    op.create_table(
+        'payment_keys',
+        sa.Column('kind', sa.String(length=20), nullable=False),
+        sa.Column('value', sa.String(length=100), nullable=False),
+        sa.Column('payment_id', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('kind', 'value', name='payment_keys_pkey'),
+        schema='voice_bot',
+    )
+    op.execute("INSERT INTO voice_bot.payment_keys (kind, value, payment_id) "
+               "SELECT 'cf_link_id', cf_link_id, id FROM voice_bot.payments WHERE cf_link_id IS NOT NULL "
+               "UNION ALL "
+               "SELECT 'transaction_id', transaction_id, id FROM voice_bot.payments WHERE transaction_id IS NOT NULL")
+    op.execute(CLAIM_KEYS_FUNCTION)
+    op.execute('CREATE TRIGGER payments_claim_keys AFTER INSERT OR UPDATE OF cf_link_id, transaction_id '
+               'ON voice_bot.payments FOR EACH ROW EXECUTE FUNCTION voice_bot.payments_claim_keys()')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute('LOCK TABLE voice_bot.payments IN EXCLUSIVE MODE')
+    op.execute('DROP TRIGGER payments_claim_keys ON voice_bot.payments')
+    op.execute('DROP FUNCTION voice_bot.payments_claim_keys()')
+    op.drop_table('payment_keys', schema='voice_bot')
+    columns = [
+        sa.Column('created_at', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True)
+        if column.name == 'created_at' else column
+        for column in _columns()
+    ]
+    op.create_table('payments_unpartitioned', *columns, schema='voice_bot')
+    op.execute(f'INSERT INTO voice_bot.payments_unpartitioned ({COLUMNS}) SELECT {COLUMNS} FROM voice_bot.payments')
+
+    op.execute('ALTER SEQUENCE voice_bot.payments_id_seq OWNED BY NONE')
+    # Drops the attached partitions with it
+    op.drop_table('payments', schema='voice_bot')
+    op.rename_table('payments_unpartitioned', 'payments', schema='voice_bot')
+    op.execute('ALTER SEQUENCE voice_bot.payments_id_seq OWNED BY voice_bot.payments.id')
+
+    op.create_primary_key('payments_pkey', 'payments', ['id'], schema='voice_bot')
+    op.create_unique_constraint('payments_cf_link_id_key', 'payments', ['cf_link_id'], schema='voice_bot')
+    op.create_unique_constraint('payments_transaction_id_key', 'payments', ['transaction_id'], schema='voice_bot')
+    _create_indexes()
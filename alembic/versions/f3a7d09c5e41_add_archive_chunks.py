@@ -0,0 +1,46 @@
+"""add archive_chunks cold storage
+
+Revision ID: f3a7d09c5e41
+Revises: e8c1f4a9d207
+Create Date: 2026-10-19 16:10:33.904215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a7d09c5e41'
+down_revision: Union[str, None] = 'e8c1f4a9d207'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Also where partition maintenance moves detached payments partitions
+    op.execute('CREATE SCHEMA IF NOT EXISTS voice_bot_archive')
+    op.create_table(
+        'archive_chunks',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('source', sa.String(length=128), nullable=False),
+        sa.Column('min_key', sa.TIMESTAMP(), nullable=False),
+        sa.Column('max_key', sa.TIMESTAMP(), nullable=False),
+        sa.Column('row_count', sa.Integer(), nullable=False),
+        sa.Column('payload', sa.LargeBinary(), nullable=False),
+        sa.Column('archived_at', sa.TIMESTAMP(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        schema='voice_bot_archive'
+    )
+    op.create_index('ix_archive_chunks_source_range', 'archive_chunks', ['source', 'min_key', 'max_key'],
+                    unique=False, schema='voice_bot_archive')
+    # Payloads are compressed already; keep PostgreSQL from trying again
+    op.execute('ALTER TABLE voice_bot_archive.archive_chunks ALTER COLUMN payload SET STORAGE EXTERNAL')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_archive_chunks_source_range', table_name='archive_chunks', schema='voice_bot_archive')
+    op.drop_table('archive_chunks', schema='voice_bot_archive')
@@ -0,0 +1,32 @@
+"""add interview_questions.reference_answers
+
+Revision ID: f3b8d2a61c47
+Revises: e5a1c7b93d20
+Create Date: 2026-10-19 15:02:37.406183
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b8d2a61c47'
+down_revision: Union[str, None] = 'e5a1c7b93d20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('interview_questions',
+                  sa.Column('reference_answers', postgresql.JSONB(astext_type=sa.Text()), server_default='[]',
+                            nullable=False),
+                  schema='voice_bot')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('interview_questions', 'reference_answers', schema='voice_bot')
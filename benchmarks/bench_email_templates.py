@@ -0,0 +1,85 @@
+"""
+Render 10k transactional emails: hand-built f-string + MIMEMultipart vs. the compiled
+template registry + cached MIME skeletons.
+
+Usage:
+    python -m benchmarks.bench_email_templates [--messages 10000]
+"""
+import time
+import argparse
+from datetime import datetime, timedelta
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+from src.utils.mailer import build_raw_message
+from src.utils.email_templates import templates
+
+
+def naive_reminder(full_name: str, subscription_end: datetime, days_left: int) -> bytes:
+    body = f"""
+            Dear {full_name},
+
+            This is a kind reminder from Nutridiet Mitra that your subscription is set to expire on {subscription_end.strftime('%B %d, %Y')}.
+            You have {days_left} days remaining on your current plan.
+        """
+    msg = MIMEMultipart()
+    msg["From"] = "bot@nutridietmitra.com"
+    msg["To"] = "user@example.com"
+    msg["Subject"] = "Subscription Expiry Reminder!"
+    msg.attach(MIMEText(body, "plain"))
+    return msg.as_bytes()
+
+
+def naive_listing(rows: list) -> bytes:
+    html_body = "<h3>Upcoming Subscription Expirations</h3><ul>"
+    for row in rows:
+        html_body += f"<li><strong>{row['full_name']}</strong> ({row['email']}) - Subscription ends on {row['subscription_end']} ({row['days_left']} days left)</li>"
+    html_body += "</ul>"
+    msg = MIMEMultipart()
+    msg["From"] = "bot@nutridietmitra.com"
+    msg["To"] = "admin@example.com"
+    msg["Subject"] = "Expiring User Subscriptions Alert"
+    msg.attach(MIMEText(html_body, "html"))
+    return msg.as_bytes()
+
+
+def compiled_reminder(reminder, full_name: str, subscription_end: datetime, days_left: int) -> bytes:
+    rendered = reminder.render(full_name=full_name, subscription_end=subscription_end.strftime('%B %d, %Y'),
+                               days_left=days_left)
+    return build_raw_message("bot@nutridietmitra.com", "user@example.com", rendered.subject,
+                             rendered.text, rendered.html).data
+
+
+def timed(label: str, count: int, fn) -> float:
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<42} {elapsed * 1000:9.1f} ms  {count / elapsed:10.0f} msg/s")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=10000)
+    parser.add_argument("--list-rows", type=int, default=2000)
+    args = parser.parse_args()
+
+    end = datetime.now() + timedelta(days=5)
+    names = [f"Candidate {i}" for i in range(args.messages)]
+    reminder = templates.get("subscription_reminder")
+
+    naive = timed("reminders: f-string + MIMEMultipart", args.messages,
+                  lambda: [naive_reminder(name, end, 5) for name in names])
+    compiled = timed("reminders: compiled template + skeleton", args.messages,
+                     lambda: [compiled_reminder(reminder, name, end, 5) for name in names])
+    print(f"speed-up: {naive / compiled:.1f}x\n")
+
+    rows = [{"full_name": f"Candidate {i}", "email": f"c{i}@example.com",
+             "subscription_end": end.strftime("%Y-%m-%d"), "days_left": 5} for i in range(args.list_rows)]
+    timed(f"listing of {args.list_rows}: += concatenation", 1, lambda: naive_listing(rows))  # HTML only, unescaped
+    timed(f"listing of {args.list_rows}: joined, escaped, text+html", 1, lambda: build_raw_message(
+        "bot@nutridietmitra.com", "admin@example.com",
+        *templates.render("expiring_subscriptions", lists={"users": rows})))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+What the embedding cache saves on a repetitive workload, and what a lookup costs.
+
+1. Workload: batches of texts drawn with a Zipf-like skew from a fixed set of
+   distinct texts (the same questions and stock answers come back over and
+   over), embedded by a backend that sleeps like a remote model (a fixed
+   round-trip per call plus a per-text cost). Compares calling the backend
+   directly with CachedEmbedder, which sends only the distinct misses of a batch.
+
+2. Lookups: a cache filled with --entries vectors, looked up in batches of
+   all-hit keys. The vectorized get (one searchsorted and one gather per shard)
+   vs. looking keys up one at a time in the same cache.
+
+3. Opening: a new worker opening the filled cache (reading and sorting the keys).
+
+Usage:
+    python -m benchmarks.bench_embedding_cache [--entries 200000] [--batches 300] [--batch-size 32]
+"""
+import time
+import argparse
+import tempfile
+import numpy as np
+from src.routers.questions.embeddings import HashingEmbedder
+from src.routers.questions.embedding_cache import CachedEmbedder, EmbeddingCache, text_keys
+
+
+class SlowEmbedder:
+    """HashingEmbedder with the latency of a remote embedding API."""
+
+    def __init__(self, dim: int, call_seconds: float, text_seconds: float):
+        self.inner = HashingEmbedder(dim)
+        self.dim = dim
+        self.name = f"slow-{dim}"
+        self.call_seconds = call_seconds
+        self.text_seconds = text_seconds
+
+    def embed(self, texts):
+        time.sleep(self.call_seconds + self.text_seconds * len(texts))
+        return self.inner.embed(texts)
+
+
+def workload(distinct: int, batches: int, batch_size: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    weights = 1.0 / np.arange(1, distinct + 1) ** 1.1
+    weights /= weights.sum()
+    texts = [f"Tell me about a time you used skill {i} on a project with  team {i % 97}." for i in range(distinct)]
+    return [[texts[i] for i in rng.choice(distinct, batch_size, p=weights)] for _ in range(batches)]
+
+
+def lookup_one_at_a_time(cache: EmbeddingCache, keys: np.ndarray) -> np.ndarray:
+    vectors = np.zeros((len(keys), cache.dim), dtype=np.float32)
+    for position, key in enumerate(keys):
+        row = int(cache._find(keys[position:position + 1])[0])
+        if row >= 0:
+            vectors[position] = cache._shard(row // cache.shard_rows)[row % cache.shard_rows]
+    return vectors
+
+
+def timed(function, repeat: int) -> float:
+    began = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - began) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--distinct", type=int, default=2000, help="Distinct texts in the workload")
+    parser.add_argument("--batches", type=int, default=300)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--call-ms", type=float, default=40.0, help="Simulated backend round trip")
+    parser.add_argument("--text-ms", type=float, default=0.5, help="Simulated backend time per text")
+    args = parser.parse_args()
+
+    batches = workload(args.distinct, args.batches, args.batch_size)
+    backend = SlowEmbedder(args.dim, args.call_ms / 1000, args.text_ms / 1000)
+    with tempfile.TemporaryDirectory() as directory:
+        began = time.perf_counter()
+        for batch in batches:
+            backend.embed(batch)
+        direct = time.perf_counter() - began
+
+        cached = CachedEmbedder(backend, EmbeddingCache(backend.name, args.dim, directory))
+        began = time.perf_counter()
+        for batch in batches:
+            vectors = cached.embed(batch)
+        through_cache = time.perf_counter() - began
+        assert np.allclose(vectors, backend.inner.embed(batches[-1]))
+        stats = cached.snapshot()
+        texts = args.batches * args.batch_size
+        print(f"{texts} texts in {args.batches} batches of {args.batch_size}, {args.distinct} distinct, "
+              f"backend {args.call_ms:g} ms/call + {args.text_ms:g} ms/text")
+        print(f"{'':<18} {'seconds':>8} {'backend calls':>14} {'backend texts':>14} {'hit rate':>9}")
+        print(f"{'backend directly':<18} {direct:>8.2f} {args.batches:>14} {texts:>14} {'':>9}")
+        print(f"{'CachedEmbedder':<18} {through_cache:>8.2f} {stats['backend_calls']:>14} "
+              f"{stats['backend_texts']:>14} {stats['hit_rate']:>9.3f}\n")
+
+        # A large cache, filled the way CachedEmbedder fills it: batch by batch
+        cache = EmbeddingCache("filled", args.dim, directory)
+        rng = np.random.default_rng(1)
+        keys = text_keys(cache.model, [f"text {i}" for i in range(args.entries)])
+        began = time.perf_counter()
+        for start in range(0, args.entries, 1000):
+            chunk = keys[start:start + 1000]
+            cache.put(chunk, rng.standard_normal((len(chunk), args.dim), dtype=np.float32))
+        filled = time.perf_counter() - began
+        began = time.perf_counter()
+        reopened = EmbeddingCache("filled", args.dim, directory)
+        opened = time.perf_counter() - began
+        print(f"{args.entries} entries ({-(-args.entries // cache.shard_rows)} shards): filled in {filled:.2f}s, "
+              f"opened by a new worker in {opened * 1000:.1f} ms\n")
+
+        print(f"{'all-hit lookup':<16} {'vectorized us':>14} {'one at a time us':>17} {'speedup':>8}")
+        for size in (1, 32, 256, 1024):
+            batch = keys[rng.integers(0, args.entries, size)]
+            found, vectors = reopened.get(batch)
+            assert found.all() and np.array_equal(vectors, lookup_one_at_a_time(reopened, batch))
+            repeat = max(20, 20000 // size)
+            vectorized = timed(lambda: reopened.get(batch), repeat)
+            single = timed(lambda: lookup_one_at_a_time(reopened, batch), max(5, repeat // 10))
+            print(f"{'batch of ' + str(size):<16} {vectorized * 1e6:>14.1f} {single * 1e6:>17.1f} "
+                  f"{single / vectorized:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
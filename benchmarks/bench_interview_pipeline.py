@@ -0,0 +1,111 @@
+"""
+End-to-end latency of the interview engine with the fake STT/LLM/TTS backends, offline.
+
+Runs concurrent simulated candidates over an in-memory transport. Each candidate
+listens to a question, speaks an answer as 20 ms PCM16 frames and signals the end of
+the utterance; `--barge-in` is the fraction of questions the candidate talks over
+as soon as the first audio arrives. Reports the client-side response latency (end
+of utterance -> first audio chunk received) and the engine's per-stage metrics.
+
+Usage:
+    python -m benchmarks.bench_interview_pipeline [--sessions 50] [--questions 5] [--barge-in 0.2]
+"""
+import json
+import time
+import random
+import asyncio
+import argparse
+import numpy as np
+from src.routers.interview.backends import FakeSpeechToText, FakeQuestionGenerator, FakeTextToSpeech, SAMPLE_RATE
+from src.routers.interview.engine import InterviewEngine, EngineMetrics
+from benchmarks.bench_audio_ingest import synthetic_speech
+
+FRAME_MS = 20
+
+
+def speech_frames(seconds: float, seed: int) -> list:
+    audio = synthetic_speech(seconds, seed).astype("<i2").tobytes()
+    size = SAMPLE_RATE * 2 * FRAME_MS // 1000
+    return [audio[offset:offset + size] for offset in range(0, len(audio), size)]
+
+
+async def candidate(index: int, backends, metrics: EngineMetrics, args, latencies: list):
+    inbox: asyncio.Queue = asyncio.Queue()
+    outbox: asyncio.Queue = asyncio.Queue()
+    engine = InterviewEngine(inbox.put, *backends, user_id=index, job_title="Backend Engineer",
+                             max_questions=args.questions, metrics=metrics)
+    run = asyncio.get_running_loop().create_task(engine.run(outbox.get))
+    rng = random.Random(index)
+
+    for turn in range(args.questions):
+        barge_in = rng.random() < args.barge_in
+        # Listen to the question, or only to its first chunk when talking over it
+        while True:
+            message = await inbox.get()
+            if isinstance(message, bytes):
+                if barge_in:
+                    break
+            elif json.loads(message)["type"] == "audio_end":
+                break
+
+        for frame in speech_frames(args.answer_seconds, seed=index * 1000 + turn):
+            await outbox.put(frame)
+            if args.realtime:
+                await asyncio.sleep(FRAME_MS / 1000)
+        while not inbox.empty():
+            inbox.get_nowait()
+        ended_at = time.perf_counter()
+        await outbox.put(json.dumps({"type": "end_of_utterance"}))
+
+        if turn == args.questions - 1:
+            break
+        # Audio of an interrupted question can still be in flight; the next question's comes after the transcript
+        while True:
+            message = await inbox.get()
+            if isinstance(message, str) and json.loads(message)["type"] == "transcript":
+                break
+        while not isinstance(await inbox.get(), bytes):
+            pass
+        latencies.append(time.perf_counter() - ended_at)
+
+    await outbox.put(None)
+    await run
+
+
+async def run_benchmark(args):
+    backends = (FakeSpeechToText(scale=args.delay_scale), FakeQuestionGenerator(scale=args.delay_scale),
+                FakeTextToSpeech(scale=args.delay_scale))
+    metrics = EngineMetrics()
+    latencies = []
+    started = time.perf_counter()
+    await asyncio.gather(*(candidate(index, backends, metrics, args, latencies) for index in range(args.sessions)))
+    return time.perf_counter() - started, latencies, metrics
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--questions", type=int, default=5)
+    parser.add_argument("--answer-seconds", type=float, default=3.0)
+    parser.add_argument("--barge-in", type=float, default=0.2, help="Fraction of questions talked over")
+    parser.add_argument("--delay-scale", type=float, default=1.0, help="Scale the fake backends' delays")
+    parser.add_argument("--realtime", action="store_true", help="Send answer frames at real-time pace")
+    args = parser.parse_args()
+
+    elapsed, latencies, metrics = asyncio.run(run_benchmark(args))
+    p50, p95, p99 = np.percentile(np.array(latencies) * 1000, [50, 95, 99])
+    print(f"{args.sessions} sessions x {args.questions} questions in {elapsed:.2f}s")
+    print(f"end of utterance -> first audio (client): p50 {p50:.1f} ms  p95 {p95:.1f} ms  p99 {p99:.1f} ms\n")
+    snapshot = metrics.snapshot()
+    print(f"{'stage':<17} {'count':>7} {'mean':>9} {'p50':>9} {'p95':>9} {'max':>9}")
+    for stage, stats in snapshot["latency"].items():
+        if stats["count"]:
+            print(f"{stage:<17} {stats['count']:>7} {stats['mean_ms']:>9.1f} {stats['p50_ms']:>9.1f} "
+                  f"{stats['p95_ms']:>9.1f} {stats['max_ms']:>9.1f}")
+    print()
+    for name, value in snapshot["counters"].items():
+        print(f"{name:<26} {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Hit rates, wrong hits and time to first token of the two-tier LLM response cache.
+
+A stream of opening-question prompts (role + job description) over --roles roles:
+- exact repeats with different case and spacing (exact tier after normalization),
+- near-duplicates: the role's description with a word swapped or a sentence added,
+- new descriptions for a role (hits only if close enough).
+
+The LLM is a fake that names the role in its question and waits --first-token-ms
+before the first word, like a remote model. A semantic hit whose question names
+another role is counted as wrong. Every prompt goes through CachedQuestionGenerator
+with the question bank's default embedder, for several similarity thresholds, and
+once without a cache.
+
+Also measures the lookup overhead itself with --entries entries in one tenant.
+
+Usage:
+    python -m benchmarks.bench_llm_cache [--prompts 600] [--roles 40] [--first-token-ms 250]
+"""
+import time
+import random
+import asyncio
+import argparse
+import numpy as np
+from src.routers.questions.embeddings import HashingEmbedder
+from src.routers.interview.llm_cache import CachedQuestionGenerator, LLMResponseCache, question_prompt
+
+DOMAINS = ["payments", "search", "billing", "growth", "mobile", "data platform", "infrastructure", "security",
+           "machine learning", "analytics", "identity", "messaging", "storage", "video", "ads", "support tools",
+           "logistics", "maps", "checkout", "notifications"]
+SKILLS = ["python", "go", "java", "kotlin", "react", "sql", "kafka", "kubernetes", "terraform", "spark", "airflow",
+          "redis", "postgresql", "graphql", "grpc", "aws", "gcp", "pytorch", "pandas", "typescript", "swift",
+          "docker", "elasticsearch", "snowflake", "dbt", "rust", "c++", "linux", "nginx", "celery"]
+
+
+class RoleEchoLLM:
+    """A fake question generator whose question names the role, after a first-token delay."""
+
+    def __init__(self, first_token_delay: float, token_delay: float = 0.0005):
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+        self.calls = 0
+
+    async def stream(self, job_title, job_description, history):
+        self.calls += 1
+        await asyncio.sleep(self.first_token_delay)
+        for index, word in enumerate(f"As our {job_title}, how would you approach the first month?".split(" ")):
+            if index:
+                await asyncio.sleep(self.token_delay)
+            yield word if index == 0 else " " + word
+
+
+def make_prompts(roles: int, count: int, seed: int = 0):
+    rng = random.Random(seed)
+    catalog = []
+    for number in range(roles):
+        title = f"{rng.choice(['Senior', 'Staff', 'Junior', 'Lead'])} {DOMAINS[number % len(DOMAINS)]} engineer {number}"
+        skills = rng.sample(SKILLS, 5)
+        description = (f"You will build {DOMAINS[number % len(DOMAINS)]} services used by millions. "
+                       f"We use {', '.join(skills[:3])} and {skills[3]}. "
+                       f"Experience with {skills[4]} and on-call is a plus.")
+        catalog.append((title, description, skills))
+    prompts = []
+    for _ in range(count):
+        title, description, skills = rng.choice(catalog)
+        kind = rng.random()
+        if kind < 0.4:
+            # Same prompt, different case and spacing
+            prompts.append((title.upper() if rng.random() < 0.5 else title, description.replace(" ", "  ", 3),
+                            "repeat", title))
+        elif kind < 0.7:
+            words = description.split(" ")
+            words[rng.randrange(len(words))] = rng.choice(SKILLS)
+            variant = " ".join(words) if rng.random() < 0.5 else description + " Remote friendly."
+            prompts.append((title, variant, "near", title))
+        else:
+            other = rng.sample(SKILLS, 4)
+            prompts.append((title, f"Join the team. You should know {', '.join(other)}. {rng.randrange(10**6)}",
+                            "new", title))
+    return prompts
+
+
+async def run(generator, prompts):
+    first_token, wrong = [], 0
+    for title, description, _, role in prompts:
+        began = time.perf_counter()
+        pieces = []
+        async for piece in generator.stream(title, description, []):
+            if not pieces:
+                first_token.append(time.perf_counter() - began)
+            pieces.append(piece)
+        if role.casefold() not in "".join(pieces).casefold():
+            wrong += 1
+    return np.array(first_token), wrong
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--prompts", type=int, default=600)
+    parser.add_argument("--roles", type=int, default=40)
+    parser.add_argument("--first-token-ms", type=float, default=250.0)
+    parser.add_argument("--entries", type=int, default=2000, help="Cache size for the lookup overhead")
+    args = parser.parse_args()
+
+    prompts = make_prompts(args.roles, args.prompts)
+    kinds = {kind: sum(1 for prompt in prompts if prompt[2] == kind) for kind in ("repeat", "near", "new")}
+    print(f"{args.prompts} prompts over {args.roles} roles: {kinds}; LLM first token {args.first_token_ms:g} ms\n")
+    print(f"{'':<20} {'LLM calls':>10} {'exact':>6} {'semantic':>9} {'wrong':>6} {'hit rate':>9} "
+          f"{'TTFT p50 ms':>12} {'TTFT mean ms':>13}")
+
+    llm = RoleEchoLLM(args.first_token_ms / 1000)
+    first_token, wrong = asyncio.run(run(llm, prompts))
+    print(f"{'no cache':<20} {llm.calls:>10} {'':>6} {'':>9} {wrong:>6} {'':>9} "
+          f"{np.median(first_token) * 1000:>12.1f} {first_token.mean() * 1000:>13.1f}")
+    for threshold in (None, 0.97, 0.95, 0.92, 0.88):
+        llm = RoleEchoLLM(args.first_token_ms / 1000)
+        cache = LLMResponseCache(HashingEmbedder() if threshold else None, threshold=threshold or 1.0)
+        first_token, wrong = asyncio.run(run(CachedQuestionGenerator(llm, cache), prompts))
+        stats = cache.snapshot()
+        label = f"threshold {threshold}" if threshold else "exact tier only"
+        print(f"{label:<20} {llm.calls:>10} {stats['exact_hits']:>6} {stats['semantic_hits']:>9} {wrong:>6} "
+              f"{stats['hit_rate']:>9.3f} {np.median(first_token) * 1000:>12.1f} {first_token.mean() * 1000:>13.1f}")
+
+    # Lookup overhead, outside the event loop: exact hit, and a semantic search that misses
+    cache = LLMResponseCache(HashingEmbedder())
+    rng = random.Random(1)
+    texts = [question_prompt(f"role {i}", " ".join(rng.choices(SKILLS, k=30)), []) for i in range(args.entries)]
+    for text in texts:
+        cache.store(cache.lookup("tenant", text), "response")
+    overheads = {}
+    for label, text in (("exact hit", texts[0]), ("semantic miss", "Role: chef\nJob description: pasta and soups")):
+        began = time.perf_counter()
+        for _ in range(200):
+            cache.lookup("tenant", text)
+        overheads[label] = (time.perf_counter() - began) / 200 * 1e6
+    print(f"\nlookup overhead with {args.entries} entries: "
+          + ", ".join(f"{label} {micros:.0f} us" for label, micros in overheads.items()))
+
+
+if __name__ == "__main__":
+    main()
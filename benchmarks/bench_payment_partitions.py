@@ -0,0 +1,160 @@
+"""
+Date-range payment queries on a plain heap vs. monthly range partitions.
+
+Builds two copies of the payments table in a scratch schema, one plain and one
+partitioned by month on created_at (same rows, same indexes), then runs the queries
+behind `list_payments_by_status` and `get_payment_history` with a created_at range.
+Reports the partitions each plan touches, buffers read and execution time. The
+"prepared" rows use bind parameters with a forced generic plan, where pruning
+happens at executor startup instead of at plan time.
+
+Needs the DB_* settings of a scratch database.
+
+Usage:
+    python -m benchmarks.bench_payment_partitions [--rows 2000000] [--months 36] [--keep]
+"""
+import json
+import time
+import argparse
+import statistics
+from datetime import date
+from sqlalchemy import text
+from src.database import Database
+from src.database.partitions import add_months
+
+SCHEMA = "bench_partitions"
+
+COLUMNS = """
+    id integer NOT NULL,
+    user_id integer NOT NULL,
+    cf_link_id varchar(50),
+    amount numeric(10, 2) NOT NULL,
+    link_status varchar(20),
+    plan_type varchar,
+    created_at timestamp NOT NULL,
+    subscription_end timestamptz
+"""
+
+QUERIES = {
+    "list_payments_by_status, 1 month": (
+        "SELECT * FROM {table} WHERE link_status = :status AND created_at >= :start AND created_at < :end",
+        1,
+    ),
+    "get_payment_history, 1 month": ("SELECT * FROM {table} WHERE created_at >= :start AND created_at < :end", 1),
+    "get_payment_history, 3 months": ("SELECT * FROM {table} WHERE created_at >= :start AND created_at < :end", 3),
+}
+
+
+def build(connection, rows: int, months: int, first: date):
+    end = add_months(first, months)
+    connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    connection.execute(text(f"CREATE TABLE {SCHEMA}.payments_plain ({COLUMNS}, PRIMARY KEY (id))"))
+    connection.execute(text(
+        f"CREATE TABLE {SCHEMA}.payments_part ({COLUMNS}, PRIMARY KEY (id, created_at)) PARTITION BY RANGE (created_at)"
+    ))
+    for offset in range(months):
+        month = add_months(first, offset)
+        connection.execute(text(
+            f"CREATE TABLE {SCHEMA}.payments_part_p{month:%Y_%m} PARTITION OF {SCHEMA}.payments_part "
+            f"FOR VALUES FROM ('{month}') TO ('{add_months(month, 1)}')"
+        ))
+
+    # Rows arrive in created_at order, as they do in production
+    connection.execute(text(f"""
+        INSERT INTO {SCHEMA}.payments_plain
+        SELECT n, 1 + (n::bigint * 7919) % 50000, 'cf_' || n, 499 + n % 5 * 100,
+               (ARRAY['successful', 'successful', 'successful', 'pending', 'failed'])[1 + n % 5],
+               'month_1', created_at, created_at + interval '30 days'
+        FROM generate_series(1, :rows) AS n,
+             LATERAL (SELECT timestamp '{first}' + (timestamp '{end}' - timestamp '{first}') * ((n - 1)::float8 / :rows)
+                      AS created_at) AS t
+    """), {"rows": rows})
+    connection.execute(text(f"INSERT INTO {SCHEMA}.payments_part SELECT * FROM {SCHEMA}.payments_plain"))
+    for table in ("payments_plain", "payments_part"):
+        connection.execute(text(f"CREATE INDEX ON {SCHEMA}.{table} (user_id, created_at)"))
+        connection.execute(text(f"CREATE INDEX ON {SCHEMA}.{table} (subscription_end)"))
+        connection.execute(text(f"CREATE INDEX ON {SCHEMA}.{table} (link_status, id)"))
+        connection.execute(text(f"VACUUM ANALYZE {SCHEMA}.{table}"))
+
+
+def scanned_relations(plan: dict) -> set:
+    found = set()
+    if "Relation Name" in plan:
+        found.add(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        found |= scanned_relations(child)
+    return found
+
+
+def subplans_removed(plan: dict) -> int:
+    return plan.get("Subplans Removed", 0) + sum(subplans_removed(child) for child in plan.get("Plans", []))
+
+
+def explain(connection, sql: str, params: dict, prepared: bool) -> dict:
+    if prepared:
+        # A generic plan cannot prune at plan time; pruning moves to executor startup
+        connection.execute(text("SET plan_cache_mode = force_generic_plan"))
+        connection.execute(text("DEALLOCATE ALL"))
+        connection.execute(text(
+            "PREPARE bench_query (text, timestamp, timestamp) AS "
+            + sql.replace(":status", "$1").replace(":start", "$2").replace(":end", "$3")
+        ))
+        sql = "EXECUTE bench_query(:status, :start, :end)"
+    raw = connection.execute(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}"), params).scalar()
+    result = (json.loads(raw) if isinstance(raw, str) else raw)[0]
+    if prepared:
+        connection.execute(text("DEALLOCATE bench_query"))
+        connection.execute(text("RESET plan_cache_mode"))
+    return result
+
+
+def measure(connection, sql: str, params: dict, prepared: bool, repeat: int) -> dict:
+    runs = [explain(connection, sql, params, prepared) for _ in range(repeat)]
+    plan = runs[-1]["Plan"]
+    return {
+        "relations": len(scanned_relations(plan)),
+        "removed": subplans_removed(plan),
+        "buffers": plan.get("Shared Hit Blocks", 0) + plan.get("Shared Read Blocks", 0),
+        "rows": plan.get("Actual Rows", 0),
+        "ms": statistics.median(run["Execution Time"] for run in runs),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--months", type=int, default=36)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--keep", action="store_true", help=f"Keep the {SCHEMA} schema afterwards")
+    args = parser.parse_args()
+
+    engine = Database().engine
+    first = add_months(date.today().replace(day=1), -(args.months - 1))
+    started = time.perf_counter()
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        build(connection, args.rows, args.months, first)
+        print(f"built {args.rows} rows over {args.months} months in {time.perf_counter() - started:.1f}s\n")
+
+        # Ranges ending where the current month starts, the ones admins look at most
+        current = add_months(first, args.months - 1)
+        print(f"{'query':<34} {'table':<10} {'plan':<9} {'scanned':>8} {'pruned':>7} "
+              f"{'buffers':>9} {'rows':>8} {'ms':>9}")
+        try:
+            for label, (sql, span) in QUERIES.items():
+                params = {"status": "successful", "start": add_months(current, -span), "end": current}
+                for table in ("payments_plain", "payments_part"):
+                    for prepared in (False, True):
+                        result = measure(connection, sql.format(table=f"{SCHEMA}.{table}"), params, prepared,
+                                         args.repeat)
+                        print(f"{label:<34} {table.split('_')[1]:<10} {'prepared' if prepared else 'literal':<9} "
+                              f"{result['relations']:>8} {result['removed']:>7} {result['buffers']:>9} "
+                              f"{result['rows']:>8} {result['ms']:>9.2f}")
+                print()
+        finally:
+            if not args.keep:
+                connection.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Query latency and recall of the question bank's index at 1M questions, and what
+mapping the index file costs a worker compared with reading it into memory.
+
+Builds the index the bank builds at this size (see new_index: IVF lists, 8-bit
+scalar quantization) over synthetic clustered embeddings, writes it to a temporary
+directory and opens it with open_index (mmap). Then measures single-query top-10
+latency and recall against exact search for several nprobe values, and the same
+through QuestionBank.search_vectors with a delta of not-yet-compacted questions
+merged in.
+
+Opening the index is measured in a fresh process (as a worker would), reading it
+into memory vs. mapping it, before and after serving the queries: private
+(anonymous) memory is paid again by every uvicorn worker, file-backed pages are
+one shared copy in the page cache.
+
+No database is needed: the vectors never go through Postgres here.
+
+Usage:
+    python -m benchmarks.bench_question_bank [--count 1000000] [--dim 256] [--queries 500]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+import faiss
+import numpy as np
+from src.routers.questions.bank import (QuestionBank, new_index, open_index, search_index, training_size,
+                                        QUESTION_BANK_COMPACT_MIN, QUESTION_BANK_NPROBE)
+
+BATCH = 50000
+
+
+class _Embedder:
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.name = f"synthetic-{dim}"
+
+
+# Run in a fresh interpreter: open the index, then search; report time and resident memory
+OPEN_PROBE = """
+import sys, json, time, faiss, numpy as np
+def memory():
+    fields = dict(line.split(":", 1) for line in open("/proc/self/status") if line.startswith(("RssAnon", "RssFile")))
+    return {name: int(value.split()[0]) / 1024 for name, value in fields.items()}
+path, queries_path, mapped, nprobe = sys.argv[1], sys.argv[2], sys.argv[3] == "1", int(sys.argv[4])
+faiss.omp_set_num_threads(1)
+queries = np.load(queries_path)
+before = memory()
+began = time.perf_counter()
+index = faiss.read_index(path, faiss.IO_FLAG_MMAP_IFC) if mapped else faiss.read_index(path)
+seconds = time.perf_counter() - began
+opened = memory()
+index.search(queries, 10, params=faiss.SearchParametersIVF(nprobe=nprobe) if isinstance(index, faiss.IndexIVF) else None)
+searched = memory()
+print(json.dumps({"seconds": seconds, "before": before, "opened": opened, "searched": searched}))
+"""
+
+
+def open_cost(path: str, queries_path: str, mapped: bool, nprobe: int) -> dict:
+    output = subprocess.run([sys.executable, "-c", OPEN_PROBE, path, queries_path, "1" if mapped else "0", str(nprobe)],
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output)
+
+
+def question_vectors(centers: np.ndarray, start: int, count: int) -> np.ndarray:
+    """Deterministic batch of clustered unit vectors: a topic center plus noise."""
+    rng = np.random.default_rng(start)
+    topics = rng.integers(0, len(centers), count)
+    vectors = centers[topics] + rng.normal(0, 0.6 / np.sqrt(centers.shape[1]), (count, centers.shape[1]))
+    vectors = vectors.astype(np.float32)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def percentiles(samples) -> str:
+    p50, p95, p99 = np.percentile(np.array(samples) * 1000, [50, 95, 99])
+    return f"{p50:>8.3f} {p95:>8.3f} {p99:>8.3f}"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=1_000_000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--topics", type=int, default=5000, help="Clusters in the synthetic data")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+    faiss.omp_set_num_threads(1)
+
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(args.topics, args.dim)).astype(np.float32)
+    faiss.normalize_L2(centers)
+    # Queries: perturbed copies of stored questions, i.e. paraphrases
+    query_ids = rng.choice(args.count, args.queries, replace=False)
+    queries = np.empty((args.queries, args.dim), dtype=np.float32)
+    for start in np.unique(query_ids // BATCH * BATCH):
+        selected = query_ids // BATCH * BATCH == start
+        queries[selected] = question_vectors(centers, start, min(BATCH, args.count - start))[query_ids[selected] - start]
+    queries += rng.normal(0, 0.3 / np.sqrt(args.dim), queries.shape).astype(np.float32)
+    faiss.normalize_L2(queries)
+
+    # Train on an evenly spread sample, as compaction does
+    started = time.perf_counter()
+    step = -(-args.count // training_size(args.count))
+    sample = np.concatenate([question_vectors(centers, start, min(BATCH, args.count - start))[::step]
+                             for start in range(0, args.count, BATCH)])
+    index = new_index(args.dim, args.count, sample)
+    trained = time.perf_counter() - started
+
+    # Add in batches; exact top-k for the queries is accumulated on the way
+    exact_scores = np.full((args.queries, args.k), -np.inf, dtype=np.float32)
+    exact_ids = np.full((args.queries, args.k), -1, dtype=np.int64)
+    added_in = 0.0
+    for start in range(0, args.count, BATCH):
+        vectors = question_vectors(centers, start, min(BATCH, args.count - start))
+        ids = np.arange(start, start + len(vectors), dtype=np.int64)
+        began = time.perf_counter()
+        index.add_with_ids(vectors, ids)
+        added_in += time.perf_counter() - began
+        scores = queries @ vectors.T
+        top = np.argpartition(-scores, args.k, axis=1)[:, :args.k]
+        merged_scores = np.concatenate([exact_scores, np.take_along_axis(scores, top, axis=1)], axis=1)
+        merged_ids = np.concatenate([exact_ids, ids[top]], axis=1)
+        order = np.argsort(-merged_scores, axis=1)[:, :args.k]
+        exact_scores = np.take_along_axis(merged_scores, order, axis=1)
+        exact_ids = np.take_along_axis(merged_ids, order, axis=1)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "questions.faiss")
+        faiss.write_index(index, path)
+        size_mb = os.path.getsize(path) / 2 ** 20
+        kind = type(faiss.downcast_index(index)).__name__
+        lists = faiss.extract_index_ivf(index).nlist if isinstance(index, faiss.IndexIVF) else 0
+        del index
+        print(f"{args.count} questions x {args.dim} dims: {kind}, {lists} lists, {size_mb:.0f} MB file; "
+              f"trained in {trained:.1f}s, added in {added_in:.1f}s\n")
+
+        queries_path = os.path.join(directory, "queries.npy")
+        np.save(queries_path, queries)
+        print(f"{'open in a new worker':<22} {'seconds':>8} {'private MB':>11} {'file MB':>8}   "
+              f"{'after the queries: private':>26} {'file MB':>8}")
+        for label, mapped in (("read into memory", False), ("open_index (mmap)", True)):
+            cost = open_cost(path, queries_path, mapped, QUESTION_BANK_NPROBE)
+            opened = {name: cost["opened"][name] - cost["before"][name] for name in cost["before"]}
+            searched = {name: cost["searched"][name] - cost["before"][name] for name in cost["before"]}
+            print(f"{label:<22} {cost['seconds']:>8.3f} {opened['RssAnon']:>11.0f} {opened['RssFile']:>8.0f}   "
+                  f"{searched['RssAnon']:>26.0f} {searched['RssFile']:>8.0f}")
+        mapped = open_index(path)
+
+        print(f"\n{'search (k=' + str(args.k) + ')':<28} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'recall':>7}")
+        for nprobe in (8, 16, 32, 64):
+            latencies, found = [], []
+            for query in queries:
+                began = time.perf_counter()
+                _, ids = search_index(mapped, query[None], args.k, nprobe)
+                latencies.append(time.perf_counter() - began)
+                found.append(ids[0])
+            recall = np.mean([len(set(row) & set(truth)) / args.k for row, truth in zip(found, exact_ids)])
+            print(f"{'base, nprobe ' + str(nprobe):<28} {percentiles(latencies)} {recall:>7.3f}")
+
+        # The bank as a worker sees it: the mapped base plus a delta at the compaction threshold
+        bank = QuestionBank(_Embedder(args.dim), database=None, directory=directory)
+        bank._base = mapped
+        delta = question_vectors(centers, args.count, QUESTION_BANK_COMPACT_MIN)
+        bank._delta.add_with_ids(delta, np.arange(args.count, args.count + len(delta), dtype=np.int64))
+        latencies = []
+        for query in queries:
+            began = time.perf_counter()
+            bank.search_vectors(query[None], args.k)
+            latencies.append(time.perf_counter() - began)
+        label = f"base + {len(delta)} delta, nprobe {bank.nprobe}"
+        print(f"{label:<28} {percentiles(latencies)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Throughput of the PCM conversion stage (downmix, dtype conversion, resampling to
+16 kHz mono PCM16): PcmConverter vs. the same polyphase filter applied sample by
+sample in Python.
+
+Each client format is converted as a stream of `--chunk-ms` buffers, the way
+WebSocket messages arrive. Reports audio seconds converted per CPU second and
+the resulting number of real-time streams one core can convert, and checks that
+both implementations produce the same samples (within one LSB of rounding).
+
+Usage:
+    python -m benchmarks.bench_resample [--seconds 30] [--chunk-ms 100]
+"""
+import time
+import struct
+import argparse
+import numpy as np
+from src.routers.interview.resample import AudioFormat, PcmConverter
+
+FORMATS = [
+    AudioFormat(8000, 1, "pcm_s16le"),
+    AudioFormat(16000, 2, "pcm_f32le"),
+    AudioFormat(44100, 1, "pcm_s16le"),
+    AudioFormat(44100, 2, "pcm_f32le"),
+    AudioFormat(48000, 1, "pcm_f32le"),
+    AudioFormat(48000, 2, "pcm_s16le"),
+]
+
+
+def client_audio(audio_format: AudioFormat, seconds: float, seed: int = 0) -> bytes:
+    """A few tones plus noise, in the client's format."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * audio_format.sample_rate)) / audio_format.sample_rate
+    mono = 0.2 * np.sin(2 * np.pi * 220 * t) + 0.1 * np.sin(2 * np.pi * 1800 * t) + rng.normal(0, 0.02, len(t))
+    frames = np.stack([mono * (1 - 0.1 * channel) for channel in range(audio_format.channels)], axis=1)
+    if audio_format.encoding == "pcm_f32le":
+        return frames.astype("<f4").tobytes()
+    return (frames * 32767).astype("<i2").tobytes()
+
+
+class NaiveConverter:
+    """PcmConverter's algorithm, one sample at a time in Python."""
+
+    def __init__(self, reference: PcmConverter):
+        self.reference = reference
+        self.phases = reference.phases.tolist() if reference.resampling else None
+        self.samples = []  # Every downmixed input sample so far, zero-padded in front
+        if reference.resampling:
+            self.samples = [0.0] * (reference.taps - 1)
+        self.consumed = self.produced = 0
+
+    def convert(self, data: bytes) -> bytes:
+        reference = self.reference
+        source = reference.source
+        code = "h" if source.encoding == "pcm_s16le" else "f"
+        values = struct.unpack(f"<{len(data) // source.dtype.itemsize}{code}", data)
+        for index in range(0, len(values), source.channels):
+            self.samples.append(sum(values[index:index + source.channels]) / source.channels * reference.scale)
+        self.consumed += len(values) // source.channels
+
+        out = []
+        if reference.resampling:
+            last = (self.consumed * reference.up + reference.down - 1) // reference.down
+            for number in range(self.produced, last):
+                position = number * reference.down
+                base = position // reference.up
+                taps = self.phases[position % reference.up]
+                value = 0.0
+                for k, tap in enumerate(taps):
+                    value += tap * self.samples[base + k]
+                out.append(value)
+            self.produced = last
+        else:
+            out = self.samples[-(len(values) // source.channels):]
+        return struct.pack(f"<{len(out)}h", *(int(min(max(round(value), -32768), 32767)) for value in out))
+
+
+def run(converter, data: bytes, chunk_bytes: int):
+    parts = []
+    started = time.process_time()
+    for offset in range(0, len(data), chunk_bytes):
+        parts.append(bytes(converter.convert(data[offset:offset + chunk_bytes])))
+    return time.process_time() - started, np.frombuffer(b"".join(parts), dtype="<i2")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=30.0, help="Audio per format for PcmConverter")
+    parser.add_argument("--naive-seconds", type=float, default=2.0, help="Audio per format for the (slow) baseline")
+    parser.add_argument("--chunk-ms", type=int, default=100, help="Size of each incoming buffer")
+    args = parser.parse_args()
+
+    print(f"{args.chunk_ms} ms buffers, converted to 16 kHz mono PCM16\n")
+    print(f"{'client format':<30} {'taps':>5} {'numpy x realtime':>17} {'naive x realtime':>17} "
+          f"{'speedup':>8} {'max diff':>9}")
+    for audio_format in FORMATS:
+        chunk_bytes = audio_format.sample_rate * args.chunk_ms // 1000 * audio_format.frame_bytes
+        data = client_audio(audio_format, args.seconds)
+        probe = PcmConverter(audio_format)
+        fast_cpu, fast_out = run(probe, data, chunk_bytes)
+
+        naive_data = data[:int(args.naive_seconds * audio_format.sample_rate) * audio_format.frame_bytes]
+        naive_cpu, naive_out = run(NaiveConverter(PcmConverter(audio_format)), naive_data, chunk_bytes)
+        _, check_out = run(PcmConverter(audio_format), naive_data, chunk_bytes)
+        difference = int(np.abs(check_out.astype(np.int32) - naive_out.astype(np.int32)).max())
+
+        fast_speed = args.seconds / fast_cpu
+        naive_speed = args.naive_seconds / naive_cpu
+        label = f"{audio_format.sample_rate / 1000:g} kHz x{audio_format.channels} {audio_format.encoding}"
+        print(f"{label:<30} {probe.taps:>5} {fast_speed:>17.0f} {naive_speed:>17.1f} "
+              f"{fast_speed / naive_speed:>7.0f}x {difference:>9}")
+    print("\nx realtime = audio seconds converted per CPU second, i.e. real-time streams per core")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Offline scoring of interview sessions: SessionScorer vs. scoring answers one at a time.
+
+Synthetic sessions of --turns questions each, drawn from a bank of --questions
+questions with three reference answers apiece. Answers are reference answers
+with words dropped and swapped in, so scores spread over the whole range.
+
+- one at a time: per turn, embed the answer, embed its question's references and
+  take the best cosine (two embedder calls per turn), on --baseline-sessions;
+- SessionScorer in this process, on all sessions;
+- SessionScorer in a spawned process pool of --workers, sessions sent in chunks,
+  as `python -m src.routers.dashboard.scoring` runs it. Needs as many free cores
+  as workers to pay off.
+
+The embedder is the default HashingEmbedder, which costs CPU but no network; with
+a remote embedder the embedder-call counts are what matter.
+
+Usage:
+    python -m benchmarks.bench_session_scoring [--sessions 10000] [--turns 8] [--workers 2]
+"""
+import time
+import random
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from src.routers.questions.embeddings import HashingEmbedder
+from src.routers.dashboard.scoring import SessionScorer, similarity_points
+
+WORDS = ("api cache latency query index deploy trace metric queue retry timeout schema replica shard "
+         "python service customer team design test review incident rollback budget memory thread lock "
+         "network storage batch stream backup alert owner release feature bug profile").split()
+
+
+def make_bank(questions: int, seed: int = 0):
+    rng = random.Random(seed)
+    bank = {}
+    for number in range(questions):
+        question = f"Question {number}: how would you handle {' '.join(rng.sample(WORDS, 4))}?"
+        bank[question] = [" ".join(rng.choices(WORDS, k=20)) for _ in range(3)]
+    return bank
+
+
+def make_sessions(bank: dict, sessions: int, turns: int, seed: int = 1):
+    rng = random.Random(seed)
+    questions = list(bank)
+    result = []
+    for _ in range(sessions):
+        session = []
+        for question in rng.sample(questions, turns):
+            words = rng.choice(bank[question]).split()
+            kept = rng.random()
+            answer = " ".join(word if rng.random() < kept else rng.choice(WORDS) for word in words)
+            session.append((question, answer if rng.random() > 0.05 else None))
+        result.append(session)
+    return result
+
+
+def score_one_at_a_time(embedder, sessions, bank):
+    totals, calls = [], 0
+    for session in sessions:
+        total = 0.0
+        for question, answer in session:
+            if not answer or not bank.get(question):
+                continue
+            answer_vector = embedder.embed([answer])[0]
+            references = embedder.embed(bank[question])
+            calls += 2
+            best = max(float(np.dot(answer_vector, reference)) for reference in references)
+            total += float(similarity_points(np.array(best)))
+        totals.append(total)
+    return totals, calls
+
+
+_scorer = {}
+
+
+def _start_worker(_):
+    time.sleep(0.5)  # Long enough that every worker gets one
+
+
+def _score_chunk(chunk, bank):
+    if "scorer" not in _scorer:
+        _scorer["scorer"] = SessionScorer(HashingEmbedder())
+    return [result["total_score"] for result in _scorer["scorer"].score_sessions(chunk, bank)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=10_000)
+    parser.add_argument("--turns", type=int, default=8)
+    parser.add_argument("--questions", type=int, default=2000, help="Questions in the bank")
+    parser.add_argument("--baseline-sessions", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--chunk", type=int, default=200, help="Sessions per pool task")
+    args = parser.parse_args()
+
+    bank = make_bank(args.questions)
+    sessions = make_sessions(bank, args.sessions, args.turns)
+    turns = args.sessions * args.turns
+    print(f"{args.sessions} sessions x {args.turns} turns, {args.questions} bank questions x 3 references\n")
+    print(f"{'':<26} {'sessions':>9} {'seconds':>8} {'sessions/s':>11} {'embedder calls':>15}")
+
+    began = time.perf_counter()
+    baseline, calls = score_one_at_a_time(HashingEmbedder(), sessions[:args.baseline_sessions], bank)
+    seconds = time.perf_counter() - began
+    print(f"{'one at a time':<26} {args.baseline_sessions:>9} {seconds:>8.2f} "
+          f"{args.baseline_sessions / seconds:>11.0f} {calls:>15}")
+
+    scorer = SessionScorer(HashingEmbedder())
+    began = time.perf_counter()
+    results = scorer.score_sessions(sessions, bank)
+    seconds = time.perf_counter() - began
+    print(f"{'SessionScorer':<26} {args.sessions:>9} {seconds:>8.2f} {args.sessions / seconds:>11.0f} "
+          f"{scorer.stats['embedder_calls']:>15}")
+    batched = [result["total_score"] for result in results[:args.baseline_sessions]]
+    assert np.allclose(batched, baseline, atol=0.01 * args.turns), "batched and one-at-a-time scores differ"
+
+    chunks = [sessions[start:start + args.chunk] for start in range(0, len(sessions), args.chunk)]
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        began = time.perf_counter()
+        list(executor.map(_start_worker, range(args.workers)))
+        started = time.perf_counter() - began
+        began = time.perf_counter()
+        pooled = [total for totals in executor.map(_score_chunk, chunks, [bank] * len(chunks)) for total in totals]
+        seconds = time.perf_counter() - began
+    print(f"{'SessionScorer, ' + str(args.workers) + ' processes':<26} {args.sessions:>9} {seconds:>8.2f} "
+          f"{args.sessions / seconds:>11.0f} {'':>15}   (+{started:.1f}s starting the workers)")
+    assert np.allclose(pooled, [result["total_score"] for result in results])
+
+    scores = np.array([result["total_score"] / result["max_possible_score"] for result in results])
+    print(f"\n{turns} turns; references embedded {scorer.stats['references_embedded']} times for "
+          f"{args.questions * 3} distinct references; session score % p10/p50/p90: "
+          f"{' / '.join(f'{value:.0%}' for value in np.percentile(scores, [10, 50, 90]))}")
+
+
+if __name__ == "__main__":
+    main()
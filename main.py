@@ -8,7 +8,11 @@ from src.routers import (users_router,
                          feedback_router,
                          dashboard_route, 
                          admin_router, 
-                         payment_router)
+                         payment_router,
+                         notifications_router,
+                         media_router,
+                         interview_router,
+                         questions_router)
 
 # Defining the application
 app = FastAPI(
@@ -35,8 +39,13 @@ app.add_middleware(
 # Including all the routes for the 'users' module
 app.include_router(users_router)
 app.include_router(feedback_router)
+app.include_router(dashboard_route)
 app.include_router(admin_router)
 app.include_router(payment_router)
+app.include_router(notifications_router)
+app.include_router(media_router)
+app.include_router(interview_router)
+app.include_router(questions_router)
 
 #
 app.mount("/public", StaticFiles(directory="public"), name="public")
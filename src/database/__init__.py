@@ -1,6 +1,9 @@
+from .base import Base, import_models
 from .db_session import Database
 
 __all__= [
-    "Database"
+    "Database",
+    "Base",
+    "import_models"
 ]
 
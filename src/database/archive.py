@@ -0,0 +1,290 @@
+# src/database/archive.py
+"""
+Cold storage for rows that have left their hot table.
+
+Old rows are moved in small batches into `voice_bot_archive.archive_chunks`: one
+zlib-compressed, column-oriented chunk per batch, tagged with the min/max of its
+time column. Like a Parquet row group, a chunk is only decoded when a query's date
+range overlaps those bounds. Each batch is a short transaction that locks just the
+rows it moves (FOR UPDATE SKIP LOCKED), so archiving never blocks the app for long.
+
+An archive with an `owner` column (e.g. QnA's user_id) writes one chunk per owner
+per batch and tags it with the owner, so reading one user's rows decodes only that
+user's chunks, not the whole archive.
+
+`ColdArchive.read()` is the read path: it returns archived rows for a date range
+(and owner) as plain dicts, decoded back to the source table's Python types.
+"""
+import os
+import json
+import zlib
+import time
+import asyncio
+from decimal import Decimal
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional
+from dotenv import load_dotenv
+from loguru import logger as logging
+from sqlalchemy import Column, BigInteger, Integer, String, TIMESTAMP, LargeBinary, Index, Table, func, text
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from .base import Base
+from .partitions import PARTITION_ARCHIVE_SCHEMA
+
+load_dotenv()
+
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "5000"))
+ARCHIVE_COMPRESSION_LEVEL = int(os.getenv("ARCHIVE_COMPRESSION_LEVEL", "6"))
+# Pause between batches, leaving room for the app's own queries
+ARCHIVE_BATCH_PAUSE = float(os.getenv("ARCHIVE_BATCH_PAUSE", "0.2"))
+ARCHIVE_INTERVAL = float(os.getenv("ARCHIVE_INTERVAL", str(24 * 60 * 60)))
+ARCHIVE_ENABLED = os.getenv("ARCHIVE_ENABLED", "true").lower() == "true"
+
+
+class ArchiveChunk(Base):
+    """A batch of rows moved out of `source`, stored column by column and compressed."""
+    __tablename__ = 'archive_chunks'
+    __table_args__ = (
+        Index('ix_archive_chunks_source_range', 'source', 'min_key', 'max_key'),
+        Index('ix_archive_chunks_source_owner', 'source', 'owner', 'min_key'),
+        {'schema': PARTITION_ARCHIVE_SCHEMA},
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    source = Column(String(128), nullable=False)  # Qualified name of the hot table, e.g. voice_bot.payments
+    min_key = Column(TIMESTAMP, nullable=False)  # Smallest value of the archive key (created_at) in the chunk
+    max_key = Column(TIMESTAMP, nullable=False)
+    row_count = Column(Integer, nullable=False)
+    owner = Column(BigInteger, nullable=True)  # Owner column value shared by the chunk's rows, if chunked by owner
+    payload = Column(LargeBinary, nullable=False)  # zlib(JSON {column: [values]})
+    archived_at = Column(TIMESTAMP, server_default=func.current_timestamp(), nullable=False)
+
+    def __repr__(self):
+        return f"<ArchiveChunk(id={self.id}, source={self.source}, rows={self.row_count})>"
+
+
+def archive_cutoff(days: int, now: Optional[datetime] = None) -> datetime:
+    """
+    `days` before now, as a naive UTC timestamp.
+
+    Archived tables use naive TIMESTAMP columns filled by CURRENT_TIMESTAMP on a UTC
+    database, so the cutoff must be UTC too, whatever the app server's local zone.
+    """
+    return (now or datetime.now(timezone.utc)).astimezone(timezone.utc).replace(tzinfo=None) - timedelta(days=days)
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _decoder(column):
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return None
+    if python_type is datetime:
+        return datetime.fromisoformat
+    if python_type is date:
+        return date.fromisoformat
+    if python_type is Decimal:
+        return Decimal
+    return None
+
+
+class ColdArchive:
+    """
+    Moves rows of `table` older than a cutoff on `key` into archive chunks, and reads them back.
+
+    `eligible` is an optional SQL condition on top of the age cutoff, e.g. "only
+    completed payments". `owner` names an integer column to chunk by, so reads for
+    one owner only decode that owner's chunks.
+    """
+
+    def __init__(self, table: Table, key: str = "created_at", eligible: Optional[str] = None,
+                 owner: Optional[str] = None, batch_size: int = ARCHIVE_BATCH_SIZE):
+        self.table = table
+        self.key = key
+        self.eligible = eligible
+        self.owner = owner
+        self.batch_size = batch_size
+        self.source = f"{table.schema}.{table.name}" if table.schema else table.name
+        self.columns = [column.name for column in table.columns]
+        self.primary_key = [column.name for column in table.primary_key.columns]
+        self._decoders = {column.name: _decoder(column) for column in table.columns}
+
+    def encode(self, rows: List[dict]) -> bytes:
+        data = {name: [_encode_value(row[name]) for row in rows] for name in self.columns}
+        return zlib.compress(json.dumps(data, separators=(",", ":")).encode("utf-8"), ARCHIVE_COMPRESSION_LEVEL)
+
+    def decode(self, payload: bytes) -> List[dict]:
+        data = json.loads(zlib.decompress(payload))
+        # Columns added to the table after the chunk was written read as None
+        count = len(next(iter(data.values()), []))
+        columns = {}
+        for name in self.columns:
+            values = data.get(name, [None] * count)
+            decode = self._decoders[name]
+            columns[name] = [decode(value) if decode and value is not None else value for value in values]
+        return [{name: columns[name][index] for name in self.columns} for index in range(count)]
+
+    def archive_batch(self, db: Session, cutoff: Optional[datetime] = None, from_table: Optional[str] = None) -> int:
+        """
+        Move up to `batch_size` of the oldest eligible rows into one chunk (one per
+        owner, with an `owner` column) and commit.
+
+        `from_table` reads from another table with the same columns instead, such as a
+        detached partition; the chunk is still filed under this archive's source.
+        Returns the number of rows moved.
+        """
+        conditions = []
+        params = {"limit": self.batch_size}
+        if cutoff is not None:
+            conditions.append(f"{self.key} < :cutoff")
+            params["cutoff"] = cutoff
+        if self.eligible and from_table is None:
+            conditions.append(f"({self.eligible})")
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        table = from_table or self.source
+        key_columns = ", ".join(self.primary_key)
+        key_params = ", ".join(f":{name}" for name in self.primary_key)
+
+        try:
+            rows = db.execute(
+                text(f"""
+                    SELECT {', '.join(self.columns)} FROM {table}
+                    {where}
+                    ORDER BY {self.key}
+                    LIMIT :limit
+                    FOR UPDATE SKIP LOCKED
+                """),
+                params,
+            ).mappings().all()
+            if not rows:
+                db.rollback()
+                return 0
+
+            groups = {}
+            for row in rows:
+                groups.setdefault(row[self.owner] if self.owner else None, []).append(row)
+            for owner, group in groups.items():
+                keys = [row[self.key] for row in group]
+                db.add(ArchiveChunk(source=self.source, min_key=min(keys), max_key=max(keys), row_count=len(group),
+                                    owner=owner, payload=self.encode(group)))
+            db.execute(
+                text(f"DELETE FROM {table} WHERE ({key_columns}) IN (SELECT * FROM unnest({key_params}))"),
+                {name: [row[name] for row in rows] for name in self.primary_key},
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return len(rows)
+
+    def archive(self, db: Session, cutoff: datetime, from_table: Optional[str] = None,
+                max_batches: Optional[int] = None, pause: float = ARCHIVE_BATCH_PAUSE) -> int:
+        """Archive batches until nothing eligible is left (or `max_batches`); returns rows moved."""
+        moved = batches = 0
+        while max_batches is None or batches < max_batches:
+            count = self.archive_batch(db, cutoff, from_table)
+            moved += count
+            batches += 1
+            if count < self.batch_size:
+                break
+            if pause:
+                time.sleep(pause)
+        if moved:
+            logging.info(f"Archived {moved} rows of {from_table or self.source} older than {cutoff}")
+        return moved
+
+    def read(self, db: Session, start: Optional[datetime] = None, end: Optional[datetime] = None,
+             where: Optional[Dict[str, object]] = None, owner: Optional[int] = None) -> List[dict]:
+        """
+        Archived rows with start <= key < end, optionally of one `owner` and matching
+        `where` (column -> value).
+
+        Only chunks whose [min_key, max_key] overlaps the range, and of that owner, are
+        fetched and decoded.
+        """
+        query = db.query(ArchiveChunk.payload).filter(ArchiveChunk.source == self.source)
+        if owner is not None:
+            if not self.owner:
+                raise ValueError(f"{self.source} archive is not chunked by owner")
+            query = query.filter(ArchiveChunk.owner == owner)
+        if start is not None:
+            query = query.filter(ArchiveChunk.max_key >= start)
+        if end is not None:
+            query = query.filter(ArchiveChunk.min_key < end)
+
+        rows = []
+        for (payload,) in query.order_by(ArchiveChunk.min_key).all():
+            for row in self.decode(payload):
+                value = row[self.key]
+                if start is not None and value < start:
+                    continue
+                if end is not None and value >= end:
+                    continue
+                if where and any(row.get(name) != expected for name, expected in where.items()):
+                    continue
+                rows.append(row)
+        return rows
+
+    def stats(self, db: Session) -> dict:
+        row = db.query(
+            func.count(ArchiveChunk.id),
+            func.coalesce(func.sum(ArchiveChunk.row_count), 0),
+            func.coalesce(func.sum(func.length(ArchiveChunk.payload)), 0),
+            func.min(ArchiveChunk.min_key),
+            func.max(ArchiveChunk.max_key),
+        ).filter(ArchiveChunk.source == self.source).one()
+        return {
+            "source": self.source,
+            "chunks": row[0],
+            "rows": int(row[1]),
+            "compressed_bytes": int(row[2]),
+            "oldest": row[3].isoformat() if row[3] else None,
+            "newest": row[4].isoformat() if row[4] else None,
+        }
+
+
+class ArchiveJob:
+    """
+    Background task that runs `run_once` (one full archival pass) on startup and then
+    every `interval` seconds.
+    """
+
+    def __init__(self, run_once, interval: float = ARCHIVE_INTERVAL):
+        self.run_once = run_once
+        self.interval = interval
+        self._task = None
+        self.stats = {"runs": 0, "errors": 0, "last_run_at": None, "last_result": None}
+
+    async def run(self):
+        logging.info("Archive job started")
+        while True:
+            try:
+                self.stats["last_result"] = await run_in_threadpool(self.run_once)
+                self.stats["runs"] += 1
+                self.stats["last_run_at"] = time.time()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["errors"] += 1
+                logging.error(f"Archive job failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,29 @@
+# src/database/base.py
+"""
+The declarative base every model inherits from.
+
+All tables register on one MetaData, so Alembic autogenerate (alembic/env.py) compares
+the whole schema, including the indexes declared on the models, against the database.
+"""
+import importlib
+from sqlalchemy.orm import declarative_base
+
+Base = declarative_base()
+
+# Modules that define models; import_models() loads them so Base.metadata is complete
+MODEL_MODULES = (
+    "src.routers.users.models",
+    "src.routers.payment.models",
+    "src.routers.feedback.models",
+    "src.routers.notifications.models",
+    "src.routers.dashboard.models",
+    "src.routers.questions.models",
+    "src.database.archive",
+)
+
+
+def import_models():
+    """Import every model module and return the shared MetaData."""
+    for module in MODEL_MODULES:
+        importlib.import_module(module)
+    return Base.metadata
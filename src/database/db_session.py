@@ -1,23 +1,49 @@
 import os
 import logging
+import threading
 import psycopg2
 from dotenv import load_dotenv
 from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import NullPool
+from .base import Base
 
 
 # Loading the environment variables from .env
 load_dotenv()
 
-Base = declarative_base()
-
 class Database:
-    """ This Class contains all the methods related to the Database utitlities."""
-    
+    """
+    This Class contains all the methods related to the Database utitlities.
+
+    The settings are read and the engine is created on first use, so importing a
+    module that holds a Database (src.utils.db, the routers) needs no database
+    configuration, e.g. in the offline benchmarks.
+    """
+
     def __init__(self):
+        self._engine = None
+        self._session_local = None
+        self._configure_lock = threading.Lock()
+
+    @property
+    def engine(self):
+        self._configure()
+        return self._engine
+
+    def SessionLocal(self, **kwargs):
+        """A new Session; also usable as a session factory before anything is configured."""
+        self._configure()
+        return self._session_local(**kwargs)
+
+    def _configure(self):
+        if self._engine is not None:
+            return
+        with self._configure_lock:
+            if self._engine is None:
+                self._connect()
 
+    def _connect(self):
         # Configuring the Database Username,password details.
         try:
             self.db_username = os.environ["DB_USERNAME"]
@@ -27,13 +53,14 @@ class Database:
             raise
 
         self.db_host = os.environ["DB_HOST"]
+        self.db_port = int(os.getenv("DB_PORT", "5432"))
         self.db_name = os.environ["DB_NAME"]  # Replace with your database name if it's not "postgres"
 
         try:
             # Default to the "public" schema
-            connectionString = f'postgresql://{self.db_username}:{self.db_password}@{self.db_host}/{self.db_name}'
+            connectionString = f'postgresql://{self.db_username}:{self.db_password}@{self.db_host}:{self.db_port}/{self.db_name}'
             print(connectionString)
-            self.engine = create_engine(
+            engine = create_engine(
                 connectionString,
                 echo=False,
                 poolclass=NullPool
@@ -42,7 +69,8 @@ class Database:
             logging.error(f'Error while connecting to the database: {e}')
             raise
 
-        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self._session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        self._engine = engine
 
     def get_session(self):
         """ This function returns the object of SessionLocal."""
@@ -56,12 +84,13 @@ class Database:
         """This function is used to connect with the Database."""
         cnx = None
         cursor = None
+        self._configure()
         try:
             cnx = psycopg2.connect(
                         user=self.db_username, 
                                 password=self.db_password, 
                                 host=self.db_host, 
-                                port=5432,
+                                port=self.db_port,
                                 database=self.db_name)
             cursor = cnx.cursor()
             return cnx, cursor
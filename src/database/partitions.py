@@ -0,0 +1,266 @@
+# src/database/partitions.py
+"""
+Monthly range partitions: create them ahead of time, detach and archive old ones.
+
+A table partitioned with `PARTITION BY RANGE (<column>)` gets one child per calendar
+month, named `<table>_pYYYY_MM` and covering [first of month, first of next month).
+`ensure()` keeps `premake_months` of partitions ahead of today; the maintenance
+worker does that on startup and then periodically. A DEFAULT partition, when the
+table has one, catches rows no month covers yet; `create()` moves them into the
+month's partition. Partitions older than `retain_months` (0, the default, keeps
+everything) are detached and moved to the archive schema, where they stay
+queryable but drop out of the parent's scans.
+"""
+import os
+import re
+import time
+import asyncio
+from datetime import date
+from typing import List, Optional, Tuple
+from dotenv import load_dotenv
+from loguru import logger as logging
+from sqlalchemy import text
+from starlette.concurrency import run_in_threadpool
+
+load_dotenv()
+
+PARTITION_PREMAKE_MONTHS = int(os.getenv("PARTITION_PREMAKE_MONTHS", "3"))
+PARTITION_ARCHIVE_SCHEMA = os.getenv("PARTITION_ARCHIVE_SCHEMA", "voice_bot_archive")
+PARTITION_MAINTENANCE_INTERVAL = float(os.getenv("PARTITION_MAINTENANCE_INTERVAL", str(6 * 60 * 60)))
+PARTITION_MAINTENANCE_ENABLED = os.getenv("PARTITION_MAINTENANCE_ENABLED", "true").lower() == "true"
+
+_BOUND_RE = re.compile(r"FROM \('(\d{4})-(\d{2})-01[^']*'\) TO \('(\d{4})-(\d{2})-01[^']*'\)")
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+class MonthlyPartitions:
+    """Partition management for one table range-partitioned by month on `column`."""
+
+    def __init__(self, schema: str, table: str, column: str = "created_at",
+                 premake_months: int = PARTITION_PREMAKE_MONTHS, retain_months: int = 0,
+                 archive_schema: str = PARTITION_ARCHIVE_SCHEMA):
+        self.schema = schema
+        self.table = table
+        self.column = column
+        self.premake_months = premake_months
+        # 0 keeps every partition attached
+        self.retain_months = retain_months
+        self.archive_schema = archive_schema
+
+    @property
+    def qualified_name(self) -> str:
+        return f"{self.schema}.{self.table}"
+
+    def partition_name(self, month: date) -> str:
+        return f"{self.table}_p{month.year:04d}_{month.month:02d}"
+
+    def _children(self, connection) -> List[Tuple[str, str]]:
+        """(name, partition bound expression) of every attached partition."""
+        return connection.execute(
+            text("""
+                SELECT child.relname, pg_get_expr(child.relpartbound, child.oid)
+                FROM pg_inherits
+                JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+                JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+                JOIN pg_namespace ns ON ns.oid = parent.relnamespace
+                WHERE ns.nspname = :schema AND parent.relname = :table
+            """),
+            {"schema": self.schema, "table": self.table},
+        ).all()
+
+    def default_partition(self, connection) -> Optional[str]:
+        """Name of the DEFAULT partition, if the table has one."""
+        return next((name for name, bound in self._children(connection) if bound == "DEFAULT"), None)
+
+    def existing(self, connection) -> List[Tuple[str, date]]:
+        """(name, month) of every attached monthly partition, oldest first."""
+        partitions = []
+        for name, bound in self._children(connection):
+            if bound == "DEFAULT":
+                continue
+            match = _BOUND_RE.search(bound or "")
+            if match is None:
+                logging.warning(f"Partition {name} of {self.qualified_name} is not a monthly range: {bound}")
+                continue
+            partitions.append((name, date(int(match.group(1)), int(match.group(2)), 1)))
+        return sorted(partitions, key=lambda partition: partition[1])
+
+    def create(self, connection, month: date) -> str:
+        """
+        Create the partition for `month`.
+
+        Rows of that month already in the DEFAULT partition would make a plain CREATE
+        fail, so they are moved into a new table that is then attached, in one
+        transaction; `connection` must be in autocommit mode, as in `maintain()`.
+        """
+        name = self.partition_name(month)
+        start, end = month.isoformat(), add_months(month, 1).isoformat()
+        default = self.default_partition(connection)
+        in_range = f"{self.column} >= '{start}' AND {self.column} < '{end}'"
+        if default is None or not connection.execute(
+            text(f"SELECT EXISTS (SELECT 1 FROM {self.schema}.{default} WHERE {in_range})")
+        ).scalar():
+            connection.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {self.schema}.{name} PARTITION OF {self.qualified_name} "
+                f"FOR VALUES FROM ('{start}') TO ('{end}')"
+            ))
+            return name
+
+        logging.warning(f"Moving {self.qualified_name} rows of {start[:7]} out of {default} into {name}")
+        try:
+            connection.execute(text(f"""
+                BEGIN;
+                CREATE TABLE {self.schema}.{name} (LIKE {self.qualified_name} INCLUDING DEFAULTS);
+                WITH moved AS (DELETE FROM {self.schema}.{default} WHERE {in_range} RETURNING *)
+                INSERT INTO {self.schema}.{name} SELECT * FROM moved;
+                ALTER TABLE {self.qualified_name} ATTACH PARTITION {self.schema}.{name}
+                    FOR VALUES FROM ('{start}') TO ('{end}');
+                COMMIT;
+            """))
+        except Exception:
+            connection.execute(text("ROLLBACK"))
+            raise
+        return name
+
+    def missing(self, connection, today: Optional[date] = None) -> List[date]:
+        """Months from this one through `premake_months` ahead that have no partition yet."""
+        current = month_start(today or date.today())
+        attached = {month for _, month in self.existing(connection)}
+        upcoming = [add_months(current, offset) for offset in range(self.premake_months + 1)]
+        return [month for month in upcoming if month not in attached]
+
+    def ensure(self, connection, today: Optional[date] = None) -> List[str]:
+        """Create any missing partitions from this month through `premake_months` ahead."""
+        return [self.create(connection, month) for month in self.missing(connection, today)]
+
+    def expired(self, connection, today: Optional[date] = None) -> List[str]:
+        """Attached partitions entirely older than the retention window."""
+        if self.retain_months <= 0:
+            return []
+        cutoff = add_months(month_start(today or date.today()), -self.retain_months)
+        return [name for name, month in self.existing(connection) if month < cutoff]
+
+    def archive(self, connection, name: str):
+        """
+        Detach a partition and move it to the archive schema.
+
+        Uses DETACH ... CONCURRENTLY on PostgreSQL 14+, which only takes a SHARE UPDATE
+        EXCLUSIVE lock on the parent; it cannot run in a transaction, so `connection`
+        must be in autocommit mode.
+        """
+        concurrently = connection.dialect.server_version_info >= (14,)
+        connection.execute(text(
+            f"ALTER TABLE {self.qualified_name} DETACH PARTITION {self.schema}.{name}"
+            f"{' CONCURRENTLY' if concurrently else ''}"
+        ))
+        connection.execute(text(f"CREATE SCHEMA IF NOT EXISTS {self.archive_schema}"))
+        connection.execute(text(f"ALTER TABLE {self.schema}.{name} SET SCHEMA {self.archive_schema}"))
+
+    def finalize_pending_detaches(self, connection) -> List[str]:
+        """Finish detaches a crash or cancel left half done (PostgreSQL 14+)."""
+        if connection.dialect.server_version_info < (14,):
+            return []
+        names = connection.execute(
+            text("""
+                SELECT child.relname
+                FROM pg_inherits
+                JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+                JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+                JOIN pg_namespace ns ON ns.oid = parent.relnamespace
+                WHERE ns.nspname = :schema AND parent.relname = :table AND pg_inherits.inhdetachpending
+            """),
+            {"schema": self.schema, "table": self.table},
+        ).scalars().all()
+        for name in names:
+            connection.execute(text(f"ALTER TABLE {self.qualified_name} DETACH PARTITION {self.schema}.{name} FINALIZE"))
+        return list(names)
+
+    def maintain(self, engine, today: Optional[date] = None, dry_run: bool = False) -> dict:
+        """
+        One maintenance pass: create upcoming partitions, archive expired ones.
+
+        Runs on its own autocommit connection under an advisory lock, so several app
+        workers can call it at once and only one does the work.
+        """
+        stats = {"table": self.qualified_name, "created": [], "archived": [], "finalized": [], "locked": False}
+        lock_key = f"partition-maintenance:{self.qualified_name}"
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            if not connection.execute(text("SELECT pg_try_advisory_lock(hashtext(:key))"), {"key": lock_key}).scalar():
+                return stats
+            stats["locked"] = True
+            try:
+                if dry_run:
+                    stats["created"] = [self.partition_name(month) for month in self.missing(connection, today)]
+                    stats["archived"] = self.expired(connection, today)
+                    return stats
+
+                stats["finalized"] = self.finalize_pending_detaches(connection)
+                stats["created"] = self.ensure(connection, today)
+                for name in self.expired(connection, today):
+                    self.archive(connection, name)
+                    stats["archived"].append(name)
+            finally:
+                connection.execute(text("SELECT pg_advisory_unlock(hashtext(:key))"), {"key": lock_key})
+        if stats["created"] or stats["archived"]:
+            logging.info(f"Partitions of {self.qualified_name}: created {stats['created']}, "
+                         f"archived {stats['archived']}")
+        return stats
+
+
+class PartitionMaintainer:
+    """
+    Background task that runs `maintain()` for each partitioned table on startup and
+    then every `interval` seconds.
+    """
+
+    def __init__(self, database, partition_sets: List[MonthlyPartitions],
+                 interval: float = PARTITION_MAINTENANCE_INTERVAL):
+        self.database = database
+        self.partition_sets = partition_sets
+        self.interval = interval
+        self._task = None
+        self.stats = {"runs": 0, "created": 0, "archived": 0, "errors": 0, "last_run_at": None}
+
+    def run_once(self) -> List[dict]:
+        results = []
+        for partitions in self.partition_sets:
+            result = partitions.maintain(self.database.engine)
+            self.stats["created"] += len(result["created"])
+            self.stats["archived"] += len(result["archived"])
+            results.append(result)
+        self.stats["runs"] += 1
+        self.stats["last_run_at"] = time.time()
+        return results
+
+    async def run(self):
+        logging.info("Partition maintenance started")
+        while True:
+            try:
+                await run_in_threadpool(self.run_once)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["errors"] += 1
+                logging.error(f"Partition maintenance failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
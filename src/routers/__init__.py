@@ -7,6 +7,10 @@ from .users.models.users import User
 from .payment.main import router as payment_router
 from .payment.models.payment import Payment
 from .payment.schemas.payment import CreatePaymentLinkSchema
+from .notifications.main import router as notifications_router
+from .media.main import router as media_router
+from .interview.main import router as interview_router
+from .questions.main import router as questions_router
 __all__ = [
     "users_router",
     "feedback_router",
@@ -15,5 +19,9 @@ __all__ = [
     "User",
     "payment_router",
     "CreatePaymentLinkSchema",
-    "Payment"
+    "Payment",
+    "notifications_router",
+    "media_router",
+    "interview_router",
+    "questions_router"
            ]
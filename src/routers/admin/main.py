@@ -1,14 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Body
+from fastapi import APIRouter, Depends, HTTPException, status, Body, Query
 from sqlalchemy.orm import Session
 from loguru import logger as logging
 from src.database import Database
 from src.utils.jwt import get_email_from_token
+from src.utils.circuit_breaker import breaker_metrics
 from fastapi.security import OAuth2PasswordBearer
 # from . import models
 from src.routers.users.models import User as users_model
 from src.routers.payment.models import Payment
+from src.routers.payment.archive import payments_in_range
 from . import schema
-from typing import List
+from typing import List, Optional
+from datetime import date
 
 # OAuth2 scheme for token authentication
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
@@ -205,11 +208,17 @@ def update_appointment(
 @admin_router.get("/payments", response_model=schema.AdminPaymentListResponse)
 def list_payments_by_status(
     status: str,  # Query parameter for payment status ("pending" or "success")
+    created_from: Optional[date] = Query(None, description="Only payments created on or after this date"),
+    created_to: Optional[date] = Query(None, description="Only payments created on or before this date"),
     db: Session = Depends(get_db),
     admin_user = Depends(get_admin_user)
 ):
     """
     Retrieve a list of all payments filtered by status (pending or success) for the admin panel.
+
+    A `created_from`/`created_to` range only reads the monthly partitions it covers,
+    and includes archived payments from that range; without one, only payments
+    still in the hot table are listed.
     """
     try:
         if status.lower() not in ["pending", "successful"]:
@@ -218,7 +227,8 @@ def list_payments_by_status(
                 detail="Invalid status. Use 'pending' or 'success'."
             )
         
-        payments = db.query(Payment).filter(Payment.link_status == status.lower()).all()
+        # A date range also reads archived payments (src/routers/payment/archive.py)
+        payments = payments_in_range(db, created_from, created_to, link_status=status.lower())
         print(f"payments---------{payments}")
         return {
             "success": True,
@@ -289,3 +299,16 @@ def list_expiring_payments(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An unexpected error occurred while retrieving expiring payments."
         )
+
+
+@admin_router.get("/circuit-breakers")
+def get_circuit_breakers(admin_user = Depends(get_admin_user)):
+    """
+    State of the circuit breakers guarding outbound dependencies (Cashfree, SMTP, S3).
+    """
+    return {
+        "success": True,
+        "status": 200,
+        "message": "Circuit breaker state fetched successfully",
+        "data": breaker_metrics(),
+    }
@@ -0,0 +1,92 @@
+"""
+Archival of old interview transcripts.
+
+QnA rows created more than QNA_ARCHIVE_AFTER_DAYS ago (UTC) move from `voice_bot.qna`
+into compressed archive chunks (src/database/archive.py), except turns of a session
+that is still active. Chunks are per user, so one user's archived history is read
+without decoding anyone else's.
+
+`archived_qna()` is the read path; `qna_page()` falls through to it once a user's hot
+history is exhausted, since archived turns are older than every hot one. Run a pass
+by hand with:
+
+    python -m src.routers.dashboard.archive [--dry-run]
+"""
+import os
+import sys
+import json
+import argparse
+from typing import List, Optional
+from dotenv import load_dotenv
+from loguru import logger as logging
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from src.database import Database
+from src.database.archive import ColdArchive, archive_cutoff
+from .models import QnA
+
+load_dotenv()
+
+QNA_ARCHIVE_AFTER_DAYS = int(os.getenv("QNA_ARCHIVE_AFTER_DAYS", "365"))
+
+qna_archive = ColdArchive(
+    QnA.__table__,
+    key="created_at",
+    owner="user_id",
+    eligible="session_id IS NULL OR NOT EXISTS (SELECT 1 FROM voice_bot.interview_sessions s "
+             "WHERE s.id = qna.session_id AND s.status = 'active')",
+)
+
+
+def run_qna_archival(session_factory, dry_run: bool = False) -> dict:
+    """One archival pass over the QnA rows past the cutoff."""
+    cutoff = archive_cutoff(QNA_ARCHIVE_AFTER_DAYS)
+    db = session_factory()
+    try:
+        if dry_run:
+            eligible = db.execute(
+                text(f"SELECT count(*) FROM {qna_archive.source} "
+                     f"WHERE created_at < :cutoff AND ({qna_archive.eligible})"),
+                {"cutoff": cutoff},
+            ).scalar()
+            return {"cutoff": cutoff.isoformat(), "eligible": eligible}
+
+        return {"cutoff": cutoff.isoformat(), "archived": qna_archive.archive(db, cutoff)}
+    finally:
+        db.close()
+
+
+def archived_qna(db: Session, user_id: int, session_id: Optional[int] = None,
+                 before_id: Optional[int] = None) -> List[dict]:
+    """
+    A user's archived QnA rows, newest first, optionally of one session and below `before_id`.
+
+    Only the user's own chunks are decoded, so the cost follows the length of their
+    archived history, not the size of the archive.
+    """
+    where = {"session_id": session_id} if session_id is not None else None
+    rows = [row for row in qna_archive.read(db, where=where, owner=user_id)
+            if before_id is None or row["id"] < before_id]
+    return sorted(rows, key=lambda row: row["id"], reverse=True)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Move QnA rows past the retention window to the archive.")
+    parser.add_argument("--dry-run", action="store_true", help="Count eligible rows without moving them")
+    args = parser.parse_args(argv)
+
+    database = Database()
+    try:
+        result = run_qna_archival(database.SessionLocal, dry_run=args.dry_run)
+        with database.SessionLocal() as db:
+            result["archive"] = qna_archive.stats(db)
+    except Exception as e:
+        logging.error(f"QnA archival failed: {e}")
+        return 1
+
+    print(json.dumps({**result, "dry_run": args.dry_run}, indent=2, default=str))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
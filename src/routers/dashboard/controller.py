@@ -0,0 +1,45 @@
+from typing import List, Optional, Tuple
+from sqlalchemy.orm import Session
+from .models import QnA
+from .archive import archived_qna
+
+QNA_PAGE_SIZE = 50
+QNA_MAX_PAGE_SIZE = 200
+
+
+def qna_page(db: Session, user_id: int, limit: int = QNA_PAGE_SIZE, before_id: Optional[int] = None,
+             session_id: Optional[int] = None) -> Tuple[List[dict], Optional[int]]:
+    """
+    One page of a user's QnA history, newest first, and the cursor for the next page.
+
+    Keyset pagination on `id DESC`: the next page starts below the last id returned,
+    so every page is a bounded range scan of ix_qna_user_id_id (or ix_qna_session_id_id)
+    however long the history is. The cursor is None on the last page. Once the hot
+    rows run out, the page is filled from the archive, which only holds older turns.
+    """
+    query = db.query(
+        QnA.id, QnA.session_id, QnA.question_asked, QnA.answer_given, QnA.created_at, QnA.updated_at
+    ).filter(QnA.user_id == user_id)
+    if session_id is not None:
+        query = query.filter(QnA.session_id == session_id)
+    if before_id is not None:
+        query = query.filter(QnA.id < before_id)
+    # One extra row tells whether another page follows
+    rows = [dict(row._mapping) for row in query.order_by(QnA.id.desc()).limit(limit + 1)]
+    if len(rows) <= limit:
+        below = rows[-1]["id"] if rows else before_id
+        rows += archived_qna(db, user_id, session_id, below)[:limit + 1 - len(rows)]
+
+    next_cursor = rows[limit - 1]["id"] if len(rows) > limit else None
+    qna_list = [
+        {
+            "qna_id": row["id"],
+            "session_id": row["session_id"],
+            "question_asked": row["question_asked"],
+            "answer_given": row["answer_given"],
+            "created_at": row["created_at"].isoformat() if row["created_at"] else None,
+            "updated_at": row["updated_at"].isoformat() if row["updated_at"] else None
+        }
+        for row in rows[:limit]
+    ]
+    return qna_list, next_cursor
@@ -1,12 +1,20 @@
-from src.utils.db import get_db
+from src.utils.db import get_db, db_util
 from sqlalchemy.orm import Session
 from loguru import logger as logging
 from src.utils.jwt import  get_email_from_token
 from fastapi.security import OAuth2PasswordBearer
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Optional
 from src.routers.users.models import users as users_model
-import json
+from .controller import qna_page, QNA_PAGE_SIZE, QNA_MAX_PAGE_SIZE
+from .transcript import TranscriptBuffer, TRANSCRIPT_FLUSHER_ENABLED
+from .reports import report_analysis
+from .scoring import SessionScorer, score_and_record
+from .archive import run_qna_archival
+from .models import InterviewReport, InterviewReportAggregate, InterviewSession, SessionStatus
+from src.routers.questions.embeddings import load_embedder
+from src.database.archive import ArchiveJob, ARCHIVE_ENABLED
 
 # Defining the router
 router = APIRouter(
@@ -15,141 +23,160 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
+# Buffers the QnA turns of live interviews and writes them in multi-row INSERTs
+transcript_buffer = TranscriptBuffer(db_util.SessionLocal)
+# Scores finished interviews against the question bank's reference answers
+session_scorer = SessionScorer(load_embedder())
+
+@router.on_event("startup")
+async def start_transcript_flusher():
+    if TRANSCRIPT_FLUSHER_ENABLED:
+        transcript_buffer.start()
+
+@router.on_event("shutdown")
+async def stop_transcript_flusher():
+    await transcript_buffer.stop()
+
+# Moves old QnA rows into compressed archive chunks
+qna_archive_job = ArchiveJob(lambda: run_qna_archival(db_util.SessionLocal))
+
+@router.on_event("startup")
+async def start_qna_archive_job():
+    if ARCHIVE_ENABLED:
+        qna_archive_job.start()
+
+@router.on_event("shutdown")
+async def stop_qna_archive_job():
+    await qna_archive_job.stop()
+
 
 @router.get("/get-user-qna/")
-async def get_user_qna(
+def get_user_qna(
+    limit: int = Query(QNA_PAGE_SIZE, ge=1, le=QNA_MAX_PAGE_SIZE, description="QnA records per page"),
+    before_id: Optional[int] = Query(None, description="Cursor: the next_cursor of the previous page"),
+    session_id: Optional[int] = Query(None, description="Only QnA records of this interview session"),
     db: Session = Depends(get_db),
     token: str = Depends(oauth2_scheme)
 ):
+    """
+    A page of the user's QnA history, newest first.
+
+    Pass the returned `next_cursor` as `before_id` to fetch the next page; it is null
+    on the last page. A plain `def` endpoint, so FastAPI runs the queries in its
+    threadpool instead of on the event loop.
+    """
     try:
         # Decode email from the token
         email = get_email_from_token(token)
-        user = db.query(users_model.User).filter(users_model.User.email == email).first()
+        user_id = db.query(users_model.User.id).filter(users_model.User.email == email).scalar()
 
-        if not user:
+        if not user_id:
             raise HTTPException(status_code=404, detail="User not found.")
 
-         # Fetch all QnA records for the user, sorted by id (question_id) in descending order
-        qna_records = (
-            db.query(qna_models.QnA)
-            .filter(qna_models.QnA.user_id == user.id)
-            .order_by(qna_models.QnA.id.desc())  # Replace `id` with `question_id` if applicable
-            .all()
-        )
+        qna_list, next_cursor = qna_page(db, user_id, limit, before_id, session_id)
 
-        if not qna_records:
+        if not qna_list:
             return {
                 "success": False,
                 "status": 200,
                 "message": "No QnA records found for the user.",
-                "qna_list": []
-            }
-
-        # Format the data into a list of dictionaries
-        qna_list = [
-            {
-                "qna_id": qna.id,
-                "session_id": qna.session_id,
-                "question_asked": qna.question_asked,
-                "answer_given": qna.answer_given,
-                "created_at": qna.created_at.isoformat() if qna.created_at else None,
-                "updated_at": qna.updated_at.isoformat() if qna.updated_at else None
+                "qna_list": [],
+                "next_cursor": None
             }
-            for qna in qna_records
-        ]
 
         return {
             "success": True,
             "status": 200,
             "message": "QnA records retrieved successfully.",
-            "qna_list": qna_list
+            "qna_list": qna_list,
+            "next_cursor": next_cursor
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error in get_user_qna: {e}")
         raise HTTPException(status_code=500, detail="An error occurred while retrieving QnA records.")
     
 
-# @router.get("/interview-report-analysis/")
-# async def interview_report_analysis(
-#     db: Session = Depends(get_db),
-#     token: str = Depends(oauth2_scheme)
-# ):
-#     """
-#     Provides an analysis of the user's interview performance, focusing on job title and job description.
-#     """
-#     try:
-#         # Decode email from token
-#         email = get_email_from_token(token)
-#         user = db.query(users_model.User).filter(users_model.User.email == email).first()
-
-#         if not user:
-#             return {"success": False, "status": 404, "message": "User not found."}
-
-#         # Fetch interview reports
-#         reports = db.query(qna.InterviewReport).filter(qna.InterviewReport.user_email == user.email).all()
-
-#         if not reports:
-#             return {
-#                 "success": True,
-#                 "status": 200,
-#                 "message": "No interview reports found for this user.",
-#                 "analysis": {
-#                     "Job Title": "N/A",
-#                     "Job Description": "N/A",
-#                     "Total Reports": 0,
-#                     "Performance Overview": {},
-#                     "Improvement Areas": []
-#                 }
-#             }
-
-#         # Collect job title and description
-#         job_title = reports[-1].job_title if reports[-1].job_title else "N/A"
-#         job_description = reports[-1].job_description if reports[-1].job_description else "N/A"
-
-#         # Calculate overall performance metrics
-#         total_reports = len(reports)
-#         total_questions = sum(report.total_questions for report in reports)
-#         total_score = sum(report.total_score for report in reports)
-#         max_possible_score = sum(report.max_possible_score for report in reports)
-#         avg_score_percentage = (total_score / max_possible_score) * 100 if max_possible_score > 0 else 0
-
-#         # Aggregate improvement areas
-#         all_improvement_areas = []
-#         for report in reports:
-#             improvement_areas = report.areas_for_improvement
-#             if improvement_areas:
-#                 all_improvement_areas.extend(json.loads(improvement_areas))
-
-#         # Identify top improvement areas
-#         top_improvement_areas = {}
-#         for area in all_improvement_areas:
-#             question = area["question"]
-#             top_improvement_areas[question] = top_improvement_areas.get(question, 0) + 1
-#         top_areas_for_improvement = sorted(
-#             top_improvement_areas.items(), key=lambda x: x[1], reverse=True
-#         )[:5]
-
-#         # Format performance overview
-#         performance_overview = {
-#             "Total Reports": total_reports,
-#             "Total Questions": total_questions,
-#             "Total Score": total_score,
-#             "Maximum Possible Score": max_possible_score,
-#             "Average Score Percentage": avg_score_percentage
-#         }
-
-#         return {
-#             "success": True,
-#             "status": 200,
-#             "message": "Interview report analysis fetched successfully.",
-#             "analysis": {
-#                 "Job Title": job_title,
-#                 "Job Description": job_description,
-#                 "Performance Overview": performance_overview,
-#                 "Improvement Areas": top_areas_for_improvement
-#             }
-#         }
-
-#     except Exception as e:
-#         logging.error(f"Error in interview_report_analysis: {e}")
-#         return {"success": False, "status": 500, "message": "Internal server error."}
+@router.get("/interview-report-analysis/")
+def interview_report_analysis(
+    db: Session = Depends(get_db),
+    token: str = Depends(oauth2_scheme)
+):
+    """
+    Provides an analysis of the user's interview performance, focusing on job title and job description.
+
+    Reads the user's InterviewReportAggregate row, kept up to date as reports are
+    recorded, so the cost does not grow with the number of interviews.
+    """
+    try:
+        # Decode email from token
+        email = get_email_from_token(token)
+        user_email = db.query(users_model.User.email).filter(users_model.User.email == email).scalar()
+
+        if not user_email:
+            return {"success": False, "status": 404, "message": "User not found."}
+
+        aggregate = db.get(InterviewReportAggregate, user_email)
+
+        if aggregate is None or not aggregate.total_reports:
+            return {
+                "success": True,
+                "status": 200,
+                "message": "No interview reports found for this user.",
+                "analysis": report_analysis(None)
+            }
+
+        return {
+            "success": True,
+            "status": 200,
+            "message": "Interview report analysis fetched successfully.",
+            "analysis": report_analysis(aggregate)
+        }
+
+    except Exception as e:
+        logging.error(f"Error in interview_report_analysis: {e}")
+        return {"success": False, "status": 500, "message": "Internal server error."}
+
+
+@router.post("/score-session/{session_id}")
+def score_session(
+    session_id: int,
+    db: Session = Depends(get_db),
+    token: str = Depends(oauth2_scheme)
+):
+    """
+    Score a finished interview session of the user and record its report.
+
+    Returns the score of each question and the report totals. Only a completed
+    session with a question from the bank can be scored, and only once: scoring it
+    again is a 409.
+    """
+    email = get_email_from_token(token)
+    user_id = db.query(users_model.User.id).filter(users_model.User.email == email).scalar()
+    session = db.get(InterviewSession, session_id)
+    if not user_id or session is None or session.user_id != user_id:
+        raise HTTPException(status_code=404, detail="Interview session not found.")
+    if session.status == SessionStatus.active.value:
+        raise HTTPException(status_code=409, detail="Interview session is still in progress.")
+    if session.status == SessionStatus.abandoned.value:
+        raise HTTPException(status_code=409, detail="Interview session was abandoned.")
+
+    try:
+        scored = score_and_record(db, session_scorer, [session_id])
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logging.error(f"Error in score_session: {e}")
+        raise HTTPException(status_code=500, detail="An error occurred while scoring the interview session.")
+    if not scored:
+        if db.query(InterviewReport.id).filter(InterviewReport.session_id == session_id).first():
+            raise HTTPException(status_code=409, detail="Interview session has already been scored.")
+        raise HTTPException(status_code=422, detail="Interview session has no questions that can be scored.")
+
+    return {
+        "success": True,
+        "status": 200,
+        "message": "Interview session scored successfully.",
+        "report": scored[0][1]
+    }
@@ -0,0 +1,9 @@
+from .dashboard import QnA, InterviewSession, SessionStatus, InterviewReport, InterviewReportAggregate
+
+__all__ = [
+    "QnA",
+    "InterviewSession",
+    "SessionStatus",
+    "InterviewReport",
+    "InterviewReportAggregate"
+]
\ No newline at end of file
@@ -0,0 +1,101 @@
+from sqlalchemy import Column, BigInteger, Integer, String, Text, Float, TIMESTAMP, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from src.database.base import Base
+from sqlalchemy import func
+import enum
+
+
+class SessionStatus(str, enum.Enum):
+    active = "active"
+    completed = "completed"
+    abandoned = "abandoned"
+
+
+class InterviewSession(Base):
+    """One interview: the questions and answers of a session are its QnA rows."""
+    __tablename__ = 'interview_sessions'
+    __table_args__ = (
+        Index('ix_interview_sessions_user_id_id', 'user_id', 'id'),
+        {'schema': 'voice_bot'},
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, nullable=False)
+    job_title = Column(String(255), nullable=True)
+    job_description = Column(Text, nullable=True)
+    status = Column(String(20), nullable=False, default=SessionStatus.active.value)
+    question_count = Column(Integer, nullable=False, default=0)  # QnA rows written so far
+    started_at = Column(TIMESTAMP, server_default=func.current_timestamp(), nullable=False)
+    ended_at = Column(TIMESTAMP, nullable=True)
+
+    def __repr__(self):
+        return f"<InterviewSession(id={self.id}, user_id={self.user_id}, status={self.status})>"
+
+
+class QnA(Base):
+    """One question asked during an interview and the candidate's answer."""
+    __tablename__ = 'qna'
+    __table_args__ = (
+        # Keyset pagination of a user's history, newest first (get_user_qna)
+        Index('ix_qna_user_id_id', 'user_id', 'id'),
+        Index('ix_qna_session_id_id', 'session_id', 'id'),
+        {'schema': 'voice_bot'},
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, nullable=False)
+    session_id = Column(BigInteger, nullable=True)  # InterviewSession.id
+    question_asked = Column(Text, nullable=False)
+    answer_given = Column(Text, nullable=True)
+    created_at = Column(TIMESTAMP, server_default=func.current_timestamp())
+    updated_at = Column(TIMESTAMP, server_default=func.current_timestamp(), onupdate=func.current_timestamp())
+
+    def __repr__(self):
+        return f"<QnA(id={self.id}, user_id={self.user_id}, session_id={self.session_id})>"
+
+
+class InterviewReport(Base):
+    """The scored result of one interview."""
+    __tablename__ = 'interview_reports'
+    __table_args__ = (
+        Index('ix_interview_reports_user_email_id', 'user_email', 'id'),
+        {'schema': 'voice_bot'},
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    user_email = Column(String(255), nullable=False)
+    session_id = Column(BigInteger, nullable=True)  # InterviewSession.id
+    job_title = Column(String(255), nullable=True)
+    job_description = Column(Text, nullable=True)
+    total_questions = Column(Integer, nullable=False, default=0)
+    total_score = Column(Float, nullable=False, default=0)
+    max_possible_score = Column(Float, nullable=False, default=0)
+    areas_for_improvement = Column(Text, nullable=True)  # JSON list of {"question": ..., ...}
+    created_at = Column(TIMESTAMP, server_default=func.current_timestamp())
+
+    def __repr__(self):
+        return f"<InterviewReport(id={self.id}, user_email={self.user_email}, total_score={self.total_score})>"
+
+
+class InterviewReportAggregate(Base):
+    """
+    Running totals over all of a user's InterviewReports, updated in the transaction
+    that inserts each report (src/routers/dashboard/reports.py).
+    """
+    __tablename__ = 'interview_report_aggregates'
+    __table_args__ = {'schema': 'voice_bot'}
+
+    user_email = Column(String(255), primary_key=True)
+    total_reports = Column(Integer, nullable=False, default=0)
+    total_questions = Column(Integer, nullable=False, default=0)
+    total_score = Column(Float, nullable=False, default=0)
+    max_possible_score = Column(Float, nullable=False, default=0)
+    score_buckets = Column(JSONB, nullable=False, default=dict)  # Reports per score-percentage decile, e.g. {"70-79": 3}
+    improvement_areas = Column(JSONB, nullable=False, default=dict)  # question -> times it needed improvement
+    last_report_id = Column(BigInteger, nullable=True)
+    last_job_title = Column(String(255), nullable=True)
+    last_job_description = Column(Text, nullable=True)
+    updated_at = Column(TIMESTAMP, server_default=func.current_timestamp(), onupdate=func.current_timestamp())
+
+    def __repr__(self):
+        return f"<InterviewReportAggregate(user_email={self.user_email}, total_reports={self.total_reports})>"
@@ -0,0 +1,178 @@
+"""
+Interview reports and the per-user aggregates behind the report analysis.
+
+`record_interview_report()` inserts a report and folds it into the user's
+InterviewReportAggregate row in the same transaction: running totals, a count per
+score-percentage decile and a count per question that needed improvement. The
+analysis endpoint then reads that one row instead of every report the user has.
+
+The aggregate row is locked (SELECT ... FOR UPDATE) while a report is folded in,
+so concurrent reports for the same user serialize and none is counted twice or
+lost. Rebuild aggregates from the reports (after a backfill or a manual fix) with:
+
+    python -m src.routers.dashboard.reports [--email user@example.com]
+"""
+import sys
+import json
+import argparse
+from typing import List, Optional
+from loguru import logger as logging
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert
+from src.database import Database
+from .models import InterviewReport, InterviewReportAggregate
+
+TOP_IMPROVEMENT_AREAS = 5
+
+
+def score_bucket(total_score: float, max_possible_score: float) -> str:
+    """Score-percentage decile label, "0-9" through "90-100"."""
+    percentage = (total_score / max_possible_score) * 100 if max_possible_score > 0 else 0
+    decile = min(max(int(percentage // 10), 0), 9)
+    return "90-100" if decile == 9 else f"{decile * 10}-{decile * 10 + 9}"
+
+
+def improvement_questions(areas_for_improvement: Optional[str]) -> List[str]:
+    """Questions listed in a report's areas_for_improvement JSON."""
+    if not areas_for_improvement:
+        return []
+    try:
+        areas = json.loads(areas_for_improvement)
+    except ValueError:
+        logging.warning("Ignoring malformed areas_for_improvement in an interview report")
+        return []
+    return [area["question"] for area in areas if isinstance(area, dict) and area.get("question")]
+
+
+def apply_report(aggregate: InterviewReportAggregate, report: InterviewReport):
+    """Fold one report into the aggregate's running totals."""
+    aggregate.total_reports = (aggregate.total_reports or 0) + 1
+    aggregate.total_questions = (aggregate.total_questions or 0) + (report.total_questions or 0)
+    aggregate.total_score = (aggregate.total_score or 0) + (report.total_score or 0)
+    aggregate.max_possible_score = (aggregate.max_possible_score or 0) + (report.max_possible_score or 0)
+
+    # New dicts rather than in-place edits, so SQLAlchemy sees the JSONB columns change
+    buckets = dict(aggregate.score_buckets or {})
+    bucket = score_bucket(report.total_score or 0, report.max_possible_score or 0)
+    buckets[bucket] = buckets.get(bucket, 0) + 1
+    aggregate.score_buckets = buckets
+
+    areas = dict(aggregate.improvement_areas or {})
+    for question in improvement_questions(report.areas_for_improvement):
+        areas[question] = areas.get(question, 0) + 1
+    aggregate.improvement_areas = areas
+
+    aggregate.last_report_id = report.id
+    aggregate.last_job_title = report.job_title
+    aggregate.last_job_description = report.job_description
+
+
+def _locked_aggregate(db: Session, user_email: str) -> InterviewReportAggregate:
+    # Create the row if this is the user's first report, then lock it
+    db.execute(
+        insert(InterviewReportAggregate)
+        .values(user_email=user_email, total_reports=0, total_questions=0, total_score=0, max_possible_score=0,
+                score_buckets={}, improvement_areas={})
+        .on_conflict_do_nothing(index_elements=["user_email"])
+    )
+    return (
+        db.query(InterviewReportAggregate)
+        .filter(InterviewReportAggregate.user_email == user_email)
+        .with_for_update()
+        .populate_existing()
+        .one()
+    )
+
+
+def record_interview_report(db: Session, user_email: str, **fields) -> InterviewReport:
+    """
+    Insert an interview report and update the user's aggregate, within the caller's
+    transaction. `fields` are InterviewReport columns (job_title, total_score, ...).
+    """
+    report = InterviewReport(user_email=user_email, **fields)
+    db.add(report)
+    db.flush()
+    apply_report(_locked_aggregate(db, user_email), report)
+    db.flush()
+    return report
+
+
+def rebuild_aggregate(db: Session, user_email: str) -> InterviewReportAggregate:
+    """Recompute a user's aggregate from all their reports, within the caller's transaction."""
+    aggregate = _locked_aggregate(db, user_email)
+    aggregate.total_reports = aggregate.total_questions = 0
+    aggregate.total_score = aggregate.max_possible_score = 0
+    aggregate.score_buckets, aggregate.improvement_areas = {}, {}
+    aggregate.last_report_id = aggregate.last_job_title = aggregate.last_job_description = None
+
+    reports = (
+        db.query(InterviewReport)
+        .filter(InterviewReport.user_email == user_email)
+        .order_by(InterviewReport.id)
+        .yield_per(500)
+    )
+    for report in reports:
+        apply_report(aggregate, report)
+    db.flush()
+    return aggregate
+
+
+def report_analysis(aggregate: Optional[InterviewReportAggregate]) -> dict:
+    """The analysis payload of the dashboard endpoint, from one aggregate row."""
+    if aggregate is None or not aggregate.total_reports:
+        return {
+            "Job Title": "N/A",
+            "Job Description": "N/A",
+            "Total Reports": 0,
+            "Performance Overview": {},
+            "Score Distribution": {},
+            "Improvement Areas": []
+        }
+
+    max_possible_score = aggregate.max_possible_score
+    avg_score_percentage = (aggregate.total_score / max_possible_score) * 100 if max_possible_score > 0 else 0
+    top_areas_for_improvement = sorted(
+        aggregate.improvement_areas.items(), key=lambda x: x[1], reverse=True
+    )[:TOP_IMPROVEMENT_AREAS]
+
+    return {
+        "Job Title": aggregate.last_job_title or "N/A",
+        "Job Description": aggregate.last_job_description or "N/A",
+        "Performance Overview": {
+            "Total Reports": aggregate.total_reports,
+            "Total Questions": aggregate.total_questions,
+            "Total Score": aggregate.total_score,
+            "Maximum Possible Score": max_possible_score,
+            "Average Score Percentage": avg_score_percentage
+        },
+        "Score Distribution": aggregate.score_buckets,
+        "Improvement Areas": top_areas_for_improvement
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Rebuild interview report aggregates from the reports.")
+    parser.add_argument("--email", help="Only rebuild this user's aggregate")
+    args = parser.parse_args(argv)
+
+    database = Database()
+    rebuilt = {}
+    try:
+        with database.SessionLocal() as db:
+            if args.email:
+                emails = [args.email]
+            else:
+                emails = [email for (email,) in db.query(InterviewReport.user_email).distinct()]
+            for email in emails:
+                rebuilt[email] = rebuild_aggregate(db, email).total_reports
+                db.commit()
+    except Exception as e:
+        logging.error(f"Rebuilding interview report aggregates failed: {e}")
+        return 1
+
+    print(json.dumps({"rebuilt": len(rebuilt), "reports": sum(rebuilt.values())}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
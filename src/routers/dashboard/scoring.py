@@ -0,0 +1,306 @@
+"""
+Scoring of interview answers against reference answers.
+
+A turn scores by the cosine similarity between the candidate's answer and the
+closest reference answer to its question, mapped linearly onto
+0..ANSWER_SCORE_POINTS between ANSWER_SCORE_FLOOR and ANSWER_SCORE_CEILING.
+Reference answers come from the question bank (reference_answers of the
+InterviewQuestion with the same text). A question without any is not scored and
+does not count towards the totals: against its own text, an answer repeating the
+question would score full points. Unanswered questions score 0.
+
+SessionScorer scores many sessions at once, in batches of up to
+SCORING_BATCH_TURNS turns:
+
+- all answers of a batch are embedded in one embedder call, and the references
+  not already in the scorer's cache of reference matrices in another;
+- the reference matrices of the batch's distinct questions are stacked, and one
+  matrix multiply gives every answer's similarity to every reference. A mask
+  keeps each answer's own references, and a row max picks the closest.
+
+The batch size bounds the (turns x references) product, most of which the mask
+discards. Reference matrices are cached by content, so a bank question asked in
+many sessions has its references embedded once per process.
+
+Only completed sessions with at least one scored question get a report. Score
+one and record its InterviewReport with POST /api/dashboard/score-session/{session_id},
+or offline, in a process pool, every completed session that has no report yet:
+
+    python -m src.routers.dashboard.scoring [--workers 2] [--limit N] [--session-id N]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from dotenv import load_dotenv
+from loguru import logger as logging
+from sqlalchemy.orm import Session
+from src.database import Database
+from src.routers.users.models import users as users_model
+from src.routers.questions.models import InterviewQuestion
+from src.routers.questions.embeddings import load_embedder
+from .models import QnA, InterviewSession, InterviewReport, SessionStatus
+from .reports import record_interview_report
+
+load_dotenv()
+
+ANSWER_SCORE_POINTS = float(os.getenv("ANSWER_SCORE_POINTS", "10"))
+# Similarity at or below the floor scores 0, at or above the ceiling full points
+ANSWER_SCORE_FLOOR = float(os.getenv("ANSWER_SCORE_FLOOR", "0.2"))
+ANSWER_SCORE_CEILING = float(os.getenv("ANSWER_SCORE_CEILING", "0.8"))
+# Answers scoring below this fraction of the points are listed as areas for improvement
+ANSWER_IMPROVEMENT_BELOW = float(os.getenv("ANSWER_IMPROVEMENT_BELOW", "0.5"))
+SCORING_BATCH_TURNS = int(os.getenv("SCORING_BATCH_TURNS", "512"))
+SCORING_REFERENCE_CACHE_SIZE = int(os.getenv("SCORING_REFERENCE_CACHE_SIZE", "4096"))
+SCORING_WORKERS = int(os.getenv("SCORING_WORKERS", "2"))
+# Sessions per task of the offline scorer's pool
+SCORING_CHUNK_SESSIONS = int(os.getenv("SCORING_CHUNK_SESSIONS", "200"))
+
+Turn = Tuple[str, Optional[str]]  # (question asked, answer given)
+
+
+def similarity_points(similarities: np.ndarray) -> np.ndarray:
+    span = max(ANSWER_SCORE_CEILING - ANSWER_SCORE_FLOOR, 1e-6)
+    return np.clip((similarities - ANSWER_SCORE_FLOOR) / span, 0, 1) * ANSWER_SCORE_POINTS
+
+
+class SessionScorer:
+    """Scores the turns of interview sessions in batches; see the module docstring."""
+
+    def __init__(self, embedder, batch_turns: int = SCORING_BATCH_TURNS,
+                 cache_size: int = SCORING_REFERENCE_CACHE_SIZE):
+        self.embedder = embedder
+        self.batch_turns = batch_turns
+        self.cache_size = cache_size
+        # Reference texts -> their embedding matrix, least recently used first
+        self._references: "OrderedDict[Tuple[str, ...], np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()  # Guards the reference cache; requests score in parallel threads
+        self.stats = {"sessions": 0, "turns": 0, "batches": 0, "embedder_calls": 0,
+                      "references_embedded": 0, "reference_cache_hits": 0}
+
+    def _reference_matrices(self, reference_sets: List[Tuple[str, ...]]) -> List[np.ndarray]:
+        with self._lock:
+            matrices = {}
+            for references in reference_sets:
+                if references in self._references:
+                    self._references.move_to_end(references)
+                    matrices[references] = self._references[references]
+            self.stats["reference_cache_hits"] += len(matrices)
+        missing = [references for references in reference_sets if references not in matrices]
+        if missing:
+            # Embedded outside the lock; another thread may embed the same set meanwhile
+            vectors = self.embedder.embed([text for references in missing for text in references])
+            bounds = np.cumsum([len(references) for references in missing])[:-1]
+            embedded = dict(zip(missing, np.split(vectors, bounds)))
+            matrices.update(embedded)
+            with self._lock:
+                self.stats["embedder_calls"] += 1
+                self.stats["references_embedded"] += len(vectors)
+                self._references.update(embedded)
+                while len(self._references) > self.cache_size:
+                    self._references.popitem(last=False)
+        return [matrices[references] for references in reference_sets]
+
+    def _similarities(self, turns: List[Turn], references: Dict[str, List[str]]) -> np.ndarray:
+        """Similarity of each answer to its closest reference; NaN where unanswered or unreferenced."""
+        similarities = np.full(len(turns), np.nan, dtype=np.float32)
+        answered = [index for index, (question, answer) in enumerate(turns)
+                    if answer and answer.strip() and references.get(question)]
+        if not answered:
+            return similarities
+        turn_sets = [tuple(references[turns[index][0]]) for index in answered]
+        distinct = list(dict.fromkeys(turn_sets))
+        matrices = self._reference_matrices(distinct)
+        set_numbers = {references: number for number, references in enumerate(distinct)}
+        turn_owner = np.array([set_numbers[references] for references in turn_sets])
+        reference_owner = np.repeat(np.arange(len(distinct)), [len(matrix) for matrix in matrices])
+
+        answers = self.embedder.embed([turns[index][1] for index in answered])
+        self.stats["embedder_calls"] += 1
+        scores = answers @ np.concatenate(matrices).T
+        np.putmask(scores, turn_owner[:, None] != reference_owner[None, :], -np.inf)
+        similarities[answered] = scores.max(axis=1)
+        return similarities
+
+    def score_sessions(self, sessions: List[List[Turn]], references: Dict[str, List[str]] = None) -> List[dict]:
+        """
+        Score each session's turns. `references` maps a question to its reference
+        answers. Returns, per session, the scored questions and the report totals.
+        """
+        references = references or {}
+        turns = [turn for session in sessions for turn in session]
+        similarities = np.full(len(turns), np.nan, dtype=np.float32)
+        for start in range(0, len(turns), self.batch_turns):
+            similarities[start:start + self.batch_turns] = self._similarities(
+                turns[start:start + self.batch_turns], references)
+            self.stats["batches"] += 1
+        points = np.where(np.isnan(similarities), 0.0, similarity_points(np.nan_to_num(similarities)))
+        scored = np.array([bool(references.get(question)) for question, _ in turns], dtype=bool)
+        self.stats["sessions"] += len(sessions)
+        self.stats["turns"] += len(turns)
+
+        results = []
+        offset = 0
+        for session in sessions:
+            questions = []
+            for index, (question, answer) in enumerate(session, start=offset):
+                similarity = similarities[index]
+                questions.append({
+                    "question": question,
+                    "answer": answer,
+                    "similarity": None if np.isnan(similarity) else round(float(similarity), 4),
+                    "score": round(float(points[index]), 2) if scored[index] else None,
+                    "max_score": ANSWER_SCORE_POINTS if scored[index] else None,
+                    "reference": "bank" if scored[index] else None,
+                })
+            offset += len(session)
+            session_scored = scored[offset - len(session):offset]
+            total_score = round(float(points[offset - len(session):offset][session_scored].sum()), 2)
+            results.append({
+                "questions": questions,
+                "total_questions": int(session_scored.sum()),
+                "total_score": total_score,
+                "max_possible_score": int(session_scored.sum()) * ANSWER_SCORE_POINTS,
+                "areas_for_improvement": [
+                    {"question": item["question"], "answer": item["answer"], "score": item["score"]}
+                    for item in questions
+                    if item["score"] is not None and item["score"] < ANSWER_IMPROVEMENT_BELOW * ANSWER_SCORE_POINTS
+                ],
+            })
+        return results
+
+
+def report_fields(result: dict) -> dict:
+    """InterviewReport columns of a scored session."""
+    return {
+        "total_questions": result["total_questions"],
+        "total_score": result["total_score"],
+        "max_possible_score": result["max_possible_score"],
+        "areas_for_improvement": json.dumps(result["areas_for_improvement"]),
+    }
+
+
+def bank_reference_answers(db: Session, questions: List[str]) -> Dict[str, List[str]]:
+    """Reference answers of the bank questions with these texts."""
+    references: Dict[str, List[str]] = {}
+    for question, answers in (db.query(InterviewQuestion.question, InterviewQuestion.reference_answers)
+                              .filter(InterviewQuestion.question.in_(set(questions)))):
+        if answers:
+            references.setdefault(question, []).extend(answers)
+    return references
+
+
+def score_and_record(db: Session, scorer: SessionScorer, session_ids: List[int]) -> List[Tuple[int, dict]]:
+    """
+    Score the given sessions that are completed and have no report yet, and record
+    their reports, within the caller's transaction. Abandoned sessions and sessions
+    without a scored question are skipped. The sessions are locked while this runs,
+    so two scorers never report the same session twice. Returns (session id, result)
+    of the sessions scored.
+    """
+    sessions = (db.query(InterviewSession)
+                .filter(InterviewSession.id.in_(session_ids),
+                        InterviewSession.status == SessionStatus.completed.value)
+                .order_by(InterviewSession.id)
+                .with_for_update()
+                .all())
+    reported = {session_id for (session_id,) in db.query(InterviewReport.session_id)
+                .filter(InterviewReport.session_id.in_([session.id for session in sessions]))}
+    sessions = [session for session in sessions if session.id not in reported]
+    if not sessions:
+        return []
+
+    turns: Dict[int, List[Turn]] = {session.id: [] for session in sessions}
+    for session_id, question, answer in (db.query(QnA.session_id, QnA.question_asked, QnA.answer_given)
+                                         .filter(QnA.session_id.in_(list(turns)))
+                                         .order_by(QnA.session_id, QnA.id)):
+        turns[session_id].append((question, answer))
+    references = bank_reference_answers(db, [question for session in turns.values() for question, _ in session])
+    emails = dict(db.query(users_model.User.id, users_model.User.email)
+                  .filter(users_model.User.id.in_({session.user_id for session in sessions})))
+
+    results = scorer.score_sessions([turns[session.id] for session in sessions], references)
+    scored = []
+    for session, result in zip(sessions, results):
+        email = emails.get(session.user_id)
+        if email is None:
+            logging.warning(f"Not scoring interview session {session.id}: user {session.user_id} not found")
+            continue
+        if not result["total_questions"]:
+            logging.info(f"Not scoring interview session {session.id}: no question with reference answers")
+            continue
+        record_interview_report(db, email, session_id=session.id, job_title=session.job_title,
+                                job_description=session.job_description, **report_fields(result))
+        scored.append((session.id, result))
+    return scored
+
+
+# -- offline scoring -----------------------------------------------------------
+
+_worker = {}
+
+
+def _init_worker():
+    _worker["database"] = Database()
+    _worker["scorer"] = SessionScorer(load_embedder())
+
+
+def _score_chunk(session_ids: List[int]) -> int:
+    with _worker["database"].SessionLocal() as db:
+        scored = score_and_record(db, _worker["scorer"], session_ids)
+        db.commit()
+    return len(scored)
+
+
+def unscored_session_ids(db: Session, limit: Optional[int] = None) -> List[int]:
+    """Completed sessions that have no report, oldest first."""
+    reported = db.query(InterviewReport.id).filter(InterviewReport.session_id == InterviewSession.id)
+    query = (db.query(InterviewSession.id)
+             .filter(InterviewSession.status == SessionStatus.completed.value, ~reported.exists())
+             .order_by(InterviewSession.id))
+    if limit:
+        query = query.limit(limit)
+    return [session_id for (session_id,) in query]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Score finished interview sessions and record their reports.")
+    parser.add_argument("--session-id", type=int, action="append", help="Score this session (repeatable)")
+    parser.add_argument("--limit", type=int, help="Score at most this many unscored sessions")
+    parser.add_argument("--workers", type=int, default=SCORING_WORKERS)
+    parser.add_argument("--chunk", type=int, default=SCORING_CHUNK_SESSIONS, help="Sessions per pool task")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    try:
+        if args.session_id:
+            session_ids = args.session_id
+        else:
+            with Database().SessionLocal() as db:
+                session_ids = unscored_session_ids(db, args.limit)
+        chunks = [session_ids[start:start + args.chunk] for start in range(0, len(session_ids), args.chunk)]
+        if args.workers > 1 and len(chunks) > 1:
+            with ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context("spawn"),
+                                     initializer=_init_worker) as executor:
+                scored = sum(executor.map(_score_chunk, chunks))
+        else:
+            _init_worker()
+            scored = sum(_score_chunk(chunk) for chunk in chunks)
+    except Exception as e:
+        logging.error(f"Scoring interview sessions failed: {e}")
+        return 1
+
+    print(json.dumps({"sessions": len(session_ids), "scored": scored,
+                      "seconds": round(time.perf_counter() - started, 2)}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
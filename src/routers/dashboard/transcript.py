@@ -0,0 +1,327 @@
+"""
+Buffered writes of interview transcripts.
+
+A live interview produces a stream of small events: a question is asked, the
+candidate's answer arrives as several utterances, then the next question starts.
+`TranscriptBuffer` keeps them in memory per session and writes finished turns to
+`voice_bot.qna` with one multi-row INSERT:
+
+- at a turn boundary (`end_turn`), once `flush_turns` turns are waiting;
+- from the background task, for sessions whose oldest waiting turn is older than
+  `flush_interval` seconds;
+- on `end_session`, which writes everything left (including an unfinished turn)
+  in the same transaction that closes the InterviewSession, and raises if it cannot.
+
+A failed flush puts its turns back in front of the queue, so the next flush retries
+them in order. On shutdown `stop()` flushes every session. Only a process crash can
+lose turns, at most `flush_interval` seconds' worth.
+
+A crash or restart also leaves its sessions `active` with nobody to end them. The
+background task sweeps, on startup and then every `sweep_interval` seconds, sessions
+that no process is buffering and that have had no turn for `stale_after` seconds,
+and marks them abandoned.
+
+Timestamps are naive UTC, like the CURRENT_TIMESTAMP defaults of a UTC database.
+"""
+import os
+import time
+import asyncio
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+from dotenv import load_dotenv
+from loguru import logger as logging
+from sqlalchemy import insert, update, text
+from starlette.concurrency import run_in_threadpool
+from .models import QnA, InterviewSession, SessionStatus
+
+load_dotenv()
+
+TRANSCRIPT_FLUSH_TURNS = int(os.getenv("TRANSCRIPT_FLUSH_TURNS", "5"))
+TRANSCRIPT_FLUSH_INTERVAL = float(os.getenv("TRANSCRIPT_FLUSH_INTERVAL", "5.0"))
+TRANSCRIPT_FLUSHER_ENABLED = os.getenv("TRANSCRIPT_FLUSHER_ENABLED", "true").lower() == "true"
+# An active session with no turn for this long, buffered by no process, was left behind by a restart
+TRANSCRIPT_STALE_SESSION_SECONDS = float(os.getenv("TRANSCRIPT_STALE_SESSION_SECONDS", "3600"))
+TRANSCRIPT_SWEEP_INTERVAL = float(os.getenv("TRANSCRIPT_SWEEP_INTERVAL", "600"))
+
+
+def utc_now() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class _SessionTranscript:
+    def __init__(self, user_id: int):
+        self.user_id = user_id
+        self.question: Optional[str] = None  # The turn in progress
+        self.utterances: List[str] = []
+        self.pending: List[dict] = []  # Finished turns not yet written
+        self.pending_since: Optional[float] = None
+        # Keeps the flushes of one session in order
+        self.flush_lock = threading.Lock()
+
+
+class TranscriptBuffer:
+    """Per-session buffer of QnA turns, written in multi-row INSERTs."""
+
+    def __init__(self, session_factory, flush_turns: int = TRANSCRIPT_FLUSH_TURNS,
+                 flush_interval: float = TRANSCRIPT_FLUSH_INTERVAL, stale_after: float = TRANSCRIPT_STALE_SESSION_SECONDS,
+                 sweep_interval: float = TRANSCRIPT_SWEEP_INTERVAL):
+        self.session_factory = session_factory
+        self.flush_turns = flush_turns
+        self.flush_interval = flush_interval
+        self.stale_after = stale_after
+        self.sweep_interval = sweep_interval
+        self._sessions: Dict[int, _SessionTranscript] = {}
+        self._lock = threading.Lock()
+        self._task = None
+        self.stats = {"turns": 0, "flushes": 0, "rows_written": 0, "errors": 0, "abandoned": 0}
+
+    def start_session(self, user_id: int, job_title: Optional[str] = None,
+                      job_description: Optional[str] = None) -> int:
+        """Create the InterviewSession row and start buffering for it; returns its id."""
+        db = self.session_factory()
+        try:
+            session = InterviewSession(user_id=user_id, job_title=job_title, job_description=job_description,
+                                       status=SessionStatus.active.value, question_count=0)
+            db.add(session)
+            db.commit()
+            session_id = session.id
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        with self._lock:
+            self._sessions[session_id] = _SessionTranscript(user_id)
+        return session_id
+
+    def _transcript(self, session_id: int) -> _SessionTranscript:
+        transcript = self._sessions.get(session_id)
+        if transcript is None:
+            raise KeyError(f"Interview session {session_id} is not active")
+        return transcript
+
+    def _close_turn(self, transcript: _SessionTranscript) -> bool:
+        """Move the turn in progress to the pending list. Caller holds self._lock."""
+        if transcript.question is None:
+            return False
+        now = utc_now()
+        transcript.pending.append({
+            "user_id": transcript.user_id,
+            "question_asked": transcript.question,
+            "answer_given": " ".join(transcript.utterances) or None,
+            "created_at": now,
+            "updated_at": now,
+        })
+        if transcript.pending_since is None:
+            transcript.pending_since = time.monotonic()
+        transcript.question = None
+        transcript.utterances = []
+        self.stats["turns"] += 1
+        return True
+
+    def start_turn(self, session_id: int, question: str):
+        """Start a new turn with the question just asked; an open turn is closed first."""
+        with self._lock:
+            transcript = self._transcript(session_id)
+            self._close_turn(transcript)
+            transcript.question = question
+
+    def add_utterance(self, session_id: int, text: str):
+        """Append part of the candidate's answer to the turn in progress. Memory only."""
+        with self._lock:
+            transcript = self._transcript(session_id)
+            if transcript.question is None:
+                raise ValueError(f"Interview session {session_id} has no question in progress")
+            transcript.utterances.append(text)
+
+    def end_turn(self, session_id: int) -> int:
+        """
+        Turn boundary: close the turn in progress, and flush once `flush_turns` turns
+        are waiting. Returns the number of rows written.
+        """
+        with self._lock:
+            transcript = self._transcript(session_id)
+            self._close_turn(transcript)
+            due = len(transcript.pending) >= self.flush_turns
+        return self.flush(session_id) if due else 0
+
+    def _write(self, db, session_id: int, rows: List[dict]):
+        db.execute(insert(QnA), [{**row, "session_id": session_id} for row in rows])
+        db.execute(
+            update(InterviewSession)
+            .where(InterviewSession.id == session_id)
+            .values(question_count=InterviewSession.question_count + len(rows))
+        )
+
+    def _take_pending(self, transcript: _SessionTranscript) -> List[dict]:
+        with self._lock:
+            rows, transcript.pending, transcript.pending_since = transcript.pending, [], None
+        return rows
+
+    def _restore_pending(self, transcript: _SessionTranscript, rows: List[dict]):
+        with self._lock:
+            transcript.pending = rows + transcript.pending
+            transcript.pending_since = transcript.pending_since or time.monotonic()
+
+    def flush(self, session_id: int) -> int:
+        """Write the session's finished turns in one INSERT; returns the number of rows."""
+        with self._lock:
+            transcript = self._sessions.get(session_id)
+        if transcript is None:
+            return 0
+
+        with transcript.flush_lock:
+            rows = self._take_pending(transcript)
+            if not rows:
+                return 0
+            db = self.session_factory()
+            try:
+                self._write(db, session_id, rows)
+                db.commit()
+            except Exception:
+                db.rollback()
+                self._restore_pending(transcript, rows)
+                self.stats["errors"] += 1
+                raise
+            finally:
+                db.close()
+
+        self.stats["flushes"] += 1
+        self.stats["rows_written"] += len(rows)
+        return len(rows)
+
+    def end_session(self, session_id: int, status: SessionStatus = SessionStatus.completed) -> int:
+        """
+        Write everything left, including an unfinished turn, and close the session in
+        one transaction. Raises if that fails; the turns stay buffered for a retry.
+        """
+        with self._lock:
+            transcript = self._transcript(session_id)
+            self._close_turn(transcript)
+
+        with transcript.flush_lock:
+            rows = self._take_pending(transcript)
+            db = self.session_factory()
+            try:
+                if rows:
+                    self._write(db, session_id, rows)
+                db.execute(
+                    update(InterviewSession)
+                    .where(InterviewSession.id == session_id)
+                    .values(status=status.value, ended_at=utc_now())
+                )
+                db.commit()
+            except Exception:
+                db.rollback()
+                self._restore_pending(transcript, rows)
+                self.stats["errors"] += 1
+                raise
+            finally:
+                db.close()
+
+        with self._lock:
+            self._sessions.pop(session_id, None)
+        if rows:
+            self.stats["flushes"] += 1
+            self.stats["rows_written"] += len(rows)
+        return len(rows)
+
+    def flush_due(self, now: Optional[float] = None) -> int:
+        """Flush every session whose oldest waiting turn is older than `flush_interval`."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            due = [
+                session_id for session_id, transcript in self._sessions.items()
+                if transcript.pending_since is not None and now - transcript.pending_since >= self.flush_interval
+            ]
+        written = 0
+        for session_id in due:
+            try:
+                written += self.flush(session_id)
+            except Exception as e:
+                logging.error(f"Failed to flush transcript of interview session {session_id}: {e}")
+        return written
+
+    def flush_all(self) -> int:
+        with self._lock:
+            session_ids = list(self._sessions)
+        written = 0
+        for session_id in session_ids:
+            try:
+                written += self.flush(session_id)
+            except Exception as e:
+                logging.error(f"Failed to flush transcript of interview session {session_id}: {e}")
+        return written
+
+    def sweep_stale_sessions(self) -> List[int]:
+        """
+        Mark abandoned the active sessions that no process is buffering: not this one's,
+        and with no turn written for `stale_after` seconds. Returns their ids.
+        """
+        cutoff = utc_now() - timedelta(seconds=self.stale_after)
+        with self._lock:
+            live = list(self._sessions)
+        db = self.session_factory()
+        try:
+            session_ids = db.execute(
+                text("""
+                    UPDATE voice_bot.interview_sessions AS s
+                    SET status = :abandoned, ended_at = :now
+                    WHERE s.status = :active AND s.started_at < :cutoff AND NOT (s.id = ANY(:live))
+                      AND NOT EXISTS (
+                          SELECT 1 FROM voice_bot.qna AS q WHERE q.session_id = s.id AND q.created_at >= :cutoff
+                      )
+                    RETURNING s.id
+                """),
+                {"abandoned": SessionStatus.abandoned.value, "active": SessionStatus.active.value,
+                 "now": utc_now(), "cutoff": cutoff, "live": live},
+            ).scalars().all()
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        if session_ids:
+            self.stats["abandoned"] += len(session_ids)
+            logging.info(f"Marked {len(session_ids)} stale interview sessions abandoned")
+        return list(session_ids)
+
+    async def run(self):
+        logging.info("Transcript flusher started")
+        last_sweep = None
+        while True:
+            try:
+                if last_sweep is None or time.monotonic() - last_sweep >= self.sweep_interval:
+                    last_sweep = time.monotonic()
+                    await run_in_threadpool(self.sweep_stale_sessions)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"Stale interview session sweep failed: {e}")
+            await asyncio.sleep(self.flush_interval / 2)
+            try:
+                await run_in_threadpool(self.flush_due)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"Transcript flusher failed: {e}")
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        written = await run_in_threadpool(self.flush_all)
+        if written:
+            logging.info(f"Flushed {written} buffered QnA turns on shutdown")
@@ -1,11 +1,12 @@
-from sqlalchemy import Column, Integer, String, Text, TIMESTAMP, CheckConstraint
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy import Column, Integer, String, Text, TIMESTAMP, CheckConstraint, Index
+from src.database.base import Base
 from sqlalchemy import  func
 
-Base = declarative_base()
-
 class Feedback(Base):
     __tablename__ = 'feedback'
+    __table_args__ = (
+        Index('ix_feedback_user_id', 'user_id'),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(Integer)
@@ -0,0 +1,245 @@
+"""
+Audio ingestion for live interviews: a per-session ring buffer and voice-activity detection.
+
+Incoming PCM16 frames are copied once, into a preallocated ring buffer. Everything
+after that works on memoryviews of the ring: the VAD reads each block of new frames
+as a NumPy array over the same memory, and a detected utterance is handed on as one
+or two memoryviews of it (two when it wraps around the end), so nothing is copied
+per frame or per utterance.
+
+The VAD scores every 20 ms frame of a block at once: RMS energy and zero-crossing rate
+are computed over a (frames x samples) view with NumPy. A frame is speech when it is
+loud enough and its zero-crossing rate is below that of hiss and broadband noise.
+An utterance opens after AUDIO_VAD_START_MS of speech (with AUDIO_VAD_PREROLL_MS
+of audio before it), and closes after AUDIO_VAD_END_MS of silence or at
+AUDIO_MAX_UTTERANCE_SECONDS.
+
+An emitted utterance keeps its bytes from being overwritten until it is released,
+so a consumer can read the views while more audio arrives. A frame that would
+overwrite unreleased audio is dropped and counted in `overruns`.
+"""
+import os
+import time
+from collections import deque
+from typing import List, Optional
+import numpy as np
+from dotenv import load_dotenv
+from .backends import SAMPLE_RATE, SAMPLE_WIDTH
+
+load_dotenv()
+
+AUDIO_FRAME_MS = int(os.getenv("AUDIO_FRAME_MS", "20"))
+# New frames are scored in blocks of this many, one NumPy pass per block
+AUDIO_VAD_BLOCK_FRAMES = int(os.getenv("AUDIO_VAD_BLOCK_FRAMES", "5"))
+AUDIO_VAD_RMS_THRESHOLD = float(os.getenv("AUDIO_VAD_RMS_THRESHOLD", "500"))
+AUDIO_VAD_MAX_ZCR = float(os.getenv("AUDIO_VAD_MAX_ZCR", "0.35"))
+AUDIO_VAD_START_MS = int(os.getenv("AUDIO_VAD_START_MS", "60"))
+AUDIO_VAD_END_MS = int(os.getenv("AUDIO_VAD_END_MS", "1000"))
+AUDIO_VAD_PREROLL_MS = int(os.getenv("AUDIO_VAD_PREROLL_MS", "200"))
+AUDIO_MAX_UTTERANCE_SECONDS = float(os.getenv("AUDIO_MAX_UTTERANCE_SECONDS", "30"))
+AUDIO_RING_SECONDS = float(os.getenv("AUDIO_RING_SECONDS", "64"))
+
+
+class RingBuffer:
+    """
+    Fixed-size byte ring addressed by absolute stream position (bytes written so far).
+
+    `write()` refuses data that would overwrite anything at or after `keep_from`.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._buffer = bytearray(capacity)
+        self._view = memoryview(self._buffer)
+        self.write_pos = 0
+
+    @property
+    def oldest(self) -> int:
+        """Oldest stream position still in the buffer."""
+        return max(0, self.write_pos - self.capacity)
+
+    def write(self, data, keep_from: Optional[int] = None) -> bool:
+        size = len(data)
+        keep_from = self.write_pos if keep_from is None else keep_from
+        if self.write_pos + size - keep_from > self.capacity:
+            return False
+        offset = self.write_pos % self.capacity
+        first = min(size, self.capacity - offset)
+        self._view[offset:offset + first] = data[:first]
+        if first < size:
+            self._view[:size - first] = data[first:]
+        self.write_pos += size
+        return True
+
+    def segments(self, start: int, end: int) -> List[memoryview]:
+        """Views of [start, end) without copying: one, or two if the range wraps."""
+        if start < self.oldest or end > self.write_pos or start > end:
+            raise ValueError(f"Range {start}-{end} is not in the buffer ({self.oldest}-{self.write_pos})")
+        offset = start % self.capacity
+        size = end - start
+        if offset + size <= self.capacity:
+            return [self._view[offset:offset + size]]
+        return [self._view[offset:], self._view[:size - (self.capacity - offset)]]
+
+
+class Utterance:
+    """A detected stretch of speech: views into the session's ring buffer."""
+
+    def __init__(self, ingest: "AudioIngest", start: int, end: int):
+        self.ingest = ingest
+        self.start = start
+        self.end = end
+        self.at = time.monotonic()  # When it was detected as complete
+        self.released = False
+
+    @property
+    def segments(self) -> List[memoryview]:
+        return self.ingest.ring.segments(self.start, self.end)
+
+    @property
+    def nbytes(self) -> int:
+        return self.end - self.start
+
+    @property
+    def seconds(self) -> float:
+        return self.nbytes / (SAMPLE_RATE * SAMPLE_WIDTH)
+
+    def audio(self):
+        """The audio as one bytes-like object: a memoryview, or bytes if it wraps the ring."""
+        segments = self.segments
+        return segments[0] if len(segments) == 1 else b"".join(segments)
+
+    def release(self):
+        """Let the ring reuse this audio; the views must not be used afterwards."""
+        if not self.released:
+            self.released = True
+            self.ingest._release()
+
+
+def frame_features(block, frame_samples: int):
+    """
+    RMS energy and zero-crossing rate of every frame in a block of PCM16 audio, with
+    no per-sample Python work. `block` is any bytes-like object of whole frames.
+    """
+    frames = np.frombuffer(block, dtype="<i2").reshape(-1, frame_samples)
+    values = frames.astype(np.float32)
+    rms = np.sqrt(np.einsum("ij,ij->i", values, values) / frame_samples)
+    signs = np.signbit(frames)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (frame_samples - 1)
+    return rms, zcr
+
+
+class AudioIngest:
+    """Ring buffer plus VAD-based utterance segmentation for one session's audio stream."""
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE, frame_ms: int = AUDIO_FRAME_MS,
+                 block_frames: int = AUDIO_VAD_BLOCK_FRAMES, rms_threshold: float = AUDIO_VAD_RMS_THRESHOLD,
+                 max_zcr: float = AUDIO_VAD_MAX_ZCR, start_ms: int = AUDIO_VAD_START_MS,
+                 end_ms: int = AUDIO_VAD_END_MS, preroll_ms: int = AUDIO_VAD_PREROLL_MS,
+                 max_utterance_seconds: float = AUDIO_MAX_UTTERANCE_SECONDS,
+                 ring_seconds: float = AUDIO_RING_SECONDS):
+        self.frame_samples = sample_rate * frame_ms // 1000
+        self.frame_bytes = self.frame_samples * SAMPLE_WIDTH
+        bytes_per_second = sample_rate * SAMPLE_WIDTH
+        # A whole number of frames, so frame boundaries never straddle the wrap
+        self.ring = RingBuffer(int(ring_seconds * bytes_per_second) // self.frame_bytes * self.frame_bytes)
+        self.block_bytes = block_frames * self.frame_bytes
+        self.rms_threshold = rms_threshold
+        self.max_zcr = max_zcr
+        self.start_frames = max(1, start_ms // frame_ms)
+        self.end_frames = max(1, end_ms // frame_ms)
+        self.preroll_bytes = preroll_ms // frame_ms * self.frame_bytes
+        self.max_utterance_bytes = int(max_utterance_seconds * bytes_per_second) // self.frame_bytes * self.frame_bytes
+
+        self.processed = 0  # Stream position up to which frames have been scored
+        self.in_speech = False  # An utterance is open
+        self._open_start = 0
+        self._last_speech_end = 0
+        self._speech_run = 0
+        self._silence_run = 0
+        self._emitted_until = 0
+        self._held: deque = deque()  # Emitted utterances not yet released, oldest first
+        self.overruns = 0
+        self.frames_scored = 0
+
+    def _keep_from(self) -> int:
+        if self._held:
+            return self._held[0].start
+        if self.in_speech:
+            return self._open_start
+        # The frames of a speech run that has not opened an utterance yet, plus the preroll before them
+        return max(self.processed - (self.start_frames - 1) * self.frame_bytes - self.preroll_bytes, 0)
+
+    def _release(self):
+        while self._held and self._held[0].released:
+            self._held.popleft()
+
+    def _emit(self, end: int, utterances: List[Utterance]):
+        utterance = Utterance(self, self._open_start, end)
+        self._held.append(utterance)
+        self._emitted_until = end
+        utterances.append(utterance)
+
+    def _score(self, utterances: List[Utterance]):
+        frames = (self.ring.write_pos - self.processed) // self.frame_bytes
+        if not frames:
+            return
+        end = self.processed + frames * self.frame_bytes
+        for segment in self.ring.segments(self.processed, end):
+            rms, zcr = frame_features(segment, self.frame_samples)
+            speech = (rms >= self.rms_threshold) & (zcr <= self.max_zcr)
+            self.frames_scored += len(speech)
+            for is_speech in speech.tolist():
+                self._step(is_speech, utterances)
+
+    def _step(self, is_speech: bool, utterances: List[Utterance]):
+        self.processed += self.frame_bytes
+        if is_speech:
+            self._speech_run += 1
+            self._silence_run = 0
+            self._last_speech_end = self.processed
+            if not self.in_speech and self._speech_run >= self.start_frames:
+                first_speech = self.processed - self._speech_run * self.frame_bytes
+                self._open_start = max(first_speech - self.preroll_bytes, self._emitted_until, self.ring.oldest)
+                self.in_speech = True
+        else:
+            self._speech_run = 0
+            if self.in_speech:
+                self._silence_run += 1
+                if self._silence_run >= self.end_frames:
+                    # Nothing to emit if a length cut already took the last of the speech
+                    if self._last_speech_end > self._open_start:
+                        self._emit(self._last_speech_end, utterances)
+                    self.in_speech = False
+                    self._silence_run = 0
+        if self.in_speech and self.processed - self._open_start >= self.max_utterance_bytes:
+            self._emit(self.processed, utterances)
+            # Speech carries on into the next utterance
+            self._open_start = self.processed
+
+    def feed(self, data) -> List[Utterance]:
+        """
+        Add incoming audio; returns the utterances it completed. Frames are scored a
+        block at a time, so speech is detected at most one block late.
+        """
+        utterances: List[Utterance] = []
+        if not self.ring.write(data, self._keep_from()):
+            self.overruns += 1
+            return utterances
+        if self.ring.write_pos - self.processed >= self.block_bytes:
+            self._score(utterances)
+        return utterances
+
+    def flush(self) -> List[Utterance]:
+        """
+        Score what is pending and close the open utterance, e.g. when the client says
+        the candidate stopped talking. Returns the utterances completed.
+        """
+        utterances: List[Utterance] = []
+        self._score(utterances)
+        if self.in_speech:
+            if self._last_speech_end > self._open_start:
+                self._emit(self._last_speech_end, utterances)
+            self.in_speech = False
+            self._speech_run = self._silence_run = 0
+        return utterances
@@ -0,0 +1,129 @@
+"""
+Speech-to-text, question-generation and text-to-speech backends of the interview engine.
+
+A backend is any class with the matching async method:
+
+- SpeechToText.transcribe(audio) -> str, for one complete utterance of 16 kHz
+  mono PCM16, given as a bytes-like object (often a memoryview of the session's
+  ring buffer, valid only until the call returns);
+- QuestionGenerator.stream(job_title, job_description, history) -> async iterator
+  of text pieces, where history is a list of (question, answer) pairs;
+- TextToSpeech.synthesize(text) -> async iterator of PCM16 audio chunks.
+
+Which class is used is set per stage with INTERVIEW_STT_BACKEND, INTERVIEW_LLM_BACKEND
+and INTERVIEW_TTS_BACKEND as "module:Class". The defaults are the fake backends
+below: deterministic, offline, with configurable delays, so the pipeline can be
+exercised and benchmarked without any external service.
+"""
+import os
+import asyncio
+import hashlib
+from typing import AsyncIterator, List, Tuple
+from dotenv import load_dotenv
+from src.utils.backends import load_backend
+
+load_dotenv()
+
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2  # PCM16
+
+INTERVIEW_STT_BACKEND = os.getenv("INTERVIEW_STT_BACKEND", "src.routers.interview.backends:FakeSpeechToText")
+INTERVIEW_LLM_BACKEND = os.getenv("INTERVIEW_LLM_BACKEND", "src.routers.interview.backends:FakeQuestionGenerator")
+INTERVIEW_TTS_BACKEND = os.getenv("INTERVIEW_TTS_BACKEND", "src.routers.interview.backends:FakeTextToSpeech")
+
+FAKE_BACKEND_DELAY_SCALE = float(os.getenv("FAKE_BACKEND_DELAY_SCALE", "1.0"))
+
+FAKE_QUESTIONS = [
+    "Tell me about yourself and your most recent role.",
+    "Describe a difficult technical problem you solved and how you approached it.",
+    "How do you decide between two designs when both would work?",
+    "Tell me about a time you disagreed with a teammate. What happened?",
+    "How would you find the cause of a sudden latency spike in production?",
+    "What is a project you are proud of, and what was your part in it?",
+    "How do you keep the quality of your work high under a deadline?",
+    "Where do you want to grow in the next two years?",
+]
+
+FAKE_WORDS = ["I", "worked", "on", "the", "backend", "team", "where", "we", "built", "services", "for",
+              "payments", "and", "reporting", "with", "Python", "and", "PostgreSQL", "mostly"]
+
+
+def load_backends():
+    """(stt, llm, tts) instances from the INTERVIEW_*_BACKEND settings."""
+    return (load_backend(INTERVIEW_STT_BACKEND), load_backend(INTERVIEW_LLM_BACKEND),
+            load_backend(INTERVIEW_TTS_BACKEND))
+
+
+async def _delay(seconds: float):
+    if seconds > 0:
+        await asyncio.sleep(seconds)
+
+
+class FakeSpeechToText:
+    """
+    Returns a transcript derived from a hash of the audio, after a delay of
+    `base_delay` plus `delay_per_second` per second of audio.
+    """
+
+    def __init__(self, base_delay: float = 0.08, delay_per_second: float = 0.02,
+                 scale: float = FAKE_BACKEND_DELAY_SCALE):
+        self.base_delay = base_delay * scale
+        self.delay_per_second = delay_per_second * scale
+
+    async def transcribe(self, audio) -> str:
+        seconds = len(audio) / (SAMPLE_RATE * SAMPLE_WIDTH)
+        await _delay(self.base_delay + self.delay_per_second * seconds)
+        digest = hashlib.sha1(audio).digest()
+        words = max(3, min(int(seconds * 2.5), 40))
+        return " ".join(FAKE_WORDS[(digest[i % len(digest)] + i) % len(FAKE_WORDS)] for i in range(words))
+
+
+class FakeQuestionGenerator:
+    """
+    Streams the next question from FAKE_QUESTIONS word by word: `first_token_delay`
+    before the first word, `token_delay` before each later one.
+    """
+
+    def __init__(self, first_token_delay: float = 0.25, token_delay: float = 0.02,
+                 scale: float = FAKE_BACKEND_DELAY_SCALE):
+        self.first_token_delay = first_token_delay * scale
+        self.token_delay = token_delay * scale
+        self.calls = 0
+
+    async def stream(self, job_title: str, job_description: str,
+                     history: List[Tuple[str, str]]) -> AsyncIterator[str]:
+        self.calls += 1
+        question = FAKE_QUESTIONS[len(history) % len(FAKE_QUESTIONS)]
+        await _delay(self.first_token_delay)
+        for index, word in enumerate(question.split(" ")):
+            if index:
+                await _delay(self.token_delay)
+            yield word if index == 0 else " " + word
+
+
+class FakeTextToSpeech:
+    """
+    Synthesizes a quiet tone lasting `seconds_per_char` per character, in chunks of
+    `chunk_ms`; `first_chunk_delay` before the first chunk, `chunk_delay` between chunks.
+    """
+
+    def __init__(self, first_chunk_delay: float = 0.06, chunk_delay: float = 0.005, seconds_per_char: float = 0.06,
+                 chunk_ms: int = 100, scale: float = FAKE_BACKEND_DELAY_SCALE):
+        self.first_chunk_delay = first_chunk_delay * scale
+        self.chunk_delay = chunk_delay * scale
+        self.seconds_per_char = seconds_per_char
+        self.chunk_bytes = SAMPLE_RATE * SAMPLE_WIDTH * chunk_ms // 1000
+        # One period of a 400 Hz square wave at low amplitude, 40 samples
+        self._period = (b"\x00\x04" * 20) + (b"\x00\xfc" * 20)
+
+    async def synthesize(self, text: str) -> AsyncIterator[bytes]:
+        total = int(len(text) * self.seconds_per_char * SAMPLE_RATE) * SAMPLE_WIDTH
+        await _delay(self.first_chunk_delay)
+        sent = 0
+        while sent < total:
+            if sent:
+                await _delay(self.chunk_delay)
+            size = min(self.chunk_bytes, total - sent)
+            repeats = size // len(self._period) + 1
+            yield (self._period * repeats)[:size]
+            sent += size
@@ -0,0 +1,409 @@
+"""
+The real-time interview pipeline behind the WebSocket endpoint.
+
+    client audio -> 16 kHz mono PCM16 -> ring buffer + VAD -> [utterance queue] -> STT -> answer -> LLM
+        -> [sentence queue] -> TTS -> [output queue] -> client
+
+Incoming audio is converted to the canonical format (resample.py) and goes into
+the session's ring buffer, where voice-activity detection
+cuts it into utterances (audio.py). Every later hop is a bounded asyncio queue, so
+a slow stage pushes back on the one before it instead of buffering without limit:
+when STT falls behind, the reader stops reading the socket and TCP slows the client
+down; when the client reads slowly, TTS waits for room in the output queue.
+
+The interviewer's turn (question generation plus speech) runs as one task per
+response. If the VAD hears the candidate start speaking over it (barge-in), that
+task is cancelled, audio already queued for it is dropped and the client is told to
+stop playback. Each stage's latency is recorded in `engine_metrics`.
+
+The engine only needs `receive()` and `send()` coroutines, so it runs the same over
+a WebSocket or an in-memory transport (benchmarks/bench_interview_pipeline.py).
+"""
+import os
+import json
+import time
+import asyncio
+from collections import deque
+from typing import Awaitable, Callable, List, Optional, Tuple, Union
+import numpy as np
+from dotenv import load_dotenv
+from loguru import logger as logging
+from starlette.concurrency import run_in_threadpool
+from src.routers.dashboard.models import SessionStatus
+from .audio import AudioIngest
+from .resample import AudioFormat, PcmConverter
+
+load_dotenv()
+
+INTERVIEW_UTTERANCE_QUEUE_SIZE = int(os.getenv("INTERVIEW_UTTERANCE_QUEUE_SIZE", "4"))
+INTERVIEW_SENTENCE_QUEUE_SIZE = int(os.getenv("INTERVIEW_SENTENCE_QUEUE_SIZE", "4"))
+INTERVIEW_OUTPUT_QUEUE_SIZE = int(os.getenv("INTERVIEW_OUTPUT_QUEUE_SIZE", "32"))
+INTERVIEW_MAX_QUESTIONS = int(os.getenv("INTERVIEW_MAX_QUESTIONS", "8"))
+# How long answers still queued when the client stops or leaves get to be transcribed
+INTERVIEW_DRAIN_SECONDS = float(os.getenv("INTERVIEW_DRAIN_SECONDS", "10"))
+
+SENTENCE_ENDINGS = (".", "?", "!")
+
+Message = Union[str, bytes, None]
+
+
+class LatencyStats:
+    """Count, mean and percentiles of recent samples of one stage's latency."""
+
+    def __init__(self, window: int = 1024):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.recent.append(seconds)
+
+    def snapshot(self) -> dict:
+        if not self.count:
+            return {"count": 0}
+        recent = np.fromiter(self.recent, dtype=np.float64)
+        p50, p95, p99 = np.percentile(recent, [50, 95, 99]) * 1000
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count * 1000, 2),
+            "p50_ms": round(float(p50), 2),
+            "p95_ms": round(float(p95), 2),
+            "p99_ms": round(float(p99), 2),
+            "max_ms": round(self.max * 1000, 2),
+        }
+
+
+class EngineMetrics:
+    """Latency per stage and counters, shared by every session of the process."""
+
+    STAGES = (
+        "stt",              # end of utterance -> transcript
+        "llm_first_token",  # response start -> first piece of the question
+        "tts_first_chunk",  # sentence ready -> its first audio chunk
+        "first_audio",      # end of utterance (or session start) -> first audio byte sent
+    )
+
+    def __init__(self):
+        self.latency = {stage: LatencyStats() for stage in self.STAGES}
+        self.counters = {"sessions": 0, "active_sessions": 0, "responses": 0, "barge_ins": 0,
+                         "audio_backpressure_waits": 0, "output_backpressure_waits": 0,
+                         "stale_chunks_dropped": 0, "audio_overruns": 0}
+
+    def snapshot(self) -> dict:
+        return {"latency": {stage: stats.snapshot() for stage, stats in self.latency.items()},
+                "counters": dict(self.counters)}
+
+
+engine_metrics = EngineMetrics()
+
+
+class InterviewEngine:
+    """
+    One candidate's interview over a `receive()`/`send()` transport.
+
+    receive() returns an audio frame (bytes), a JSON control message (str) or None
+    once the client has gone. Answers are delimited by the VAD; the client may also
+    send {"type": "end_of_utterance"} to close the current answer right away.
+    {"type": "stop"} ends the interview. Answers already spoken when the client stops or
+    goes away are still transcribed and recorded; the session is closed as abandoned
+    only when the client went away before the last question was answered. Messages to the client are JSON events ("question_delta",
+    "question", "transcript", "audio_start", "audio_end", "interrupted",
+    "complete", "error") and binary PCM16 audio chunks of the spoken question.
+
+    `audio_format` is the format of the client's audio frames (16 kHz mono PCM16
+    when None). `transcript` is the TranscriptBuffer that persists the QnA turns;
+    None keeps the interview in memory only.
+    """
+
+    def __init__(self, send: Callable[[Union[str, bytes]], Awaitable[None]], stt, llm, tts, user_id: int,
+                 job_title: str = "", job_description: str = "", audio_format: Optional[AudioFormat] = None,
+                 transcript=None, max_questions: int = INTERVIEW_MAX_QUESTIONS, metrics: EngineMetrics = engine_metrics):
+        self._send = send
+        self.stt = stt
+        self.llm = llm
+        self.tts = tts
+        self.user_id = user_id
+        self.job_title = job_title
+        self.job_description = job_description
+        self.transcript = transcript
+        self.max_questions = max_questions
+        self.metrics = metrics
+
+        self.session_id: Optional[int] = None
+        self.history: List[Tuple[str, Optional[str]]] = []
+        self.converter = PcmConverter(audio_format)
+        self.audio = AudioIngest()
+        self.utterance_queue: asyncio.Queue = asyncio.Queue(maxsize=INTERVIEW_UTTERANCE_QUEUE_SIZE)
+        self.output_queue: asyncio.Queue = asyncio.Queue(maxsize=INTERVIEW_OUTPUT_QUEUE_SIZE)
+
+        self._response: Optional[asyncio.Task] = None
+        self._response_id = 0
+        self._speaking = False  # A response is generating or its audio is still queued
+        self._question_open = False  # A question is recorded and waiting for its answer
+        self._closing = False  # The client stopped or left: record answers, ask nothing more
+        self._stopped = False  # The client ended the interview with {"type": "stop"}
+        self._complete = asyncio.Event()
+
+    # -- output --------------------------------------------------------------
+
+    async def _emit(self, item, response_id: Optional[int] = None):
+        if self.output_queue.full():
+            self.metrics.counters["output_backpressure_waits"] += 1
+        await self.output_queue.put((response_id, item))
+
+    async def _emit_event(self, event: dict, response_id: Optional[int] = None):
+        await self._emit(json.dumps(event), response_id)
+
+    async def _sender(self):
+        first_audio_from = {}
+        while True:
+            response_id, item = await self.output_queue.get()
+            if response_id is not None and response_id != self._response_id:
+                first_audio_from.pop(response_id, None)
+                self.metrics.counters["stale_chunks_dropped"] += 1
+                continue
+            if isinstance(item, tuple):
+                # Markers from _respond: ("first_audio_from", started_at) or ("done",)
+                if item[0] == "first_audio_from":
+                    first_audio_from[response_id] = item[1]
+                else:
+                    self._speaking = False
+                continue
+            await self._send(item)
+            if isinstance(item, bytes) and response_id in first_audio_from:
+                self.metrics.latency["first_audio"].record(time.monotonic() - first_audio_from.pop(response_id))
+
+    # -- interviewer turn ----------------------------------------------------
+
+    def _start_response(self, started_at: float):
+        self._response_id += 1
+        self._speaking = True
+        self.metrics.counters["responses"] += 1
+        self._response = asyncio.get_running_loop().create_task(self._respond(self._response_id, started_at))
+
+    async def _cancel_response(self):
+        if self._response is not None and not self._response.done():
+            self._response.cancel()
+            try:
+                await self._response
+            except asyncio.CancelledError:
+                pass
+        self._response = None
+
+    async def _respond(self, response_id: int, started_at: float):
+        """
+        Generate the next question, speaking each sentence as soon as it is complete.
+        `started_at` is when the candidate stopped talking (or the session started).
+        """
+        sentences: asyncio.Queue = asyncio.Queue(maxsize=INTERVIEW_SENTENCE_QUEUE_SIZE)
+        pieces: List[str] = []
+        opened = False
+
+        async def generate():
+            nonlocal opened
+            pending = ""
+            generating_at = time.monotonic()
+            history = [(question, answer or "") for question, answer in self.history]
+            async for piece in self.llm.stream(self.job_title, self.job_description, history):
+                if not pieces:
+                    self.metrics.latency["llm_first_token"].record(time.monotonic() - generating_at)
+                pieces.append(piece)
+                pending += piece
+                await self._emit_event({"type": "question_delta", "text": piece}, response_id)
+                if pending.rstrip().endswith(SENTENCE_ENDINGS):
+                    await sentences.put(pending.strip())
+                    pending = ""
+            if pending.strip():
+                await sentences.put(pending.strip())
+            question = "".join(pieces).strip()
+            self._open_question(question)
+            opened = True
+            await self._emit_event({"type": "question", "text": question}, response_id)
+            await sentences.put(None)
+
+        async def speak():
+            await self._emit(("first_audio_from", started_at), response_id)
+            await self._emit_event({"type": "audio_start"}, response_id)
+            while True:
+                sentence = await sentences.get()
+                if sentence is None:
+                    break
+                ready_at = time.monotonic()
+                first = True
+                async for chunk in self.tts.synthesize(sentence):
+                    if first:
+                        self.metrics.latency["tts_first_chunk"].record(time.monotonic() - ready_at)
+                        first = False
+                    await self._emit(chunk, response_id)
+            await self._emit_event({"type": "audio_end"}, response_id)
+            # Queued right behind audio_end, so the sender clears _speaking as soon as it is out
+            await self._emit(("done",), response_id)
+
+        tasks = [asyncio.ensure_future(generate()), asyncio.ensure_future(speak())]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException as e:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            # An interrupted question still counts once the candidate heard part of it
+            question = "".join(pieces).strip()
+            if question and not opened:
+                self._open_question(question)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            logging.error(f"Interview response failed in session {self.session_id}: {e}")
+            await self._emit_event({"type": "error", "message": "The interviewer could not respond."})
+            await self._emit(("done",), response_id)
+
+    def _open_question(self, question: str):
+        self.history.append((question, None))
+        self._question_open = True
+        if self.transcript is not None and self.session_id is not None:
+            self.transcript.start_turn(self.session_id, question)
+
+    async def _barge_in(self):
+        self.metrics.counters["barge_ins"] += 1
+        await self._cancel_response()
+        # Audio already queued for the cancelled response is dropped by the sender
+        self._response_id += 1
+        self._speaking = False
+        await self._emit_event({"type": "interrupted"})
+
+    # -- candidate turn ------------------------------------------------------
+
+    async def _answer(self, text: str, ended_at: float):
+        await self._emit_event({"type": "transcript", "text": text, "final": True})
+        if self._question_open:
+            question, _ = self.history[-1]
+            self.history[-1] = (question, text)
+            self._question_open = False
+            if self.transcript is not None and self.session_id is not None:
+                self.transcript.add_utterance(self.session_id, text)
+                await run_in_threadpool(self.transcript.end_turn, self.session_id)
+
+        if sum(1 for _, answer in self.history if answer is not None) >= self.max_questions:
+            await self._emit_event({"type": "complete"})
+            self._complete.set()
+            return
+        if self._closing:
+            return
+        await self._cancel_response()
+        self._start_response(ended_at)
+
+    async def _recognizer(self):
+        while True:
+            utterance = await self.utterance_queue.get()
+            try:
+                try:
+                    # A view of the ring buffer; released once the backend is done with it
+                    text = await self.stt.transcribe(utterance.audio())
+                finally:
+                    utterance.release()
+                self.metrics.latency["stt"].record(time.monotonic() - utterance.at)
+                if text.strip():
+                    await self._answer(text.strip(), utterance.at)
+            finally:
+                self.utterance_queue.task_done()
+
+    async def _queue_utterances(self, utterances):
+        for utterance in utterances:
+            if self.utterance_queue.full():
+                self.metrics.counters["audio_backpressure_waits"] += 1
+            await self.utterance_queue.put(utterance)
+
+    async def _reader(self, receive: Callable[[], Awaitable[Message]]):
+        while True:
+            message = await receive()
+            if message is None:
+                return
+            if isinstance(message, bytes):
+                overruns = self.audio.overruns
+                utterances = self.audio.feed(self.converter.convert(message))
+                self.metrics.counters["audio_overruns"] += self.audio.overruns - overruns
+                if self._speaking and self.audio.in_speech:
+                    await self._barge_in()
+                await self._queue_utterances(utterances)
+                continue
+            try:
+                control = json.loads(message)
+            except ValueError:
+                await self._emit_event({"type": "error", "message": "Control messages must be JSON."})
+                continue
+            if control.get("type") == "end_of_utterance":
+                await self._queue_utterances(self.audio.flush())
+            elif control.get("type") == "stop":
+                self._stopped = True
+                # Speech not closed by the VAD yet is the end of the last answer
+                await self._queue_utterances(self.audio.flush())
+                return
+            else:
+                await self._emit_event({"type": "error", "message": f"Unknown control message: {control.get('type')}"})
+
+    # -- session -------------------------------------------------------------
+
+    async def run(self, receive: Callable[[], Awaitable[Message]]):
+        """Run the interview until it completes, the client stops it or the client goes away."""
+        self.metrics.counters["sessions"] += 1
+        self.metrics.counters["active_sessions"] += 1
+        try:
+            if self.transcript is not None:
+                self.session_id = await run_in_threadpool(self.transcript.start_session, self.user_id,
+                                                          self.job_title or None, self.job_description or None)
+            await self._run(receive)
+        finally:
+            self.metrics.counters["active_sessions"] -= 1
+
+    async def _run(self, receive: Callable[[], Awaitable[Message]]):
+        loop = asyncio.get_running_loop()
+        sender = loop.create_task(self._sender())
+        recognizer = loop.create_task(self._recognizer())
+        reader = loop.create_task(self._reader(receive))
+        complete = loop.create_task(self._complete.wait())
+        try:
+            self._start_response(time.monotonic())
+            done, _ = await asyncio.wait([reader, recognizer, sender, complete], return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task is not complete and task.exception() is not None:
+                    raise task.exception()
+            if reader in done and not self._complete.is_set():
+                # Answers the client gave before stopping or leaving are still recorded
+                self._closing = True
+                await self._cancel_response()
+                await self._drain_utterances(recognizer)
+            if self._complete.is_set() or self._stopped:
+                # Let the closing events reach the client
+                await self._drain_output(sender)
+        finally:
+            await self._cancel_response()
+            for task in (reader, recognizer, sender, complete):
+                task.cancel()
+            await asyncio.gather(reader, recognizer, sender, complete, return_exceptions=True)
+            if self.transcript is not None and self.session_id is not None:
+                finished = self._complete.is_set() or self._stopped
+                status = SessionStatus.completed if finished else SessionStatus.abandoned
+                try:
+                    await run_in_threadpool(self.transcript.end_session, self.session_id, status)
+                except Exception as e:
+                    logging.error(f"Failed to close interview session {self.session_id}: {e}")
+
+    async def _drain_utterances(self, recognizer: asyncio.Task, timeout: float = INTERVIEW_DRAIN_SECONDS):
+        """Wait for the recognizer to transcribe the utterances still queued."""
+        drained = asyncio.ensure_future(self.utterance_queue.join())
+        try:
+            await asyncio.wait([drained, recognizer], timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            drained.cancel()
+        if recognizer.done() and recognizer.exception() is not None:
+            raise recognizer.exception()
+        if not drained.done() or drained.cancelled():
+            logging.warning(f"Interview session {self.session_id}: answers still queued after {timeout}s dropped")
+
+    async def _drain_output(self, sender: asyncio.Task, timeout: float = 5.0):
+        deadline = time.monotonic() + timeout
+        while not self.output_queue.empty() and not sender.done() and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
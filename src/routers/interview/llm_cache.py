@@ -0,0 +1,277 @@
+"""
+Two-tier response cache in front of the interview's LLM.
+
+Many prompts are near-duplicates: the same role and job description, the same
+follow-up after a similar answer. A cached response is served without waiting
+for the model's first token.
+
+- Exact tier: an LRU keyed by a hash of the normalized prompt (NFKC, collapsed
+  whitespace, case-folded).
+- Semantic tier: the prompt's embedding (the question bank's embedder) is looked
+  up in a small flat FAISS inner-product index. The closest stored prompt at or
+  above LLM_CACHE_SIMILARITY_THRESHOLD is a hit.
+
+Entries expire after LLM_CACHE_TTL_SECONDS and are evicted least recently used
+past LLM_CACHE_MAX_ENTRIES per tenant. Tenants are isolated: each has its own
+LRU, index and counters, and a lookup never sees another tenant's entries. A
+lookup also carries a partition, which a semantic hit must share (e.g. how many
+questions were asked so far), and responses to exclude (questions already
+asked).
+
+CachedQuestionGenerator applies this to a QuestionGenerator backend. Prompts
+without candidate answers (the opening question for a job) are cached under the
+shared tenant. Prompts with answers are cached under the session's tenant
+(`llm_cache_tenant`), which the interview endpoint sets per user, or to the shared
+tenant when LLM_CACHE_TENANT_SCOPE is "global". Only complete responses are
+stored: a response cut short by a barge-in is not.
+
+It works with any backend, including the offline FakeQuestionGenerator.
+"""
+import os
+import re
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+import faiss
+import numpy as np
+from dotenv import load_dotenv
+from starlette.concurrency import run_in_threadpool
+from src.routers.questions.embeddings import load_embedder
+from src.routers.questions.embedding_cache import normalize_text
+
+load_dotenv()
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_SEMANTIC_ENABLED = os.getenv("LLM_CACHE_SEMANTIC_ENABLED", "true").lower() == "true"
+LLM_CACHE_SIMILARITY_THRESHOLD = float(os.getenv("LLM_CACHE_SIMILARITY_THRESHOLD", "0.92"))
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", "86400"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2048"))  # Per tenant
+LLM_CACHE_MAX_TENANTS = int(os.getenv("LLM_CACHE_MAX_TENANTS", "1000"))
+# Closest stored prompts checked for one that is unexpired, in the partition and not excluded
+LLM_CACHE_SEMANTIC_CANDIDATES = int(os.getenv("LLM_CACHE_SEMANTIC_CANDIDATES", "8"))
+# "user": prompts with a candidate's answers are cached per user; "global": shared by everyone
+LLM_CACHE_TENANT_SCOPE = os.getenv("LLM_CACHE_TENANT_SCOPE", "user")
+LLM_CACHE_SHARED_TENANT = "shared"
+
+# Tenant of the prompts with candidate answers, set per interview session
+llm_cache_tenant: ContextVar[str] = ContextVar("llm_cache_tenant", default=LLM_CACHE_SHARED_TENANT)
+
+_SENTENCE_END = re.compile(r"(?<=[.?!])\s+")
+
+
+def normalize_prompt(prompt: str) -> str:
+    return normalize_text(prompt).casefold()
+
+
+class _Entry:
+    __slots__ = ("id", "key", "partition", "response", "expires_at", "seconds")
+
+    def __init__(self, entry_id: int, key: bytes, partition: str, response: str, expires_at: float, seconds: float):
+        self.id = entry_id
+        self.key = key
+        self.partition = partition
+        self.response = response
+        self.expires_at = expires_at
+        self.seconds = seconds  # How long the model took to produce the response
+
+
+class _TenantCache:
+    def __init__(self, dim: Optional[int]):
+        self.entries: "OrderedDict[bytes, _Entry]" = OrderedDict()  # Least recently used first
+        self.by_id: Dict[int, _Entry] = {}
+        self.index = faiss.IndexIDMap2(faiss.IndexFlatIP(dim)) if dim else None
+        self.stats = {"lookups": 0, "exact_hits": 0, "semantic_hits": 0, "misses": 0}
+
+    def remove(self, entry: _Entry):
+        del self.entries[entry.key]
+        del self.by_id[entry.id]
+        if self.index is not None:
+            self.index.remove_ids(np.array([entry.id], dtype=np.int64))
+
+
+class CacheLookup:
+    """The result of LLMResponseCache.lookup; pass it to store() after a miss."""
+
+    def __init__(self, tenant: str, partition: str, key: bytes, normalized: str):
+        self.tenant = tenant
+        self.partition = partition
+        self.key = key
+        self.normalized = normalized
+        self.vector: Optional[np.ndarray] = None
+        self.response: Optional[str] = None
+        self.tier: Optional[str] = None  # "exact" or "semantic" on a hit
+        self.similarity: Optional[float] = None
+
+
+class LLMResponseCache:
+    """Exact and semantic cache of LLM responses per tenant; see the module docstring."""
+
+    def __init__(self, embedder=None, threshold: float = LLM_CACHE_SIMILARITY_THRESHOLD,
+                 ttl: float = LLM_CACHE_TTL_SECONDS, max_entries: int = LLM_CACHE_MAX_ENTRIES,
+                 max_tenants: int = LLM_CACHE_MAX_TENANTS, candidates: int = LLM_CACHE_SEMANTIC_CANDIDATES):
+        self.embedder = embedder  # None disables the semantic tier
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_tenants = max_tenants
+        self.candidates = candidates
+        self._tenants: "OrderedDict[str, _TenantCache]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.stats = {"lookups": 0, "exact_hits": 0, "semantic_hits": 0, "misses": 0, "stores": 0,
+                      "evictions": 0, "expirations": 0, "seconds_saved": 0.0}
+
+    def _tenant(self, tenant: str) -> _TenantCache:
+        cache = self._tenants.get(tenant)
+        if cache is None:
+            cache = self._tenants[tenant] = _TenantCache(self.embedder.dim if self.embedder else None)
+            while len(self._tenants) > self.max_tenants:
+                _, evicted = self._tenants.popitem(last=False)
+                self.stats["evictions"] += len(evicted.entries)
+        self._tenants.move_to_end(tenant)
+        return cache
+
+    def _usable(self, cache: _TenantCache, entry: _Entry, now: float, excluded: set) -> bool:
+        if entry.expires_at <= now:
+            cache.remove(entry)
+            self.stats["expirations"] += 1
+            return False
+        return normalize_prompt(entry.response) not in excluded
+
+    def _hit(self, cache: _TenantCache, lookup: CacheLookup, entry: _Entry, tier: str):
+        cache.entries.move_to_end(entry.key)
+        lookup.response, lookup.tier = entry.response, tier
+        cache.stats[f"{tier}_hits"] += 1
+        self.stats[f"{tier}_hits"] += 1
+        self.stats["seconds_saved"] += entry.seconds
+
+    def _miss(self, cache: _TenantCache):
+        cache.stats["misses"] += 1
+        self.stats["misses"] += 1
+
+    def lookup(self, tenant: str, prompt: str, partition: str = "", exclude: Iterable[str] = ()) -> CacheLookup:
+        """
+        Look `prompt` up in `tenant`'s cache, exact first, then semantic among the
+        entries of `partition`. Responses in `exclude` do not count as hits.
+        """
+        normalized = normalize_prompt(prompt)
+        key = hashlib.blake2b(f"{partition}\x00{normalized}".encode(), digest_size=16).digest()
+        lookup = CacheLookup(tenant, partition, key, normalized)
+        excluded = {normalize_prompt(text) for text in exclude}
+        now = time.monotonic()
+        with self._lock:
+            self.stats["lookups"] += 1
+            cache = self._tenant(tenant)
+            cache.stats["lookups"] += 1
+            entry = cache.entries.get(key)
+            if entry is not None and self._usable(cache, entry, now, excluded):
+                self._hit(cache, lookup, entry, "exact")
+                return lookup
+            if self.embedder is None or not cache.index.ntotal:
+                self._miss(cache)
+                return lookup
+
+        lookup.vector = self.embedder.embed([normalized])
+        with self._lock:
+            cache = self._tenant(tenant)
+            if cache.index.ntotal:
+                scores, ids = cache.index.search(lookup.vector, min(self.candidates, cache.index.ntotal))
+                for score, entry_id in zip(scores[0], ids[0]):
+                    if score < self.threshold:
+                        break
+                    entry = cache.by_id.get(int(entry_id))
+                    if entry is None or entry.partition != partition or not self._usable(cache, entry, now, excluded):
+                        continue
+                    lookup.similarity = float(score)
+                    self._hit(cache, lookup, entry, "semantic")
+                    return lookup
+            self._miss(cache)
+        return lookup
+
+    def store(self, lookup: CacheLookup, response: str, seconds: float = 0.0):
+        """Cache the model's `response` to the prompt of a missed lookup; `seconds` is what it took."""
+        if self.embedder is not None and lookup.vector is None:
+            lookup.vector = self.embedder.embed([lookup.normalized])
+        with self._lock:
+            cache = self._tenant(lookup.tenant)
+            previous = cache.entries.get(lookup.key)
+            if previous is not None:
+                cache.remove(previous)
+            self._next_id += 1
+            entry = _Entry(self._next_id, lookup.key, lookup.partition, response,
+                           time.monotonic() + self.ttl, seconds)
+            cache.entries[entry.key] = entry
+            cache.by_id[entry.id] = entry
+            if cache.index is not None:
+                cache.index.add_with_ids(lookup.vector, np.array([entry.id], dtype=np.int64))
+            while len(cache.entries) > self.max_entries:
+                cache.remove(next(iter(cache.entries.values())))
+                self.stats["evictions"] += 1
+            self.stats["stores"] += 1
+
+    def invalidate(self, tenant: Optional[str] = None):
+        """Drop one tenant's entries, or every tenant's."""
+        with self._lock:
+            if tenant is None:
+                self._tenants.clear()
+            else:
+                self._tenants.pop(tenant, None)
+
+    def snapshot(self, tenants: int = 20) -> dict:
+        """Counters, and per-tenant counters of the most recently used `tenants`."""
+        with self._lock:
+            hits = self.stats["exact_hits"] + self.stats["semantic_hits"]
+            recent = list(self._tenants.items())[-tenants:]
+            return {
+                **self.stats,
+                "seconds_saved": round(self.stats["seconds_saved"], 2),
+                "hit_rate": round(hits / self.stats["lookups"], 4) if self.stats["lookups"] else None,
+                "threshold": self.threshold,
+                "tenant_count": len(self._tenants),
+                "entries": sum(len(cache.entries) for cache in self._tenants.values()),
+                "tenants": {name: {**cache.stats, "entries": len(cache.entries)} for name, cache in reversed(recent)},
+            }
+
+
+def question_prompt(job_title: str, job_description: str, history: List[Tuple[str, str]]) -> str:
+    """The question generator's input as one text, the cache key."""
+    lines = [f"Role: {job_title}", f"Job description: {job_description}"]
+    for question, answer in history:
+        lines += [f"Q: {question}", f"A: {answer}"]
+    return "\n".join(lines)
+
+
+class CachedQuestionGenerator:
+    """A QuestionGenerator backend behind an LLMResponseCache."""
+
+    def __init__(self, generator, cache: LLMResponseCache = None):
+        self.generator = generator
+        self.cache = cache or LLMResponseCache(load_embedder() if LLM_CACHE_SEMANTIC_ENABLED else None)
+
+    async def stream(self, job_title: str, job_description: str,
+                     history: List[Tuple[str, str]]) -> AsyncIterator[str]:
+        tenant = llm_cache_tenant.get() if history else LLM_CACHE_SHARED_TENANT
+        prompt = question_prompt(job_title, job_description, history)
+        # A semantic hit must be for as many questions asked so far, and not repeat one of them
+        lookup = await run_in_threadpool(self.cache.lookup, tenant, prompt, f"question:{len(history)}",
+                                         [question for question, _ in history])
+        if lookup.response is not None:
+            # Sentence by sentence, so the engine can start speaking the first one
+            for index, sentence in enumerate(_SENTENCE_END.split(lookup.response)):
+                yield sentence if index == 0 else " " + sentence
+            return
+
+        started = time.monotonic()
+        pieces = []
+        async for piece in self.generator.stream(job_title, job_description, history):
+            pieces.append(piece)
+            yield piece
+        response = "".join(pieces).strip()
+        if response:
+            await run_in_threadpool(self.cache.store, lookup, response, time.monotonic() - started)
+
+    def snapshot(self) -> dict:
+        return self.cache.snapshot()
@@ -0,0 +1,106 @@
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect, status
+from loguru import logger as logging
+from starlette.concurrency import run_in_threadpool
+from src.utils.db import db_util
+from src.utils.jwt import get_email_from_token
+from src.routers.users.models import User
+from src.routers.admin.main import get_admin_user
+from src.routers.dashboard.main import transcript_buffer
+from .backends import load_backends
+from .engine import InterviewEngine, engine_metrics
+from .llm_cache import (CachedQuestionGenerator, llm_cache_tenant, LLM_CACHE_ENABLED, LLM_CACHE_TENANT_SCOPE,
+                        LLM_CACHE_SHARED_TENANT)
+from .resample import AudioFormat
+
+# Defining the router
+router = APIRouter(
+    prefix="/api/interview",
+    tags=["interview"],
+    responses={404: {"description": "Not found"}},
+)
+
+# Shared by every session; backends keep no per-session state
+stt_backend, llm_backend, tts_backend = load_backends()
+if LLM_CACHE_ENABLED:
+    llm_backend = CachedQuestionGenerator(llm_backend)
+
+
+def _user_id_for_token(token: str):
+    email = get_email_from_token(token)
+    db = db_util.SessionLocal()
+    try:
+        return db.query(User.id).filter(User.email == email).scalar()
+    finally:
+        db.close()
+
+
+@router.websocket("/ws")
+async def interview_socket(websocket: WebSocket, token: str, job_title: str = "", job_description: str = "",
+                           sample_rate: int = 16000, channels: int = 1, encoding: str = "pcm_s16le"):
+    """
+    Real-time voice interview.
+
+    Browsers cannot set headers on a WebSocket, so the access token comes as the
+    `token` query parameter. The client streams audio frames as binary messages, in
+    the format given by `sample_rate`, `channels` and `encoding` ("pcm_s16le" or
+    "pcm_f32le"). The server converts them to 16 kHz mono PCM16, detects when the
+    candidate stops talking (or is told with {"type": "end_of_utterance"}) and
+    streams the spoken questions back (see InterviewEngine).
+    """
+    try:
+        user_id = await run_in_threadpool(_user_id_for_token, token)
+    except HTTPException:
+        user_id = None
+    if not user_id:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    try:
+        audio_format = AudioFormat(sample_rate, channels, encoding)
+    except ValueError as e:
+        logging.error(f"Rejected interview audio format: {e}")
+        await websocket.close(code=status.WS_1003_UNSUPPORTED_DATA)
+        return
+
+    await websocket.accept()
+    # The engine's tasks inherit this context: which LLM cache tenant the session reads and fills
+    llm_cache_tenant.set(f"user:{user_id}" if LLM_CACHE_TENANT_SCOPE == "user" else LLM_CACHE_SHARED_TENANT)
+
+    async def receive():
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return None
+        return message["bytes"] if message.get("bytes") is not None else message.get("text")
+
+    async def send(item):
+        if isinstance(item, bytes):
+            await websocket.send_bytes(item)
+        else:
+            await websocket.send_text(item)
+
+    engine = InterviewEngine(send, stt_backend, llm_backend, tts_backend, user_id, job_title, job_description,
+                             audio_format=audio_format, transcript=transcript_buffer)
+    try:
+        await engine.run(receive)
+    except WebSocketDisconnect:
+        return
+    except Exception as e:
+        logging.error(f"Interview session {engine.session_id} failed: {e}")
+        await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
+        return
+    await websocket.close()
+
+
+@router.get("/metrics")
+def get_interview_metrics(admin_user = Depends(get_admin_user)):
+    """
+    Per-stage latency (STT, first LLM token, first TTS chunk, first audio sent),
+    backpressure / barge-in counters and LLM response cache hit rates of the
+    interview engine in this process.
+    """
+    return {
+        "success": True,
+        "status": 200,
+        "message": "Interview engine metrics fetched successfully",
+        "data": {**engine_metrics.snapshot(),
+                 "llm_cache": llm_backend.snapshot() if hasattr(llm_backend, "snapshot") else None},
+    }
@@ -0,0 +1,178 @@
+"""
+Conversion of client audio to the engine's canonical format: 16 kHz mono PCM16.
+
+Clients capture at whatever rate their device runs (8, 16, 44.1 or 48 kHz, and
+others), as int16 or float32, mono or stereo. PcmConverter turns each incoming
+buffer into canonical audio in a few whole-array NumPy operations: downmix and
+dtype conversion in one pass, then rational resampling with a polyphase FIR
+filter. The filter for a rate pair is designed once and cached, and the
+converter's work and output arrays are reused from buffer to buffer.
+
+Resampling by up/down (44.1 -> 16 kHz is 160/441) computes each output sample as
+one row of a (samples x taps) window matrix times the filter phase it falls on;
+the window rows are gathered from a strided view of the input, so there is no
+per-sample Python work and no upsampled intermediate.
+"""
+import os
+from math import gcd
+from functools import lru_cache
+from typing import Optional
+import numpy as np
+from dotenv import load_dotenv
+from .backends import SAMPLE_RATE
+
+load_dotenv()
+
+# Zero crossings of the filter's sinc kernel on each side, at the lower of the two rates
+AUDIO_RESAMPLE_HALF_WIDTH = int(os.getenv("AUDIO_RESAMPLE_HALF_WIDTH", "10"))
+AUDIO_RESAMPLE_KAISER_BETA = float(os.getenv("AUDIO_RESAMPLE_KAISER_BETA", "5.0"))
+
+SUPPORTED_ENCODINGS = {"pcm_s16le": np.dtype("<i2"), "pcm_f32le": np.dtype("<f4")}
+MAX_CHANNELS = 2
+
+
+class AudioFormat:
+    """Sample rate, channel count and encoding of a client's audio stream."""
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE, channels: int = 1, encoding: str = "pcm_s16le"):
+        if encoding not in SUPPORTED_ENCODINGS:
+            raise ValueError(f"Unsupported encoding {encoding!r}, expected one of {', '.join(SUPPORTED_ENCODINGS)}")
+        if not 1 <= channels <= MAX_CHANNELS:
+            raise ValueError(f"Unsupported channel count {channels}")
+        if not 8000 <= sample_rate <= 192000:
+            raise ValueError(f"Unsupported sample rate {sample_rate}")
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.encoding = encoding
+        self.dtype = SUPPORTED_ENCODINGS[encoding]
+
+    @property
+    def frame_bytes(self) -> int:
+        """Bytes per sample frame (one sample of every channel)."""
+        return self.dtype.itemsize * self.channels
+
+    @property
+    def is_canonical(self) -> bool:
+        return self.sample_rate == SAMPLE_RATE and self.channels == 1 and self.encoding == "pcm_s16le"
+
+    def __repr__(self):
+        return f"<AudioFormat {self.sample_rate} Hz x{self.channels} {self.encoding}>"
+
+
+@lru_cache(maxsize=None)
+def polyphase_filter(up: int, down: int, half_width: int = AUDIO_RESAMPLE_HALF_WIDTH,
+                     beta: float = AUDIO_RESAMPLE_KAISER_BETA) -> np.ndarray:
+    """
+    Kaiser-windowed sinc low-pass for resampling by up/down, split into its `up`
+    phases: row p holds the taps applied for output samples that fall on phase p,
+    in input order (oldest sample first), so an output is `window @ row`.
+    """
+    factor = max(up, down)
+    half = half_width * factor
+    positions = np.arange(-half, half + 1)
+    taps = np.sinc(positions / factor) * np.kaiser(len(positions), beta)
+    taps *= up / taps.sum()  # Unity gain after upsampling by `up`
+    per_phase = -(-len(taps) // up)
+    padded = np.zeros(per_phase * up)
+    padded[:len(taps)] = taps
+    # padded[p + k * up] is the tap for input sample (base - k) of an output on phase p
+    return np.ascontiguousarray(padded.reshape(per_phase, up).T[:, ::-1], dtype=np.float32)
+
+
+class PcmConverter:
+    """
+    Streaming converter from one client AudioFormat to 16 kHz mono PCM16.
+
+    `convert()` keeps the filter's history between calls, so a stream can be fed in
+    buffers of any size (a partial sample frame is held until the rest arrives).
+    It returns a memoryview of the converter's output array, valid until the next
+    call; canonical input is returned as is.
+    """
+
+    def __init__(self, source: Optional[AudioFormat] = None, target_rate: int = SAMPLE_RATE):
+        self.source = source or AudioFormat()
+        divisor = gcd(self.source.sample_rate, target_rate)
+        self.up = target_rate // divisor
+        self.down = self.source.sample_rate // divisor
+        self.resampling = self.up != self.down
+        self.phases = polyphase_filter(self.up, self.down) if self.resampling else None
+        self.taps = self.phases.shape[1] if self.resampling else 1
+        self.scale = 32768.0 if self.source.encoding == "pcm_f32le" else 1.0
+        self._pending = b""
+        self._consumed = 0  # Input samples (per channel) fed so far
+        self._produced = 0  # Output samples produced so far
+        # Work array: the last taps-1 input samples, then the new buffer's
+        self._work = np.zeros(self.taps - 1 + 4096, dtype=np.float32)
+        self._float_out = np.empty(0, dtype=np.float32)
+        self._out = np.empty(0, dtype="<i2")
+
+    def _reserve(self, samples: int, outputs: int):
+        if len(self._work) < self.taps - 1 + samples:
+            work = np.zeros(2 * (self.taps - 1 + samples), dtype=np.float32)
+            work[:self.taps - 1] = self._work[:self.taps - 1]
+            self._work = work
+        if len(self._out) < outputs:
+            self._out = np.empty(2 * outputs, dtype="<i2")
+            # Room for whole groups of `up` outputs
+            self._float_out = np.empty(2 * outputs + self.up, dtype=np.float32)
+
+    def convert(self, data):
+        if self.source.is_canonical:
+            return data
+        if self._pending:
+            data = self._pending + bytes(data)
+        frame_bytes = self.source.frame_bytes
+        usable = len(data) // frame_bytes * frame_bytes
+        self._pending = bytes(data[usable:])
+        samples = usable // frame_bytes
+        if not samples:
+            return memoryview(b"")
+
+        # Outputs whose newest input sample has now arrived
+        first = self._produced
+        last = ((self._consumed + samples) * self.up + self.down - 1) // self.down
+        outputs = last - first
+        self._reserve(samples, outputs)
+
+        # Downmix and convert dtype in one pass, straight into the work array
+        frames = np.frombuffer(data, dtype=self.source.dtype, count=samples * self.source.channels)
+        frames = frames.reshape(samples, self.source.channels)
+        history = self.taps - 1
+        incoming = self._work[history:history + samples]
+        if self.source.channels == 1:
+            np.multiply(frames[:, 0], self.scale, out=incoming, casting="unsafe")
+        else:
+            # Strided adds are much faster than a mean over a length-2 axis
+            np.add(frames[:, 0], frames[:, 1], out=incoming, dtype=np.float32)
+            incoming *= self.scale / self.source.channels
+
+        result = self._float_out[:outputs]
+        if self.resampling:
+            windows = np.lib.stride_tricks.sliding_window_view(self._work[:history + samples], self.taps)
+            if self.up == 1:
+                # Pure decimation: one phase, and the windows are every `down`-th row of the view
+                start = first * self.down - self._consumed
+                np.dot(windows[start::self.down][:outputs], self.phases[0], out=result)
+            elif outputs:
+                # Outputs r, r + up, r + 2*up, ... fall on the same phase, so with the outputs
+                # laid out as (groups x up) each column needs a single row of the filter
+                groups = -(-outputs // self.up)
+                positions = np.arange(first, first + groups * self.up, dtype=np.int64) * self.down
+                # Index of each output's newest input sample, relative to this buffer; the
+                # padding past the last output is clamped to a valid window and discarded
+                bases = np.minimum(positions // self.up - self._consumed, len(windows) - 1)
+                coefficients = self.phases[positions[:self.up] % self.up]
+                grouped = self._float_out[:groups * self.up].reshape(groups, self.up)
+                np.einsum("grk,rk->gr", windows[bases.reshape(groups, self.up)], coefficients, out=grouped)
+            # Keep the newest taps-1 samples as the next buffer's history
+            self._work[:history] = self._work[samples:samples + history]
+        else:
+            result[:] = incoming
+
+        self._consumed += samples
+        self._produced = last
+        np.rint(result, out=result)
+        np.clip(result, -32768, 32767, out=result)
+        out = self._out[:outputs]
+        out[:] = result
+        return memoryview(out).cast("B")
@@ -0,0 +1,5 @@
+from .main import router
+
+__all__ = [
+    "router"
+]
@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Request
+from src.utils import storage
+from src.utils.media import MediaFileResponse, plan_file_response
+
+# Defining the router
+router = APIRouter(
+    prefix="/media",
+    tags=["Media"],
+    responses={404: {"description": "Not found"}},
+)
+
+
+@router.api_route("/{key:path}", methods=["GET", "HEAD"], include_in_schema=False)
+def serve_media(key: str, request: Request):
+    """
+    Serve a file from the local storage backend, with ETag / If-None-Match, Range and
+    immutable caching. For heavy traffic run `python -m src.utils.media_server` (sendfile)
+    or put nginx in front with MEDIA_ACCEL_REDIRECT, and point MEDIA_URL at it.
+    """
+    return MediaFileResponse(plan_file_response(storage.MEDIA_ROOT, key, request.method, request.headers))
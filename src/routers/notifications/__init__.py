@@ -0,0 +1,9 @@
+from .models.outbox import EmailOutbox
+from .controller import enqueue_email, enqueue_emails, enqueue_template
+
+__all__ = [
+    "EmailOutbox",
+    "enqueue_email",
+    "enqueue_emails",
+    "enqueue_template"
+]
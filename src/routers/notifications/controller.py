@@ -0,0 +1,296 @@
+import os
+import asyncio
+from typing import Optional
+from sqlalchemy import text, insert
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+from loguru import logger as logging
+from starlette.concurrency import run_in_threadpool
+from src.utils import mailer
+from src.utils.bulk import values_clause
+from src.utils.circuit_breaker import CircuitOpenError
+from src.utils.email_templates import RenderedEmail, render_email
+from .models import EmailOutbox, OutboxStatus
+
+load_dotenv()
+
+OUTBOX_WORKERS = int(os.getenv("OUTBOX_WORKERS", "2"))
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "1.0"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "6"))
+OUTBOX_BACKOFF_SECONDS = float(os.getenv("OUTBOX_BACKOFF_SECONDS", "30"))
+OUTBOX_BACKOFF_MAX_SECONDS = float(os.getenv("OUTBOX_BACKOFF_MAX_SECONDS", "3600"))
+# How long a claimed row stays invisible to other workers; must outlast sending a whole batch
+OUTBOX_CLAIM_SECONDS = float(os.getenv("OUTBOX_CLAIM_SECONDS", "600"))
+OUTBOX_ENABLED = os.getenv("OUTBOX_ENABLED", "true").lower() == "true"
+
+
+def enqueue_email(db: Session, to_email: str, subject: str, body: str, is_html: bool = False,
+                  html_body: Optional[str] = None) -> EmailOutbox:
+    """
+    Add an email to the outbox within the caller's transaction.
+
+    Nothing is sent here: the row becomes visible to the workers when the caller
+    commits, so the email goes out if and only if the business change is committed.
+    """
+    entry = EmailOutbox(to_email=to_email, subject=subject, body=body, is_html=is_html, html_body=html_body,
+                        status=OutboxStatus.pending.value, attempts=0)
+    db.add(entry)
+    return entry
+
+
+def enqueue_template(db: Session, to_email: str, template_name: str, lists: Optional[dict] = None,
+                     **context) -> EmailOutbox:
+    """
+    Render a registered email template and add it to the outbox within the caller's transaction.
+    """
+    return enqueue_email(db, to_email=to_email, **rendered_fields(render_email(template_name, lists=lists, **context)))
+
+
+def rendered_fields(rendered: RenderedEmail) -> dict:
+    """Map a rendered template onto the outbox's subject / body / html_body columns."""
+    if rendered.text is None:
+        return {"subject": rendered.subject, "body": rendered.html, "is_html": True, "html_body": None}
+    return {"subject": rendered.subject, "body": rendered.text, "is_html": False, "html_body": rendered.html}
+
+
+def enqueue_emails(db: Session, emails: list, campaign_id: str = None) -> int:
+    """
+    Add many emails to the outbox with multi-row INSERTs, within the caller's transaction.
+
+    `emails` is a list of dicts with `to_email`, `subject`, `body` and optionally `is_html` / `html_body`.
+    """
+    if not emails:
+        return 0
+    db.execute(
+        insert(EmailOutbox),
+        [
+            {
+                "to_email": email["to_email"],
+                "subject": email["subject"],
+                "body": email["body"],
+                "is_html": email.get("is_html", False),
+                "html_body": email.get("html_body"),
+                "status": OutboxStatus.pending.value,
+                "attempts": 0,
+                "campaign_id": campaign_id,
+            }
+            for email in emails
+        ],
+    )
+    return len(emails)
+
+
+def campaign_progress(db: Session, campaign_id: str) -> Optional[dict]:
+    """
+    Delivery progress of the emails queued under `campaign_id`.
+    """
+    row = db.execute(
+        text("""
+            SELECT count(*) AS total,
+                   count(*) FILTER (WHERE status = :sent) AS sent,
+                   count(*) FILTER (WHERE status = :failed) AS failed,
+                   count(*) FILTER (WHERE status = :pending) AS pending,
+                   count(*) FILTER (WHERE status = :pending AND attempts > 0) AS retrying,
+                   EXTRACT(EPOCH FROM (max(sent_at) - min(created_at))) AS elapsed
+            FROM voice_bot.email_outbox
+            WHERE campaign_id = :campaign_id
+        """),
+        {"campaign_id": campaign_id, "sent": OutboxStatus.sent.value,
+         "failed": OutboxStatus.failed.value, "pending": OutboxStatus.pending.value},
+    ).one()
+    if not row.total:
+        return None
+
+    elapsed = float(row.elapsed) if row.elapsed is not None else None
+    return {
+        "campaign_id": campaign_id,
+        "total": row.total,
+        "sent": row.sent,
+        "failed": row.failed,
+        "pending": row.pending,
+        "retrying": row.retrying,
+        "progress_percent": round((row.sent + row.failed) * 100 / row.total, 1),
+        "done": row.pending == 0,
+        "elapsed_seconds": round(elapsed, 3) if elapsed is not None else None,
+        "emails_per_second": round(row.sent / elapsed, 1) if elapsed else None,
+    }
+
+
+def backoff_seconds(attempts: int) -> float:
+    return min(OUTBOX_BACKOFF_SECONDS * (2 ** (attempts - 1)), OUTBOX_BACKOFF_MAX_SECONDS)
+
+
+def deliver_outbox_batch(db: Session, batch_size: int = OUTBOX_BATCH_SIZE, pool: mailer.SMTPPool = None,
+                         claim_seconds: float = OUTBOX_CLAIM_SECONDS) -> dict:
+    """
+    Claim due outbox rows, send them and record the outcome.
+
+    Rows are picked with `FOR UPDATE SKIP LOCKED` and claimed by pushing their
+    `next_attempt_at` `claim_seconds` ahead, then committed before anything is
+    sent, so no locks or transaction stay open during the SMTP round trips. Any
+    number of workers (in any number of processes) can share the outbox. If a
+    worker dies mid-batch its rows become due again once the claim expires.
+    """
+    pool = pool or mailer.get_mail_pool()
+    stats = {"claimed": 0, "sent": 0, "retrying": 0, "failed": 0, "deferred": 0}
+    if pool.breaker.state == pool.breaker.OPEN:
+        # SMTP is down: leave the rows unclaimed rather than burn their attempts
+        return stats
+
+    rows = db.execute(
+        text("""
+            UPDATE voice_bot.email_outbox AS o
+            SET next_attempt_at = CURRENT_TIMESTAMP + make_interval(secs => :claim_seconds)
+            FROM (
+                SELECT id FROM voice_bot.email_outbox
+                WHERE status = :pending AND next_attempt_at <= CURRENT_TIMESTAMP
+                ORDER BY next_attempt_at, id
+                LIMIT :limit
+                FOR UPDATE SKIP LOCKED
+            ) AS due
+            WHERE o.id = due.id
+            RETURNING o.id, o.to_email, o.subject, o.body, o.is_html, o.html_body, o.attempts
+        """),
+        {"pending": OutboxStatus.pending.value, "limit": batch_size, "claim_seconds": claim_seconds},
+    ).all()
+    db.commit()
+
+    stats["claimed"] = len(rows)
+    if not rows:
+        return stats
+    rows.sort(key=lambda row: row.id)
+
+    from_email = os.getenv("EMAIL") or pool.username or ""
+    messages, invalid = {}, {}
+    for row in rows:
+        try:
+            messages[row.id] = mailer.build_raw_message(
+                from_email, row.to_email, row.subject,
+                text=None if row.is_html else row.body,
+                html=row.body if row.is_html else row.html_body,
+            )
+        except ValueError as e:
+            invalid[row.id] = e
+    errors = dict(zip(messages, pool.send_many(list(messages.values()))))
+
+    results = []
+    for row in rows:
+        attempts = row.attempts + 1
+        error = errors.get(row.id)
+        if row.id in invalid:
+            # A malformed address or subject will never send; don't retry it
+            results.append((row.id, OutboxStatus.failed.value, attempts, str(invalid[row.id])[:1000], 0.0))
+            stats["failed"] += 1
+            logging.error(f"Outbox: email {row.id} to {row.to_email!r} is malformed: {invalid[row.id]}")
+        elif error is None:
+            results.append((row.id, OutboxStatus.sent.value, attempts, None, 0.0))
+            stats["sent"] += 1
+        elif isinstance(error, CircuitOpenError):
+            # Never handed to the server; retry once the circuit may be half-open, without counting an attempt
+            results.append((row.id, OutboxStatus.pending.value, row.attempts, str(error)[:1000], max(error.retry_after, 1.0)))
+            stats["deferred"] += 1
+        elif attempts >= OUTBOX_MAX_ATTEMPTS:
+            results.append((row.id, OutboxStatus.failed.value, attempts, str(error)[:1000], 0.0))
+            stats["failed"] += 1
+            logging.error(f"Outbox: giving up on email {row.id} to {row.to_email} after {attempts} attempts: {error}")
+        else:
+            results.append((row.id, OutboxStatus.pending.value, attempts, str(error)[:1000], backoff_seconds(attempts)))
+            stats["retrying"] += 1
+
+    clause, params = values_clause(results)
+    db.execute(
+        text(f"""
+            UPDATE voice_bot.email_outbox AS o
+            SET status = v.status,
+                attempts = v.attempts::integer,
+                last_error = v.last_error,
+                sent_at = CASE WHEN v.status = :sent THEN CURRENT_TIMESTAMP ELSE o.sent_at END,
+                next_attempt_at = CURRENT_TIMESTAMP + make_interval(secs => v.delay::double precision)
+            FROM ({clause}) AS v(id, status, attempts, last_error, delay)
+            WHERE o.id = v.id
+        """),
+        {**params, "sent": OutboxStatus.sent.value},
+    )
+    db.commit()
+    return stats
+
+
+def outbox_metrics(db: Session) -> dict:
+    rows = db.execute(
+        text("SELECT status, count(*) AS total FROM voice_bot.email_outbox GROUP BY status")
+    ).all()
+    oldest = db.execute(
+        text("""
+            SELECT EXTRACT(EPOCH FROM (CURRENT_TIMESTAMP - min(created_at))) FROM voice_bot.email_outbox
+            WHERE status = :pending
+        """),
+        {"pending": OutboxStatus.pending.value},
+    ).scalar()
+    return {
+        "by_status": {row.status: row.total for row in rows},
+        "oldest_pending_age_seconds": float(oldest) if oldest is not None else 0.0,
+    }
+
+
+class OutboxWorkers:
+    """
+    A few asyncio tasks that drain the outbox off the request path.
+    """
+
+    def __init__(self, session_factory, workers: int = OUTBOX_WORKERS, batch_size: int = OUTBOX_BATCH_SIZE,
+                 poll_interval: float = OUTBOX_POLL_INTERVAL):
+        self.session_factory = session_factory
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._tasks = []
+        self.stats = {"batches": 0, "sent": 0, "retrying": 0, "failed": 0, "deferred": 0, "errors": 0}
+
+    def drain_once(self) -> dict:
+        db = self.session_factory()
+        try:
+            batch = deliver_outbox_batch(db, self.batch_size)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        if batch["claimed"]:
+            self.stats["batches"] += 1
+            for key in ("sent", "retrying", "failed", "deferred"):
+                self.stats[key] += batch[key]
+        return batch
+
+    async def run(self, worker_id: int):
+        logging.info(f"Outbox worker {worker_id} started")
+        while True:
+            try:
+                batch = await run_in_threadpool(self.drain_once)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["errors"] += 1
+                logging.error(f"Outbox worker {worker_id} failed to deliver a batch: {e}")
+                await asyncio.sleep(self.poll_interval * 5)
+                continue
+
+            if batch["claimed"] < self.batch_size:
+                await asyncio.sleep(self.poll_interval)
+
+    def start(self):
+        if self._tasks:
+            return
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self.run(worker_id)) for worker_id in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
@@ -0,0 +1,50 @@
+from . import controller
+from src.utils.db import get_db, db_util
+from src.utils import mailer
+from sqlalchemy.orm import Session
+from loguru import logger as logging
+from fastapi import APIRouter, Depends, HTTPException, status
+from src.routers.admin.main import get_admin_user
+
+# Defining the router
+router = APIRouter(
+    prefix="/api/notifications",
+    tags=["Notifications"],
+    responses={404: {"description": "Not found"}},
+)
+
+# Background workers delivering the email outbox
+outbox_workers = controller.OutboxWorkers(db_util.SessionLocal)
+
+@router.on_event("startup")
+async def start_outbox_workers():
+    if controller.OUTBOX_ENABLED:
+        outbox_workers.start()
+
+@router.on_event("shutdown")
+async def stop_outbox_workers():
+    await outbox_workers.stop()
+
+
+@router.get("/outbox/metrics", status_code=200)
+def get_outbox_metrics(db: Session = Depends(get_db), admin_user = Depends(get_admin_user)):
+    """
+    Admin endpoint to inspect email outbox backlog and delivery counters.
+    """
+    try:
+        return {
+            "success": True,
+            "status": 200,
+            "message": "Outbox metrics fetched successfully",
+            "data": {
+                **controller.outbox_metrics(db),
+                "workers": outbox_workers.stats,
+                "smtp_circuit": mailer.get_mail_pool().breaker.snapshot(),
+            }
+        }
+    except Exception as e:
+        logging.error(f"Error retrieving outbox metrics: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An unexpected error occurred while retrieving outbox metrics."
+        )
@@ -0,0 +1,6 @@
+from .outbox import EmailOutbox, OutboxStatus
+
+__all__ = [
+    "EmailOutbox",
+    "OutboxStatus"
+]
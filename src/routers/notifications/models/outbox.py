@@ -0,0 +1,34 @@
+from sqlalchemy import Column, BigInteger, Integer, String, Text, Boolean, TIMESTAMP, Index, text
+from src.database.base import Base
+from sqlalchemy.sql import func
+import enum
+
+class OutboxStatus(str, enum.Enum):
+    pending = "pending"
+    sent = "sent"
+    failed = "failed"
+
+class EmailOutbox(Base):
+    """Emails written in the same transaction as the change that triggers them, delivered by the outbox workers."""
+    __tablename__ = 'email_outbox'
+    __table_args__ = (
+        Index('ix_email_outbox_due', 'next_attempt_at', postgresql_where=text("status = 'pending'")),
+        {'schema': 'voice_bot'},
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    to_email = Column(String(255), nullable=False)
+    subject = Column(String(255), nullable=False)
+    body = Column(Text, nullable=False)
+    is_html = Column(Boolean, nullable=False, default=False)  # `body` itself is HTML
+    html_body = Column(Text, nullable=True)  # Optional HTML alternative to a plain-text `body`
+    status = Column(String(20), nullable=False, default=OutboxStatus.pending.value)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    next_attempt_at = Column(TIMESTAMP, server_default=func.current_timestamp(), nullable=False)
+    created_at = Column(TIMESTAMP, server_default=func.current_timestamp())
+    sent_at = Column(TIMESTAMP, nullable=True)
+    campaign_id = Column(String(36), nullable=True, index=True)  # Groups emails queued by one bulk job
+
+    def __repr__(self):
+        return f"<EmailOutbox(id={self.id}, to_email={self.to_email}, status={self.status})>"
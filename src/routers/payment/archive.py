@@ -0,0 +1,108 @@
+"""
+Archival of completed payments.
+
+Successful or failed payments created more than PAYMENTS_ARCHIVE_AFTER_DAYS ago (UTC),
+whose subscription has ended, move from `voice_bot.payments` into compressed archive
+chunks (src/database/archive.py). This is the only way payments leave the hot table:
+partition maintenance never detaches payments partitions.
+
+`payments_in_range()` is the read path: hot rows plus, when a date range asks for
+them, the archived rows in that range. Run a pass by hand with:
+
+    python -m src.routers.payment.archive [--dry-run]
+"""
+import os
+import sys
+import json
+import argparse
+from typing import List, Optional
+from datetime import date, datetime, timedelta
+from dotenv import load_dotenv
+from loguru import logger as logging
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from src.database import Database
+from src.database.archive import ColdArchive, archive_cutoff
+from .models import Payment
+from .partitions import created_between
+
+load_dotenv()
+
+PAYMENTS_ARCHIVE_AFTER_DAYS = int(os.getenv("PAYMENTS_ARCHIVE_AFTER_DAYS", "365"))
+
+payment_archive = ColdArchive(
+    Payment.__table__,
+    key="created_at",
+    eligible="link_status IN ('successful', 'failed') AND (subscription_end IS NULL OR subscription_end < now())",
+)
+
+
+def run_payment_archival(session_factory, dry_run: bool = False) -> dict:
+    """One archival pass over the completed payments past the cutoff."""
+    cutoff = archive_cutoff(PAYMENTS_ARCHIVE_AFTER_DAYS)
+    db = session_factory()
+    try:
+        if dry_run:
+            eligible = db.execute(
+                text(f"SELECT count(*) FROM {payment_archive.source} "
+                     f"WHERE created_at < :cutoff AND ({payment_archive.eligible})"),
+                {"cutoff": cutoff},
+            ).scalar()
+            return {"cutoff": cutoff.isoformat(), "eligible": eligible}
+
+        return {"cutoff": cutoff.isoformat(), "archived": payment_archive.archive(db, cutoff)}
+    finally:
+        db.close()
+
+
+def archived_payments(db: Session, created_from: Optional[date] = None, created_to: Optional[date] = None,
+                      **where) -> List[Payment]:
+    """
+    Archived payments created within the inclusive date range, matching `where`.
+
+    They are returned as transient Payment objects (never added to the session), so
+    callers can treat them like rows from the hot table.
+    """
+    start = datetime.combine(created_from, datetime.min.time()) if created_from else None
+    end = datetime.combine(created_to + timedelta(days=1), datetime.min.time()) if created_to else None
+    return [Payment(**row) for row in payment_archive.read(db, start, end, where)]
+
+
+def payments_in_range(db: Session, created_from: Optional[date] = None, created_to: Optional[date] = None,
+                      **where) -> List[Payment]:
+    """
+    Payments created within the date range, from the hot table and, with a
+    `created_from` or `created_to` bound, the archive.
+
+    The archive lookup is an index probe on the chunks' date bounds, so a recent
+    range decodes nothing. Without any bound only hot rows are returned, so an
+    unfiltered listing never decodes the whole archive.
+    """
+    query = db.query(Payment).filter(*created_between(created_from, created_to))
+    for name, value in where.items():
+        query = query.filter(getattr(Payment, name) == value)
+    if created_from is None and created_to is None:
+        return query.all()
+    return archived_payments(db, created_from, created_to, **where) + query.all()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Move completed payments past the retention window to the archive.")
+    parser.add_argument("--dry-run", action="store_true", help="Count eligible payments without moving them")
+    args = parser.parse_args(argv)
+
+    database = Database()
+    try:
+        result = run_payment_archival(database.SessionLocal, dry_run=args.dry_run)
+        with database.SessionLocal() as db:
+            result["archive"] = payment_archive.stats(db)
+    except Exception as e:
+        logging.error(f"Payment archival failed: {e}")
+        return 1
+
+    print(json.dumps({**result, "dry_run": args.dry_run}, indent=2, default=str))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""
+Local stand-in for the Cashfree payment-links API.
+
+Usage:
+    python -m src.routers.payment.fake_cashfree [--port 8765] [--latency 0.05] [--paid-ratio 0.5]
+
+then point the app or the reconciliation job at it with
+`CASHFREE_BASE_URL=http://127.0.0.1:8765/pg`.
+"""
+import json
+import time
+import zlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeCashfreeServer:
+    """
+    Serves `GET /pg/links/{link_id}` from an in-memory table.
+
+    Links missing from `links` get a deterministic status derived from a hash of the
+    link ID, so large runs are reproducible without seeding every row.
+    """
+
+    def __init__(self, links: dict = None, host: str = "127.0.0.1", port: int = 0,
+                 latency: float = 0.0, paid_ratio: float = 0.5, fail_ratio: float = 0.0):
+        self.links = links if links is not None else {}
+        self.latency = latency
+        self.paid_ratio = paid_ratio
+        self.fail_ratio = fail_ratio
+        self.requests_served = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/pg"
+
+    def link_for(self, link_id: str) -> dict:
+        if link_id in self.links:
+            return self.links[link_id]
+
+        bucket = (zlib.crc32(link_id.encode()) % 1000) / 1000
+        if bucket < self.paid_ratio:
+            link_status = "PAID"
+        elif bucket < self.paid_ratio + self.fail_ratio:
+            link_status = "EXPIRED"
+        else:
+            link_status = "ACTIVE"
+        return {"link_id": link_id, "link_status": link_status}
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if fake.latency:
+                    time.sleep(fake.latency)
+                with fake._lock:
+                    fake.requests_served += 1
+
+                prefix = "/pg/links/"
+                if not self.path.startswith(prefix):
+                    self._reply(404, {"message": "Not found"})
+                    return
+                self._reply(200, fake.link_for(self.path[len(prefix):]))
+
+            def _reply(self, code: int, body: dict):
+                payload = json.dumps(body).encode()
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "FakeCashfreeServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a fake Cashfree payment-links API.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to sleep per request")
+    parser.add_argument("--paid-ratio", type=float, default=0.5)
+    parser.add_argument("--fail-ratio", type=float, default=0.1)
+    args = parser.parse_args()
+
+    server = FakeCashfreeServer(port=args.port, latency=args.latency,
+                                paid_ratio=args.paid_ratio, fail_ratio=args.fail_ratio)
+    print(f"Fake Cashfree listening on {server.base_url}")
+    server.start()
+    try:
+        server._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
@@ -1,31 +1,34 @@
 import os
-import enum
 import uuid
 import requests
 from . import  utilities
-from sqlalchemy import func
+from . import webhook_queue
+from .partitions import payment_partitions
+from .archive import run_payment_archival, payments_in_range
+from sqlalchemy import func, text
 from dotenv import load_dotenv
 from src.database import Database
 from sqlalchemy.orm import Session
 from loguru import logger as logging
 from src.routers.users.models import User
+from src.routers.notifications.controller import enqueue_template, enqueue_emails, rendered_fields, campaign_progress
+from src.utils import email_templates
+from src.utils.circuit_breaker import CircuitOpenError
+from src.database.partitions import PartitionMaintainer, PARTITION_MAINTENANCE_ENABLED
+from src.database.archive import ArchiveJob, ARCHIVE_ENABLED
+from src.routers.admin.main import get_admin_user
 from src.utils.jwt import get_email_from_token
 from fastapi.security import OAuth2PasswordBearer
-from datetime import datetime, timezone, timedelta
+from typing import Optional
+from datetime import date, datetime, timezone, timedelta
+from starlette.concurrency import run_in_threadpool
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
-from src.routers.payment.models import Payment,DailyNotification
-from fastapi import APIRouter, Depends, HTTPException, Request, Body,status
-from src.routers.payment.schemas import CreatePaymentLinkSchema, PaymentWebhookSchema,ReminderRequest
+from src.routers.payment.models import Payment,DailyNotification,PaymentStatusEnum
+from fastapi import APIRouter, Depends, HTTPException, Request, Body, Query, status
+from src.routers.payment.schemas import CreatePaymentLinkSchema, PaymentWebhookSchema,ReminderRequest,ReminderCampaignRequest
 
 load_dotenv()
 
-X_API_VERSION = os.getenv('X_API_VERSION') 
-X_CLIENT_ID = os.getenv('X_CLIENT_ID')
-X_CLIENT_SECRET = os.getenv('X_CLIENT_SECRET')
-# X_API_VERSION = ""
-# X_CLIENT_ID = ""
-# X_CLIENT_SECRET ="" 
-
 
 # Dependency to get database session
 db_util = Database()
@@ -43,11 +46,41 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
-# Payment Status Enum
-class PaymentStatusEnum(str, enum.Enum):
-    pending = "pending"
-    successful = "successful"
-    failed = "failed"
+# Background consumer that applies queued Cashfree webhooks in batches
+webhook_consumer = webhook_queue.WebhookQueueConsumer(db_util.SessionLocal)
+
+@router.on_event("startup")
+async def start_webhook_consumer():
+    if webhook_queue.WEBHOOK_CONSUMER_ENABLED:
+        webhook_consumer.start()
+
+@router.on_event("shutdown")
+async def stop_webhook_consumer():
+    await webhook_consumer.stop()
+
+# Keeps monthly partitions of voice_bot.payments created ahead
+partition_maintainer = PartitionMaintainer(db_util, [payment_partitions])
+
+@router.on_event("startup")
+async def start_partition_maintainer():
+    if PARTITION_MAINTENANCE_ENABLED:
+        partition_maintainer.start()
+
+@router.on_event("shutdown")
+async def stop_partition_maintainer():
+    await partition_maintainer.stop()
+
+# Moves completed payments past the retention window into compressed archive chunks
+payment_archive_job = ArchiveJob(lambda: run_payment_archival(db_util.SessionLocal))
+
+@router.on_event("startup")
+async def start_payment_archive_job():
+    if ARCHIVE_ENABLED:
+        payment_archive_job.start()
+
+@router.on_event("shutdown")
+async def stop_payment_archive_job():
+    await payment_archive_job.stop()
 
 @router.post("/create-payment-link", response_model=dict)
 def create_payment_link(
@@ -121,16 +154,16 @@ def create_payment_link(
         "link_notify": {"send_email": True},
     }
 
-    headers = {
-        "x-api-version": X_API_VERSION,
-        "x-client-id": X_CLIENT_ID,
-        "x-client-secret": X_CLIENT_SECRET,
-        "Content-Type": "application/json"
-    }
-
     try:
-        response = requests.post("https://sandbox.cashfree.com/pg/links", json=payload, headers=headers)
+        response = utilities.cashfree_request("POST", "/links", json=payload)
         response.raise_for_status()
+    except CircuitOpenError as e:
+        logging.warning(f"Skipping payment link creation: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Payment provider is temporarily unavailable. Please try again shortly.",
+            headers={"Retry-After": str(max(1, int(e.retry_after)))},
+        )
     except requests.RequestException as e:
         logging.error(f"Failed to create payment link: {e}")
         raise HTTPException(status_code=400, detail="Failed to create payment link")
@@ -217,66 +250,88 @@ async def cashfree_webhook(
     db: Session = Depends(get_db),
 ):
     """
-    Webhook API to update payment status based on Cashfree's response.
+    Webhook API to queue Cashfree's payment notification.
+
+    The raw body is appended to `voice_bot.payment_webhook_events` and acknowledged
+    immediately; `webhook_consumer` applies queued events to payments in batches.
+    If it cannot be queued the answer is a 500, so Cashfree retries the delivery.
     """
     logging.debug("Webhook function called")
 
     try:
-        data = await request.json()
-        logging.info(f"Received Webhook Data: {data}")
-
-        payment_data = data.get("data", {})
-        order_data = payment_data.get("order", {})
-
-        cf_link_id = str(payment_data.get("cf_link_id", ""))
-        link_id = payment_data.get("link_id", "")
-        transaction_id = str(order_data.get("transaction_id", ""))
-        amount_paid = float(payment_data.get("link_amount_paid", 0))
-        payment_status = order_data.get("transaction_status", "").lower()
-        logging.error(f"Payment_status is :{payment_status}")
+        payload = await request.body()
+        event_id = await run_in_threadpool(webhook_queue.enqueue_webhook_event, db, payload)
 
-        # Map payment status
-        status_map = {"success": PaymentStatusEnum.successful, "failed": PaymentStatusEnum.failed, "pending": PaymentStatusEnum.pending}
-        payment_status_data = status_map.get(payment_status, PaymentStatusEnum.pending)
+        return {
+            "success": True,
+            "status": 200,
+            "message": "Webhook event queued",
+            "data": {"event_id": event_id}
+        }
 
-        # Find the existing payment record
-        payment = db.query(Payment).filter(Payment.cf_link_id == cf_link_id).first()
-        if not payment:
-            logging.warning(f"Webhook: No matching payment found for cf_link_id {cf_link_id}")
-            raise HTTPException(status_code=404, detail="Payment record not found")
+    except Exception as e:
+        # A non-2xx answer makes Cashfree redeliver the event later; a 200 would lose it
+        logging.error(f"Error in webhook processing: {e}")
+        raise HTTPException(status_code=500, detail="Webhook event could not be queued")
 
-        # Update payment record
-        payment.transaction_id = transaction_id
-        payment.amount_paid = amount_paid
-        payment.status = payment_status
-        payment.link_status = payment_status
-        payment.updated_at = func.current_timestamp()
 
-        db.commit()
+@router.get("/webhook-queue/metrics", status_code=200)
+def get_webhook_queue_metrics(request: Request, db: Session = Depends(get_db)):
+    """
+    Admin endpoint to inspect the webhook queue backlog and consumer throughput.
+    """
+    try:
+        token = request.headers.get("Authorization")
+        if not token:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Authorization token missing",
+            )
+        token = token.split(" ")[1]
+        email = get_email_from_token(token)
 
-        logging.info(f"Payment {cf_link_id} updated successfully to {payment_status}")
+        admin_user = db.query(User).filter(User.email == email).first()
+        if not admin_user or admin_user.role != "admin":
+            return {
+                "success": False,
+                "status": 403,
+                "message": "You are not authorized to access this resource",
+                "data": None
+            }
 
         return {
             "success": True,
             "status": 200,
-            "message": "Payment record updated",
-            "data": {"status": payment_status}
+            "message": "Webhook queue metrics fetched successfully",
+            "data": {
+                **webhook_queue.queue_metrics(db),
+                "consumer": webhook_consumer.stats,
+            }
         }
 
+    except HTTPException as http_exc:
+        raise http_exc
     except Exception as e:
-        logging.error(f"Error in webhook processing: {e}")
-        return {
-            "success": False,
-            "status": 500,
-            "message": "An unexpected error occurred",
-            "data": None
-        }
+        logging.error(f"An error occurred while fetching webhook queue metrics: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An unexpected error occurred. Please try again later.",
+        )
 
 
 @router.get("/history", status_code=200)
-def get_payment_history(request: Request, db: Session = Depends(get_db)):
+def get_payment_history(
+    request: Request,
+    created_from: Optional[date] = Query(None, description="Only payments created on or after this date"),
+    created_to: Optional[date] = Query(None, description="Only payments created on or before this date"),
+    db: Session = Depends(get_db),
+):
     """
     Admin endpoint to get payment history with user details.
+
+    A `created_from`/`created_to` range only reads the monthly partitions it covers,
+    and includes archived payments from that range; without one, only payments
+    still in the hot table are listed.
     """
     try:
         # Get the email from the token
@@ -307,8 +362,8 @@ def get_payment_history(request: Request, db: Session = Depends(get_db)):
                 "data": None
             }
 
-        # Query all payments
-        payments = db.query(Payment).all()
+        # Query all payments (within the requested creation dates, archived ones included for a range)
+        payments = payments_in_range(db, created_from, created_to)
 
         if not payments:
             return {
@@ -431,36 +486,20 @@ def send_subscription_reminder(request_data: ReminderRequest, request: Request,
                 "data": None
             }
 
-        # Prepare email content
-        subject = "Subscription Expiry Reminder!"
-        body = f"""
-            Dear {user.full_name},
-
-            We hope this message finds you well.
-
-            This is a kind reminder from Nutridiet Mitra that your subscription is set to expire on {payment.subscription_end.strftime('%B %d, %Y')}.  
-            You have {days_left} days remaining on your current plan.
-
-            To continue enjoying uninterrupted access to our personalized diet plans, expert consultations, and premium services, we encourage you to renew your subscription before it expires.
-
-            Renew today and stay committed to your health journey with Nutridiet Mitra!
-
-            If you have any questions or need assistance, feel free to reach out to us.
-
-            Warm regards,  
-            The Nutridiet Mitra Team
-            www.nutridietmitra.com
-        """
-
-        # Send email
+        # Queue email; the outbox workers deliver it after commit
         try:
-            utilities.send_email(
+            enqueue_template(
+                db,
                 to_email=user.email,
-                subject=subject,
-                body=body
+                template_name="subscription_reminder",
+                full_name=user.full_name,
+                subscription_end=payment.subscription_end.strftime('%B %d, %Y'),
+                days_left=days_left
             )
+            db.commit()
         except Exception as e:
-            logging.error(f"Failed to send email to {user.email}: {e}")
+            db.rollback()
+            logging.error(f"Failed to queue email to {user.email}: {e}")
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to send email. Please try again later.",
@@ -469,7 +508,7 @@ def send_subscription_reminder(request_data: ReminderRequest, request: Request,
         return {
             "success": True,
             "status": 200,
-            "message": f"Reminder email sent to {user.email} ({days_left} days left)",
+            "message": f"Reminder email queued for {user.email} ({days_left} days left)",
             "data": {
                 "user_id": user.id,
                 "email": user.email,
@@ -485,6 +524,105 @@ def send_subscription_reminder(request_data: ReminderRequest, request: Request,
         )
         
 
+@router.post("/send-subscription-reminders", status_code=202)
+def send_subscription_reminders(
+    request_data: ReminderCampaignRequest = Body(...),
+    db: Session = Depends(get_db),
+    admin_user = Depends(get_admin_user)
+):
+    """
+    Queue subscription expiry reminders for every user whose latest subscription ends in the given window.
+
+    Users are selected with one joined query and the reminders are written to the email
+    outbox in a single transaction; the outbox workers deliver them over pooled SMTP
+    connections. Poll `/reminder-campaigns/{campaign_id}` for progress.
+    """
+    try:
+        if request_data.days_to < request_data.days_from:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="days_to must be greater than or equal to days_from.",
+            )
+
+        today = datetime.now(timezone.utc)
+        recipients = db.execute(
+            text("""
+                SELECT u.id, u.full_name, u.email, latest.subscription_end
+                FROM (
+                    SELECT DISTINCT ON (user_id) user_id, subscription_end
+                    FROM voice_bot.payments
+                    ORDER BY user_id, created_at DESC
+                ) AS latest
+                JOIN voice_bot.users AS u ON u.id = latest.user_id
+                WHERE latest.subscription_end >= :window_start
+                  AND latest.subscription_end <= :window_end
+            """),
+            {
+                "window_start": today + timedelta(days=request_data.days_from),
+                "window_end": today + timedelta(days=request_data.days_to),
+            },
+        ).all()
+
+        if not recipients:
+            return {
+                "success": True,
+                "status": 200,
+                "message": "No subscriptions expire in the requested window",
+                "data": {"campaign_id": None, "queued": 0}
+            }
+
+        campaign_id = uuid.uuid4().hex
+        reminder = email_templates.templates.get("subscription_reminder")
+        emails = [
+            {
+                "to_email": recipient.email,
+                **rendered_fields(reminder.render(
+                    full_name=recipient.full_name,
+                    subscription_end=recipient.subscription_end.strftime('%B %d, %Y'),
+                    days_left=(recipient.subscription_end - today).days,
+                )),
+            }
+            for recipient in recipients
+        ]
+        queued = enqueue_emails(db, emails, campaign_id=campaign_id)
+        db.commit()
+
+        logging.info(f"Reminder campaign {campaign_id} queued {queued} emails")
+        return {
+            "success": True,
+            "status": 202,
+            "message": f"{queued} reminder emails queued",
+            "data": {"campaign_id": campaign_id, "queued": queued}
+        }
+
+    except HTTPException as http_exc:
+        raise http_exc
+    except Exception as e:
+        db.rollback()
+        logging.error(f"An error occurred while queueing subscription reminders: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An unexpected error occurred. Please try again later.",
+        )
+
+
+@router.get("/reminder-campaigns/{campaign_id}", status_code=200)
+def get_reminder_campaign(campaign_id: str, db: Session = Depends(get_db), admin_user = Depends(get_admin_user)):
+    """
+    Progress, sent/failed counts and throughput of a reminder campaign.
+    """
+    progress = campaign_progress(db, campaign_id)
+    if progress is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Campaign not found")
+
+    return {
+        "success": True,
+        "status": 200,
+        "message": "Campaign progress fetched successfully",
+        "data": progress
+    }
+
+
 @router.get("/get-expiring-subscriptions", status_code=200)
 def get_expiring_subscriptions(request: Request, db: Session = Depends(get_db)):
     try:
@@ -547,16 +685,12 @@ def get_expiring_subscriptions(request: Request, db: Session = Depends(get_db)):
         if not notification or notification.last_sent_date != today:
             # First time today -> Send mail
             if users_data:
-                html_body = "<h3>Upcoming Subscription Expirations</h3><ul>"
-                for user_data in users_data:
-                    html_body += f"<li><strong>{user_data['full_name']}</strong> ({user_data['email']}) - Subscription ends on {user_data['subscription_end']} ({user_data['days_left']} days left)</li>"
-                html_body += "</ul>"
-
-                utilities.send_email(
-                    subject="⚡ Expiring User Subscriptions Alert",
-                    to_email=admin_user.email,   # ✅ corrected from `to` to `to_email`
-                    body=html_body,
-                    is_html=True
+                # Queued in the same transaction as the DailyNotification update below
+                enqueue_template(
+                    db,
+                    to_email=admin_user.email,
+                    template_name="expiring_subscriptions",
+                    lists={"users": users_data}
                 )
 
 
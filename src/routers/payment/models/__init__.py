@@ -1,6 +1,9 @@
-from .payment import Payment,DailyNotification
+from .payment import Payment,PaymentKey,DailyNotification,PaymentWebhookEvent,PaymentStatusEnum
 
 __all__ = [
     "Payment",
-    "DailyNotification"
+    "PaymentKey",
+    "DailyNotification",
+    "PaymentWebhookEvent",
+    "PaymentStatusEnum"
 ]
\ No newline at end of file
@@ -1,40 +1,82 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Numeric, Text, TIMESTAMP,Date
+from sqlalchemy import Column, Integer, BigInteger, String, ForeignKey, Numeric, Text, TIMESTAMP,Date
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-# from .models import Base  # Ensure this imports from the correct place
-from sqlalchemy.ext.declarative import declarative_base
+from src.database.base import Base
 from src.routers.users.models.users import User
-from sqlalchemy import Column, DateTime
+from sqlalchemy import Column, DateTime, Index, UniqueConstraint, text
 from datetime import datetime, timezone
+import enum
 
 
-Base = declarative_base()
+# Payment Status Enum
+class PaymentStatusEnum(str, enum.Enum):
+    pending = "pending"
+    successful = "successful"
+    failed = "failed"
 
 class Payment(Base):
+    """
+    Range-partitioned by month on `created_at` (see src/routers/payment/partitions.py).
+
+    PostgreSQL requires every unique constraint on a partitioned table to include the
+    partition key, so the primary key is (id, created_at) in the database. `id` alone
+    still comes from one sequence and identifies the row for the ORM. cf_link_id and
+    transaction_id stay globally unique through PaymentKey.
+    """
     __tablename__ = 'payments'
-    __table_args__ = {'schema': 'voice_bot'}
+    __table_args__ = (
+        UniqueConstraint('cf_link_id', 'created_at', name='uq_payments_cf_link_id_created_at'),
+        UniqueConstraint('transaction_id', 'created_at', name='uq_payments_transaction_id_created_at'),
+        # "This user's payments, newest first" (profile, payment link creation, renewals)
+        Index('ix_payments_user_id_created_at', 'user_id', 'created_at'),
+        # Expiring-subscription reports and reminders scan a date window
+        Index('ix_payments_subscription_end', 'subscription_end'),
+        # Admin listing by link status and the reconciler's "pending, by id" batches
+        Index('ix_payments_link_status_id', 'link_status', 'id'),
+        {'schema': 'voice_bot', 'postgresql_partition_by': 'RANGE (created_at)'},
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(Integer, nullable=False)
-    cf_link_id = Column(String(50), unique=True)  # Cashfree generated ID
-    transaction_id = Column(String(100), unique=True, nullable=True)  # Optional transaction ID
+    cf_link_id = Column(String(50))  # Cashfree generated ID
+    transaction_id = Column(String(100), nullable=True)  # Optional transaction ID
     link_id = Column(String(50))  # Newly added column
     link_url = Column(Text)  # Payment link URL
     amount = Column(Numeric(10,2), nullable=False)  # Payment Amount
     currency = Column(String(10), default="INR")  # Currency (Default INR)
     status = Column(String(20))  # Payment Status
     link_status = Column(String(20))  # Link Status (ACTIVE, EXPIRED, etc.)
-    created_at = Column(TIMESTAMP, server_default=func.current_timestamp())
+    created_at = Column(TIMESTAMP, primary_key=True, server_default=func.current_timestamp())  # Partition key
     updated_at = Column(TIMESTAMP, server_default=func.current_timestamp(), onupdate=func.current_timestamp())
     plan_type = Column(String)  # ✅ Add this
     subscription_end = Column(DateTime(timezone=True))
 
+    __mapper_args__ = {'primary_key': [id]}
 
 
     def __repr__(self):
         return f"<Payment(id={self.id}, user_id={self.user_id}, amount={self.amount}, status={self.status})>"
 
 
+class PaymentKey(Base):
+    """
+    Taken cf_link_id / transaction_id values, one row each, in an unpartitioned table.
+
+    Written by the `payments_claim_keys` trigger on payments in the same transaction
+    (migration e8c1f4a9d207), so a duplicate id fails on this primary key. Rows are
+    kept when a payment is deleted or archived.
+    """
+    __tablename__ = 'payment_keys'
+    __table_args__ = {'schema': 'voice_bot'}
+
+    kind = Column(String(20), primary_key=True)  # cf_link_id or transaction_id
+    value = Column(String(100), primary_key=True)
+    payment_id = Column(Integer, nullable=False)
+
+    def __repr__(self):
+        return f"<PaymentKey(kind={self.kind}, value={self.value}, payment_id={self.payment_id})>"
+
+
 # src/models/daily_notification.py
 class DailyNotification(Base):
     __tablename__ = "daily_notifications"
@@ -42,3 +84,22 @@ class DailyNotification(Base):
     id = Column(Integer, primary_key=True, index=True)
     notification_type = Column(String, unique=True)
     last_sent_date = Column(Date)
+
+
+class PaymentWebhookEvent(Base):
+    """Raw Cashfree webhook bodies, appended on receipt and applied later in batches."""
+    __tablename__ = 'payment_webhook_events'
+    __table_args__ = (
+        # Keeps the consumer's "oldest unprocessed first" scan small however large the log grows
+        Index('ix_payment_webhook_events_pending', 'id', postgresql_where=text('processed_at IS NULL')),
+        {'schema': 'voice_bot'},
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    payload = Column(Text, nullable=False)  # Raw request body, parsed by the consumer
+    received_at = Column(TIMESTAMP, server_default=func.current_timestamp(), nullable=False)
+    processed_at = Column(TIMESTAMP, nullable=True)  # NULL while the event is still queued
+    outcome = Column(String(20), nullable=True)  # applied, duplicate, stale, unmatched, invalid, failed
+
+    def __repr__(self):
+        return f"<PaymentWebhookEvent(id={self.id}, outcome={self.outcome})>"
@@ -0,0 +1,55 @@
+"""
+Monthly partitions of `voice_bot.payments`.
+
+The maintenance worker started with the payments router keeps PARTITION_PREMAKE_MONTHS
+of partitions ahead of today. Partitions are never detached: old payments leave the hot
+table row by row through the archival job (src/routers/payment/archive.py), which keeps
+them readable with `payments_in_range()`. Run a pass by hand with:
+
+    python -m src.routers.payment.partitions [--dry-run]
+"""
+import sys
+import json
+import argparse
+from typing import Optional
+from datetime import date, timedelta
+from loguru import logger as logging
+from src.database import Database
+from src.database.partitions import MonthlyPartitions
+from .models import Payment
+
+payment_partitions = MonthlyPartitions("voice_bot", "payments", "created_at")
+
+
+def created_between(created_from: Optional[date] = None, created_to: Optional[date] = None) -> list:
+    """
+    Filters on Payment.created_at for an inclusive date range.
+
+    A bound on the partition key lets PostgreSQL skip the partitions outside it, at plan
+    time for literals and at execution time for parameters.
+    """
+    filters = []
+    if created_from is not None:
+        filters.append(Payment.created_at >= created_from)
+    if created_to is not None:
+        filters.append(Payment.created_at < created_to + timedelta(days=1))
+    return filters
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Create upcoming payments partitions.")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without changing it")
+    args = parser.parse_args(argv)
+
+    try:
+        stats = payment_partitions.maintain(Database().engine, dry_run=args.dry_run)
+    except Exception as e:
+        logging.error(f"Payments partition maintenance failed: {e}")
+        return 1
+
+    print(json.dumps({**stats, "dry_run": args.dry_run}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
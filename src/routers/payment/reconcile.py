@@ -0,0 +1,187 @@
+"""
+Reconcile payments stuck in `pending` against Cashfree's payment-link status API.
+
+Usage:
+    python -m src.routers.payment.reconcile [--older-than-hours 24] [--batch-size 500]
+        [--concurrency 16] [--dry-run]
+
+Pending payments older than the threshold are walked in keyset batches (`id > last_id`),
+their links are looked up concurrently under a bounded semaphore and the rows whose status
+changed are written back with one bulk UPDATE per batch.
+"""
+import sys
+import json
+import time
+import asyncio
+import argparse
+import requests
+from typing import Optional
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from loguru import logger as logging
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from src.database import Database
+from src.utils.circuit_breaker import CircuitOpenError
+from src.routers.payment import utilities, webhook_queue
+from src.routers.payment.models import PaymentStatusEnum
+
+# Cashfree link status -> our link status; anything else leaves the payment pending
+LINK_STATUS_MAP = {
+    "PAID": PaymentStatusEnum.successful,
+    "EXPIRED": PaymentStatusEnum.failed,
+    "CANCELLED": PaymentStatusEnum.failed,
+}
+
+# Our link status -> the Cashfree transaction status webhooks store in `status`, so the
+# column holds one vocabulary whichever path settled the payment
+TRANSACTION_STATUS = {link_status: status for status, link_status in webhook_queue.STATUS_MAP.items()}
+
+
+def fetch_pending_batch(db: Session, older_than_seconds: int, after_id: int, batch_size: int) -> list:
+    return db.execute(
+        text("""
+            SELECT id, cf_link_id, link_id FROM voice_bot.payments
+            WHERE link_status = :pending
+              AND created_at < CURRENT_TIMESTAMP - make_interval(secs => :age)
+              AND id > :after_id
+            ORDER BY id
+            LIMIT :limit
+        """),
+        {"pending": PaymentStatusEnum.pending.value, "age": older_than_seconds,
+         "after_id": after_id, "limit": batch_size},
+    ).all()
+
+
+class PaymentReconciler:
+    """
+    Looks up pending payment links on Cashfree with at most `concurrency` requests in flight.
+    """
+
+    def __init__(self, base_url: str = None, concurrency: int = 16, timeout: float = 10.0):
+        self.base_url = base_url or utilities.CASHFREE_BASE_URL
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.headers = utilities.cashfree_headers()
+
+        # One keep-alive connection per concurrent request
+        self.http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+        self.http.mount("http://", adapter)
+        self.http.mount("https://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=concurrency)
+        self._semaphore = None
+
+        self.stats = {"scanned": 0, "looked_up": 0, "changed": 0, "updated": 0,
+                      "unchanged": 0, "errors": 0, "skipped": 0, "batches": 0}
+
+    def _get_link(self, link_id: str) -> dict:
+        response = utilities.cashfree_request("GET", f"/links/{link_id}", base_url=self.base_url, http=self.http,
+                                              headers=self.headers, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    async def lookup(self, row) -> Optional[dict]:
+        """Return the payment update for `row`, or None if its link is still open."""
+        async with self._semaphore:
+            try:
+                link = await asyncio.get_running_loop().run_in_executor(self._executor, self._get_link, row.link_id)
+            except CircuitOpenError:
+                self.stats["skipped"] += 1
+                return None
+            except (requests.RequestException, ValueError) as e:
+                self.stats["errors"] += 1
+                logging.warning(f"Reconcile: lookup failed for link {row.link_id}: {e}")
+                return None
+
+        self.stats["looked_up"] += 1
+        cashfree_status = str(link.get("link_status", "")).upper()
+        link_status = LINK_STATUS_MAP.get(cashfree_status)
+        if link_status is None:
+            return None
+        return {
+            "cf_link_id": row.cf_link_id,
+            "transaction_id": "",
+            "status": TRANSACTION_STATUS[link_status],
+            "link_status": link_status.value,
+        }
+
+    async def run(self, db: Session, older_than_seconds: int, batch_size: int = 500,
+                  dry_run: bool = False) -> dict:
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        started = time.perf_counter()
+        last_id = 0
+
+        while True:
+            rows = fetch_pending_batch(db, older_than_seconds, last_id, batch_size)
+            if not rows:
+                break
+            last_id = rows[-1].id
+            self.stats["scanned"] += len(rows)
+
+            results = await asyncio.gather(*(self.lookup(row) for row in rows if row.link_id))
+            updates = [update for update in results if update is not None]
+            self.stats["changed"] += len(updates)
+            self.stats["unchanged"] += len(rows) - len(updates)
+
+            if updates and not dry_run:
+                self.stats["updated"] += sum(webhook_queue.apply_payment_updates(db, updates).values())
+                db.commit()
+            else:
+                db.rollback()
+
+            self.stats["batches"] += 1
+            elapsed = time.perf_counter() - started
+            logging.info(
+                f"Reconcile: batch {self.stats['batches']} up to id {last_id}, "
+                f"scanned={self.stats['scanned']} changed={self.stats['changed']} "
+                f"errors={self.stats['errors']} rate={self.stats['looked_up'] / elapsed:.1f} lookups/s"
+            )
+
+            if self.stats["skipped"]:
+                # Cashfree's breaker opened; the remaining payments are picked up by the next run
+                logging.warning(f"Reconcile: stopping early, {utilities.cashfree_breaker.name} circuit is open")
+                break
+
+        elapsed = time.perf_counter() - started
+        return {
+            **self.stats,
+            "dry_run": dry_run,
+            "total_seconds": round(elapsed, 3),
+            "lookups_per_second": round(self.stats["looked_up"] / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self.http.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Reconcile stale pending payments with Cashfree.")
+    parser.add_argument("--older-than-hours", type=float, default=24, help="Only payments pending longer than this")
+    parser.add_argument("--batch-size", type=int, default=500, help="Payments per keyset batch")
+    parser.add_argument("--concurrency", type=int, default=16, help="Maximum Cashfree requests in flight")
+    parser.add_argument("--base-url", default=None, help="Override CASHFREE_BASE_URL, e.g. a local fake")
+    parser.add_argument("--dry-run", action="store_true", help="Look up links without writing changes")
+    args = parser.parse_args(argv)
+
+    db = Database().get_session()
+    reconciler = PaymentReconciler(base_url=args.base_url, concurrency=args.concurrency)
+    try:
+        stats = asyncio.run(
+            reconciler.run(db, int(args.older_than_hours * 3600), args.batch_size, args.dry_run)
+        )
+    except Exception as e:
+        db.rollback()
+        logging.error(f"Payment reconciliation failed: {e}")
+        return 1
+    finally:
+        reconciler.close()
+        db.close()
+
+    print(json.dumps(stats, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
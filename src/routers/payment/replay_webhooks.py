@@ -0,0 +1,146 @@
+"""
+Replay Cashfree webhook events from a JSON-lines dump into `voice_bot.payments`.
+
+Usage:
+    python -m src.routers.payment.replay_webhooks events.jsonl [--dry-run] [--force]
+        [--batch-size 1000] [--batches-per-transaction 10]
+
+Each line is a webhook body exactly as Cashfree posts it to `/api/payments/cashfree-webhook`.
+Events are parsed with the same mapping as the webhook, deduped across the whole file and
+applied with one `UPDATE ... FROM (VALUES ...)` per batch. Like the webhook consumer, the
+replay never moves a payment to a less final status (counted as "stale") unless `--force`
+is given.
+"""
+import sys
+import json
+import time
+import argparse
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from loguru import logger as logging
+from src.database import Database
+from src.routers.payment import webhook_queue
+
+
+def read_updates(path: str, deduper: webhook_queue.UpdateDeduper, stats: dict):
+    """Stream the file line by line, feeding every parsable event to `deduper`."""
+    with open(path, "r", encoding="utf-8") as events:
+        for line_number, line in enumerate(events, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            stats["lines"] += 1
+            try:
+                update = webhook_queue.parse_webhook_event(json.loads(line))
+            except (ValueError, TypeError, AttributeError) as e:
+                logging.warning(f"Line {line_number}: not a valid webhook event: {e}")
+                update = None
+            if update is None:
+                stats["invalid"] += 1
+                continue
+            if deduper.add(line_number, update) is not None:
+                stats["duplicate"] += 1
+
+
+def count_matches(db: Session, updates: list, force: bool = False) -> tuple:
+    """Dry-run helper: how many updates hit a payment, how many would change it and how many are stale."""
+    rows = db.execute(
+        text("""
+            SELECT cf_link_id, transaction_id, link_status FROM voice_bot.payments
+            WHERE cf_link_id = ANY(:cf_link_ids)
+        """),
+        {"cf_link_ids": [u["cf_link_id"] for u in updates]},
+    ).all()
+    current = {row.cf_link_id: row for row in rows}
+
+    changed = stale = 0
+    for update in updates:
+        row = current.get(update["cf_link_id"])
+        if row is None:
+            continue
+        if not force and (
+            webhook_queue.status_rank(row.link_status) > webhook_queue.status_rank(update["link_status"])
+        ):
+            stale += 1
+        elif row.link_status != update["link_status"] or (
+            update["transaction_id"] and row.transaction_id != update["transaction_id"]
+        ):
+            changed += 1
+    return len(current), changed, stale
+
+
+def replay(db: Session, path: str, batch_size: int = 1000, batches_per_transaction: int = 10,
+           dry_run: bool = False, force: bool = False) -> dict:
+    """
+    Replay the dump at `path` and return a summary of what was (or would be) applied.
+    """
+    started = time.perf_counter()
+    stats = {"lines": 0, "invalid": 0, "duplicate": 0, "unique": 0, "matched": 0,
+             "unmatched": 0, "stale": 0, "changed": None, "dry_run": dry_run, "force": force}
+
+    deduper = webhook_queue.UpdateDeduper()
+    read_updates(path, deduper, stats)
+    parsed_at = time.perf_counter()
+
+    updates = [update for _, update in deduper.winners.values()]
+    stats["unique"] = len(updates)
+    if dry_run:
+        stats["changed"] = 0
+
+    batches = 0
+    for offset in range(0, len(updates), batch_size):
+        batch = updates[offset:offset + batch_size]
+        if dry_run:
+            matched, changed, stale = count_matches(db, batch, force)
+            stats["changed"] += changed
+        else:
+            applied = webhook_queue.apply_payment_updates(db, batch, force)
+            matched, stale = len(applied), list(applied.values()).count(False)
+        stats["matched"] += matched
+        stats["stale"] += stale
+        stats["unmatched"] += len(batch) - matched
+
+        batches += 1
+        if not dry_run and batches % batches_per_transaction == 0:
+            db.commit()
+            logging.info(f"Committed {offset + len(batch)}/{len(updates)} updates")
+
+    if dry_run:
+        db.rollback()
+    else:
+        db.commit()
+
+    elapsed = time.perf_counter() - started
+    stats["parse_seconds"] = round(parsed_at - started, 3)
+    stats["total_seconds"] = round(elapsed, 3)
+    stats["events_per_minute"] = int(stats["lines"] / elapsed * 60) if elapsed > 0 else stats["lines"]
+    return stats
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Replay Cashfree webhook events from a JSON-lines dump.")
+    parser.add_argument("path", help="JSON-lines file, one Cashfree webhook body per line")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    parser.add_argument("--force", action="store_true",
+                        help="Apply events even when they would move a payment to a less final status")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Rows per UPDATE statement")
+    parser.add_argument("--batches-per-transaction", type=int, default=10, help="UPDATE statements per commit")
+    args = parser.parse_args(argv)
+
+    db = Database().get_session()
+    try:
+        stats = replay(db, args.path, args.batch_size, args.batches_per_transaction, args.dry_run,
+                       args.force)
+    except Exception as e:
+        db.rollback()
+        logging.error(f"Webhook replay failed: {e}")
+        return 1
+    finally:
+        db.close()
+
+    print(json.dumps(stats, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
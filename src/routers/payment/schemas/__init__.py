@@ -1,9 +1,10 @@
-from .payment import CreatePaymentLinkSchema, PaymentLinkResponseSchema, PaymentWebhookSchema, UpdatePaymentSchema,ReminderRequest
+from .payment import CreatePaymentLinkSchema, PaymentLinkResponseSchema, PaymentWebhookSchema, UpdatePaymentSchema,ReminderRequest,ReminderCampaignRequest
 
 __all__ = [ 
     "CreatePaymentLinkSchema",
     "PaymentLinkResponseSchema",    
     "PaymentWebhookSchema",
     "UpdatePaymentSchema",
-    "ReminderRequest"
+    "ReminderRequest",
+    "ReminderCampaignRequest"
 ]
\ No newline at end of file
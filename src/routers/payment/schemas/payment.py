@@ -45,4 +45,9 @@ class UpdatePaymentSchema(BaseModel):
     
 # Request body schema
 class ReminderRequest(BaseModel):
-    user_id: int
\ No newline at end of file
+    user_id: int
+
+# Request body schema for a bulk reminder campaign
+class ReminderCampaignRequest(BaseModel):
+    days_from: int = Field(default=0, ge=0)  # Subscriptions ending at least this many days from now
+    days_to: int = Field(default=7, ge=0)  # ... and at most this many days from now
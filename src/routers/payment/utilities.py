@@ -1,15 +1,56 @@
-import smtplib
 import os
+import requests
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from dotenv import load_dotenv
+from src.utils import mailer
+from src.utils.circuit_breaker import get_breaker
 
 load_dotenv()
 
+CASHFREE_BASE_URL = os.getenv('CASHFREE_BASE_URL', 'https://sandbox.cashfree.com/pg')
+# Latency budget for one Cashfree call: (connect, read) socket timeouts in seconds
+CASHFREE_CONNECT_TIMEOUT = float(os.getenv('CASHFREE_CONNECT_TIMEOUT', '3'))
+CASHFREE_READ_TIMEOUT = float(os.getenv('CASHFREE_READ_TIMEOUT', '10'))
+
+# Opens after consecutive connection errors, timeouts or 5xx responses
+cashfree_breaker = get_breaker("cashfree", failure_threshold=5, recovery_timeout=30.0,
+                               expected_exceptions=(requests.RequestException,))
+
+
+def cashfree_headers() -> dict:
+    return {
+        "x-api-version": os.getenv('X_API_VERSION'),
+        "x-client-id": os.getenv('X_CLIENT_ID'),
+        "x-client-secret": os.getenv('X_CLIENT_SECRET'),
+        "Content-Type": "application/json"
+    }
+
+
+def _send_cashfree_request(http, method: str, url: str, **kwargs) -> requests.Response:
+    response = http.request(method, url, **kwargs)
+    if response.status_code >= 500:
+        # Cashfree is failing, not rejecting our request: count it against the breaker
+        response.raise_for_status()
+    return response
+
+
+def cashfree_request(method: str, path: str, base_url: str = None, http=None, **kwargs) -> requests.Response:
+    """
+    Call the Cashfree API through the circuit breaker, within the configured timeouts.
+
+    Raises CircuitOpenError without touching the network while Cashfree is considered down.
+    4xx responses are returned to the caller as-is; they do not count as Cashfree failures.
+    """
+    kwargs.setdefault("headers", cashfree_headers())
+    kwargs.setdefault("timeout", (CASHFREE_CONNECT_TIMEOUT, CASHFREE_READ_TIMEOUT))
+    return cashfree_breaker.call(
+        _send_cashfree_request, http or requests, method, f"{base_url or CASHFREE_BASE_URL}{path}", **kwargs
+    )
+
 
 def send_email(to_email: str, subject: str, body: str, is_html: bool = False):
     from_email = os.environ['EMAIL']
-    from_password = os.environ['APP_PASSWORD']
 
     msg = MIMEMultipart()
     msg["From"] = from_email
@@ -21,8 +62,5 @@ def send_email(to_email: str, subject: str, body: str, is_html: bool = False):
     else:
         msg.attach(MIMEText(body, "plain"))  # Plain text
 
-    server = smtplib.SMTP("smtp.gmail.com", 587)
-    server.starttls()
-    server.login(from_email, from_password)
-    server.send_message(msg)
-    server.quit()
\ No newline at end of file
+    # Reuses an already authenticated connection from the shared pool
+    mailer.send_message(msg)
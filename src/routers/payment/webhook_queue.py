@@ -0,0 +1,367 @@
+import os
+import json
+import time
+import asyncio
+from typing import Optional
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+from loguru import logger as logging
+from starlette.concurrency import run_in_threadpool
+from src.utils.bulk import values_clause
+from src.routers.payment.models import Payment, PaymentStatusEnum
+
+load_dotenv()
+
+WEBHOOK_BATCH_SIZE = int(os.getenv("WEBHOOK_BATCH_SIZE", "500"))
+WEBHOOK_POLL_INTERVAL = float(os.getenv("WEBHOOK_POLL_INTERVAL", "0.5"))
+WEBHOOK_CONSUMER_ENABLED = os.getenv("WEBHOOK_CONSUMER_ENABLED", "true").lower() == "true"
+
+# Map Cashfree transaction status to our link status
+STATUS_MAP = {
+    "success": PaymentStatusEnum.successful,
+    "failed": PaymentStatusEnum.failed,
+    "pending": PaymentStatusEnum.pending,
+}
+
+# When several events for one link land in the same batch, the most final one wins
+STATUS_PRECEDENCE = {
+    PaymentStatusEnum.pending: 0,
+    PaymentStatusEnum.failed: 1,
+    PaymentStatusEnum.successful: 2,
+}
+
+# Longest value each written payment column holds; longer ones would fail the whole batch
+FIELD_LENGTHS = {
+    field: Payment.__table__.c[field].type.length for field in ("cf_link_id", "transaction_id", "status")
+}
+
+
+def parse_webhook_event(data: dict) -> Optional[dict]:
+    """
+    Extract the payment update carried by a Cashfree webhook body.
+
+    Returns None when the event does not reference a payment link, and raises
+    ValueError when a field does not fit its payment column.
+    """
+    payment_data = data.get("data") or {}
+    order_data = payment_data.get("order") or {}
+
+    cf_link_id = str(payment_data.get("cf_link_id") or "")
+    if not cf_link_id:
+        return None
+
+    payment_status = str(order_data.get("transaction_status") or "").lower()
+
+    update = {
+        "cf_link_id": cf_link_id,
+        "link_id": payment_data.get("link_id", ""),
+        "transaction_id": str(order_data.get("transaction_id") or ""),
+        "amount_paid": float(payment_data.get("link_amount_paid") or 0),
+        "status": payment_status,
+        "link_status": STATUS_MAP.get(payment_status, PaymentStatusEnum.pending).value,
+    }
+    for field, length in FIELD_LENGTHS.items():
+        if len(update[field]) > length:
+            raise ValueError(f"{field} is longer than {length} characters")
+    return update
+
+
+def status_rank(link_status: str) -> int:
+    """Precedence of a stored link status; values outside PaymentStatusEnum rank lowest."""
+    try:
+        return STATUS_PRECEDENCE[PaymentStatusEnum(link_status)]
+    except ValueError:
+        return 0
+
+
+def _precedence_sql(column: str) -> str:
+    """SQL expression ranking a link status column like STATUS_PRECEDENCE (unknown values rank lowest)."""
+    cases = " ".join(f"WHEN '{status.value}' THEN {rank}" for status, rank in STATUS_PRECEDENCE.items())
+    return f"(CASE {column} {cases} ELSE 0 END)"
+
+
+class UpdateDeduper:
+    """
+    Collapse payment updates to one per `cf_link_id`, dropping exact repeats.
+
+    Updates are fed in arrival order together with a `key` identifying their source
+    (queue row id, file line, ...). An update repeating an earlier transaction ID
+    with the same status is dropped outright; otherwise, when several updates
+    target the same link, the most final status wins, later events winning ties.
+    """
+
+    def __init__(self):
+        self.winners = {}
+        self._seen = set()
+
+    def add(self, key, update: dict):
+        """Record an update; return the key it superseded (possibly its own) or None."""
+        transaction_id = update["transaction_id"]
+        if transaction_id:
+            seen = (transaction_id, update["link_status"])
+            if seen in self._seen:
+                return key
+            self._seen.add(seen)
+
+        cf_link_id = update["cf_link_id"]
+        current = self.winners.get(cf_link_id)
+        if current is None:
+            self.winners[cf_link_id] = (key, update)
+            return None
+
+        current_rank = STATUS_PRECEDENCE[PaymentStatusEnum(current[1]["link_status"])]
+        new_rank = STATUS_PRECEDENCE[PaymentStatusEnum(update["link_status"])]
+        if new_rank >= current_rank:
+            self.winners[cf_link_id] = (key, update)
+            return current[0]
+        return key
+
+
+def dedupe_updates(updates: list) -> tuple:
+    """
+    Dedupe a list of `(key, update)` pairs in arrival order.
+
+    Returns the winning updates keyed by `cf_link_id` and the set of keys that were superseded.
+    """
+    deduper = UpdateDeduper()
+    superseded = set()
+    for key, update in updates:
+        dropped = deduper.add(key, update)
+        if dropped is not None:
+            superseded.add(dropped)
+    return deduper.winners, superseded
+
+
+def apply_payment_updates(db: Session, updates: list, force: bool = False) -> dict:
+    """
+    Apply payment updates with one `UPDATE ... FROM (VALUES ...)` statement.
+
+    Unless `force` is set, a row is never moved to a less final status than it
+    already has, so an old event arriving late cannot downgrade a successful
+    payment. Returns
+    `{cf_link_id: applied}` for every update that matched a payment row, with
+    `applied` False when the row was left alone as more final. The caller owns
+    the transaction.
+    """
+    if not updates:
+        return {}
+
+    clause, params = values_clause(
+        (u["cf_link_id"], u["transaction_id"], u["status"], u["link_status"]) for u in updates
+    )
+    guard = "" if force else f"AND {_precedence_sql('p.link_status')} <= {_precedence_sql('v.link_status')}"
+    result = db.execute(
+        text(f"""
+            WITH v(cf_link_id, transaction_id, status, link_status) AS ({clause}),
+            updated AS (
+                UPDATE voice_bot.payments AS p
+                SET transaction_id = COALESCE(NULLIF(v.transaction_id, ''), p.transaction_id),
+                    status = v.status,
+                    link_status = v.link_status,
+                    updated_at = CURRENT_TIMESTAMP
+                FROM v
+                WHERE p.cf_link_id = v.cf_link_id {guard}
+                RETURNING p.cf_link_id
+            )
+            SELECT p.cf_link_id, bool_or(p.cf_link_id IN (SELECT cf_link_id FROM updated)) AS applied
+            FROM voice_bot.payments AS p JOIN v ON p.cf_link_id = v.cf_link_id
+            GROUP BY p.cf_link_id
+        """),
+        params,
+    )
+    return {row.cf_link_id: row.applied for row in result}
+
+
+def enqueue_webhook_event(db: Session, payload: bytes) -> int:
+    """
+    Append a raw webhook body to the durable queue and commit.
+
+    This is the only DB work done on the request path: a single-row insert.
+    """
+    event_id = db.execute(
+        text("INSERT INTO voice_bot.payment_webhook_events (payload) VALUES (:payload) RETURNING id"),
+        {"payload": payload.decode("utf-8", errors="replace")},
+    ).scalar_one()
+    db.commit()
+    return event_id
+
+
+def process_webhook_batch(db: Session, batch_size: int = WEBHOOK_BATCH_SIZE) -> dict:
+    """
+    Claim a batch of queued events, apply them and mark them processed in one transaction.
+
+    Rows are claimed with `FOR UPDATE SKIP LOCKED`, so several workers can drain
+    the queue concurrently without applying the same event twice. If the batch's
+    update fails in the database, its events are applied one at a time, each in a
+    savepoint, and those that still fail are marked `failed` rather than holding
+    up the queue.
+    """
+    rows = db.execute(
+        text("""
+            SELECT id, payload FROM voice_bot.payment_webhook_events
+            WHERE processed_at IS NULL
+            ORDER BY id
+            LIMIT :limit
+            FOR UPDATE SKIP LOCKED
+        """),
+        {"limit": batch_size},
+    ).all()
+
+    stats = {"claimed": len(rows), "applied": 0, "duplicate": 0, "stale": 0, "unmatched": 0, "invalid": 0,
+             "failed": 0}
+    if not rows:
+        db.commit()
+        return stats
+
+    outcomes = {}
+    parsed = []
+    for row in rows:
+        try:
+            update = parse_webhook_event(json.loads(row.payload))
+        except (ValueError, TypeError, AttributeError) as e:
+            logging.warning(f"Webhook queue: event {row.id} is not a valid payload: {e}")
+            update = None
+        if update is None:
+            outcomes[row.id] = "invalid"
+        else:
+            parsed.append((row.id, update))
+
+    winners, superseded = dedupe_updates(parsed)
+    for event_id in superseded:
+        outcomes[event_id] = "duplicate"
+
+    try:
+        with db.begin_nested():
+            matched = apply_payment_updates(db, [update for _, update in winners.values()])
+    except SQLAlchemyError as e:
+        logging.warning(f"Webhook queue: batch update failed, applying its events one at a time: {e.orig or e}")
+        matched = {}
+        for cf_link_id, (event_id, update) in winners.items():
+            try:
+                with db.begin_nested():
+                    matched.update(apply_payment_updates(db, [update]))
+            except SQLAlchemyError as e:
+                outcomes[event_id] = "failed"
+                logging.error(f"Webhook queue: event {event_id} for cf_link_id {cf_link_id} failed: {e.orig or e}")
+    for cf_link_id, (event_id, _) in winners.items():
+        if outcomes.get(event_id) == "failed":
+            continue
+        if cf_link_id not in matched:
+            outcomes[event_id] = "unmatched"
+            logging.warning(f"Webhook queue: No matching payment found for cf_link_id {cf_link_id}")
+        else:
+            outcomes[event_id] = "applied" if matched[cf_link_id] else "stale"
+
+    clause, params = values_clause(outcomes.items())
+    db.execute(
+        text(f"""
+            UPDATE voice_bot.payment_webhook_events AS e
+            SET processed_at = CURRENT_TIMESTAMP, outcome = v.outcome
+            FROM ({clause}) AS v(id, outcome)
+            WHERE e.id = v.id
+        """),
+        params,
+    )
+    db.commit()
+
+    for outcome in outcomes.values():
+        stats[outcome] += 1
+    return stats
+
+
+def queue_metrics(db: Session) -> dict:
+    """
+    Return the current backlog size and how far behind the consumer is.
+    """
+    row = db.execute(
+        text("""
+            SELECT count(*) AS pending,
+                   EXTRACT(EPOCH FROM (CURRENT_TIMESTAMP - min(received_at))) AS lag_seconds
+            FROM voice_bot.payment_webhook_events
+            WHERE processed_at IS NULL
+        """)
+    ).one()
+    return {
+        "pending_events": row.pending,
+        "oldest_pending_age_seconds": float(row.lag_seconds) if row.lag_seconds is not None else 0.0,
+    }
+
+
+class WebhookQueueConsumer:
+    """
+    Background task that drains the webhook queue in batches.
+
+    It polls while the queue is empty and loops without sleeping while full
+    batches keep coming back, so bursts are absorbed at batch throughput.
+    """
+
+    def __init__(self, session_factory, batch_size: int = WEBHOOK_BATCH_SIZE,
+                 poll_interval: float = WEBHOOK_POLL_INTERVAL):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._task = None
+        self.stats = {
+            "batches": 0,
+            "events": 0,
+            "applied": 0,
+            "duplicate": 0,
+            "stale": 0,
+            "unmatched": 0,
+            "invalid": 0,
+            "failed": 0,
+            "errors": 0,
+            "last_batch_at": None,
+            "last_batch_seconds": None,
+        }
+
+    def drain_once(self) -> dict:
+        db = self.session_factory()
+        started = time.perf_counter()
+        try:
+            batch = process_webhook_batch(db, self.batch_size)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        if batch["claimed"]:
+            self.stats["batches"] += 1
+            self.stats["events"] += batch["claimed"]
+            for outcome in ("applied", "duplicate", "stale", "unmatched", "invalid", "failed"):
+                self.stats[outcome] += batch[outcome]
+            self.stats["last_batch_at"] = time.time()
+            self.stats["last_batch_seconds"] = round(time.perf_counter() - started, 4)
+        return batch
+
+    async def run(self):
+        logging.info("Webhook queue consumer started")
+        while True:
+            try:
+                batch = await run_in_threadpool(self.drain_once)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["errors"] += 1
+                logging.error(f"Webhook queue consumer failed to process a batch: {e}")
+                await asyncio.sleep(self.poll_interval * 4)
+                continue
+
+            if batch["claimed"] < self.batch_size:
+                await asyncio.sleep(self.poll_interval)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
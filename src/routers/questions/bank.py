@@ -0,0 +1,522 @@
+"""
+The question bank: interview questions retrievable by meaning, from a FAISS index
+that every app worker on a host shares through the page cache.
+
+Postgres (InterviewQuestion) is the source of truth and keeps each question's
+vector. The index is a set of immutable, versioned files in QUESTION_BANK_DIR,
+named by manifest.json:
+
+- the base index holds every question up to the manifest's `max_id`. It is opened
+  with IO_FLAG_MMAP_IFC, so its vectors stay file pages mapped into the process
+  instead of being read into private memory: all workers share one copy, and
+  opening it takes milliseconds at any size. Small banks use an exact flat index;
+  from QUESTION_BANK_IVF_MIN questions it is an IVF index of 8-bit scalar-quantized
+  vectors, searched over QUESTION_BANK_NPROBE lists.
+- the delta holds the questions added since (id > max_id). Each worker keeps it
+  as a small in-memory flat index, synced from the table every
+  QUESTION_BANK_REFRESH_SECONDS.
+
+A query searches both and merges the results. Compaction (CompactionJob, under an
+advisory lock so one worker does it, or the CLI) appends the delta to a copy of
+the base and publishes it as the next version. The IVF quantizer is trained
+once and kept, so adding questions never retrains or re-encodes the existing
+ones. Workers switch to the new file at their next refresh; superseded files are
+removed only once the version after them has been out for QUESTION_BANK_KEEP_SECONDS,
+and a worker that finds its file gone re-reads the manifest and maps the newer one.
+
+QUESTION_BANK_DIR must be one filesystem seen by every worker that shares the
+database (a host-local directory only works with a single host): the compaction
+lock is database-wide, so the worker that wins it publishes for all of them.
+
+Usage:
+    python -m src.routers.questions.bank stats
+    python -m src.routers.questions.bank compact [--rebuild] [--reembed]
+    python -m src.routers.questions.bank import questions.jsonl
+    python -m src.routers.questions.bank search "python backend databases" [--k 5] [--role ...]
+"""
+import os
+import sys
+import json
+import math
+import time
+import asyncio
+import argparse
+import threading
+from typing import Iterator, List, Optional, Tuple
+import faiss
+import numpy as np
+from dotenv import load_dotenv
+from loguru import logger as logging
+from sqlalchemy import bindparam, func, insert, text, update
+from starlette.concurrency import run_in_threadpool
+from src.database import Database
+from .models import InterviewQuestion
+from .embeddings import load_embedder
+
+load_dotenv()
+
+# Shared by every worker on the database: one host's local disk, or a shared volume for several hosts
+QUESTION_BANK_DIR = os.getenv("QUESTION_BANK_DIR", "question_bank")
+# Below this many questions the base index is exact (flat); from it, IVF-SQ8
+QUESTION_BANK_IVF_MIN = int(os.getenv("QUESTION_BANK_IVF_MIN", "50000"))
+QUESTION_BANK_NPROBE = int(os.getenv("QUESTION_BANK_NPROBE", "16"))
+QUESTION_BANK_KMEANS_ITERATIONS = int(os.getenv("QUESTION_BANK_KMEANS_ITERATIONS", "10"))
+QUESTION_BANK_REFRESH_SECONDS = float(os.getenv("QUESTION_BANK_REFRESH_SECONDS", "5"))
+# Compact once the delta has this many questions, checked every QUESTION_BANK_COMPACT_INTERVAL
+QUESTION_BANK_COMPACT_MIN = int(os.getenv("QUESTION_BANK_COMPACT_MIN", "10000"))
+QUESTION_BANK_COMPACT_INTERVAL = float(os.getenv("QUESTION_BANK_COMPACT_INTERVAL", "300"))
+# Superseded index files stay this long after the next version is published, for workers still switching
+QUESTION_BANK_KEEP_SECONDS = float(os.getenv("QUESTION_BANK_KEEP_SECONDS", "600"))
+QUESTION_BANK_COMPACTOR_ENABLED = os.getenv("QUESTION_BANK_COMPACTOR_ENABLED", "true").lower() == "true"
+QUESTION_BANK_BATCH_SIZE = int(os.getenv("QUESTION_BANK_BATCH_SIZE", "10000"))
+# Extra candidates fetched per result when filtering by role
+QUESTION_BANK_FILTER_OVERSAMPLE = int(os.getenv("QUESTION_BANK_FILTER_OVERSAMPLE", "4"))
+# FAISS threads per search; requests already run in parallel, one per threadpool worker
+QUESTION_BANK_SEARCH_THREADS = int(os.getenv("QUESTION_BANK_SEARCH_THREADS", "1"))
+
+MANIFEST_NAME = "manifest.json"
+ADD_LOCK_KEY = "question-bank-add"
+COMPACTION_LOCK_KEY = "question-bank-compaction"
+
+
+def ivf_lists(count: int) -> int:
+    """
+    IVF lists for `count` vectors: about 4 * sqrt(count), rounded to a power of two,
+    and no more than the 39 training vectors per list FAISS needs allow.
+    """
+    lists = 1 << max(4, round(math.log2(4 * math.sqrt(max(count, 1)))))
+    while lists > 16 and lists * 39 > count:
+        lists //= 2
+    return lists
+
+
+def new_index(dim: int, count: int, training: Optional[np.ndarray] = None) -> faiss.Index:
+    """
+    An empty index sized for `count` vectors: exact below QUESTION_BANK_IVF_MIN,
+    otherwise IVF-SQ8 trained on `training`.
+    """
+    if count < QUESTION_BANK_IVF_MIN:
+        return faiss.index_factory(dim, "IDMap2,Flat", faiss.METRIC_INNER_PRODUCT)
+    index = faiss.index_factory(dim, f"IVF{ivf_lists(count)},SQ8", faiss.METRIC_INNER_PRODUCT)
+    faiss.extract_index_ivf(index).cp.niter = QUESTION_BANK_KMEANS_ITERATIONS
+    index.train(np.ascontiguousarray(training, dtype=np.float32))
+    return index
+
+
+def training_size(count: int) -> int:
+    """Vectors to train the IVF quantizer on (FAISS wants at least 39 per list)."""
+    return min(count, 64 * ivf_lists(count))
+
+
+def open_index(path: str) -> faiss.Index:
+    """Map an index file read-only; its vectors are shared page cache, not process memory."""
+    return faiss.read_index(path, faiss.IO_FLAG_MMAP_IFC)
+
+
+def search_index(index: faiss.Index, vectors: np.ndarray, k: int, nprobe: int) -> Tuple[np.ndarray, np.ndarray]:
+    params = faiss.SearchParametersIVF(nprobe=nprobe) if isinstance(index, faiss.IndexIVF) else None
+    return index.search(vectors, k, params=params)
+
+
+def merge_results(results: List[Tuple[np.ndarray, np.ndarray]], k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Top k of several (scores, ids) results for the same queries; -1 ids are padding."""
+    if len(results) == 1:
+        return results[0]
+    scores = np.concatenate([result[0] for result in results], axis=1)
+    ids = np.concatenate([result[1] for result in results], axis=1)
+    scores[ids < 0] = -np.inf
+    order = np.argsort(-scores, axis=1, kind="stable")[:, :k]
+    return np.take_along_axis(scores, order, axis=1), np.take_along_axis(ids, order, axis=1)
+
+
+def read_manifest(directory: str) -> Optional[dict]:
+    try:
+        with open(os.path.join(directory, MANIFEST_NAME)) as manifest_file:
+            return json.load(manifest_file)
+    except FileNotFoundError:
+        return None
+
+
+def write_manifest(directory: str, manifest: dict):
+    """Replace the manifest atomically, so readers see the old or the new version, never half of one."""
+    path = os.path.join(directory, MANIFEST_NAME)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "w") as manifest_file:
+        json.dump(manifest, manifest_file, indent=2)
+        manifest_file.flush()
+        os.fsync(manifest_file.fileno())
+    os.replace(temporary, path)
+
+
+def iter_vectors(db, dim: int, after_id: int = 0, up_to_id: Optional[int] = None,
+                 batch_size: int = QUESTION_BANK_BATCH_SIZE) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """(ids, vectors) of the stored questions with after_id < id <= up_to_id, in id order, a batch at a time."""
+    while True:
+        query = db.query(InterviewQuestion.id, InterviewQuestion.embedding).filter(InterviewQuestion.id > after_id)
+        if up_to_id is not None:
+            query = query.filter(InterviewQuestion.id <= up_to_id)
+        rows = query.order_by(InterviewQuestion.id).limit(batch_size).all()
+        if not rows:
+            return
+        ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        vectors = np.frombuffer(b"".join(row[1] for row in rows), dtype=np.float32).reshape(len(rows), dim)
+        yield ids, vectors
+        after_id = int(ids[-1])
+
+
+class QuestionBank:
+    """One process's view of the question bank: the mapped base index plus its delta."""
+
+    def __init__(self, embedder, database: Database, directory: str = QUESTION_BANK_DIR,
+                 nprobe: int = QUESTION_BANK_NPROBE, refresh_seconds: float = QUESTION_BANK_REFRESH_SECONDS):
+        self.embedder = embedder
+        self.database = database
+        self.directory = directory
+        self.nprobe = nprobe
+        self.refresh_seconds = refresh_seconds
+        self.manifest: Optional[dict] = None
+        self._base: Optional[faiss.Index] = None
+        self._delta = self._new_delta()
+        self._synced_id = 0  # Highest question id in the base or the delta
+        self._lock = threading.Lock()  # Guards the delta and swapping the base
+        self._refresh_lock = threading.Lock()
+        self._refreshed_at = None
+        self.stats = {"searches": 0, "refreshes": 0, "base_loads": 0, "delta_synced": 0, "compactions": 0}
+        faiss.omp_set_num_threads(QUESTION_BANK_SEARCH_THREADS)
+
+    def _new_delta(self) -> faiss.Index:
+        return faiss.IndexIDMap2(faiss.IndexFlatIP(self.embedder.dim))
+
+    # -- keeping up to date --------------------------------------------------
+
+    def _open_base(self, manifest: dict) -> faiss.Index:
+        if manifest["embedder"] != self.embedder.name or manifest["dim"] != self.embedder.dim:
+            raise ValueError(f"Question bank index was built with {manifest['embedder']}, "
+                             f"not {self.embedder.name}; run compact --reembed")
+        path = os.path.join(self.directory, manifest["file"])
+        try:
+            return open_index(path)
+        except RuntimeError:
+            if not os.path.exists(path):
+                raise FileNotFoundError(path)
+            raise
+
+    def _open_latest(self, manifest: dict, attempts: int = 3) -> Tuple[faiss.Index, dict]:
+        """Map the manifest's base index, or a newer manifest's if compaction removed it meanwhile."""
+        for attempt in range(attempts):
+            try:
+                return self._open_base(manifest), manifest
+            except FileNotFoundError:
+                latest = read_manifest(self.directory)
+                if attempt == attempts - 1 or latest is None or latest["version"] == manifest["version"]:
+                    raise
+                manifest = latest
+
+    def refresh(self, force: bool = False):
+        """Map a newer base index if one was published, and add new questions to the delta."""
+        now = time.monotonic()
+        if not force and self._refreshed_at is not None and now - self._refreshed_at < self.refresh_seconds:
+            return
+        if not self._refresh_lock.acquire(blocking=force):
+            return  # Another request is refreshing
+        try:
+            self._refreshed_at = now
+            manifest = read_manifest(self.directory)
+            base = None
+            delta, synced_id = self._delta, self._synced_id
+            if manifest is not None and (self.manifest is None or manifest["version"] != self.manifest["version"]):
+                # Everything up to max_id is in the new base; a new delta starts after it, and
+                # both replace the current ones together once it is filled
+                base, manifest = self._open_latest(manifest)
+                delta, synced_id = self._new_delta(), manifest["max_id"]
+            with self.database.SessionLocal() as db:
+                for ids, vectors in iter_vectors(db, self.embedder.dim, after_id=synced_id):
+                    with self._lock:
+                        delta.add_with_ids(vectors, ids)
+                        if base is None:
+                            self._synced_id = int(ids[-1])
+                    synced_id = int(ids[-1])
+                    self.stats["delta_synced"] += len(ids)
+            if base is not None:
+                with self._lock:
+                    self._base, self.manifest = base, manifest
+                    self._delta, self._synced_id = delta, synced_id
+                self.stats["base_loads"] += 1
+                logging.info(f"Question bank index v{manifest['version']} mapped: {manifest['count']} questions "
+                             f"({manifest['kind']})")
+            self.stats["refreshes"] += 1
+        finally:
+            self._refresh_lock.release()
+
+    # -- queries -------------------------------------------------------------
+
+    def search_vectors(self, vectors: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k (scores, ids) for each query vector over the base and the delta."""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        results = []
+        base = self._base
+        if base is not None and base.ntotal:
+            results.append(search_index(base, vectors, k, self.nprobe))
+        with self._lock:
+            if self._delta.ntotal:
+                results.append(self._delta.search(vectors, min(k, self._delta.ntotal)))
+        if not results:
+            return np.zeros((len(vectors), 0), dtype=np.float32), np.zeros((len(vectors), 0), dtype=np.int64)
+        return merge_results(results, k)
+
+    def search(self, db, query: str, k: int = 10, role: Optional[str] = None,
+               exclude_ids: Tuple[int, ...] = ()) -> List[dict]:
+        """The k questions closest to `query` (e.g. a role and its skills), best first."""
+        self.refresh()
+        self.stats["searches"] += 1
+        candidates = k + len(exclude_ids)
+        if role:
+            candidates *= QUESTION_BANK_FILTER_OVERSAMPLE
+        scores, ids = self.search_vectors(self.embedder.embed([query]), candidates)
+        excluded = set(exclude_ids)
+        ranked = [(int(question_id), float(score)) for question_id, score in zip(ids[0], scores[0])
+                  if question_id >= 0 and question_id not in excluded]
+        if not ranked:
+            return []
+        columns = (InterviewQuestion.id, InterviewQuestion.question, InterviewQuestion.role,
+                   InterviewQuestion.skills, InterviewQuestion.difficulty)
+        rows = {row.id: row for row in db.query(*columns).filter(InterviewQuestion.id.in_([i for i, _ in ranked]))}
+        results = []
+        for question_id, score in ranked:
+            row = rows.get(question_id)
+            if row is None or (role and (row.role or "").lower() != role.lower()):
+                continue
+            results.append({"id": row.id, "question": row.question, "role": row.role, "skills": row.skills,
+                            "difficulty": row.difficulty, "score": round(score, 4)})
+            if len(results) == k:
+                break
+        return results
+
+    # -- writes --------------------------------------------------------------
+
+    def add(self, db, questions: List[dict]) -> List[int]:
+        """
+        Store questions ({"question", "role", "skills", "difficulty",
+        "reference_answers"}) with their vectors, in the caller's transaction.
+        Returns their ids.
+
+        Ids are taken under a transaction-level advisory lock, so they commit in id
+        order: the delta sync reads "id > last seen", which would skip a lower id
+        committed after a higher one.
+        """
+        if not questions:
+            return []
+        vectors = self.embedder.embed([question["question"] for question in questions])
+        db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:key))"), {"key": ADD_LOCK_KEY})
+        rows = [{"question": question["question"], "role": question.get("role"),
+                 "skills": question.get("skills") or [], "difficulty": question.get("difficulty"),
+                 "reference_answers": question.get("reference_answers") or [],
+                 "embedding": vector.tobytes()} for question, vector in zip(questions, vectors)]
+        statement = insert(InterviewQuestion).returning(InterviewQuestion.id, sort_by_parameter_order=True)
+        return list(db.execute(statement, rows).scalars())
+
+    def reembed(self, batch_size: int = QUESTION_BANK_BATCH_SIZE) -> int:
+        """Recompute every stored vector with the current embedder, e.g. after changing it."""
+        updated = 0
+        last_id = 0
+        with self.database.SessionLocal() as db:
+            while True:
+                rows = db.query(InterviewQuestion.id, InterviewQuestion.question).filter(
+                    InterviewQuestion.id > last_id).order_by(InterviewQuestion.id).limit(batch_size).all()
+                if not rows:
+                    return updated
+                vectors = self.embedder.embed([row.question for row in rows])
+                table = InterviewQuestion.__table__
+                statement = update(table).where(table.c.id == bindparam("row_id")).values(
+                    embedding=bindparam("vector"))
+                db.execute(statement, [{"row_id": row.id, "vector": vector.tobytes()}
+                                       for row, vector in zip(rows, vectors)])
+                db.commit()
+                updated += len(rows)
+                last_id = rows[-1].id
+
+    def compact(self, rebuild: bool = False, min_new: int = 1) -> dict:
+        """
+        Publish a new base index with the questions added since the current one, if
+        there are at least `min_new`. The current base is extended (an IVF index keeps
+        its trained quantizer); with `rebuild`, or when the bank outgrows the flat
+        index, a new index is built and trained from all stored vectors.
+
+        Runs under an advisory lock, so several workers can call it at once and
+        only one does the work.
+        """
+        stats = {"locked": False, "version": None, "added": 0, "count": 0, "kind": None}
+        os.makedirs(self.directory, exist_ok=True)
+        dim = self.embedder.dim
+        with self.database.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            if not connection.execute(text("SELECT pg_try_advisory_lock(hashtext(:key))"),
+                                      {"key": COMPACTION_LOCK_KEY}).scalar():
+                return stats
+            stats["locked"] = True
+            try:
+                current = read_manifest(self.directory)
+                if current is not None and (current["embedder"] != self.embedder.name or current["dim"] != dim):
+                    rebuild = True
+                after_id = 0 if current is None or rebuild else current["max_id"]
+                base_count = 0 if current is None or rebuild else current["count"]
+                with self.database.SessionLocal() as db:
+                    max_id, new = db.query(func.max(InterviewQuestion.id), func.count(InterviewQuestion.id)).filter(
+                        InterviewQuestion.id > after_id).one()
+                    if not new or (new < min_new and not rebuild):
+                        stats.update(version=current and current["version"], count=base_count,
+                                     kind=current and current["kind"])
+                        return stats
+                    count = base_count + new
+                    grow = current is not None and current["kind"] == "flat" and count >= QUESTION_BANK_IVF_MIN
+                    if current is None or rebuild or grow:
+                        index, after_id = self._build(db, count), 0
+                    else:
+                        index = faiss.read_index(os.path.join(self.directory, current["file"]))
+                    for ids, vectors in iter_vectors(db, dim, after_id=after_id, up_to_id=max_id):
+                        index.add_with_ids(vectors, ids)
+                        stats["added"] += len(ids)
+
+                version = (current["version"] if current else 0) + 1
+                manifest = {"version": version, "file": f"questions-{version:06d}.faiss",
+                            "kind": "ivf" if isinstance(index, faiss.IndexIVF) else "flat",
+                            "count": int(index.ntotal), "max_id": int(max_id), "dim": dim,
+                            "embedder": self.embedder.name, "created_at": time.time()}
+                path = os.path.join(self.directory, manifest["file"])
+                faiss.write_index(index, f"{path}.tmp")
+                os.replace(f"{path}.tmp", path)
+                write_manifest(self.directory, manifest)
+                if current is not None and time.time() - current["created_at"] >= QUESTION_BANK_KEEP_SECONDS:
+                    self._remove_old_files(keep=(manifest["file"], current["file"]))
+                stats.update(version=version, count=manifest["count"], kind=manifest["kind"])
+                self.stats["compactions"] += 1
+            finally:
+                connection.execute(text("SELECT pg_advisory_unlock(hashtext(:key))"), {"key": COMPACTION_LOCK_KEY})
+        logging.info(f"Question bank index v{stats['version']}: {stats['count']} questions ({stats['kind']}), "
+                     f"{stats['added']} added")
+        return stats
+
+    def _build(self, db, count: int) -> faiss.Index:
+        if count < QUESTION_BANK_IVF_MIN:
+            return new_index(self.embedder.dim, count)
+        # An evenly spread sample: every n-th stored question
+        step = -(-count // training_size(count))
+        sample = [vectors[::step] for _, vectors in iter_vectors(db, self.embedder.dim)]
+        return new_index(self.embedder.dim, count, np.concatenate(sample))
+
+    def _remove_old_files(self, keep: Tuple[Optional[str], ...]):
+        # Older files were superseded when `current` was published, at least
+        # QUESTION_BANK_KEEP_SECONDS ago, so every worker has refreshed past them; one that
+        # has not reopens the newer manifest. The previous version stays, and already-mapped
+        # files stay readable by their processes after being unlinked
+        for name in os.listdir(self.directory):
+            if name.startswith("questions-") and name.endswith(".faiss") and name not in keep:
+                os.remove(os.path.join(self.directory, name))
+
+    def snapshot(self) -> dict:
+        manifest = self.manifest or {}
+        return {
+            "version": manifest.get("version"),
+            "kind": manifest.get("kind"),
+            "base_questions": int(self._base.ntotal) if self._base is not None else 0,
+            "delta_questions": int(self._delta.ntotal),
+            "max_id": self._synced_id,
+            "embedder": self.embedder.name,
+            "nprobe": self.nprobe,
+            **self.stats,
+            "embedding_cache": self.embedder.snapshot() if hasattr(self.embedder, "snapshot") else None,
+        }
+
+
+class CompactionJob:
+    """
+    Background task that compacts the question bank once its delta has
+    `min_new` questions, checking on startup and then every `interval` seconds.
+    """
+
+    def __init__(self, bank: QuestionBank, interval: float = QUESTION_BANK_COMPACT_INTERVAL,
+                 min_new: int = QUESTION_BANK_COMPACT_MIN):
+        self.bank = bank
+        self.interval = interval
+        self.min_new = min_new
+        self._task = None
+        self.stats = {"runs": 0, "errors": 0, "last_run_at": None, "last_result": None}
+
+    async def run(self):
+        logging.info("Question bank compaction started")
+        while True:
+            try:
+                self.stats["last_result"] = await run_in_threadpool(self.bank.compact, min_new=self.min_new)
+                self.stats["runs"] += 1
+                self.stats["last_run_at"] = time.time()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["errors"] += 1
+                logging.error(f"Question bank compaction failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Manage the question bank's FAISS index.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("stats", help="Show the published index and the questions not in it yet")
+    compact = commands.add_parser("compact", help="Publish an index with every stored question")
+    compact.add_argument("--rebuild", action="store_true", help="Build and train a new index from scratch")
+    compact.add_argument("--reembed", action="store_true", help="Recompute all vectors first (implies --rebuild)")
+    load = commands.add_parser("import", help="Add questions from a JSON-lines file, then compact")
+    load.add_argument("path")
+    search = commands.add_parser("search", help="Query the bank")
+    search.add_argument("query")
+    search.add_argument("--k", type=int, default=5)
+    search.add_argument("--role")
+    args = parser.parse_args(argv)
+
+    bank = QuestionBank(load_embedder(), Database())
+    try:
+        if args.command == "stats":
+            bank.refresh(force=True)
+            result = bank.snapshot()
+        elif args.command == "compact":
+            reembedded = bank.reembed() if args.reembed else 0
+            result = bank.compact(rebuild=args.rebuild or args.reembed)
+            result["reembedded"] = reembedded
+        elif args.command == "import":
+            added = 0
+            with open(args.path) as source, bank.database.SessionLocal() as db:
+                batch = []
+                for line in source:
+                    if line.strip():
+                        batch.append(json.loads(line))
+                    if len(batch) == QUESTION_BANK_BATCH_SIZE:
+                        added += len(bank.add(db, batch))
+                        db.commit()
+                        batch = []
+                added += len(bank.add(db, batch))
+                db.commit()
+            result = {"imported": added, **bank.compact()}
+        else:
+            with bank.database.SessionLocal() as db:
+                result = bank.search(db, args.query, k=args.k, role=args.role)
+    except Exception as e:
+        logging.error(f"Question bank {args.command} failed: {e}")
+        return 1
+
+    print(json.dumps(result, indent=2, default=str))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+"""
+Content-addressed cache of text embeddings, shared by every worker on a host.
+
+A text's key is a 64-bit BLAKE2b hash of the embedder name (the model and its
+dimension) and the normalized text (Unicode NFKC, whitespace collapsed). The
+same question, resume or answer embedded again is then a lookup.
+
+Storage, under EMBEDDING_CACHE_DIR/<embedder name>/:
+
+- vectors-NNNNNN.npy: append-only shards of EMBEDDING_CACHE_SHARD_ROWS float32
+  rows, created at full size and memory-mapped (np.lib.format.open_memmap), so
+  workers read each other's vectors straight from the shared page cache;
+- keys.u64: the append-only hash index, one uint64 key per row. The key at
+  position i belongs to row i (shard i // shard_rows), so a record is
+  8 bytes and needs no row number.
+
+Each process keeps the keys sorted in memory (a large main array plus a small
+recent tail, merged when the tail grows) and follows keys.u64 for rows other
+processes append. A batch lookup is one np.searchsorted over the keys and one
+fancy-index gather per shard touched. Appends take an exclusive flock and write
+the vectors (and flush them) before their keys, so a key never points at an
+unwritten row; a writer first cuts off any partial record a crashed one left, so
+keys stay aligned with their rows.
+
+CachedEmbedder wraps any embedder: hits come from the cache, and the distinct
+misses of a call go to the backend in one batch.
+"""
+import os
+import re
+import fcntl
+import hashlib
+import threading
+import unicodedata
+from typing import List, Tuple
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", "embedding_cache")
+EMBEDDING_CACHE_SHARD_ROWS = int(os.getenv("EMBEDDING_CACHE_SHARD_ROWS", "65536"))
+# Recent keys are kept in a small sorted tail, merged into the main array past this size
+EMBEDDING_CACHE_TAIL_MAX = int(os.getenv("EMBEDDING_CACHE_TAIL_MAX", "8192"))
+
+KEY_DTYPE = np.dtype("<u8")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def text_keys(model: str, texts: List[str]) -> np.ndarray:
+    """64-bit content keys of `texts` for `model`."""
+    prefix = model.encode() + b"\x00"
+    return np.fromiter((int.from_bytes(hashlib.blake2b(prefix + normalize_text(text).encode(), digest_size=8)
+                                       .digest(), "little") for text in texts), dtype=KEY_DTYPE, count=len(texts))
+
+
+class EmbeddingCache:
+    """Append-only, memory-mapped store of vectors by 64-bit key, for one model."""
+
+    def __init__(self, model: str, dim: int, directory: str = EMBEDDING_CACHE_DIR,
+                 shard_rows: int = EMBEDDING_CACHE_SHARD_ROWS, tail_max: int = EMBEDDING_CACHE_TAIL_MAX):
+        self.model = model
+        self.dim = dim
+        self.shard_rows = shard_rows
+        self.tail_max = tail_max
+        self.directory = os.path.join(directory, re.sub(r"[^A-Za-z0-9_.-]", "_", model))
+        os.makedirs(self.directory, exist_ok=True)
+        self._keys_path = os.path.join(self.directory, "keys.u64")
+        open(self._keys_path, "ab").close()
+        self._lock = threading.Lock()
+        self._shards = {}
+        self._rows = 0  # Records of keys.u64 read so far
+        self._main_keys = np.zeros(0, dtype=KEY_DTYPE)
+        self._main_rows = np.zeros(0, dtype=np.int64)
+        self._tail_keys = np.zeros(0, dtype=KEY_DTYPE)
+        self._tail_rows = np.zeros(0, dtype=np.int64)
+        self.stats = {"lookups": 0, "hits": 0, "misses": 0, "stored": 0}
+        self._follow()
+
+    @property
+    def entries(self) -> int:
+        return self._rows
+
+    def _shard(self, number: int) -> np.ndarray:
+        shard = self._shards.get(number)
+        if shard is None:
+            path = os.path.join(self.directory, f"vectors-{number:06d}.npy")
+            if not os.path.exists(path):
+                # Created by the process holding the append lock; sparse until written
+                np.lib.format.open_memmap(f"{path}.tmp", mode="w+", dtype=np.float32,
+                                          shape=(self.shard_rows, self.dim)).flush()
+                os.replace(f"{path}.tmp", path)
+            shard = np.load(path, mmap_mode="r+")
+            self._shards[number] = shard
+        return shard
+
+    def _index(self, keys: np.ndarray, rows: np.ndarray):
+        order = np.argsort(keys, kind="stable")
+        tail_keys = np.concatenate([self._tail_keys, keys[order]])
+        tail_rows = np.concatenate([self._tail_rows, rows[order]])
+        # Both parts are sorted runs, which the stable sort merges in linear time
+        order = np.argsort(tail_keys, kind="stable")
+        self._tail_keys, self._tail_rows = tail_keys[order], tail_rows[order]
+        if len(self._tail_keys) > self.tail_max:
+            keys = np.concatenate([self._main_keys, self._tail_keys])
+            rows = np.concatenate([self._main_rows, self._tail_rows])
+            order = np.argsort(keys, kind="stable")
+            self._main_keys, self._main_rows = keys[order], rows[order]
+            self._tail_keys = np.zeros(0, dtype=KEY_DTYPE)
+            self._tail_rows = np.zeros(0, dtype=np.int64)
+
+    def _follow(self):
+        """Index the keys other processes appended since the last call."""
+        size = os.path.getsize(self._keys_path) // KEY_DTYPE.itemsize
+        if size <= self._rows:
+            return
+        keys = np.fromfile(self._keys_path, dtype=KEY_DTYPE, count=size - self._rows,
+                           offset=self._rows * KEY_DTYPE.itemsize)
+        self._index(keys, np.arange(self._rows, self._rows + len(keys), dtype=np.int64))
+        self._rows += len(keys)
+
+    def _find(self, keys: np.ndarray) -> np.ndarray:
+        """Row of each key, -1 when absent."""
+        rows = np.full(len(keys), -1, dtype=np.int64)
+        for sorted_keys, sorted_rows in ((self._main_keys, self._main_rows), (self._tail_keys, self._tail_rows)):
+            if not len(sorted_keys):
+                continue
+            positions = np.minimum(np.searchsorted(sorted_keys, keys), len(sorted_keys) - 1)
+            found = sorted_keys[positions] == keys
+            rows[found] = sorted_rows[positions[found]]
+        return rows
+
+    def get(self, keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(found mask, vectors) for a batch of keys; rows of missing keys are zero."""
+        with self._lock:
+            self._follow()
+            rows = self._find(keys)
+            vectors = np.zeros((len(keys), self.dim), dtype=np.float32)
+            found = rows >= 0
+            shard_numbers = rows // self.shard_rows
+            for number in np.unique(shard_numbers[found]):
+                selected = found & (shard_numbers == number)
+                vectors[selected] = self._shard(int(number))[rows[selected] % self.shard_rows]
+            hits = int(found.sum())
+            self.stats["lookups"] += len(keys)
+            self.stats["hits"] += hits
+            self.stats["misses"] += len(keys) - hits
+        return found, vectors
+
+    def put(self, keys: np.ndarray, vectors: np.ndarray):
+        """Append vectors for keys not stored yet (by this or another process)."""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        with self._lock, open(self._keys_path, "ab") as keys_file:
+            fcntl.flock(keys_file, fcntl.LOCK_EX)
+            try:
+                self._follow()
+                # _follow read whole records only; drop a torn one so the append starts at row self._rows
+                os.ftruncate(keys_file.fileno(), self._rows * KEY_DTYPE.itemsize)
+                keys, first = np.unique(keys, return_index=True)
+                new = self._find(keys) < 0
+                keys, vectors = keys[new], vectors[first[new]]
+                if not len(keys):
+                    return
+                rows = np.arange(self._rows, self._rows + len(keys), dtype=np.int64)
+                touched = set()
+                for number in np.unique(rows // self.shard_rows):
+                    selected = rows // self.shard_rows == number
+                    self._shard(int(number))[rows[selected] % self.shard_rows] = vectors[selected]
+                    touched.add(int(number))
+                for number in touched:
+                    self._shards[number].flush()
+                keys_file.write(keys.astype(KEY_DTYPE).tobytes())
+                keys_file.flush()
+                self._index(keys, rows)
+                self._rows += len(keys)
+                self.stats["stored"] += len(keys)
+            finally:
+                fcntl.flock(keys_file, fcntl.LOCK_UN)
+
+    def snapshot(self) -> dict:
+        lookups = self.stats["lookups"]
+        return {
+            "model": self.model,
+            "entries": self._rows,
+            "shards": -(-self._rows // self.shard_rows),
+            **self.stats,
+            "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else None,
+        }
+
+
+class CachedEmbedder:
+    """An embedder in front of which sits an EmbeddingCache; same interface as the embedder."""
+
+    def __init__(self, embedder, cache: EmbeddingCache = None):
+        self.embedder = embedder
+        self.name = embedder.name
+        self.dim = embedder.dim
+        self.cache = cache or EmbeddingCache(embedder.name, embedder.dim)
+        self.stats = {"backend_calls": 0, "backend_texts": 0}
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        keys = text_keys(self.name, texts)
+        found, vectors = self.cache.get(keys)
+        if not found.all():
+            # Each distinct missing text goes to the backend once, all in one call
+            missing = np.flatnonzero(~found)
+            unique_keys, first, inverse = np.unique(keys[missing], return_index=True, return_inverse=True)
+            embedded = self.embedder.embed([texts[missing[index]] for index in first])
+            self.stats["backend_calls"] += 1
+            self.stats["backend_texts"] += len(unique_keys)
+            self.cache.put(unique_keys, embedded)
+            vectors[missing] = embedded[inverse.reshape(-1)]
+        return vectors
+
+    def snapshot(self) -> dict:
+        return {**self.cache.snapshot(), **self.stats}
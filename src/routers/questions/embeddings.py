@@ -0,0 +1,100 @@
+"""
+Text embedders of the question bank.
+
+An embedder is any class with a `name`, a `dim` and `embed(texts) -> np.ndarray`
+of shape (len(texts), dim), float32, with L2-normalized rows (so inner product is
+cosine similarity). Which class is used is set with QUESTION_EMBEDDING_BACKEND as
+"module:Class", like the interview backends.
+
+The default HashingEmbedder needs no model or network: it hashes words and word
+pairs into `dim` signed buckets, which is enough to retrieve questions that share
+vocabulary with the query. OpenAIEmbedder uses the OpenAI embeddings API.
+
+Embedders that call a model are wrapped in a CachedEmbedder (see
+embedding_cache; EMBEDDING_CACHE_ENABLED), so a text is embedded once per host.
+Embedders with `cacheable = False` are cheaper to run than to look up.
+
+The bank stores each question's vector, and its index records the embedder's
+name; vectors from different embedders are not comparable, so changing the
+embedder means re-embedding the bank (`python -m src.routers.questions.bank
+compact --reembed`).
+"""
+import os
+import re
+import hashlib
+from typing import List
+import numpy as np
+from dotenv import load_dotenv
+from src.utils.backends import load_backend
+from .embedding_cache import CachedEmbedder, EMBEDDING_CACHE_ENABLED
+
+load_dotenv()
+
+QUESTION_EMBEDDING_BACKEND = os.getenv("QUESTION_EMBEDDING_BACKEND",
+                                       "src.routers.questions.embeddings:HashingEmbedder")
+QUESTION_EMBEDDING_DIM = int(os.getenv("QUESTION_EMBEDDING_DIM", "256"))
+QUESTION_EMBEDDING_MODEL = os.getenv("QUESTION_EMBEDDING_MODEL", "text-embedding-3-small")
+QUESTION_EMBEDDING_BATCH_SIZE = int(os.getenv("QUESTION_EMBEDDING_BATCH_SIZE", "256"))
+
+_WORD = re.compile(r"[a-z0-9+#.]+")
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.maximum(norms, 1e-12, out=norms)
+    vectors /= norms
+    return vectors
+
+
+def load_embedder():
+    """The embedder set by QUESTION_EMBEDDING_BACKEND, behind the embedding cache."""
+    embedder = load_backend(QUESTION_EMBEDDING_BACKEND)
+    if EMBEDDING_CACHE_ENABLED and getattr(embedder, "cacheable", True):
+        return CachedEmbedder(embedder)
+    return embedder
+
+
+class HashingEmbedder:
+    """Signed feature hashing of words and adjacent word pairs."""
+
+    cacheable = False
+
+    def __init__(self, dim: int = QUESTION_EMBEDDING_DIM):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _features(self, text: str) -> List[str]:
+        words = [word.strip(".") for word in _WORD.findall(text.lower())]
+        words = [word for word in words if word]
+        return words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                digest = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little")
+                vectors[row, digest % self.dim] += 1.0 if digest >> 63 else -1.0
+        return normalize_rows(vectors)
+
+
+class OpenAIEmbedder:
+    """OpenAI embeddings (OPENAI_API_KEY), requested in batches."""
+
+    def __init__(self, model: str = QUESTION_EMBEDDING_MODEL, dim: int = QUESTION_EMBEDDING_DIM,
+                 batch_size: int = QUESTION_EMBEDDING_BATCH_SIZE):
+        import openai
+        openai.api_key = os.getenv("OPENAI_API_KEY")
+        self._openai = openai
+        self.model = model
+        self.dim = dim
+        self.batch_size = batch_size
+        self.name = f"openai-{model}-{dim}"
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for start in range(0, len(texts), self.batch_size):
+            batch = texts[start:start + self.batch_size]
+            response = self._openai.Embedding.create(model=self.model, input=batch, dimensions=self.dim)
+            for item in response["data"]:
+                vectors[start + item["index"]] = item["embedding"]
+        return normalize_rows(vectors)
@@ -0,0 +1,93 @@
+from typing import Optional
+from sqlalchemy.orm import Session
+from loguru import logger as logging
+from fastapi.security import OAuth2PasswordBearer
+from fastapi import APIRouter, Depends, HTTPException, Query
+from src.utils.db import get_db, db_util
+from src.utils.jwt import get_email_from_token
+from src.routers.admin.main import get_admin_user
+from . import schemas
+from .bank import QuestionBank, CompactionJob, QUESTION_BANK_COMPACTOR_ENABLED
+from .embeddings import load_embedder
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+
+# Defining the router
+router = APIRouter(
+    prefix="/api/questions",
+    tags=["questions"],
+    responses={404: {"description": "Not found"}},
+)
+
+# One per worker; the base index it maps is shared by all workers on the host
+question_bank = QuestionBank(load_embedder(), db_util)
+compaction_job = CompactionJob(question_bank)
+
+
+@router.on_event("startup")
+async def start_question_bank_compaction():
+    if QUESTION_BANK_COMPACTOR_ENABLED:
+        compaction_job.start()
+
+@router.on_event("shutdown")
+async def stop_question_bank_compaction():
+    await compaction_job.stop()
+
+
+@router.get("/search")
+def search_questions(
+    q: str = Query(..., min_length=1, description="What to ask about, e.g. a role and its skills"),
+    k: int = Query(10, ge=1, le=100, description="Questions to return"),
+    role: Optional[str] = Query(None, description="Only questions written for this role"),
+    db: Session = Depends(get_db),
+    token: str = Depends(oauth2_scheme)
+):
+    """
+    The interview questions closest in meaning to `q`, best first, with their
+    similarity score.
+    """
+    get_email_from_token(token)
+    try:
+        questions = question_bank.search(db, q, k=k, role=role)
+        return {
+            "success": True,
+            "status": 200,
+            "message": "Questions fetched successfully",
+            "data": questions,
+        }
+    except Exception as e:
+        logging.error(f"Question search failed: {e}")
+        raise HTTPException(status_code=500, detail="Question search failed")
+
+
+@router.post("/")
+def add_questions(payload: schemas.QuestionBatchCreate, db: Session = Depends(get_db),
+                  admin_user = Depends(get_admin_user)):
+    """
+    Add questions to the bank. They are searchable by every worker after its next
+    refresh, and go into the shared index at the next compaction.
+    """
+    try:
+        ids = question_bank.add(db, [question.dict() for question in payload.questions])
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logging.error(f"Adding questions failed: {e}")
+        raise HTTPException(status_code=500, detail="Adding questions failed")
+    return {
+        "success": True,
+        "status": 200,
+        "message": f"{len(ids)} questions added",
+        "data": {"ids": ids},
+    }
+
+
+@router.get("/stats")
+def get_question_bank_stats(admin_user = Depends(get_admin_user)):
+    """The mapped index version, base and delta sizes, embedding cache and compaction stats of this worker."""
+    return {
+        "success": True,
+        "status": 200,
+        "message": "Question bank stats fetched successfully",
+        "data": {**question_bank.snapshot(), "compaction": compaction_job.stats},
+    }
@@ -0,0 +1,5 @@
+from .questions import InterviewQuestion
+
+__all__ = [
+    "InterviewQuestion"
+]
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, BigInteger, String, Text, TIMESTAMP, LargeBinary
+from sqlalchemy.dialects.postgresql import JSONB
+from src.database.base import Base
+from sqlalchemy import func
+
+
+class InterviewQuestion(Base):
+    """
+    A question of the question bank. `embedding` is its vector (float32 bytes) from
+    the embedder the FAISS index was built with, so the index can be extended or
+    rebuilt without embedding the text again. `reference_answers` are model answers
+    that candidates' answers to this question are scored against.
+    """
+    __tablename__ = 'interview_questions'
+    __table_args__ = (
+        {'schema': 'voice_bot'},
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    question = Column(Text, nullable=False)
+    role = Column(String(255), nullable=True)
+    skills = Column(JSONB, nullable=False, default=list)  # List of skill names
+    difficulty = Column(String(20), nullable=True)
+    reference_answers = Column(JSONB, nullable=False, default=list, server_default="[]")  # List of answer texts
+    embedding = Column(LargeBinary, nullable=False)
+    created_at = Column(TIMESTAMP, server_default=func.current_timestamp())
+
+    def __repr__(self):
+        return f"<InterviewQuestion(id={self.id}, role={self.role})>"
@@ -0,0 +1,6 @@
+from .questions import QuestionCreate, QuestionBatchCreate
+
+__all__ = [
+    "QuestionCreate",
+    "QuestionBatchCreate"
+]
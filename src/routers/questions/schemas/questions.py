@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+
+class QuestionCreate(BaseModel):
+    question: str
+    role: Optional[str] = None
+    skills: List[str] = []
+    difficulty: Optional[str] = None
+    reference_answers: List[str] = []
+
+
+class QuestionBatchCreate(BaseModel):
+    questions: List[QuestionCreate]
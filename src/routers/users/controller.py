@@ -1,16 +1,21 @@
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 from loguru import logger as logging
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from typing import Optional
 import os
+import uuid
+import asyncio
 from fastapi import HTTPException, status
 
-from botocore.exceptions import NoCredentialsError, ClientError
+from botocore.exceptions import BotoCoreError, NoCredentialsError, ClientError
 from dotenv import load_dotenv
 from urllib.parse import urlparse
+from sqlalchemy.orm import Session
+from src.routers.notifications.controller import enqueue_template
+from src.utils.circuit_breaker import CircuitOpenError
+from src.utils import images, s3, storage, uploads
+from starlette.concurrency import run_in_threadpool
+from .models import User
 
 # Load environment variables
 load_dotenv()
@@ -21,6 +26,7 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60  # Token expires in 1 hour
 EMAIL = os.getenv('EMAIL')
 APP_PASSWORD = os.getenv('APP_PASSWORD')
+PROFILE_PICTURE_MAX_BYTES = int(os.getenv('PROFILE_PICTURE_MAX_BYTES', str(5 * 1024 * 1024)))
 
 
 
@@ -68,36 +74,26 @@ def decode_access_token(token: str) -> dict:
         )
 
 
-def send_password_reset_email(email: str, token: str):
+def queue_password_reset_email(db: Session, email: str, token: str):
     """
-    Send a password reset email with a reset link containing the token.
-    """
-    if not EMAIL or not APP_PASSWORD:
-        logging.error("EMAIL or APP_PASSWORD is not set in the environment variables.")
-        raise ValueError("Email credentials are missing.")
+    Queue a password reset email with a reset link containing the token.
 
+    The email is written to the outbox in the caller's transaction and delivered
+    by the outbox workers once the caller commits.
+    """
     reset_link = f"https://nutridietmitra.com/reset-password?token={token}"
-    subject = "Password Reset Request"
-    body = f"Click the following link to reset your password: {reset_link}"
 
-    msg = MIMEMultipart()
-    msg['From'] = EMAIL
-    msg['To'] = email
-    msg['Subject'] = subject
-    msg.attach(MIMEText(body, 'plain'))
+    enqueue_template(db, to_email=email, template_name="password_reset", reset_link=reset_link)
+    logging.info(f"Password reset email queued for {email}.")
 
-    try:
-        with smtplib.SMTP('smtp.gmail.com', 587) as server:
-            server.starttls()  # Start TLS encryption
-            server.login(EMAIL, APP_PASSWORD)
-            server.sendmail(EMAIL, email, msg.as_string())
-        logging.info(f"Password reset email sent successfully to {email}.")
-    except Exception as e:
-        logging.error(f"Failed to send password reset email to {email}: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to send email. Please try again later.",
-        )
+
+def profile_picture_key(user_id: int, content_type: str) -> str:
+    """
+    Storage key for a new profile picture. Every upload gets a fresh name, so cached
+    copies of the previous picture never have to be invalidated.
+    """
+    extension = "png" if content_type == "image/png" else "jpg"
+    return f"profile_pictures/{user_id}/{uuid.uuid4().hex}.{extension}"
 
 
 def s3_file_exists(profile_path: str) -> bool:
@@ -122,23 +118,23 @@ def s3_file_exists(profile_path: str) -> bool:
         if not bucket_name or not key_name:
             raise ValueError(f"Invalid S3 path: {profile_path}")
 
-        # Initialize S3 client
-        s3_client = boto3.client("s3")
-
-        # Check if the file exists
-        s3_client.head_object(Bucket=bucket_name, Key=key_name)
-        logging.info(f"File '{key_name}' exists in S3 bucket '{bucket_name}'.")
-        return True
+        # Check if the file exists (HeadObject results are cached, misses briefly)
+        if s3.object_exists(bucket_name, key_name):
+            return True
+        logging.warning(f"File '{profile_path}' does not exist in S3 bucket '{bucket_name}'.")
+        return False
     except ClientError as e:
-        if e.response["Error"]["Code"] == "404":
-            logging.warning(f"File '{profile_path}' does not exist in S3 bucket '{bucket_name}'.")
-            return False
-        else:
-            logging.error(f"Unexpected S3 error: {e}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Unexpected S3 error: {e}",
-            )
+        logging.error(f"Unexpected S3 error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Unexpected S3 error: {e}",
+        )
+    except CircuitOpenError as e:
+        logging.warning(f"Skipping S3 lookup for '{profile_path}': {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="File storage is temporarily unavailable. Please try again shortly.",
+        )
     except NoCredentialsError:
         logging.error("AWS credentials not available.")
         raise HTTPException(
@@ -151,24 +147,90 @@ def s3_file_exists(profile_path: str) -> bool:
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Invalid S3 path: {profile_path}",
         )
+    except BotoCoreError as e:
+        logging.error(f"S3 unreachable: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="File storage is temporarily unavailable. Please try again shortly.",
+        )
         
         
 def generate_presigned_url(source_bucket: str, s3_image_path: str) -> str:
     """
     Generate a pre-signed URL for accessing an S3 object.
     """
-    expires_in = 7 * 24 * 60 * 60  # 7 days
     s3_key = s3_image_path
     try:
-        url = boto3.client('s3').generate_presigned_url(
-            ClientMethod='get_object',
-            Params={'Bucket': source_bucket, 'Key': s3_key},
-            ExpiresIn=expires_in
-        )
-        return url
+        # Valid for 7 days; the same URL is reused until about a day before it expires
+        return s3.presigned_url(source_bucket, s3_key)
     except Exception as e:
         logging.error(f"Error generating pre-signed URL: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to generate pre-signed URL."
         )
+
+
+# Variant generation runs in worker processes, off the request path
+image_pipeline = images.ImagePipeline()
+_variant_tasks = set()
+
+
+def _record_profile_image_hash(session_factory, user_id: int, location: str, digest: str):
+    db = session_factory()
+    try:
+        # Only if the user has not uploaded another picture in the meantime
+        db.query(User).filter(User.id == user_id, User.profile_path == location).update(
+            {User.profile_image_hash: digest}, synchronize_session=False
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+async def _build_profile_variants(session_factory, user_id: int, stored: uploads.StoredUpload):
+    try:
+        await image_pipeline.build(stored.location, stored.sha256)
+    except Exception:
+        return
+    await run_in_threadpool(_record_profile_image_hash, session_factory, user_id, stored.location, stored.sha256)
+
+
+def schedule_profile_variants(session_factory, user_id: int, stored: uploads.StoredUpload):
+    """
+    Build the resized variants of a just-uploaded profile picture in the background.
+
+    `profile_image_hash` is set once they are stored; until then the user has no variants.
+    """
+    task = asyncio.get_running_loop().create_task(_build_profile_variants(session_factory, user_id, stored))
+    _variant_tasks.add(task)
+    task.add_done_callback(_variant_tasks.discard)
+
+
+def profile_picture_exists(profile_path: str) -> bool:
+    """Whether a stored profile picture (s3:// or local://) is present on its backend."""
+    if profile_path.startswith(storage.S3_SCHEME):
+        return s3_file_exists(profile_path)
+    backend, key = storage.resolve_location(profile_path)
+    return backend is not None and backend.exists(key)
+
+
+def profile_picture_url(profile_path: str) -> Optional[str]:
+    """URL clients can fetch a stored profile picture from, or None for legacy paths."""
+    backend, key = storage.resolve_location(profile_path)
+    if backend is None:
+        return None
+    if backend.name == "s3":
+        return generate_presigned_url(backend.bucket, key)
+    return backend.url(key)
+
+
+def profile_variant_urls(profile_path: str, digest: str) -> Optional[dict]:
+    """URLs of every stored variant of a profile picture, as {name: {extension: url}}."""
+    backend, _ = storage.resolve_location(profile_path)
+    if backend is None:
+        return None
+    return {
+        name: {extension: backend.url(key) for extension, key in formats.items()}
+        for name, formats in images.variant_keys(digest).items()
+    }
@@ -15,6 +15,8 @@ from src.routers.users.schemas import LoginSchema, TokenResponse
 from fastapi import APIRouter, Depends, HTTPException,status,Request
 from src.utils.jwt import create_access_token, get_email_from_token,create_refresh_token
 from src.routers.payment import  models as paymentmodels
+from src.utils import storage, uploads
+from src.utils.circuit_breaker import CircuitOpenError
 # Dependency to get database session
 db_util = Database()
 
@@ -36,6 +38,10 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
+@router.on_event("shutdown")
+async def stop_image_pipeline():
+    controller.image_pipeline.shutdown()
+
 @router.post("/login", response_model=TokenResponse)
 def login(user_credentials: LoginSchema = Body(...), db: Session = Depends(get_db)):
     """
@@ -330,16 +336,17 @@ def get_user_profile_path(
                 detail="No profile path found for the user.",
             )
 
-        # if not controller.s3_file_exists(profile_path):
-        #     raise HTTPException(
-        #         status_code=status.HTTP_404_NOT_FOUND,
-        #         detail="Profile path does not exist in S3.",
-        #     )
+        presigned_url = "folder_name/file_name"
+        if storage.resolve_location(profile_path)[0] is not None:
+            # Answered from in-process caches on repeat calls, without a round trip to S3
+            if not controller.profile_picture_exists(profile_path):
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Profile path does not exist in storage.",
+                )
 
-        # Generate a pre-signed URL for the profile path
-        # source_bucket = "hdmedia"
-        # presigned_url = controller.generate_presigned_url(source_bucket, profile_path)
-        
+            # Generate a pre-signed URL (S3) or a /media URL (local storage) for the profile path
+            presigned_url = controller.profile_picture_url(profile_path)
 
         # Return the user's profile path and pre-signed URL
         return schemas.UserProfilePathResponse(
@@ -348,7 +355,10 @@ def get_user_profile_path(
             message="User profile path fetched successfully.",
             data={
                 "profile_path": profile_path,
-                "presigned_url": "folder_name/file_name"
+                "presigned_url": presigned_url,
+                # Resized WebP/JPEG variants, once the image pipeline has produced them
+                "variants": controller.profile_variant_urls(profile_path, user.profile_image_hash)
+                if user.profile_image_hash else None,
             },
         )
 
@@ -363,14 +373,35 @@ def get_user_profile_path(
             detail="An unexpected error occurred. Please try again later.",
         )
 
-@router.put("/update-profile-path", response_model=schemas.UserResponse)
+@router.put(
+    "/update-profile-path",
+    response_model=schemas.UserResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "required": ["profile_picture"],
+                        "properties": {"profile_picture": {"type": "string", "format": "binary"}},
+                    }
+                }
+            },
+        }
+    },
+)
 async def update_user_profile_path(
-    profile_picture: UploadFile = File(...),  # Accept the uploaded file
+    request: Request,
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db),
 ):
     """
-    Upload the profile picture to S3 and update the profile path in the database.
+    Upload the profile picture to storage (S3 or local disk) and update the profile path in the database.
+
+    The `profile_picture` form field is streamed straight to storage as it arrives
+    instead of being spooled first, and is rejected on its first bytes if it is not
+    a JPEG or PNG, or as soon as it exceeds the size limit.
     """
     try:
         # Decode email from the token
@@ -398,43 +429,32 @@ async def update_user_profile_path(
                 detail="You are not authorized to update another user's profile path.",
             )
 
-        # Validate uploaded file
-        if profile_picture.content_type not in ["image/jpeg", "image/png"]:
+        # Stream the upload to storage; nothing is read before the user is authorized
+        try:
+            stored = await uploads.stream_upload(
+                request,
+                field_name="profile_picture",
+                max_bytes=controller.PROFILE_PICTURE_MAX_BYTES,
+                make_key=lambda content_type: controller.profile_picture_key(user.id, content_type),
+            )
+        except uploads.UploadError as upload_error:
+            raise HTTPException(status_code=upload_error.status_code, detail=str(upload_error))
+        except CircuitOpenError:
             raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid file type. Only JPEG and PNG are allowed.",
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="File storage is temporarily unavailable. Please try again shortly.",
+            )
+        except Exception as storage_error:
+            logging.error(f"Error uploading profile picture: {storage_error}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to upload the profile picture. Please try again.",
             )
+        logging.info(f"Profile picture uploaded to {stored.location} ({stored.size} bytes)")
 
-        
-        file_key = f"profile_pictures/{email}/{profile_picture.filename}"
-
-        # Upload the file to S3
-        # s3_client = boto3.client("s3", region_name="us-east-1")
-        # try:
-            # Read file content
-            # file_content = await profile_picture.read()
-
-            # # Upload file to S3
-            # s3_client.put_object(
-            #     Bucket=bucket_name,
-            #     Key=file_key,
-            #     Body=file_content,
-            #     ContentType=profile_picture.content_type,
-            # )
-            # logging.info(f"Profile picture uploaded to S3: {file_key}")
-
-            # Construct the S3 URL
-            # s3_url = f"{file_key}"
-
-        # except Exception as s3_error:
-        #     logging.error(f"Error uploading profile picture to S3: {s3_error}")
-        #     raise HTTPException(
-        #         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-        #         detail="Failed to upload the profile picture to S3. Please try again.",
-        #     )
-
-        # Update the profile path in the database
-        # user.profile_path = s3_url
+        # Update the profile path in the database; the variants of the previous picture no longer apply
+        user.profile_path = stored.location
+        user.profile_image_hash = None
 
         # Commit the changes
         try:
@@ -448,6 +468,8 @@ async def update_user_profile_path(
                 detail="An error occurred while updating the profile path. Please try again.",
             )
 
+        controller.schedule_profile_variants(db_util.SessionLocal, user.id, stored)
+
         # Return updated user info
         return schemas.UserResponse(
             success=True,
@@ -680,10 +702,11 @@ def forgot_password(forgot_request: schemas.ForgotPasswordSchema, db: Session =
         # Generate a password reset token
         reset_token = create_access_token(data={"sub": user.email}, expires_delta=timedelta(hours=1))
 
-        # Send the reset token to the user (e.g., via email)
-        controller.send_password_reset_email(email=user.email, token=reset_token)
+        # Queue the reset email; it is delivered by the outbox workers after commit
+        controller.queue_password_reset_email(db, email=user.email, token=reset_token)
+        db.commit()
 
-        logging.info(f"Password reset token sent to {user.email}")
+        logging.info(f"Password reset token queued for {user.email}")
         return {
             "success": True,
             "status": 200,
@@ -1,13 +1,11 @@
 from sqlalchemy import Column, Integer, String, DateTime, Enum, TIMESTAMP
 from sqlalchemy.orm import validates, relationship
 from sqlalchemy.sql import func
-from sqlalchemy.ext.declarative import declarative_base
+from src.database.base import Base
 import enum
 import re
 import bcrypt
 
-Base = declarative_base()
-
 class UserRole(enum.Enum):
     admin = "admin"
     user = "user"
@@ -28,6 +26,8 @@ class User(Base):
     password = Column(String(255), nullable=False)
     role = Column(String(50), nullable=False)
     profile_path = Column(String(255), default="default.jpg")
+    # SHA-256 of the current profile picture, set once its resized variants are stored
+    profile_image_hash = Column(String(64), nullable=True)
     status = Column(Enum(UserStatus), default=UserStatus.active)
     created_at = Column(TIMESTAMP, server_default=func.current_timestamp())
     updated_at = Column(TIMESTAMP, server_default=func.current_timestamp(), onupdate=func.current_timestamp())
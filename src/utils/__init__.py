@@ -1,9 +1,10 @@
-
 from .jwt import create_access_token, verify_access_token
 from .db import get_db
+from .bulk import values_clause
 
 __all__ = [
     "create_access_token",
     "verify_access_token",
-    "get_db"
+    "get_db",
+    "values_clause"
 ]
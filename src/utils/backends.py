@@ -0,0 +1,8 @@
+# src/utils/backends.py
+import importlib
+
+
+def load_backend(path: str):
+    """Instantiate a pluggable backend from a "module:Class" path."""
+    module_name, _, class_name = path.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)()
@@ -0,0 +1,25 @@
+# src/utils/bulk.py
+from typing import Iterable, Sequence, Tuple
+
+
+def values_clause(rows: Iterable[Sequence], prefix: str = "v") -> Tuple[str, dict]:
+    """
+    Build a bound `VALUES (...), (...)` clause for multi-row statements.
+
+    Returns the SQL fragment and the parameter dict, so a whole batch can be
+    sent as one `UPDATE ... FROM (VALUES ...)` or `INSERT ... VALUES` statement.
+    """
+    placeholders = []
+    params = {}
+    for row_index, row in enumerate(rows):
+        names = []
+        for col_index, value in enumerate(row):
+            name = f"{prefix}_{row_index}_{col_index}"
+            params[name] = value
+            names.append(f":{name}")
+        placeholders.append(f"({', '.join(names)})")
+
+    if not placeholders:
+        raise ValueError("values_clause() needs at least one row.")
+
+    return "VALUES " + ", ".join(placeholders), params
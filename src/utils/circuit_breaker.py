@@ -0,0 +1,176 @@
+# src/utils/circuit_breaker.py
+import os
+import time
+import threading
+from typing import Callable, Dict, Optional, Tuple, Type
+from dotenv import load_dotenv
+from loguru import logger as logging
+
+load_dotenv()
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose breaker is open."""
+
+    def __init__(self, name: str, retry_after: float):
+        self.name = name
+        self.retry_after = retry_after
+        super().__init__(f"Circuit '{name}' is open; retry in {retry_after:.1f}s")
+
+
+class CircuitBreaker:
+    """
+    Fail fast in front of an outbound dependency.
+
+    closed    -> calls go through; `failure_threshold` consecutive failures open the circuit.
+    open      -> calls raise CircuitOpenError immediately for `recovery_timeout` seconds.
+    half_open -> up to `half_open_max_calls` probe calls go through; a success closes the
+                 circuit, a failure opens it again.
+
+    A call that succeeds but takes longer than `slow_call_seconds` (the dependency's
+    latency budget) counts as a failure, so a dependency that degrades into slowness
+    trips the breaker as well as one that errors.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_timeout: float = 30.0,
+                 half_open_max_calls: int = 1, slow_call_seconds: Optional[float] = None,
+                 expected_exceptions: Tuple[Type[BaseException], ...] = (Exception,)):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.slow_call_seconds = slow_call_seconds
+        self.expected_exceptions = expected_exceptions
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        self.stats = {"calls": 0, "successes": 0, "failures": 0, "slow_calls": 0, "rejected": 0, "opened": 0}
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._state = self.HALF_OPEN
+            self._half_open_calls = 0
+        return self._state
+
+    def _before_call(self):
+        with self._lock:
+            state = self._current_state()
+            if state == self.OPEN:
+                self.stats["rejected"] += 1
+                raise CircuitOpenError(self.name, self.recovery_timeout - (time.monotonic() - self._opened_at))
+            if state == self.HALF_OPEN:
+                if self._half_open_calls >= self.half_open_max_calls:
+                    self.stats["rejected"] += 1
+                    raise CircuitOpenError(self.name, 0.0)
+                self._half_open_calls += 1
+            self.stats["calls"] += 1
+
+    def _open(self):
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self.stats["opened"] += 1
+        logging.warning(f"Circuit '{self.name}' opened after {self._consecutive_failures} failures")
+
+    def record_success(self):
+        with self._lock:
+            self.stats["successes"] += 1
+            self._consecutive_failures = 0
+            if self._state == self.HALF_OPEN:
+                logging.info(f"Circuit '{self.name}' closed")
+            self._state = self.CLOSED
+
+    def record_failure(self, slow: bool = False):
+        with self._lock:
+            self.stats["slow_calls" if slow else "failures"] += 1
+            self._consecutive_failures += 1
+            if self._state == self.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                self._open()
+
+    def release(self):
+        """End a call that says nothing about the dependency's health, freeing its half-open probe slot."""
+        with self._lock:
+            if self._state == self.HALF_OPEN and self._half_open_calls > 0:
+                self._half_open_calls -= 1
+
+    def call(self, fn: Callable, *args, **kwargs):
+        """Call `fn` through the breaker."""
+        self._before_call()
+        started = time.monotonic()
+        try:
+            result = fn(*args, **kwargs)
+        except self.expected_exceptions:
+            self.record_failure()
+            raise
+        except BaseException:
+            # Not a dependency failure (e.g. a bug on our side, or a rejected request):
+            # neither a success nor a failure, but the half-open probe slot is given back
+            self.release()
+            raise
+
+        if self.slow_call_seconds is not None and time.monotonic() - started > self.slow_call_seconds:
+            self.record_failure(slow=True)
+        else:
+            self.record_success()
+        return result
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            state = self._current_state()
+            return {
+                "state": state,
+                "consecutive_failures": self._consecutive_failures,
+                "failure_threshold": self.failure_threshold,
+                "recovery_timeout": self.recovery_timeout,
+                "slow_call_seconds": self.slow_call_seconds,
+                "retry_after": round(max(0.0, self.recovery_timeout - (time.monotonic() - self._opened_at)), 2)
+                if state == self.OPEN else 0.0,
+                **self.stats,
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str, failure_threshold: int = 5, recovery_timeout: float = 30.0,
+                slow_call_seconds: Optional[float] = None,
+                expected_exceptions: Tuple[Type[BaseException], ...] = (Exception,)) -> CircuitBreaker:
+    """
+    Return the process-wide breaker for dependency `name`, creating it on first use.
+
+    Defaults can be overridden per dependency with BREAKER_<NAME>_FAILURES,
+    BREAKER_<NAME>_RECOVERY_SECONDS and BREAKER_<NAME>_SLOW_SECONDS.
+    """
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            prefix = f"BREAKER_{name.upper()}_"
+            slow = os.getenv(prefix + "SLOW_SECONDS")
+            breaker = CircuitBreaker(
+                name,
+                failure_threshold=int(os.getenv(prefix + "FAILURES", failure_threshold)),
+                recovery_timeout=float(os.getenv(prefix + "RECOVERY_SECONDS", recovery_timeout)),
+                slow_call_seconds=float(slow) if slow else slow_call_seconds,
+                expected_exceptions=expected_exceptions,
+            )
+            _breakers[name] = breaker
+        return breaker
+
+
+def breaker_metrics() -> dict:
+    """State and counters of every registered breaker."""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.snapshot() for breaker in breakers}
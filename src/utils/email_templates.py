@@ -0,0 +1,131 @@
+# src/utils/email_templates.py
+import os
+import html
+from string import Template
+from typing import Dict, NamedTuple, Optional
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "templates", "email")
+
+# Subject lines and list sections of each transactional email. Bodies live in TEMPLATE_DIR
+# as <name>.txt / <name>.html, list items as <name>.<list>.txt / <name>.<list>.html.
+EMAIL_TEMPLATES = {
+    "password_reset": {"subject": "Password Reset Request"},
+    "subscription_reminder": {"subject": "Subscription Expiry Reminder!"},
+    "expiring_subscriptions": {"subject": "⚡ Expiring User Subscriptions Alert", "lists": ["users"]},
+}
+
+
+class RenderedEmail(NamedTuple):
+    subject: str
+    text: Optional[str]
+    html: Optional[str]
+
+
+class EmailTemplate:
+    """
+    One transactional email: a subject and plain-text and/or HTML bodies, compiled once.
+
+    Values are HTML-escaped when substituted into the HTML part. A list section is
+    rendered by substituting each item into the item template and joining the results,
+    then inserted into the body as a single (already escaped) value.
+    """
+
+    def __init__(self, name: str, subject: str, text: Optional[str] = None, html_body: Optional[str] = None,
+                 items: Optional[Dict[str, dict]] = None):
+        if text is None and html_body is None:
+            raise ValueError(f"Email template '{name}' needs a text or an HTML body.")
+        self.name = name
+        self.subject = Template(subject)
+        self.text = Template(text) if text is not None else None
+        self.html = Template(html_body) if html_body is not None else None
+        self.items = {
+            list_name: {part: Template(source) for part, source in parts.items() if source is not None}
+            for list_name, parts in (items or {}).items()
+        }
+
+    def _render_list(self, list_name: str, part: str, rows: list) -> str:
+        item = self.items[list_name].get(part)
+        if item is None:
+            return ""
+        if part == "html":
+            rendered = (item.substitute({k: html.escape(str(v)) for k, v in row.items()}) for row in rows)
+            return "".join(rendered)
+        return "\n".join(item.substitute(row) for row in rows)
+
+    def render(self, lists: Optional[Dict[str, list]] = None, **context) -> RenderedEmail:
+        lists = lists or {}
+        missing = set(self.items) - set(lists)
+        if missing:
+            raise ValueError(f"Email template '{self.name}' is missing list sections: {sorted(missing)}")
+
+        text_body = None
+        if self.text is not None:
+            text_context = dict(context)
+            for list_name, rows in lists.items():
+                text_context[list_name] = self._render_list(list_name, "text", rows)
+            text_body = self.text.substitute(text_context)
+
+        html_body = None
+        if self.html is not None:
+            html_context = {key: html.escape(str(value)) for key, value in context.items()}
+            for list_name, rows in lists.items():
+                html_context[list_name] = self._render_list(list_name, "html", rows)
+            html_body = self.html.substitute(html_context)
+
+        return RenderedEmail(self.subject.substitute(context), text_body, html_body)
+
+
+class EmailTemplateRegistry:
+    """
+    Loads and compiles every template in `EMAIL_TEMPLATES` once; `render()` never touches the disk.
+    """
+
+    def __init__(self, template_dir: str = TEMPLATE_DIR, definitions: dict = None):
+        self.template_dir = template_dir
+        self.definitions = definitions if definitions is not None else EMAIL_TEMPLATES
+        self._templates: Dict[str, EmailTemplate] = {}
+
+    def _read(self, filename: str) -> Optional[str]:
+        path = os.path.join(self.template_dir, filename)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as source:
+            return source.read().rstrip("\n")
+
+    def load(self) -> "EmailTemplateRegistry":
+        templates = {}
+        for name, definition in self.definitions.items():
+            items = {
+                list_name: {
+                    "text": self._read(f"{name}.{list_name}.txt"),
+                    "html": self._read(f"{name}.{list_name}.html"),
+                }
+                for list_name in definition.get("lists", [])
+            }
+            templates[name] = EmailTemplate(
+                name,
+                subject=definition["subject"],
+                text=self._read(f"{name}.txt"),
+                html_body=self._read(f"{name}.html"),
+                items=items,
+            )
+        self._templates = templates
+        return self
+
+    def get(self, name: str) -> EmailTemplate:
+        try:
+            return self._templates[name]
+        except KeyError:
+            raise KeyError(f"Unknown email template '{name}'")
+
+    def render(self, name: str, lists: Optional[Dict[str, list]] = None, **context) -> RenderedEmail:
+        return self.get(name).render(lists=lists, **context)
+
+
+# Compiled at import, i.e. once per worker process at startup
+templates = EmailTemplateRegistry().load()
+
+
+def render_email(name: str, lists: Optional[Dict[str, list]] = None, **context) -> RenderedEmail:
+    """Render a registered transactional email."""
+    return templates.render(name, lists=lists, **context)
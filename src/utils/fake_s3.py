@@ -0,0 +1,207 @@
+"""
+Local stand-in for the parts of the S3 API the app uses.
+
+Usage:
+    python -m src.utils.fake_s3 [--port 9000]
+
+then run the app with `S3_ENDPOINT_URL=http://127.0.0.1:9000` (and any AWS_ACCESS_KEY_ID /
+AWS_SECRET_ACCESS_KEY; signatures are not checked). Buckets are created on first write.
+Objects live in memory (`FakeS3Server.objects`, keyed by (bucket, key)).
+"""
+import time
+import uuid
+import hashlib
+import argparse
+import threading
+from email.utils import formatdate
+from urllib.parse import urlsplit, parse_qs, unquote
+from xml.etree import ElementTree
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+S3_XMLNS = "http://s3.amazonaws.com/doc/2006-03-01/"
+
+
+class FakeS3Server:
+    """
+    Path-style PutObject, GetObject, HeadObject, DeleteObject and multipart uploads
+    (Create / UploadPart / Complete / Abort).
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0):
+        self.objects = {}
+        self.uploads = {}
+        self.latency = latency
+        self.requests_served = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def endpoint_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _target(self):
+                parts = urlsplit(self.path)
+                bucket, _, key = unquote(parts.path).lstrip("/").partition("/")
+                query = {name: values[0] for name, values in parse_qs(parts.query, keep_blank_values=True).items()}
+                return bucket, key, query
+
+            def _body(self) -> bytes:
+                length = int(self.headers.get("Content-Length") or 0)
+                return self.rfile.read(length) if length else b""
+
+            def _reply(self, code: int, body: bytes = b"", headers: dict = None, head: bool = False):
+                self.send_response(code)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                if "Content-Length" not in (headers or {}):
+                    self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if body and not head:
+                    self.wfile.write(body)
+
+            def _xml(self, code: int, root: str, fields: dict):
+                element = ElementTree.Element(root, xmlns=S3_XMLNS)
+                for name, value in fields.items():
+                    ElementTree.SubElement(element, name).text = str(value)
+                self._reply(code, ElementTree.tostring(element, xml_declaration=True, encoding="utf-8"),
+                            {"Content-Type": "application/xml"})
+
+            def _not_found(self, code: str = "NoSuchKey", head: bool = False):
+                if head:
+                    self._reply(404, head=True)
+                else:
+                    self._xml(404, "Error", {"Code": code, "Message": "Not found"})
+
+            def _count(self):
+                if fake.latency:
+                    time.sleep(fake.latency)
+                with fake._lock:
+                    fake.requests_served += 1
+
+            def do_PUT(self):
+                self._count()
+                bucket, key, query = self._target()
+                body = self._body()
+                etag = f"\"{hashlib.md5(body).hexdigest()}\""
+                if "uploadId" in query:
+                    upload = fake.uploads.get(query["uploadId"])
+                    if upload is None:
+                        self._not_found("NoSuchUpload")
+                        return
+                    upload["parts"][int(query["partNumber"])] = (etag, body)
+                else:
+                    with fake._lock:
+                        fake.objects[(bucket, key)] = {
+                            "body": body, "etag": etag, "content_type": self.headers.get("Content-Type"),
+                            "last_modified": time.time(),
+                        }
+                self._reply(200, headers={"ETag": etag})
+
+            def do_POST(self):
+                self._count()
+                bucket, key, query = self._target()
+                body = self._body()
+                if "uploads" in query:
+                    upload_id = uuid.uuid4().hex
+                    with fake._lock:
+                        fake.uploads[upload_id] = {"bucket": bucket, "key": key, "parts": {},
+                                                   "content_type": self.headers.get("Content-Type")}
+                    self._xml(200, "InitiateMultipartUploadResult",
+                              {"Bucket": bucket, "Key": key, "UploadId": upload_id})
+                elif "uploadId" in query:
+                    with fake._lock:
+                        upload = fake.uploads.pop(query["uploadId"], None)
+                    if upload is None:
+                        self._not_found("NoSuchUpload")
+                        return
+                    requested = [
+                        int(element.text)
+                        for element in ElementTree.fromstring(body).iter()
+                        if element.tag.endswith("PartNumber")
+                    ]
+                    data = b"".join(upload["parts"][number][1] for number in requested)
+                    digests = b"".join(bytes.fromhex(upload["parts"][n][0].strip("\"")) for n in requested)
+                    etag = f"\"{hashlib.md5(digests).hexdigest()}-{len(requested)}\""
+                    with fake._lock:
+                        fake.objects[(bucket, key)] = {
+                            "body": data, "etag": etag, "content_type": upload["content_type"],
+                            "last_modified": time.time(),
+                        }
+                    self._xml(200, "CompleteMultipartUploadResult",
+                              {"Bucket": bucket, "Key": key, "ETag": etag})
+                else:
+                    self._reply(400)
+
+            def _get(self, head: bool):
+                self._count()
+                bucket, key, _ = self._target()
+                stored = fake.objects.get((bucket, key))
+                if stored is None:
+                    self._not_found(head=head)
+                    return
+                self._reply(200, stored["body"], {
+                    "Content-Type": stored["content_type"] or "binary/octet-stream",
+                    "Content-Length": str(len(stored["body"])),
+                    "ETag": stored["etag"],
+                    "Last-Modified": formatdate(stored["last_modified"], usegmt=True),
+                }, head=head)
+
+            def do_GET(self):
+                self._get(head=False)
+
+            def do_HEAD(self):
+                self._get(head=True)
+
+            def do_DELETE(self):
+                self._count()
+                bucket, key, query = self._target()
+                with fake._lock:
+                    if "uploadId" in query:
+                        fake.uploads.pop(query["uploadId"], None)
+                    else:
+                        fake.objects.pop((bucket, key), None)
+                self._reply(204)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "FakeS3Server":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a fake S3 endpoint.")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to sleep per request")
+    args = parser.parse_args()
+
+    server = FakeS3Server(port=args.port, latency=args.latency)
+    print(f"Fake S3 listening on {server.endpoint_url}")
+    server.start()
+    try:
+        server._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,140 @@
+# src/utils/images.py
+"""
+Profile-picture variants.
+
+Each uploaded picture is decoded once and cut into fixed-size square variants in every
+format in VARIANT_FORMATS. The work is CPU-bound, so it runs in a process pool rather
+than on the event loop or the request threadpool. Variants are stored under the SHA-256
+of the original (`profile_variants/<sha256>/<name>.<ext>`), so re-uploading the same
+image reuses the variants already stored instead of rendering them again.
+"""
+import io
+import os
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from loguru import logger as logging
+from PIL import Image, ImageOps
+from .storage import resolve_location
+
+load_dotenv()
+
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+
+# Variant name -> edge length in pixels (variants are square, center-cropped)
+PROFILE_VARIANTS = {"medium": 480, "small": 160, "thumb": 64}
+# Pillow format -> (extension, content type, save options)
+VARIANT_FORMATS = {
+    "WEBP": ("webp", "image/webp", {"quality": 80, "method": 4}),
+    "JPEG": ("jpg", "image/jpeg", {"quality": 85, "optimize": True, "progressive": True}),
+}
+VARIANT_PREFIX = "profile_variants"
+# Variants never change once written: their key is derived from the original's content
+VARIANT_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def variant_key(digest: str, name: str, extension: str) -> str:
+    return f"{VARIANT_PREFIX}/{digest}/{name}.{extension}"
+
+
+def variant_keys(digest: str) -> Dict[str, Dict[str, str]]:
+    """Keys of every variant of the original with SHA-256 `digest`, as {name: {extension: key}}."""
+    return {
+        name: {extension: variant_key(digest, name, extension) for extension, _, _ in VARIANT_FORMATS.values()}
+        for name in PROFILE_VARIANTS
+    }
+
+
+def _fit_square(image: Image.Image, edge: int) -> Image.Image:
+    width, height = image.size
+    side = min(width, height)
+    left, top = (width - side) / 2, (height - side) / 2
+    # reducing_gap: shrink by an integer factor first (cheap), then resample the rest with LANCZOS
+    return image.resize((edge, edge), Image.Resampling.LANCZOS, box=(left, top, left + side, top + side),
+                        reducing_gap=3.0)
+
+
+def render_variants(data: bytes) -> List[Tuple[str, str, str, bytes]]:
+    """
+    Decode an image once and encode every variant.
+
+    Returns (name, extension, content type, encoded bytes) tuples. Sizes are rendered
+    largest first and each smaller size is scaled from the previous one, so the full
+    resolution original is only resampled once.
+    """
+    image = Image.open(io.BytesIO(data))
+    largest = max(PROFILE_VARIANTS.values())
+    # Let the JPEG decoder skip detail we are about to throw away (DCT scaling)
+    image.draft("RGB", (largest * 2, largest * 2))
+    image = ImageOps.exif_transpose(image)
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+
+    rendered = []
+    source = image
+    for name, edge in sorted(PROFILE_VARIANTS.items(), key=lambda item: -item[1]):
+        source = _fit_square(source, edge)
+        for image_format, (extension, content_type, options) in VARIANT_FORMATS.items():
+            buffer = io.BytesIO()
+            source.save(buffer, image_format, **options)
+            rendered.append((name, extension, content_type, buffer.getvalue()))
+    return rendered
+
+
+def build_profile_variants(location: str, digest: str) -> bool:
+    """
+    Process-pool entry point: render the variants of the original at `location` and
+    store them next to it, on the same storage backend.
+
+    Returns False when the variants of an identical upload were already stored.
+    """
+    storage, key = resolve_location(location)
+    if storage is None:
+        raise ValueError(f"Not a stored upload: {location}")
+    keys = [variant_key(digest, name, extension) for name in PROFILE_VARIANTS
+            for extension, _, _ in VARIANT_FORMATS.values()]
+    if all(storage.exists(variant) for variant in keys):
+        return False
+    for name, extension, content_type, data in render_variants(storage.read(key)):
+        storage.write(variant_key(digest, name, extension), data, content_type, VARIANT_CACHE_CONTROL)
+    return True
+
+
+class ImagePipeline:
+    """
+    A lazily started process pool for variant generation.
+
+    Workers are spawned rather than forked, so they do not inherit the server's
+    threads, sockets or database connections.
+    """
+
+    def __init__(self, workers: int = IMAGE_WORKERS):
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.stats = {"submitted": 0, "rendered": 0, "deduplicated": 0, "failed": 0}
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    async def build(self, location: str, digest: str) -> bool:
+        """Generate the variants of an upload in the pool; True if they were rendered, False if reused."""
+        self.stats["submitted"] += 1
+        loop = asyncio.get_running_loop()
+        try:
+            rendered = await loop.run_in_executor(self._get_executor(), build_profile_variants, location, digest)
+        except Exception as e:
+            self.stats["failed"] += 1
+            logging.error(f"Failed to build image variants for {location}: {e}")
+            raise
+        self.stats["rendered" if rendered else "deduplicated"] += 1
+        return rendered
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,120 @@
+"""
+Minimal local SMTP sink for development and tests.
+
+Usage:
+    python -m src.utils.mail_debug [--port 1025]
+
+then run the app with `SMTP_HOST=127.0.0.1 SMTP_PORT=1025 SMTP_STARTTLS=false`. Messages are
+kept in memory (`DebugSMTPServer.messages`) and printed when run from the command line.
+"""
+import argparse
+import threading
+import socketserver
+from email import message_from_bytes
+
+
+class DebugSMTPServer:
+    """
+    Speaks just enough SMTP (EHLO/HELO, MAIL, RCPT, DATA, RSET, NOOP, QUIT) to accept mail.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, echo: bool = False):
+        self.messages = []
+        self.connections = 0
+        self.echo = echo
+        self._lock = threading.Lock()
+        self._server = socketserver.ThreadingTCPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def address(self) -> tuple:
+        return self._server.server_address[:2]
+
+    def _handler(self):
+        sink = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def reply(self, line: str):
+                self.wfile.write(line.encode() + b"\r\n")
+
+            def handle(self):
+                with sink._lock:
+                    sink.connections += 1
+                self.reply("220 localhost debug SMTP ready")
+                mail_from, rcpt_to = None, []
+                while True:
+                    line = self.rfile.readline()
+                    if not line:
+                        return
+                    command = line.decode(errors="replace").strip()
+                    verb = command[:4].upper()
+                    if verb == "EHLO":
+                        self.reply("250-localhost")
+                        self.reply("250 8BITMIME")
+                    elif verb == "HELO":
+                        self.reply("250 localhost")
+                    elif verb == "MAIL":
+                        mail_from, rcpt_to = command[10:].strip(), []
+                        self.reply("250 OK")
+                    elif verb == "RCPT":
+                        rcpt_to.append(command[8:].strip())
+                        self.reply("250 OK")
+                    elif verb == "DATA":
+                        self.reply("354 End data with <CR><LF>.<CR><LF>")
+                        lines = []
+                        while True:
+                            data_line = self.rfile.readline()
+                            if not data_line or data_line in (b".\r\n", b".\n"):
+                                break
+                            if data_line.startswith(b".."):
+                                data_line = data_line[1:]
+                            lines.append(data_line)
+                        message = message_from_bytes(b"".join(lines))
+                        with sink._lock:
+                            sink.messages.append({"from": mail_from, "to": rcpt_to, "message": message})
+                        if sink.echo:
+                            print(f"--- {mail_from} -> {', '.join(rcpt_to)}: {message['Subject']}")
+                        self.reply("250 OK")
+                    elif verb == "RSET":
+                        mail_from, rcpt_to = None, []
+                        self.reply("250 OK")
+                    elif verb == "NOOP":
+                        self.reply("250 OK")
+                    elif verb == "QUIT":
+                        self.reply("221 Bye")
+                        return
+                    else:
+                        self.reply("502 Command not implemented")
+
+        return Handler
+
+    def start(self) -> "DebugSMTPServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local debugging SMTP server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1025)
+    args = parser.parse_args()
+
+    server = DebugSMTPServer(args.host, args.port, echo=True)
+    print(f"Debug SMTP server listening on {args.host}:{args.port}")
+    server.start()
+    try:
+        server._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,406 @@
+# src/utils/mailer.py
+import os
+import time
+import uuid
+import queue
+import base64
+import socket
+import smtplib
+import threading
+from string import Template
+from functools import lru_cache
+from typing import Iterable, List, NamedTuple, Optional, Union
+from email.header import Header
+from email.message import Message
+from email.utils import formatdate, make_msgid
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+from dotenv import load_dotenv
+from loguru import logger as logging
+from concurrent.futures import ThreadPoolExecutor
+from .circuit_breaker import CircuitBreaker, CircuitOpenError, get_breaker
+
+load_dotenv()
+
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "true").lower() == "true"
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "4"))
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "10"))
+# Gmail drops idle sessions after a few minutes; reconnect instead of finding out on send
+SMTP_IDLE_TIMEOUT = float(os.getenv("SMTP_IDLE_TIMEOUT", "60"))
+
+# Failures that mean the SMTP server is unreachable, as opposed to a rejected message. Every
+# smtplib.SMTPException is an OSError, so OSError itself (and SMTPResponseException, which
+# covers recipient and data rejections) must stay out of this list.
+SMTP_OUTAGE_ERRORS = (
+    smtplib.SMTPServerDisconnected,
+    smtplib.SMTPConnectError,
+    ConnectionError,
+    TimeoutError,
+    socket.gaierror,
+)
+smtp_breaker = get_breaker("smtp", expected_exceptions=SMTP_OUTAGE_ERRORS)
+
+
+def build_message(from_email: str, to_email: str, subject: str, body: str, is_html: bool = False) -> Message:
+    msg = MIMEMultipart()
+    msg["From"] = from_email
+    msg["To"] = to_email
+    msg["Subject"] = subject
+    msg.attach(MIMEText(body, "html" if is_html else "plain"))
+    return msg
+
+
+class RawMessage(NamedTuple):
+    """A fully serialized message, sent as-is with `sendmail`."""
+    from_addr: str
+    to_addr: str
+    data: bytes
+
+
+class MimeSkeleton:
+    """
+    A pre-serialized MIME frame for one body layout (plain, html or plain+html).
+
+    Headers, boundary and part headers are laid out once; each message only fills in
+    the addresses, subject, date, message id and the base64-encoded bodies.
+    """
+
+    def __init__(self, parts: tuple):
+        self.parts = parts
+        frame = (
+            "From: $from_addr\r\n"
+            "To: $to_addr\r\n"
+            "Subject: $subject\r\n"
+            "Date: $date\r\n"
+            "Message-ID: $message_id\r\n"
+            "MIME-Version: 1.0\r\n"
+        )
+        if len(parts) == 1:
+            frame += (
+                f"Content-Type: text/{parts[0]}; charset=\"utf-8\"\r\n"
+                "Content-Transfer-Encoding: base64\r\n"
+                "\r\n"
+                f"${parts[0]}\r\n"
+            )
+        else:
+            # Bodies are base64, which can never contain the "=" + "-" mix of the boundary
+            boundary = f"=============={uuid.uuid4().hex}=="
+            frame += f"Content-Type: multipart/alternative; boundary=\"{boundary}\"\r\n\r\n"
+            for subtype in parts:
+                frame += (
+                    f"--{boundary}\r\n"
+                    f"Content-Type: text/{subtype}; charset=\"utf-8\"\r\n"
+                    "Content-Transfer-Encoding: base64\r\n"
+                    "\r\n"
+                    f"${subtype}\r\n"
+                )
+            frame += f"--{boundary}--\r\n"
+        self._frame = Template(frame)
+
+    @staticmethod
+    def _encode_body(body: str) -> str:
+        return base64.encodebytes(body.encode("utf-8")).decode("ascii").replace("\n", "\r\n").rstrip("\r\n")
+
+    @staticmethod
+    def _encode_subject(subject: str) -> str:
+        if subject.isascii():
+            return subject
+        return Header(subject, "utf-8").encode(linesep="\r\n")
+
+    def render(self, from_addr: str, to_addr: str, subject: str, bodies: dict) -> RawMessage:
+        """Fill in the frame; addresses must already be ASCII (see `ascii_address`)."""
+        for name, value in (("From", from_addr), ("To", to_addr), ("Subject", subject)):
+            check_header_value(name, value)
+        if not (from_addr.isascii() and to_addr.isascii()):
+            raise ValueError("MimeSkeleton needs ASCII addresses; use build_raw_message for international ones.")
+        data = self._frame.substitute(
+            from_addr=from_addr,
+            to_addr=to_addr,
+            subject=self._encode_subject(subject),
+            date=formatdate(localtime=True),
+            message_id=make_msgid(domain=from_addr.rpartition("@")[2] or None),
+            **{subtype: self._encode_body(bodies[subtype]) for subtype in self.parts},
+        )
+        return RawMessage(from_addr, to_addr, data.encode("ascii"))
+
+
+@lru_cache(maxsize=None)
+def mime_skeleton(parts: tuple) -> MimeSkeleton:
+    return MimeSkeleton(parts)
+
+
+def check_header_value(name: str, value: str):
+    """Reject CR and LF in a header value, which would let it start new headers."""
+    if "\r" in value or "\n" in value:
+        raise ValueError(f"The {name} header must not contain CR or LF.")
+
+
+def ascii_address(address: str) -> Optional[str]:
+    """
+    Return `address` with an international domain IDNA-encoded, or None when the
+    local part is not ASCII and the message needs SMTPUTF8.
+    """
+    if address.isascii():
+        return address
+    local, at, domain = address.rpartition("@")
+    if not at or not local.isascii():
+        return None
+    try:
+        return f"{local}@{domain.encode('idna').decode('ascii')}"
+    except UnicodeError:
+        return None
+
+
+def _build_utf8_message(from_email: str, to_email: str, subject: str, bodies: dict) -> Message:
+    """Build a message with the email package; SMTPPool sends it with SMTPUTF8 when the addresses need it."""
+    parts = [MIMEText(body, subtype, "utf-8") for subtype, body in bodies.items()]
+    if len(parts) == 1:
+        msg = parts[0]
+    else:
+        msg = MIMEMultipart("alternative")
+        for part in parts:
+            msg.attach(part)
+    msg["From"] = from_email
+    msg["To"] = to_email
+    msg["Subject"] = subject
+    msg["Date"] = formatdate(localtime=True)
+    msg["Message-ID"] = make_msgid()
+    return msg
+
+
+def build_raw_message(from_email: str, to_email: str, subject: str, text: Optional[str] = None,
+                      html: Optional[str] = None) -> Union[RawMessage, Message]:
+    """
+    Serialize a text, HTML or multipart/alternative message from a cached MIME skeleton.
+
+    International domains are IDNA-encoded; an address whose local part is not ASCII
+    cannot go through the skeleton, and a regular Message is returned instead.
+    Raises ValueError when an address or the subject contains CR or LF.
+    """
+    bodies = {}
+    if text is not None:
+        bodies["plain"] = text
+    if html is not None:
+        bodies["html"] = html
+    if not bodies:
+        raise ValueError("An email needs a text or an HTML body.")
+    for name, value in (("From", from_email), ("To", to_email), ("Subject", subject)):
+        check_header_value(name, value)
+
+    from_addr, to_addr = ascii_address(from_email), ascii_address(to_email)
+    if from_addr is None or to_addr is None:
+        return _build_utf8_message(from_email, to_email, subject, bodies)
+    return mime_skeleton(tuple(bodies)).render(from_addr, to_addr, subject, bodies)
+
+
+class _SMTP(smtplib.SMTP):
+    """smtplib.SMTP that records whether the current send got as far as DATA."""
+
+    data_started = False
+
+    def data(self, msg):
+        self.data_started = True
+        return super().data(msg)
+
+
+class _PooledConnection:
+    def __init__(self, smtp: smtplib.SMTP):
+        self.smtp = smtp
+        self.last_used = time.monotonic()
+        self.sent = 0
+
+    def close(self):
+        try:
+            self.smtp.quit()
+        except Exception:
+            self.smtp.close()
+
+
+class SMTPPool:
+    """
+    A small pool of authenticated, kept-alive SMTP connections.
+
+    Connections are opened lazily (connect, STARTTLS, login once) and handed back to
+    the pool after each send. A connection idle longer than `idle_timeout` is probed
+    with NOOP and replaced if the server has dropped it. Login is skipped when no
+    credentials are configured, so a local debugging server works as a drop-in.
+
+    Every send goes through `breaker`: once the server keeps timing out or refusing
+    connections, sends fail immediately with CircuitOpenError instead of each one
+    waiting out `timeout`.
+    """
+
+    def __init__(self, host: str = SMTP_HOST, port: int = SMTP_PORT, username: Optional[str] = None,
+                 password: Optional[str] = None, starttls: bool = SMTP_STARTTLS, size: int = SMTP_POOL_SIZE,
+                 timeout: float = SMTP_TIMEOUT, idle_timeout: float = SMTP_IDLE_TIMEOUT,
+                 breaker: Optional[CircuitBreaker] = None):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.size = size
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.breaker = breaker or CircuitBreaker("smtp", expected_exceptions=SMTP_OUTAGE_ERRORS)
+
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._closed = False
+        self.stats = {"connects": 0, "reconnects": 0, "sent": 0, "failed": 0}
+
+    def _connect(self) -> _PooledConnection:
+        smtp = _SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.starttls:
+                smtp.starttls()
+            if self.username and self.password:
+                smtp.login(self.username, self.password)
+        except Exception:
+            smtp.close()
+            raise
+        with self._lock:
+            self.stats["connects"] += 1
+        return _PooledConnection(smtp)
+
+    def _is_alive(self, conn: _PooledConnection) -> bool:
+        if time.monotonic() - conn.last_used < self.idle_timeout:
+            return True
+        try:
+            return conn.smtp.noop()[0] == 250
+        except smtplib.SMTPException:
+            return False
+        except OSError:
+            return False
+
+    def _acquire(self) -> _PooledConnection:
+        self._slots.acquire()
+        try:
+            while True:
+                try:
+                    conn = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._connect()
+                if self._is_alive(conn):
+                    return conn
+                conn.close()
+                with self._lock:
+                    self.stats["reconnects"] += 1
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _release(self, conn: Optional[_PooledConnection]):
+        if conn is not None:
+            if self._closed:
+                conn.close()
+            else:
+                conn.last_used = time.monotonic()
+                self._idle.put(conn)
+        self._slots.release()
+
+    def _send_on(self, conn: _PooledConnection, msg: Union[Message, RawMessage]):
+        conn.smtp.data_started = False
+        if isinstance(msg, RawMessage):
+            conn.smtp.sendmail(msg.from_addr, [msg.to_addr], msg.data)
+        else:
+            conn.smtp.send_message(msg)
+        conn.sent += 1
+
+    def send(self, msg: Union[Message, RawMessage]):
+        """
+        Send one message over a pooled connection.
+
+        A connection the server dropped since its last use is replaced and the send retried once,
+        but only when it dropped before DATA: once the message may have been accepted, or when
+        the server rejected the sender, a recipient or the data, the error is raised as is.
+        Raises CircuitOpenError without sending while the SMTP circuit is open.
+        """
+        self.breaker.call(self._send, msg)
+
+    def _send(self, msg: Union[Message, RawMessage]):
+        conn = self._acquire()
+        try:
+            try:
+                self._send_on(conn, msg)
+            except smtplib.SMTPServerDisconnected:
+                if conn.smtp.data_started:
+                    raise
+                conn.smtp.close()
+                conn = None
+                with self._lock:
+                    self.stats["reconnects"] += 1
+                conn = self._connect()
+                self._send_on(conn, msg)
+        except Exception:
+            with self._lock:
+                self.stats["failed"] += 1
+            if conn is not None:
+                conn.smtp.close()
+                conn = None
+            raise
+        finally:
+            self._release(conn)
+
+        with self._lock:
+            self.stats["sent"] += 1
+
+    def send_many(self, messages: Iterable[Union[Message, RawMessage]]) -> List[Optional[Exception]]:
+        """
+        Send a batch, streaming messages back-to-back over up to `size` held connections.
+
+        Returns one entry per message: None when it was sent, otherwise the exception raised.
+        """
+        messages = list(messages)
+        results: List[Optional[Exception]] = [None] * len(messages)
+        if not messages:
+            return results
+
+        workers = min(self.size, len(messages))
+        chunks = [range(i, len(messages), workers) for i in range(workers)]
+
+        def deliver(indexes):
+            for index in indexes:
+                try:
+                    self.send(messages[index])
+                except CircuitOpenError as e:
+                    results[index] = e
+                except Exception as e:
+                    recipient = messages[index].to_addr if isinstance(messages[index], RawMessage) else messages[index]["To"]
+                    logging.error(f"Failed to send email to {recipient}: {e}")
+                    results[index] = e
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(deliver, chunks))
+        return results
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+_pool: Optional[SMTPPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_mail_pool() -> SMTPPool:
+    """Return the process-wide SMTP pool, configured from the environment on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = SMTPPool(username=os.getenv("EMAIL"), password=os.getenv("APP_PASSWORD"),
+                                 breaker=smtp_breaker)
+    return _pool
+
+
+def send_message(msg: Union[Message, RawMessage]):
+    """Send `msg` through the shared pool."""
+    get_mail_pool().send(msg)
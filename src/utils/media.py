@@ -0,0 +1,178 @@
+# src/utils/media.py
+"""
+HTTP semantics for serving local media: validators, conditional requests and byte ranges.
+
+`plan_file_response()` decides status, headers and the byte span to send for a GET or
+HEAD of a file under the media root. The plan is executed either by `MediaFileResponse`
+inside the app, or by the standalone sendfile server in `src/utils/media_server.py`.
+"""
+import os
+import stat
+import mimetypes
+from email.utils import formatdate
+from typing import List, Mapping, NamedTuple, Optional, Tuple
+from dotenv import load_dotenv
+from starlette.responses import Response
+from starlette.concurrency import run_in_threadpool
+
+load_dotenv()
+
+# Every stored key is unique (uuid or content hash), so a response never goes stale
+MEDIA_CACHE_CONTROL = os.getenv("MEDIA_CACHE_CONTROL", "public, max-age=31536000, immutable")
+# Hand the body to nginx (`X-Accel-Redirect: <prefix><key>`) instead of sending it from Python
+MEDIA_ACCEL_REDIRECT = os.getenv("MEDIA_ACCEL_REDIRECT", "")
+MEDIA_READ_CHUNK = 1024 * 1024
+
+
+class FilePlan(NamedTuple):
+    status: int
+    headers: List[Tuple[str, str]]
+    path: Optional[str] = None
+    offset: int = 0
+    count: int = 0
+
+
+def file_etag(st: os.stat_result) -> str:
+    """
+    Strong validator from inode, size and mtime. Files are only ever replaced atomically
+    (new inode), never rewritten in place, so different bytes always mean a different tag.
+    """
+    return f"\"{st.st_ino:x}-{st.st_size:x}-{st.st_mtime_ns:x}\""
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    # If-None-Match uses weak comparison: W/"x" matches "x"
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    The (start, end exclusive) of a single `bytes=` range, or None to send the whole file.
+
+    Malformed headers and multiple ranges are answered with the whole file, which
+    RFC 9110 allows. Raises ValueError if the range cannot be satisfied.
+    """
+    units, _, spec = header.partition("=")
+    first, dash, last = spec.strip().partition("-")
+    if units.strip().lower() != "bytes" or not dash or "," in spec:
+        return None
+    if not (first or last) or (first and not first.isdigit()) or (last and not last.isdigit()):
+        return None
+
+    if not first:
+        # Suffix range: the last N bytes
+        if int(last) == 0 or size == 0:
+            raise ValueError("Range not satisfiable")
+        return max(0, size - int(last)), size
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise ValueError("Range not satisfiable")
+    return start, min(int(last) + 1, size) if last else size
+
+
+def resolve_media_path(root: str, key: str) -> Optional[str]:
+    """Absolute path of `key` under `root`, or None if it escapes the root."""
+    root = os.path.realpath(root)
+    path = os.path.realpath(os.path.join(root, key.lstrip("/")))
+    if not path.startswith(root + os.sep):
+        return None
+    return path
+
+
+def plan_file_response(root: str, key: str, method: str, headers: Mapping[str, str],
+                       accel_redirect: str = MEDIA_ACCEL_REDIRECT,
+                       cache_control: str = MEDIA_CACHE_CONTROL) -> FilePlan:
+    """`headers` must be a case-insensitive mapping or have lower-case names."""
+    if method not in ("GET", "HEAD"):
+        return FilePlan(405, [("allow", "GET, HEAD"), ("content-length", "0")])
+
+    path = resolve_media_path(root, key)
+    try:
+        st = os.stat(path) if path else None
+    except OSError:
+        st = None
+    if st is None or not stat.S_ISREG(st.st_mode):
+        return FilePlan(404, [("content-length", "0")])
+
+    etag = file_etag(st)
+    common = [
+        ("etag", etag),
+        ("last-modified", formatdate(st.st_mtime, usegmt=True)),
+        ("cache-control", cache_control),
+        ("accept-ranges", "bytes"),
+    ]
+
+    if_none_match = headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return FilePlan(304, common)
+
+    content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    start, end, status = 0, st.st_size, 200
+    range_header = headers.get("range")
+    if_range = headers.get("if-range")
+    # If-Range needs a strong match; anything else (a date, an old tag) means "send it all"
+    if range_header and (if_range is None or if_range.strip() == etag):
+        try:
+            span = parse_range(range_header, st.st_size)
+        except ValueError:
+            return FilePlan(416, common + [("content-range", f"bytes */{st.st_size}"), ("content-length", "0")])
+        if span is not None:
+            start, end = span
+            status = 206
+            common.append(("content-range", f"bytes {start}-{end - 1}/{st.st_size}"))
+
+    response_headers = common + [("content-type", content_type), ("content-length", str(end - start))]
+    if method == "HEAD":
+        return FilePlan(status, response_headers)
+    if accel_redirect:
+        # nginx serves the body with sendfile and applies the Range itself
+        redirect = accel_redirect.rstrip("/") + "/" + os.path.relpath(path, os.path.realpath(root))
+        headers_out = [(name, value) for name, value in common if name != "content-range"]
+        return FilePlan(200, headers_out + [("content-type", content_type), ("x-accel-redirect", redirect)])
+    return FilePlan(status, response_headers, path, start, end - start)
+
+
+class MediaFileResponse(Response):
+    """
+    Executes a FilePlan inside the app.
+
+    Uses the ASGI `http.response.zerocopysend` extension (sendfile) when the server
+    offers it, otherwise reads the span in 1 MiB chunks off the event loop.
+    """
+
+    def __init__(self, plan: FilePlan):
+        self.plan = plan
+        self.status_code = plan.status
+        self.background = None
+        self.raw_headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in plan.headers]
+
+    async def __call__(self, scope, receive, send):
+        plan = self.plan
+        await send({"type": "http.response.start", "status": plan.status, "headers": self.raw_headers})
+        if not plan.count:
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        fd = await run_in_threadpool(os.open, plan.path, os.O_RDONLY)
+        try:
+            if "http.response.zerocopysend" in scope.get("extensions", {}):
+                await send({"type": "http.response.zerocopysend", "file": fd,
+                            "offset": plan.offset, "count": plan.count})
+                return
+
+            offset, remaining = plan.offset, plan.count
+            while remaining:
+                chunk = await run_in_threadpool(os.pread, fd, min(MEDIA_READ_CHUNK, remaining), offset)
+                if not chunk:
+                    break
+                offset += len(chunk)
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining:
+                # File shrank under us; close the response rather than hang the client
+                await send({"type": "http.response.body", "body": b""})
+        finally:
+            os.close(fd)
@@ -0,0 +1,153 @@
+"""
+Zero-copy server for local media.
+
+Usage:
+    python -m src.utils.media_server [--port 8081] [--root media]
+
+then point clients at it with `MEDIA_URL=http://<host>:8081/media`. It speaks just enough
+HTTP/1.1 (GET/HEAD, keep-alive) to serve files from the local storage backend. Bodies are
+written with `loop.sendfile()`, i.e. os.sendfile(): the kernel copies from the page cache
+to the socket without the bytes passing through Python. Headers, ETag/If-None-Match and
+Range handling are shared with the in-app /media route (src/utils/media.py).
+"""
+import asyncio
+import argparse
+import threading
+from http import HTTPStatus
+from urllib.parse import unquote, urlsplit
+from .media import FilePlan, plan_file_response
+from .storage import MEDIA_ROOT
+
+MAX_HEADER_LINES = 100
+
+
+class MediaServer:
+    def __init__(self, root: str = MEDIA_ROOT, host: str = "127.0.0.1", port: int = 0, prefix: str = "/media"):
+        self.root = root
+        self.host = host
+        self.port = port
+        self.prefix = prefix.rstrip("/")
+        self.stats = {"connections": 0, "requests": 0, "bytes_sent": 0}
+        self._server = None
+        self._loop = None
+        self._thread = None
+        self._ready = threading.Event()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}{self.prefix}"
+
+    def _plan(self, method: str, target: str, headers: dict) -> FilePlan:
+        path = unquote(urlsplit(target).path)
+        if not path.startswith(self.prefix + "/"):
+            return FilePlan(404, [("content-length", "0")])
+        return plan_file_response(self.root, path[len(self.prefix) + 1:], method, headers, accel_redirect="")
+
+    async def _read_request(self, reader: asyncio.StreamReader):
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        method, target, version = request_line.decode("latin-1").split()
+        headers = {}
+        for _ in range(MAX_HEADER_LINES):
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length") or 0)
+        if length:
+            await reader.readexactly(length)
+        return method, target, version, headers
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        loop = asyncio.get_running_loop()
+        self.stats["connections"] += 1
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except ValueError:
+                    writer.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                    break
+                if request is None:
+                    break
+                method, target, version, headers = request
+                self.stats["requests"] += 1
+
+                plan = self._plan(method, target, headers)
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                lines = [f"HTTP/1.1 {plan.status} {HTTPStatus(plan.status).phrase}"]
+                lines += [f"{name}: {value}" for name, value in plan.headers]
+                lines.append(f"connection: {'keep-alive' if keep_alive else 'close'}")
+                writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+
+                if plan.count:
+                    await writer.drain()
+                    with open(plan.path, "rb") as source:
+                        self.stats["bytes_sent"] += await loop.sendfile(writer.transport, source,
+                                                                        plan.offset, plan.count)
+                if not keep_alive:
+                    break
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            # Cancelled on stop(); the connection is simply dropped
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self):
+        self._server = await asyncio.start_server(self.handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        async with self._server:
+            await self._server.serve_forever()
+
+    def start(self) -> "MediaServer":
+        def run():
+            self._loop = asyncio.new_event_loop()
+            try:
+                self._loop.run_until_complete(self.serve())
+            except asyncio.CancelledError:
+                pass
+            finally:
+                # Let cancelled connection handlers run their cleanup before the loop goes away
+                pending = asyncio.all_tasks(self._loop)
+                for task in pending:
+                    task.cancel()
+                if pending:
+                    self._loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+                self._loop.close()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def stop(self):
+        if self._thread is not None and self._thread.is_alive():
+            # Cancelling serve() closes the listening socket; run() then cancels the connections
+            self._loop.call_soon_threadsafe(lambda: [task.cancel() for task in asyncio.all_tasks(self._loop)])
+            self._thread.join(timeout=5)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve local media with sendfile.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--root", default=MEDIA_ROOT, help="Local storage root (MEDIA_ROOT)")
+    parser.add_argument("--prefix", default="/media", help="URL path the files are served under")
+    args = parser.parse_args()
+
+    server = MediaServer(args.root, args.host, args.port, args.prefix)
+    print(f"Serving {args.root} at http://{args.host}:{args.port}{server.prefix}/")
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,206 @@
+# src/utils/s3.py
+import os
+import time
+import boto3
+import threading
+from typing import Optional
+from collections import OrderedDict
+from dotenv import load_dotenv
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+from .circuit_breaker import get_breaker
+
+load_dotenv()
+
+S3_BUCKET = os.getenv('S3_BUCKET', 'hdmedia')
+# Point at MinIO or the local fake (python -m src.utils.fake_s3) instead of AWS
+S3_ENDPOINT_URL = os.getenv('S3_ENDPOINT_URL') or None
+
+# Latency budget for S3 calls; botocore's defaults (60s read, retries) would hold a worker for minutes
+S3_CONNECT_TIMEOUT = float(os.getenv('S3_CONNECT_TIMEOUT', '2'))
+S3_READ_TIMEOUT = float(os.getenv('S3_READ_TIMEOUT', '5'))
+S3_MAX_ATTEMPTS = int(os.getenv('S3_MAX_ATTEMPTS', '2'))
+
+# Presigned URLs are valid for 7 days and handed out again until less than a day is left
+S3_PRESIGN_EXPIRES = int(os.getenv('S3_PRESIGN_EXPIRES', str(7 * 24 * 60 * 60)))
+S3_PRESIGN_REFRESH_MARGIN = int(os.getenv('S3_PRESIGN_REFRESH_MARGIN', str(24 * 60 * 60)))
+S3_PRESIGN_CACHE_SIZE = int(os.getenv('S3_PRESIGN_CACHE_SIZE', '10000'))
+# HEAD results: a key seen once rarely disappears, a missing key may be uploaded any moment
+S3_EXISTS_TTL = float(os.getenv('S3_EXISTS_TTL', '3600'))
+S3_MISSING_TTL = float(os.getenv('S3_MISSING_TTL', '30'))
+S3_EXISTS_CACHE_SIZE = int(os.getenv('S3_EXISTS_CACHE_SIZE', '10000'))
+
+# Connection errors and timeouts open the circuit; ClientErrors (404, 403, ...) are answers, not outages
+s3_breaker = get_breaker("s3", failure_threshold=5, recovery_timeout=30.0, expected_exceptions=(BotoCoreError,))
+
+
+def _build_client():
+    return boto3.client(
+        "s3",
+        endpoint_url=S3_ENDPOINT_URL,
+        config=Config(
+            connect_timeout=S3_CONNECT_TIMEOUT,
+            read_timeout=S3_READ_TIMEOUT,
+            retries={"max_attempts": S3_MAX_ATTEMPTS, "mode": "standard"},
+            # S3-compatible stand-ins serve buckets by path, not by virtual host
+            s3={"addressing_style": "path"} if S3_ENDPOINT_URL else None,
+            request_checksum_calculation="when_required",
+            max_pool_connections=int(os.getenv('S3_MAX_POOL_CONNECTIONS', '20')),
+        ),
+    )
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def s3_client():
+    """
+    Return the process-wide S3 client, built on first use.
+
+    Building a client loads the service model and resolves credentials, which costs
+    tens of milliseconds; boto3 clients are thread-safe, so one is shared.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = _build_client()
+    return _client
+
+
+def credentials_expiry(client) -> Optional[float]:
+    """
+    When the credentials `client` signs with expire (epoch seconds), or None for
+    long-lived keys. Temporary STS, SSO and instance-role credentials expire.
+    """
+    credentials = getattr(getattr(client, "_request_signer", None), "_credentials", None)
+    expiry = getattr(credentials, "_expiry_time", None)
+    return expiry.timestamp() if expiry is not None else None
+
+
+class _LRU:
+    """A small thread-safe LRU mapping."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class PresignedUrlCache:
+    """
+    Presigned GET URLs per (bucket, key), reused until `refresh_margin` seconds before they expire.
+
+    Handing out the same URL also lets browsers and CDNs cache the object, which a fresh
+    signature on every request defeats. A URL signed with temporary credentials stops
+    working when they expire, so its lifetime is capped at the credentials' expiry.
+    """
+
+    def __init__(self, expires_in: int = S3_PRESIGN_EXPIRES, refresh_margin: int = S3_PRESIGN_REFRESH_MARGIN,
+                 maxsize: int = S3_PRESIGN_CACHE_SIZE):
+        self.expires_in = expires_in
+        self.refresh_margin = min(refresh_margin, expires_in // 2)
+        self._cache = _LRU(maxsize)
+        self.stats = {"hits": 0, "misses": 0, "refreshes": 0}
+
+    def get(self, bucket: str, key: str) -> str:
+        now = time.time()
+        cached = self._cache.get((bucket, key))
+        if cached is not None:
+            url, refresh_at = cached
+            if now < refresh_at:
+                self.stats["hits"] += 1
+                return url
+            self.stats["refreshes"] += 1
+        else:
+            self.stats["misses"] += 1
+
+        client = s3_client()
+        url = client.generate_presigned_url(
+            ClientMethod="get_object",
+            Params={"Bucket": bucket, "Key": key},
+            ExpiresIn=self.expires_in,
+        )
+        # Read after signing: botocore refreshes credentials that are about to expire before it signs
+        credentials_expire_at = credentials_expiry(client)
+        lifetime = self.expires_in
+        if credentials_expire_at is not None:
+            lifetime = max(0.0, min(lifetime, credentials_expire_at - now))
+        self._cache.set((bucket, key), (url, now + lifetime - min(self.refresh_margin, lifetime / 2)))
+        return url
+
+
+class ExistenceCache:
+    """
+    Cached HeadObject results: hits for `positive_ttl` seconds, misses for `negative_ttl`.
+
+    Uploads through this app call `remember()`, so a freshly stored object is known to
+    exist without a round trip even while a negative entry is cached for it.
+    """
+
+    def __init__(self, positive_ttl: float = S3_EXISTS_TTL, negative_ttl: float = S3_MISSING_TTL,
+                 maxsize: int = S3_EXISTS_CACHE_SIZE):
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self._cache = _LRU(maxsize)
+        self.stats = {"hits": 0, "misses": 0}
+
+    def exists(self, bucket: str, key: str) -> bool:
+        """HeadObject through the cache and the S3 circuit breaker. Raises ClientError for errors other than 404."""
+        cached = self._cache.get((bucket, key))
+        if cached is not None and time.monotonic() < cached[1]:
+            self.stats["hits"] += 1
+            return cached[0]
+
+        self.stats["misses"] += 1
+        try:
+            s3_breaker.call(s3_client().head_object, Bucket=bucket, Key=key)
+            found = True
+        except ClientError as e:
+            if e.response["Error"]["Code"] not in ("404", "NoSuchKey", "NotFound"):
+                raise
+            found = False
+        self._cache.set((bucket, key), (found, time.monotonic() + (self.positive_ttl if found else self.negative_ttl)))
+        return found
+
+    def remember(self, bucket: str, key: str, exists: bool = True):
+        self._cache.set((bucket, key), (exists, time.monotonic() + (self.positive_ttl if exists else self.negative_ttl)))
+
+
+presigned_urls = PresignedUrlCache()
+existence = ExistenceCache()
+
+
+def presigned_url(bucket: str, key: str) -> str:
+    """A presigned GET URL for the object, cached until shortly before it expires."""
+    return presigned_urls.get(bucket, key)
+
+
+def object_exists(bucket: str, key: str) -> bool:
+    """Whether the object exists, answered from the HeadObject cache when possible."""
+    return existence.exists(bucket, key)
+
+
+def cache_stats() -> dict:
+    return {
+        "presigned_urls": {**presigned_urls.stats, "size": len(presigned_urls._cache)},
+        "head_object": {**existence.stats, "size": len(existence._cache)},
+    }
@@ -0,0 +1,219 @@
+# src/utils/storage.py
+"""
+Where uploaded media lives.
+
+Two backends share one interface: `S3Storage` (production) and `LocalStorage`
+(small deployments and test rigs, files under MEDIA_ROOT served at MEDIA_URL).
+Stored objects are recorded by location, `s3://<bucket>/<key>` or `local://<key>`,
+so a profile path keeps pointing at the right backend if the default changes.
+"""
+import os
+import uuid
+import threading
+from typing import Optional, Tuple
+from dotenv import load_dotenv
+from loguru import logger as logging
+from . import s3
+
+load_dotenv()
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "s3")
+MEDIA_ROOT = os.getenv("MEDIA_ROOT", "media")
+# Where clients fetch local media: the app's /media route, or the sendfile server (src/utils/media_server.py)
+MEDIA_URL = os.getenv("MEDIA_URL", "/media").rstrip("/")
+
+# S3 needs parts of at least 5 MiB (except the last); this is also the per-upload buffer
+S3_PART_SIZE = int(os.getenv("S3_PART_SIZE", str(5 * 1024 * 1024)))
+
+LOCAL_SCHEME = "local://"
+S3_SCHEME = "s3://"
+
+
+class LocalFileSink:
+    """
+    Writes the upload to `path` through a temporary file, so readers never see a partial file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._tmp_path = f"{self.path}.{uuid.uuid4().hex}.part"
+        self._file = open(self._tmp_path, "wb")
+
+    def write(self, chunk: bytes):
+        self._file.write(chunk)
+
+    def complete(self):
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        self._file.close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+
+class S3MultipartSink:
+    """
+    Streams the upload to S3 in `part_size` parts.
+
+    At most one part is buffered. The multipart upload is only started once a full
+    part has arrived; anything smaller is sent with a single PutObject on completion.
+    S3 calls go through `breaker`, so uploads fail fast while S3 is unreachable.
+    """
+
+    def __init__(self, client, bucket: str, key: str, content_type: str, part_size: int = S3_PART_SIZE,
+                 breaker=s3.s3_breaker):
+        self.client = client
+        self.breaker = breaker
+        self.bucket = bucket
+        self.key = key
+        self.content_type = content_type
+        self.part_size = part_size
+        self._buffer = bytearray()
+        self._upload_id = None
+        self._parts = []
+
+    def _upload_part(self, body: bytes):
+        if self._upload_id is None:
+            response = self.breaker.call(self.client.create_multipart_upload, Bucket=self.bucket, Key=self.key,
+                                         ContentType=self.content_type)
+            self._upload_id = response["UploadId"]
+        part_number = len(self._parts) + 1
+        response = self.breaker.call(self.client.upload_part, Bucket=self.bucket, Key=self.key,
+                                     UploadId=self._upload_id, PartNumber=part_number, Body=body)
+        self._parts.append({"ETag": response["ETag"], "PartNumber": part_number})
+
+    def write(self, chunk: bytes):
+        self._buffer += chunk
+        while len(self._buffer) >= self.part_size:
+            self._upload_part(bytes(self._buffer[:self.part_size]))
+            del self._buffer[:self.part_size]
+
+    def complete(self):
+        if self._upload_id is None:
+            self.breaker.call(self.client.put_object, Bucket=self.bucket, Key=self.key, Body=bytes(self._buffer),
+                              ContentType=self.content_type)
+        else:
+            if self._buffer:
+                self._upload_part(bytes(self._buffer))
+            self.breaker.call(self.client.complete_multipart_upload, Bucket=self.bucket, Key=self.key,
+                              UploadId=self._upload_id, MultipartUpload={"Parts": self._parts})
+        self._buffer = bytearray()
+        s3.existence.remember(self.bucket, self.key)
+
+    def abort(self):
+        self._buffer = bytearray()
+        if self._upload_id is not None:
+            try:
+                self.client.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self._upload_id)
+            except Exception as e:
+                # Left for the bucket's AbortIncompleteMultipartUpload lifecycle rule
+                logging.warning(f"Failed to abort multipart upload {self._upload_id} for {self.key}: {e}")
+
+
+class S3Storage:
+    name = "s3"
+
+    def __init__(self, bucket: str = s3.S3_BUCKET):
+        self.bucket = bucket
+
+    def location(self, key: str) -> str:
+        return f"{S3_SCHEME}{self.bucket}/{key}"
+
+    def open_sink(self, key: str, content_type: str):
+        return S3MultipartSink(s3.s3_client(), self.bucket, key, content_type)
+
+    def write(self, key: str, data: bytes, content_type: str, cache_control: Optional[str] = None):
+        extra = {"CacheControl": cache_control} if cache_control else {}
+        s3.s3_breaker.call(s3.s3_client().put_object, Bucket=self.bucket, Key=key, Body=data,
+                           ContentType=content_type, **extra)
+        s3.existence.remember(self.bucket, key)
+
+    def read(self, key: str) -> bytes:
+        response = s3.s3_breaker.call(s3.s3_client().get_object, Bucket=self.bucket, Key=key)
+        return response["Body"].read()
+
+    def exists(self, key: str) -> bool:
+        return s3.object_exists(self.bucket, key)
+
+    def url(self, key: str) -> str:
+        return s3.presigned_url(self.bucket, key)
+
+
+class LocalStorage:
+    name = "local"
+
+    def __init__(self, root: str = MEDIA_ROOT, base_url: str = MEDIA_URL):
+        self.root = root
+        self.base_url = base_url
+
+    def path(self, key: str) -> str:
+        path = os.path.normpath(os.path.join(self.root, key))
+        if os.path.isabs(key) or not path.startswith(os.path.normpath(self.root) + os.sep):
+            raise ValueError(f"Invalid storage key: {key}")
+        return path
+
+    def location(self, key: str) -> str:
+        return f"{LOCAL_SCHEME}{key}"
+
+    def open_sink(self, key: str, content_type: str):
+        return LocalFileSink(self.path(key))
+
+    def write(self, key: str, data: bytes, content_type: str, cache_control: Optional[str] = None):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.part"
+        with open(tmp_path, "wb") as target:
+            target.write(data)
+        # A new inode per write keeps the file's ETag (inode-size-mtime) a strong validator
+        os.replace(tmp_path, path)
+
+    def read(self, key: str) -> bytes:
+        with open(self.path(key), "rb") as source:
+            return source.read()
+
+    def exists(self, key: str) -> bool:
+        return os.path.isfile(self.path(key))
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def _cached(name: str, factory):
+    with _backends_lock:
+        backend = _backends.get(name)
+        if backend is None:
+            backend = _backends[name] = factory()
+        return backend
+
+
+def get_storage(name: str = None):
+    """The configured storage backend (STORAGE_BACKEND=s3|local), or the one named."""
+    name = name or STORAGE_BACKEND
+    if name == "s3":
+        return _cached("s3", S3Storage)
+    if name == "local":
+        return _cached("local", LocalStorage)
+    raise ValueError(f"Unknown storage backend '{name}'")
+
+
+def resolve_location(location: Optional[str]) -> Tuple[Optional[object], Optional[str]]:
+    """
+    (backend, key) for a stored location, or (None, None) for anything else, e.g. the
+    legacy "default.jpg" profile path.
+    """
+    if not location:
+        return None, None
+    if location.startswith(S3_SCHEME):
+        bucket, _, key = location[len(S3_SCHEME):].partition("/")
+        if not bucket or not key:
+            return None, None
+        return _cached(f"s3:{bucket}", lambda: S3Storage(bucket)), key
+    if location.startswith(LOCAL_SCHEME):
+        return get_storage("local"), location[len(LOCAL_SCHEME):]
+    return None, None
@@ -0,0 +1,192 @@
+# src/utils/uploads.py
+"""
+Streaming file uploads.
+
+`stream_upload()` parses a multipart/form-data request body as it arrives and pipes the
+bytes of one file field into a storage sink (S3 multipart upload or a local file), so
+memory per upload is bounded by the sink's buffer however large the file is. The file
+type is checked against its magic bytes on the first chunk and the size is enforced
+while streaming, so bad or oversized uploads are rejected before they are stored.
+"""
+import hashlib
+from typing import Callable, NamedTuple, Optional
+from fastapi import Request
+from starlette.concurrency import run_in_threadpool
+from .storage import get_storage
+
+try:
+    from python_multipart.exceptions import MultipartParseError
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.exceptions import MultipartParseError
+    from multipart.multipart import MultipartParser, parse_options_header
+
+# Leading bytes of the image formats we accept
+IMAGE_SIGNATURES = {
+    b"\xff\xd8\xff": "image/jpeg",
+    b"\x89PNG\r\n\x1a\n": "image/png",
+}
+SNIFF_BYTES = max(len(signature) for signature in IMAGE_SIGNATURES)
+# Room for the multipart boundaries and part headers around the file itself
+MULTIPART_OVERHEAD = 16 * 1024
+
+
+class UploadError(Exception):
+    status_code = 400
+
+
+class UploadTooLarge(UploadError):
+    status_code = 413
+
+
+class UnsupportedUpload(UploadError):
+    status_code = 415
+
+
+class StoredUpload(NamedTuple):
+    location: str
+    key: str
+    content_type: str
+    size: int
+    sha256: str
+
+
+def sniff_image_type(head: bytes) -> Optional[str]:
+    """Content type of an image from its first bytes, or None if it is not an accepted format."""
+    for signature, content_type in IMAGE_SIGNATURES.items():
+        if head.startswith(signature):
+            return content_type
+    return None
+
+
+class _FilePartReader:
+    """Collects the bytes of one form field from python-multipart's push-parser callbacks."""
+
+    def __init__(self, field_name: str):
+        self.field_name = field_name
+        self.found = False
+        self.chunks = []
+        self._in_field = False
+        self._header_field = b""
+        self._header_value = b""
+        self._headers = {}
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        }
+
+    def _on_part_begin(self):
+        self._headers = {}
+
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        self._in_field = options.get(b"name") == self.field_name.encode() and b"filename" in options
+        if self._in_field:
+            if self.found:
+                raise UploadError(f"Only one '{self.field_name}' file may be uploaded.")
+            self.found = True
+
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        if self._in_field:
+            self.chunks.append(bytes(data[start:end]))
+
+    def _on_part_end(self):
+        self._in_field = False
+
+    def take(self) -> list:
+        chunks, self.chunks = self.chunks, []
+        return chunks
+
+
+async def stream_upload(request: Request, field_name: str, max_bytes: int,
+                        make_key: Callable[[str], str], storage=None) -> StoredUpload:
+    """
+    Stream the image in form field `field_name` of a multipart request into storage.
+
+    `make_key(content_type)` names the object once the type is known from its magic bytes.
+    `storage` defaults to the configured backend (see src/utils/storage.py).
+    Raises UploadError (or a subclass carrying the HTTP status to answer with) if the
+    request is not multipart, the file is missing, not a JPEG/PNG, or larger than `max_bytes`.
+    """
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    boundary = options.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise UploadError("Expected a multipart/form-data request.")
+
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes + MULTIPART_OVERHEAD:
+        raise UploadTooLarge(f"File exceeds the {max_bytes // (1024 * 1024)} MB limit.")
+
+    reader = _FilePartReader(field_name)
+    parser = MultipartParser(boundary, reader.callbacks())
+    storage = storage or get_storage()
+    sink, key, image_type, head, size = None, None, None, b"", 0
+    digest = hashlib.sha256()
+
+    try:
+        async for chunk in request.stream():
+            try:
+                parser.write(chunk)
+            except MultipartParseError as e:
+                raise UploadError(f"Malformed multipart body: {e}")
+            for data in reader.take():
+                size += len(data)
+                digest.update(data)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"File exceeds the {max_bytes // (1024 * 1024)} MB limit.")
+
+                if image_type is None:
+                    # Hold back the first few bytes until the signature can be checked
+                    head += data
+                    if len(head) < SNIFF_BYTES:
+                        continue
+                    image_type = sniff_image_type(head)
+                    if image_type is None:
+                        raise UnsupportedUpload("Invalid file type. Only JPEG and PNG are allowed.")
+                    key = make_key(image_type)
+                    sink = await run_in_threadpool(storage.open_sink, key, image_type)
+                    data, head = head, b""
+
+                # Blocks only when the sink flushes (an S3 part or a disk write)
+                await run_in_threadpool(sink.write, data)
+        try:
+            parser.finalize()
+        except MultipartParseError as e:
+            raise UploadError(f"Malformed multipart body: {e}")
+
+        if not reader.found:
+            raise UploadError(f"Missing file field '{field_name}'.")
+        if image_type is None:
+            # Whole file shorter than the longest signature
+            image_type = sniff_image_type(head)
+            if image_type is None:
+                raise UnsupportedUpload("Invalid file type. Only JPEG and PNG are allowed.")
+            key = make_key(image_type)
+            sink = await run_in_threadpool(storage.open_sink, key, image_type)
+            await run_in_threadpool(sink.write, head)
+
+        await run_in_threadpool(sink.complete)
+    except BaseException:
+        if sink is not None:
+            await run_in_threadpool(sink.abort)
+        raise
+
+    return StoredUpload(storage.location(key), key, image_type, size, digest.hexdigest())